@@ -5,11 +5,13 @@ from google.adk.agents.readonly_context import ReadonlyContext
 
 from app.config import MODEL
 
+from .sub_agents.batch_discovery_agent.agent import batch_discovery_agent
 from .sub_agents.data_profiling_agent.agent import data_profiling_agent
 from .sub_agents.database_cred_agent.agent import database_cred_agent
 from .sub_agents.qa_agent.agent import qa_agent
 from .sub_agents.reporting_agent.agent import reporting_agent
 from .sub_agents.schema_introspection_agent.agent import schema_introspection_agent
+from .sub_agents.workload_profiling_agent.agent import workload_profiling_agent
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
@@ -58,7 +60,7 @@ def root_agent_instruction(ctx: ReadonlyContext) -> str:
         *   **Responsibilities:**
             *   Takes a single `schema_name` as input (this will be the user's query to this agent).
             *   Calls the `get_schema_details` tool, passing the input schema name in the `args` dictionary (e.g., `get_schema_details(args={"schema_name": query})`). The tool uses the stored connection to:
-                *   Discover all tables and views.
+                *   Discover all tables and views; partitioned tables are listed once, with their partitions.
                 *   Detail columns for each table: names, data types, lengths, precision, nullability, defaults.
                 *   Identify all constraints: PRIMARY KEY, UNIQUE, FOREIGN KEY, CHECK, NOT NULL.
                 *   Discover all indexes, including columns and uniqueness.
@@ -66,6 +68,7 @@ def root_agent_instruction(ctx: ReadonlyContext) -> str:
                 *   Identify explicit and potential inferred relationships.
                 *   Flag relationship anomalies.
             *   The tool stores the comprehensive `schema_structure` object in the session state.
+            *   On request, calls the `advise_indexes` tool, which joins the introspected indexes with the database's index usage statistics and stores ranked `index_advice` (unused, duplicate and redundant indexes, unindexed foreign keys, missing indexes) in the session state.
             *   Provides a brief summary of findings back to the Root Agent as a tool result.
         *   **Boundaries:**
             *   Does **not** connect to the database itself; relies on session state connection info.
@@ -109,6 +112,26 @@ def root_agent_instruction(ctx: ReadonlyContext) -> str:
             *   Does **not** connect to the database.
             *   Does **not** perform any new introspection or profiling.
             *   Does **not** generate file exports or full reports.
+
+    6.  **`workload_profiling_agent`**:
+        *   **Scope:** Database Workload Analysis.
+        *   **Responsibilities:**
+            *   Calls the `profile_workload` tool to read the database's statement statistics (pg_stat_statements, performance_schema, sys.dm_exec_query_stats).
+            *   The tool stores the `workload_profile` (top queries by time, calls, rows and I/O, and hot tables) in the session state.
+            *   Upon successful tool completion, hands off to the `qa_agent` to summarize the workload for the user.
+        *   **Boundaries:**
+            *   Does **not** run the user's queries or profile table data.
+            *   Does **not** directly respond to the user; it delegates the response to the `qa_agent`.
+
+    7.  **`batch_discovery_agent`**:
+        *   **Scope:** Estate-Wide Batch Discovery.
+        *   **Responsibilities:**
+            *   Takes an inventory of database instances (connection details and optionally the schemas to cover), given inline or as the path of a JSON file.
+            *   Calls the `run_batch_discovery` tool, which introspects and profiles every schema of the inventory with limits on concurrent work overall and per instance, retries failed connections and schemas, stores each schema's results and a roll-up summary, and keeps the roll-up as `batch_discovery` in the session state.
+            *   Reports the roll-up: totals, per-instance figures and failures.
+        *   **Boundaries:**
+            *   Does **not** need or change the session's database connection or selected schema.
+            *   Does **not** answer questions about a single schema; those need that schema to be connected and introspected interactively.
     ---
     """
 
@@ -123,6 +146,7 @@ def root_agent_instruction(ctx: ReadonlyContext) -> str:
         2.  **Database-Related Intent:** If the user's query suggests they want to perform any database operations (e.g., mentioning "database", "connect", "schema", "table", "analyze", "SQL", "postgres", "mysql", "mssql", "ERD", "report on DB", etc.), you MUST immediately call the `database_cred_agent` to initiate the connection process. Do not attempt to answer further.
             -   Example User Intents: "Analyze my database", "Connect to a database", "I want to see my tables".
             -   **Action:** Call `database_cred_agent()`
+            -   **Exception:** If the user wants to discover many databases or schemas at once, mentions an inventory, a batch, or the whole estate or portfolio, call `batch_discovery_agent` and pass the user's query instead; it does not need a session connection.
 
         3.  **General Conversation / Capability Inquiry:** If the user's query is a greeting ("Hi"), asks about your capabilities ("What can you do?"), or is general chat not related to database actions:
             -   Respond politely.
@@ -172,6 +196,18 @@ def root_agent_instruction(ctx: ReadonlyContext) -> str:
         Call `data_profiling_agent`.
         - Example: `data_profiling_agent()`
 
+    -   **"Workload"**, **"Hot queries"**, **"Slow queries"**, **"Hot tables"**, **"How is the database used"**:
+        Call `workload_profiling_agent`.
+        - Example: `workload_profiling_agent()`
+
+    -   **"Batch discovery"**, **"Inventory"**, **"All databases"**, **"Whole estate"**, **"Many schemas"**:
+        Call `batch_discovery_agent` and pass the user's query.
+        - Example: `batch_discovery_agent(user_input)`
+
+    -   **"Index advice"**, **"Unused indexes"**, **"Duplicate indexes"**, **"Missing indexes"**, **"Redundant indexes"**:
+        Call `schema_introspection_agent` and pass the user's query.
+        - Example: `schema_introspection_agent(user_input)`
+
     -   **"Generate Report"**, **"Export"**, **"Diagram"**, **"Summary"**, **"ERD"**, **"JSON"**, **"YAML"**, **"Mermaid"**:
         Call `reporting_agent` and pass the user's query.
         - Example: `reporting_agent(user_input)`
@@ -213,6 +249,8 @@ data_model_discovery_agent = LlmAgent(
         schema_introspection_agent,
         qa_agent,
         data_profiling_agent,
+        workload_profiling_agent,
         reporting_agent,
+        batch_discovery_agent,
     ],
 )
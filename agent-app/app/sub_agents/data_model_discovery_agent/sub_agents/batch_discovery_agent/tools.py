@@ -0,0 +1,470 @@
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from datetime import datetime, timezone
+from functools import partial
+from itertools import chain, zip_longest
+from typing import Any
+
+from google.adk.tools import ToolContext
+
+from app.sub_agents.data_model_discovery_agent.sub_agents.data_profiling_agent.tools import (
+    ADAPTIVE_CONCURRENCY,
+    DEFAULT_STATEMENT_TIMEOUT,
+    PROFILERS,
+    profile_with_session_connections,
+)
+from app.sub_agents.data_model_discovery_agent.sub_agents.data_profiling_agent.utils.catalog_statistics import (
+    PROFILE_MODES,
+)
+from app.sub_agents.data_model_discovery_agent.sub_agents.data_profiling_agent.utils.incremental import (
+    get_profile_store,
+    profile_snapshot,
+    profile_store_key,
+)
+from app.sub_agents.data_model_discovery_agent.sub_agents.database_cred_agent.tools import (
+    connect_and_list_schemas,
+)
+from app.sub_agents.data_model_discovery_agent.sub_agents.schema_introspection_agent.tools import (
+    introspect_schema,
+)
+from app.sub_agents.data_model_discovery_agent.sub_agents.schema_introspection_agent.utils.schema_cache import (
+    get_schema_cache,
+)
+from app.sub_agents.data_model_discovery_agent.utils.blocking import run_blocking
+from app.sub_agents.data_model_discovery_agent.utils.connection_manager import (
+    OperationCancelledError,
+    get_connection_manager,
+)
+
+from .utils.results_store import (
+    SUMMARY_KEY,
+    get_results_store,
+    result_key,
+    results_location,
+)
+from .utils.rollup import build_rollup, schema_figures
+from .utils.scheduler import run_units
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+# Schemas discovered at once across the whole inventory, and per instance,
+# unless args["max_concurrent_units"] / args["max_units_per_instance"] say
+# otherwise. Each profiling unit opens up to BATCH_POOL_SIZE connections.
+BATCH_MAX_CONCURRENT_UNITS = int(os.environ.get("BATCH_MAX_CONCURRENT_UNITS", "4"))
+BATCH_MAX_UNITS_PER_INSTANCE = int(os.environ.get("BATCH_MAX_UNITS_PER_INSTANCE", "2"))
+# Connections per profiling unit unless args["pool_size"] says otherwise.
+BATCH_POOL_SIZE = int(os.environ.get("BATCH_POOL_SIZE", "2"))
+# Attempts per instance connection and per schema, and the delay before the
+# first retry in seconds; later retries wait twice as long as the previous.
+BATCH_MAX_ATTEMPTS = int(os.environ.get("BATCH_MAX_ATTEMPTS", "3"))
+BATCH_RETRY_BACKOFF = float(os.environ.get("BATCH_RETRY_BACKOFF_SECONDS", "10"))
+
+# Failures returned to the agent; all of them are in state and the summary.
+BATCH_REPORT_FAILURES = 10
+
+# Connection fields every inventory entry needs besides its password.
+_CONNECTION_KEYS = ("host", "port", "dbname", "user", "db_type")
+
+
+def _load_inventory(args: dict[str, Any]) -> list[dict[str, Any]]:
+    """Inventory entries from args["inventory"] or the JSON file at args["inventory_path"]."""
+    inventory = args.get("inventory")
+    if inventory is None and args.get("inventory_path"):
+        with open(args["inventory_path"], encoding="utf-8") as f:
+            inventory = json.load(f)
+    if isinstance(inventory, dict):
+        inventory = inventory.get("instances")
+    if not isinstance(inventory, list) or not inventory:
+        raise ValueError(
+            "Provide args['inventory'] or args['inventory_path'] with a list of instances."
+        )
+    return inventory
+
+
+def _parse_instance(
+    entry: dict[str, Any], position: int
+) -> tuple[dict[str, Any], tuple[dict[str, Any], str]]:
+    """
+    The instance unit of an inventory entry, and its connection metadata and
+    password, which are kept out of the unit so they never reach the results.
+    """
+    if not isinstance(entry, dict):
+        raise ValueError(f"Entry {position} is not an object.")
+    missing = [k for k in _CONNECTION_KEYS if not entry.get(k)]
+    password = entry.get("password")
+    if password is None and entry.get("password_env"):
+        password = os.getenv(entry["password_env"])
+        if password is None:
+            raise ValueError(
+                f"Environment variable {entry['password_env']} is not set."
+            )
+    if password is None:
+        missing.append("password or password_env")
+    if missing:
+        raise ValueError(
+            f"Entry {entry.get('name') or position} is missing: {', '.join(missing)}"
+        )
+    db_type = str(entry["db_type"]).lower()
+    if db_type not in PROFILERS:
+        raise ValueError(
+            f"Unsupported database type: {db_type}. Supported types are: "
+            f"{', '.join(PROFILERS)}."
+        )
+    metadata = {
+        "host": entry["host"],
+        "port": entry["port"],
+        "dbname": entry["dbname"],
+        "user": entry["user"],
+        "db_type": db_type,
+    }
+    label = (
+        entry.get("name")
+        or f"{db_type}://{entry['host']}:{entry['port']}/{entry['dbname']}"
+    )
+    unit = {
+        "id": label,
+        "instance": label,
+        "db_type": db_type,
+        "schemas": entry.get("schemas"),
+        "exclude_schemas": list(entry.get("exclude_schemas", [])),
+    }
+    return unit, (metadata, password)
+
+
+def _is_retryable(error: Exception) -> bool:
+    """Cancellations and invalid connection parameters fail the same way again."""
+    return not isinstance(error, (OperationCancelledError, ValueError))
+
+
+def _schema_units(instances: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """
+    One unit per schema of every reachable instance: the listed schemas, or
+    all of them less exclude_schemas. Listed schemas the instance does not
+    have are failed units that never run. Instances are interleaved so the
+    scheduler reaches every instance early.
+    """
+    per_instance = []
+    for instance in instances:
+        if instance["status"] != "succeeded":
+            continue
+        available = instance["result"]
+        requested = instance["schemas"] or [
+            s for s in available if s not in instance["exclude_schemas"]
+        ]
+        units = []
+        for schema_name in requested:
+            unit = {
+                "id": f"{instance['instance']}/{schema_name}",
+                "instance": instance["instance"],
+                "schema": schema_name,
+            }
+            if schema_name not in available:
+                unit.update(
+                    status="failed",
+                    stage="listing",
+                    attempts=0,
+                    errors=["Schema not found on the instance."],
+                    seconds=0.0,
+                )
+            units.append(unit)
+        per_instance.append(units)
+    return [unit for unit in chain.from_iterable(zip_longest(*per_instance)) if unit]
+
+
+def _profile_schema(
+    key: str,
+    metadata: dict[str, Any],
+    password: str,
+    schema_name: str,
+    schema_structure: dict[str, Any],
+    profile_store: Any,
+    options: dict[str, Any],
+) -> dict[str, Any]:
+    """Profiles one schema as profile_schema_data does, storing the profile for incremental runs."""
+    store_key = profile_store_key(
+        metadata,
+        schema_name,
+        {
+            "sample_size": options["sample_size"],
+            "profile_mode": options["profile_mode"],
+            "cardinality_error": None,
+        },
+    )
+    previous_profile = None
+    if options["incremental"] and profile_store:
+        previous_profile = profile_store.get(store_key)
+    data_profile = profile_with_session_connections(
+        key,
+        metadata,
+        password,
+        PROFILERS[metadata["db_type"]],
+        options["statement_timeout"],
+        options["pool_size"],
+        schema_name=schema_name,
+        schema_structure=schema_structure,
+        sample_size=options["sample_size"],
+        profile_mode=options["profile_mode"],
+        time_budget=options["schema_time_budget"],
+        previous_profile=previous_profile,
+        adaptive_concurrency=options["adaptive_concurrency"],
+    )
+    change_indicators = data_profile.pop("change_indicators", {})
+    data_profile["profile_mode"] = options["profile_mode"]
+    if profile_store:
+        profile_store.put(
+            store_key,
+            profile_snapshot(
+                schema_name, schema_structure, data_profile, change_indicators
+            ),
+        )
+    return data_profile
+
+
+def _discover_schema(
+    connections: dict[str, tuple[str, dict[str, Any], str]],
+    introspected: dict[str, tuple[dict[str, Any], str]],
+    store: Any,
+    caches: tuple[Any, Any],
+    options: dict[str, Any],
+    unit: dict[str, Any],
+) -> dict[str, Any]:
+    """
+    Introspects and profiles one schema unit and stores its results. A retry
+    after a profiling failure reuses the introspected structure. `caches` are
+    the run's schema cache and profile store.
+    """
+    key, metadata, password = connections[unit["instance"]]
+    schema_name = unit["schema"]
+    introspection_cache, profile_store = caches
+    if unit["id"] not in introspected:
+        unit["stage"] = "introspection"
+        introspected[unit["id"]] = introspect_schema(
+            key,
+            metadata,
+            password,
+            schema_name,
+            options["refresh"],
+            introspection_cache,
+        )
+    schema_structure, cache_status = introspected[unit["id"]]
+    data_profile = None
+    if options["profile"]:
+        unit["stage"] = "profiling"
+        data_profile = _profile_schema(
+            key,
+            metadata,
+            password,
+            schema_name,
+            schema_structure,
+            profile_store,
+            options,
+        )
+    store.put(
+        result_key(unit["instance"], schema_name),
+        {
+            "instance": unit["instance"],
+            "schema": schema_name,
+            "status": "succeeded",
+            "attempts": unit["attempts"],
+            "introspection_cache": cache_status,
+            "schema_structure": schema_structure,
+            "data_profile": data_profile,
+        },
+    )
+    del introspected[unit["id"]]
+    logger.info(f"Batch discovery of {unit['id']} completed.")
+    return {
+        "introspection_cache": cache_status,
+        **schema_figures(schema_structure, data_profile),
+    }
+
+
+def _run_batch(
+    run_id: str,
+    instances: list[dict[str, Any]],
+    connections: dict[str, tuple[str, dict[str, Any], str]],
+    options: dict[str, Any],
+) -> dict[str, Any]:
+    """
+    Blocking part of run_batch_discovery: connects to every instance and
+    lists its schemas, then discovers the schemas through the scheduler and
+    stores one result per schema and the roll-up summary.
+    """
+    started = time.monotonic()
+    schedule = partial(
+        run_units,
+        max_concurrent=options["max_concurrent_units"],
+        max_attempts=options["max_attempts"],
+        retry_backoff=options["retry_backoff"],
+        is_retryable=_is_retryable,
+    )
+    manager = get_connection_manager()
+    try:
+        schedule(
+            instances,
+            lambda instance: connect_and_list_schemas(
+                *connections[instance["instance"]]
+            ),
+            max_per_instance=1,
+        )
+        units = _schema_units(instances)
+        store = get_results_store(run_id, len(units) + 1)
+        # Both caches are LRUs; sized to the run, a large inventory does not
+        # evict the entries it wrote itself before the run ends.
+        caches = (get_schema_cache(len(units)), get_profile_store(len(units)))
+        introspected: dict[str, tuple[dict[str, Any], str]] = {}
+        schedule(
+            [unit for unit in units if "status" not in unit],
+            partial(
+                _discover_schema, connections, introspected, store, caches, options
+            ),
+            max_per_instance=options["max_units_per_instance"],
+        )
+    finally:
+        for key, _, _ in connections.values():
+            manager.close_session(key)
+
+    for unit in units:
+        if unit["status"] != "failed":
+            continue
+        schema_structure = introspected.get(unit["id"], (None, None))[0]
+        store.put(
+            result_key(unit["instance"], unit["schema"]),
+            {
+                "instance": unit["instance"],
+                "schema": unit["schema"],
+                "status": "failed",
+                "stage": unit.get("stage"),
+                "attempts": unit["attempts"],
+                "errors": unit["errors"],
+                "schema_structure": schema_structure,
+            },
+        )
+
+    rollup = {
+        "run_id": run_id,
+        "finished_at": datetime.now(timezone.utc).isoformat(),
+        "seconds": round(time.monotonic() - started, 1),
+        "results_location": results_location(run_id),
+        "options": options,
+        **build_rollup(instances, units),
+    }
+    store.put(SUMMARY_KEY, rollup)
+    return rollup
+
+
+async def run_batch_discovery(
+    tool_context: ToolContext, args: dict[str, Any]
+) -> dict[str, Any]:
+    """
+    Introspects and profiles many schemas across many database instances in
+    one run. args["inventory"] (or the JSON file at args["inventory_path"])
+    lists the instances with their connection details, a password or the
+    name of the environment variable holding it (password_env), and
+    optionally the schemas to discover or exclude_schemas.
+
+    Schemas run through a scheduler limited to args["max_concurrent_units"]
+    at once and args["max_units_per_instance"] per instance; failed
+    connections and schemas are retried up to args["max_attempts"] times.
+    Each schema's structure and profile are stored as a result of the run,
+    and the roll-up summary is stored with them and in state as
+    batch_discovery. With args["profile"] = False, schemas are only
+    introspected; sample_size, profile_mode, statement_timeout,
+    schema_time_budget, pool_size, incremental and adaptive_concurrency
+    apply to every schema as in profile_schema_data.
+    """
+    try:
+        parsed = [
+            _parse_instance(entry, position)
+            for position, entry in enumerate(_load_inventory(args), start=1)
+        ]
+    except (OSError, TypeError, ValueError) as e:
+        return {"error": f"Invalid inventory: {e}"}
+    labels = [unit["instance"] for unit, _ in parsed]
+    duplicates = sorted({label for label in labels if labels.count(label) > 1})
+    if duplicates:
+        return {
+            "error": f"Instance names must be unique; repeated: {', '.join(duplicates)}."
+        }
+
+    profile_mode = args.get("profile_mode", "sampled")
+    if profile_mode not in PROFILE_MODES:
+        return {
+            "error": f"Unknown profile_mode '{profile_mode}'. Use one of {', '.join(PROFILE_MODES)}."
+        }
+    try:
+        statement_timeout = args.get("statement_timeout", DEFAULT_STATEMENT_TIMEOUT)
+        schema_time_budget = args.get("schema_time_budget")
+        options = {
+            "profile": bool(args.get("profile", True)),
+            "refresh": bool(args.get("refresh")),
+            "incremental": bool(args.get("incremental")),
+            "sample_size": int(args.get("sample_size", 10000)),
+            "profile_mode": profile_mode,
+            "statement_timeout": float(statement_timeout)
+            if statement_timeout
+            else None,
+            "schema_time_budget": float(schema_time_budget)
+            if schema_time_budget
+            else None,
+            "pool_size": max(1, int(args.get("pool_size", BATCH_POOL_SIZE))),
+            "adaptive_concurrency": bool(
+                args.get("adaptive_concurrency", ADAPTIVE_CONCURRENCY)
+            ),
+            "max_concurrent_units": int(
+                args.get("max_concurrent_units", BATCH_MAX_CONCURRENT_UNITS)
+            ),
+            "max_units_per_instance": int(
+                args.get("max_units_per_instance", BATCH_MAX_UNITS_PER_INSTANCE)
+            ),
+            "max_attempts": max(1, int(args.get("max_attempts", BATCH_MAX_ATTEMPTS))),
+            "retry_backoff": BATCH_RETRY_BACKOFF,
+        }
+    except (TypeError, ValueError):
+        return {
+            "error": "sample_size, pool_size, the limits and timeouts must be numbers."
+        }
+
+    # Each instance gets a connection session of its own; the batch's key
+    # only tracks the blocking call.
+    instances = [unit for unit, _ in parsed]
+    connections = {
+        unit["instance"]: (uuid.uuid4().hex, metadata, password)
+        for unit, (metadata, password) in parsed
+    }
+    run_id = f"{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}-{uuid.uuid4().hex[:8]}"
+    logger.info(f"Starting batch discovery {run_id} over {len(instances)} instances.")
+    try:
+        rollup = await run_blocking(
+            f"batch-{run_id}", _run_batch, run_id, instances, connections, options
+        )
+    except asyncio.CancelledError:
+        manager = get_connection_manager()
+        for key, _, _ in connections.values():
+            manager.cancel_session(key)
+        raise
+    except Exception as e:
+        logger.error(f"Error during batch discovery: {e}", exc_info=True)
+        return {"error": f"Batch discovery {run_id} failed: {e!s}"}
+
+    tool_context.state["batch_discovery"] = rollup
+    logger.info(f"Batch discovery {run_id} saved to session state.")
+    return {
+        "status": "partial" if rollup["failures"] else "success",
+        "message": (
+            f"Batch discovery {run_id} finished: {rollup['totals']['succeeded']} "
+            f"schemas discovered, {rollup['totals']['partial']} partially profiled "
+            f"and {rollup['totals']['failed']} failed on "
+            f"{rollup['totals']['instances']} instances. Results are stored."
+        ),
+        "run_id": run_id,
+        "results_location": rollup["results_location"],
+        "totals": rollup["totals"],
+        "instances": rollup["instances"],
+        "failures": rollup["failures"][:BATCH_REPORT_FAILURES],
+    }
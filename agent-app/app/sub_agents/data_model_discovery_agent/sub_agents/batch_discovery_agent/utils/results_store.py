@@ -0,0 +1,46 @@
+import hashlib
+import os
+import re
+
+from app.sub_agents.data_model_discovery_agent.sub_agents.schema_introspection_agent.utils.schema_cache import (
+    DiskSchemaCache,
+    GcsSchemaCache,
+    SchemaCache,
+)
+
+# Directory holding one subdirectory of results per batch run.
+DEFAULT_RESULTS_DIR = os.path.join(
+    os.path.expanduser("~"), ".cache", "data_model_discovery", "batch_results"
+)
+
+# Key of the roll-up summary among a run's per-schema results.
+SUMMARY_KEY = "summary"
+
+
+def result_key(instance: str, schema_name: str) -> str:
+    """
+    Readable, file-safe key of one schema's results within a run. The hash
+    keeps names that differ only in replaced characters apart.
+    """
+    name = f"{instance}.{schema_name}"
+    digest = hashlib.sha256(name.encode("utf-8")).hexdigest()[:8]
+    return f"{re.sub(r'[^A-Za-z0-9._-]+', '_', name)}-{digest}"
+
+
+def results_location(run_id: str) -> str:
+    return os.path.join(os.getenv("BATCH_RESULTS_DIR", DEFAULT_RESULTS_DIR), run_id)
+
+
+def get_results_store(run_id: str, max_entries: int) -> SchemaCache:
+    """
+    Store of one batch run's results: a JSON file per schema plus the summary
+    in a directory of its own under BATCH_RESULTS_DIR, copied to
+    BATCH_RESULTS_GCS_BUCKET under batch_results/<run_id>/ when it is set.
+    `max_entries` must cover every result of the run, since the disk backend
+    evicts beyond it.
+    """
+    backends: list = [DiskSchemaCache(results_location(run_id), max_entries)]
+    bucket_name = os.getenv("BATCH_RESULTS_GCS_BUCKET")
+    if bucket_name:
+        backends.append(GcsSchemaCache(bucket_name, prefix=f"batch_results/{run_id}/"))
+    return SchemaCache(backends)
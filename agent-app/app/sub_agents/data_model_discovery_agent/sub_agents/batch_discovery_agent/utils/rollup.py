@@ -0,0 +1,134 @@
+from typing import Any
+
+# Thresholds of the data quality highlights, as in the summary report.
+HIGH_NULL_PERCENT = 50
+HIGH_ORPHAN_PERCENT = 10
+
+# Schema figures added up per instance and across the estate.
+_TOTALS = (
+    "tables",
+    "views",
+    "columns",
+    "explicit_fks",
+    "inferred_relationships",
+    "schema_anomalies",
+    "high_null_columns",
+    "high_orphan_fks",
+    "type_anomalies",
+)
+
+
+def schema_figures(
+    schema_structure: dict[str, Any], data_profile: dict[str, Any] | None
+) -> dict[str, Any]:
+    """Structure counts and data quality highlights of one discovered schema."""
+    tables = schema_structure.get("tables", {})
+    figures: dict[str, Any] = {
+        "tables": len(tables),
+        "views": len(schema_structure.get("views", {})),
+        "columns": sum(len(t.get("columns", {})) for t in tables.values()),
+        "explicit_fks": len(schema_structure.get("foreign_keys", [])),
+        "inferred_relationships": len(
+            schema_structure.get("inferred_relationships", [])
+        ),
+        "schema_anomalies": len(schema_structure.get("anomalies", [])),
+        "profiled": data_profile is not None,
+    }
+    if data_profile is None:
+        return figures
+    figures["high_null_columns"] = sum(
+        1
+        for table in data_profile.get("nullability", {}).values()
+        for null_pct in table.values()
+        if isinstance(null_pct, (int, float)) and null_pct > HIGH_NULL_PERCENT
+    )
+    figures["high_orphan_fks"] = sum(
+        1
+        for orphan_pct in data_profile.get("orphan_records", {}).values()
+        if isinstance(orphan_pct, (int, float)) and orphan_pct > HIGH_ORPHAN_PERCENT
+    )
+    figures["type_anomalies"] = len(data_profile.get("type_anomalies", {}))
+    status = data_profile.get("profiling_status", {})
+    figures["profile_complete"] = status.get("complete", True)
+    figures["throttling_pauses"] = data_profile.get("throttling", {}).get("pauses", 0)
+    return figures
+
+
+def build_rollup(
+    instances: list[dict[str, Any]], units: list[dict[str, Any]]
+) -> dict[str, Any]:
+    """
+    Roll-up of a batch run from its instance and schema units once the
+    scheduler is done with them: totals across the estate, per instance, one
+    row per schema, and every failure with its last error.
+    """
+    per_instance: dict[str, dict[str, Any]] = {}
+    failures = []
+    for instance in instances:
+        per_instance[instance["instance"]] = {
+            "db_type": instance["db_type"],
+            "reachable": instance["status"] == "succeeded",
+            "schemas": 0,
+            "succeeded": 0,
+            "partial": 0,
+            "failed": 0,
+            **dict.fromkeys(_TOTALS, 0),
+        }
+        if instance["status"] == "failed":
+            failures.append(
+                {
+                    "instance": instance["instance"],
+                    "schema": None,
+                    "stage": "connect",
+                    "attempts": instance["attempts"],
+                    "error": instance["errors"][-1] if instance["errors"] else None,
+                }
+            )
+
+    rows = []
+    for unit in units:
+        figures = unit.get("result") or {}
+        totals = per_instance[unit["instance"]]
+        totals["schemas"] += 1
+        if unit["status"] == "failed":
+            totals["failed"] += 1
+            failures.append(
+                {
+                    "instance": unit["instance"],
+                    "schema": unit["schema"],
+                    "stage": unit.get("stage"),
+                    "attempts": unit["attempts"],
+                    "error": unit["errors"][-1] if unit["errors"] else None,
+                }
+            )
+        elif figures.get("profile_complete", True):
+            totals["succeeded"] += 1
+        else:
+            totals["partial"] += 1
+        for name in _TOTALS:
+            totals[name] += figures.get(name, 0)
+        rows.append(
+            {
+                "instance": unit["instance"],
+                "schema": unit["schema"],
+                "status": unit["status"],
+                "attempts": unit["attempts"],
+                "seconds": unit["seconds"],
+                **figures,
+            }
+        )
+
+    estate = {
+        "instances": len(instances),
+        "instances_unreachable": sum(
+            1 for totals in per_instance.values() if not totals["reachable"]
+        ),
+    }
+    for name in ("schemas", "succeeded", "partial", "failed", *_TOTALS):
+        estate[name] = sum(totals[name] for totals in per_instance.values())
+    return {
+        "totals": estate,
+        "instances": per_instance,
+        "schemas": rows,
+        "failures": failures,
+    }
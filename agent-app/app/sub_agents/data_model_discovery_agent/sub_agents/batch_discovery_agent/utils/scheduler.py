@@ -0,0 +1,98 @@
+import logging
+import time
+from collections.abc import Callable
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+def run_units(
+    units: list[dict[str, Any]],
+    run: Callable[[dict[str, Any]], Any],
+    max_concurrent: int,
+    max_per_instance: int,
+    max_attempts: int = 1,
+    retry_backoff: float = 0.0,
+    is_retryable: Callable[[Exception], bool] = lambda e: True,
+) -> None:
+    """
+    Calls run(unit) for every unit, at most `max_concurrent` at a time and at
+    most `max_per_instance` for the same unit["instance"]. Units start in list
+    order, skipping those whose instance is at its limit. A unit whose run
+    raises a retryable error is queued again after retry_backoff seconds,
+    doubled per attempt, until it has made `max_attempts` attempts.
+
+    Each unit is updated in place with "status" ("succeeded" or "failed"),
+    "attempts", "errors" (one message per failed attempt), "seconds" spent
+    running, and "result" on success.
+    """
+    max_concurrent = max(1, max_concurrent)
+    max_per_instance = max(1, max_per_instance)
+    pending = list(units)
+    retry_at: dict[int, float] = {}
+    running: dict[Future, dict[str, Any]] = {}
+    per_instance: dict[str, int] = {}
+    for unit in units:
+        unit.update(status="pending", attempts=0, errors=[], seconds=0.0)
+
+    def attempt(unit: dict[str, Any]) -> Any:
+        started = time.monotonic()
+        try:
+            return run(unit)
+        finally:
+            unit["seconds"] = round(unit["seconds"] + time.monotonic() - started, 2)
+
+    with ThreadPoolExecutor(
+        max_workers=max_concurrent, thread_name_prefix="batch-discovery"
+    ) as executor:
+        while pending or running:
+            now = time.monotonic()
+            for unit in list(pending):
+                if len(running) >= max_concurrent:
+                    break
+                if per_instance.get(unit["instance"], 0) >= max_per_instance:
+                    continue
+                if retry_at.get(id(unit), 0.0) > now:
+                    continue
+                pending.remove(unit)
+                per_instance[unit["instance"]] = (
+                    per_instance.get(unit["instance"], 0) + 1
+                )
+                unit["status"] = "running"
+                unit["attempts"] += 1
+                running[executor.submit(attempt, unit)] = unit
+
+            # Wake up for the first finished unit or the next retry, whichever is first.
+            waits = [retry_at[id(u)] - now for u in pending if id(u) in retry_at]
+            timeout = max(0.0, min(waits)) if waits else None
+            if not running:
+                time.sleep(timeout or 0.0)
+                continue
+            done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                unit = running.pop(future)
+                per_instance[unit["instance"]] -= 1
+                try:
+                    unit["result"] = future.result()
+                    unit["status"] = "succeeded"
+                    retry_at.pop(id(unit), None)
+                except Exception as e:
+                    unit["errors"].append(f"{type(e).__name__}: {e}".strip())
+                    if unit["attempts"] < max_attempts and is_retryable(e):
+                        delay = retry_backoff * 2 ** (unit["attempts"] - 1)
+                        logger.warning(
+                            f"Batch unit {unit['id']} failed (attempt "
+                            f"{unit['attempts']} of {max_attempts}), retrying in "
+                            f"{delay:.0f}s: {e}"
+                        )
+                        retry_at[id(unit)] = time.monotonic() + delay
+                        unit["status"] = "pending"
+                        pending.append(unit)
+                    else:
+                        logger.error(
+                            f"Batch unit {unit['id']} failed after "
+                            f"{unit['attempts']} attempts: {e}"
+                        )
+                        unit["status"] = "failed"
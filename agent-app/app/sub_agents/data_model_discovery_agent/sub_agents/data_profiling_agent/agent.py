@@ -21,17 +21,23 @@ data_profiling_agent = LlmAgent(
     1. **Column Nullability:** For each column, calculate and report the percentage of NULL values based on a representative sample (e.g., top 10,000 rows).  
     2. **Column Cardinality:** For key columns (PKs, FKs, inferred keys), report the cardinality (count of unique values).  
     3. **Orphan Record Detection:** Sample FK columns and report the percentage of orphan records (e.g., orders.customer_id values missing in customers.id).  
-    4. **Data Type Anomalies:** For text-based columns (VARCHAR, CHAR), detect potential type inconsistencies (e.g., customer_phone containing non-numeric characters).  
+    4. **Data Type Anomalies:** For text-based columns (VARCHAR, CHAR), detect potential type inconsistencies (e.g., customer_phone containing non-numeric characters, a mostly numeric column with a few text values, or dates stored as text). Each text column's value patterns, lengths and top values are in `column_patterns`.  
 
     ### Task Execution
-    1. **Receive Input:** The user's query or relevant arguments (e.g., `sample_size`) are available in `query`.  
+    1. **Receive Input:** The user's query or relevant arguments (e.g., `sample_size`, `profile_mode`) are available in `query`.  
+    - `profile_mode` is `"sampled"` (default, scans a sample of each table) or `"statistics"` (reads nullability and cardinality from the database's optimizer statistics without scanning tables; use it when the user asks for a fast or low-impact profile).  
+    - `cardinality_error` (optional, e.g. `0.01`) switches key-column cardinality from exact counts to approximate distinct counts within that relative error; use it for very large tables or when the user accepts approximate cardinality.  
+    - `statement_timeout` (seconds per query, default 300) and `time_budget` (seconds for the whole run) bound how long profiling may take; pass them when the user asks for a quick or time-limited profile.  
+    - `incremental` (optional, `true`) re-profiles only tables written since the last stored profile of this schema and reuses the stored results for the rest; use it for scheduled or repeated runs, or when the user asks to refresh only what changed.  
+    - `discover_relationships` (optional, `true`) compares sketches of column values to find columns whose values are contained in another table's key column, and adds them to the inferred relationships with an `evidence_score`; use it for legacy schemas with cryptic column names or when the user asks to find relationships from the data.  
+    - `adaptive_concurrency` (optional, default `true`) starts with few concurrent queries and adjusts to the server's active sessions, replication lag and response time, pausing while the database is stressed; pass `false` only when the user asks for a fixed `pool_size` on a database with no production traffic.  
 
     2. **Call Profiling Tool:** Invoke `profile_schema_data` with the arguments:
     ```python
     profile_schema_data(args=query if isinstance(query, dict) else {})
     ```
     3. **Process Profiling Results:**
-    - If `status` is `"success"`:
+    - If `status` is `"success"` or `"partial"` (the time budget ran out; the stored profile lists skipped and timed-out checks under `profiling_status`):
     - Store profiling results in the session state.  
     - **Do NOT return results directly to the user.**  
     - Immediately invoke the QA agent to summarize the findings:
@@ -1,50 +1,103 @@
 import logging
+import os
+from collections.abc import Callable
+from functools import partial
 from typing import Any
 
-import mysql.connector
-import psycopg2
-import pytds as tds
 from google.adk.tools import ToolContext
 
+from app.sub_agents.data_model_discovery_agent.utils.blocking import run_blocking
+from app.sub_agents.data_model_discovery_agent.utils.connection_manager import (
+    get_connection_manager,
+    session_key,
+)
+
 from .utils import (
     mssql_profiling_utils,
     mysql_profiling_utils,
     postgres_profiling_utils,
 )
+from .utils.catalog_statistics import PROFILE_MODES
+from .utils.incremental import (
+    get_profile_store,
+    profile_snapshot,
+    profile_store_key,
+)
+from .utils.value_overlap import merge_discovered
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
+# Connections opened per profiling run when neither args["pool_size"] nor
+# PROFILING_POOL_SIZE_<DB_TYPE> (e.g. PROFILING_POOL_SIZE_MSSQL) is set.
+DEFAULT_POOL_SIZES = {"postgresql": 8, "mysql": 8, "mssql": 4}
+
+# Longest any single profiling statement may run, in seconds, unless
+# args["statement_timeout"] says otherwise.
+DEFAULT_STATEMENT_TIMEOUT = 300
+
+# Whether runs adapt their concurrency to the server's load unless
+# args["adaptive_concurrency"] says otherwise; pool_size stays the ceiling.
+ADAPTIVE_CONCURRENCY = (
+    os.getenv("PROFILING_ADAPTIVE_CONCURRENCY", "true").lower() == "true"
+)
+
+
+# Dialect entry points of profile_schema_data and of the batch discovery job.
+PROFILERS = {
+    "postgresql": postgres_profiling_utils.profile_postgres_data,
+    "mysql": mysql_profiling_utils.profile_mysql_data,
+    "mssql": mssql_profiling_utils.profile_mssql_data,
+}
 
-def _get_db_connection(metadata: dict[str, Any], password: str) -> Any:
-    db_type = metadata.get("db_type")
-    host = metadata.get("host")
-    port_value = metadata.get("port")
-    port = int(port_value) if port_value is not None else None
-    dbname = metadata.get("dbname")
-    user = metadata.get("user")
-    logger.info(
-        f"Attempting to connect to {db_type} at {host}:{port} as {user} to database {dbname}"
+
+def _get_pool_size(db_type: str, args: dict[str, Any]) -> int:
+    pool_size = args.get("pool_size") or os.getenv(
+        f"PROFILING_POOL_SIZE_{db_type.upper()}"
     )
-    if db_type == "postgresql":
-        return psycopg2.connect(
-            host=host, port=port, dbname=dbname, user=user, password=password
+    if pool_size is None:
+        return DEFAULT_POOL_SIZES.get(db_type, 1)
+    return max(1, int(pool_size))
+
+
+def profile_with_session_connections(
+    key: str,
+    metadata: dict[str, Any],
+    password: str,
+    profile_data: Callable[..., dict[str, Any]],
+    statement_timeout: float | None,
+    pool_size: int,
+    **kwargs: Any,
+) -> dict[str, Any]:
+    """
+    Blocking part of profile_schema_data and of the batch discovery job, run
+    on the session's connections.
+    """
+    manager = get_connection_manager()
+    db_type = metadata["db_type"]
+    conn = manager.acquire(key, metadata, password, statement_timeout)
+    try:
+        # Extra pool connections never wait for the process-wide cap; the run
+        # continues on fewer connections instead.
+        connect = partial(
+            manager.acquire, key, metadata, password, statement_timeout, wait=False
         )
-    elif db_type == "mysql":
-        return mysql.connector.connect(
-            host=host, port=port, database=dbname, user=user, password=password
+        logger.info(
+            f"Using the session's {db_type} connections for data profiling of "
+            f"schema '{kwargs['schema_name']}' with up to {pool_size} connections."
         )
-    elif db_type == "mssql":
-        return tds.connect(
-            server=host,
-            port=port or 1433,
-            user=user,
-            password=password,
-            database=dbname,
-            autocommit=True,
+        return profile_data(
+            conn,
+            connect=connect,
+            pool_size=pool_size,
+            statement_timeout=statement_timeout,
+            **kwargs,
         )
-    else:
-        raise ValueError(f"Unsupported database type: {db_type}")
+    finally:
+        try:
+            conn.close()
+        except Exception as e:
+            logger.error(f"Error releasing {db_type} connection: {e}")
 
 
 async def profile_schema_data(
@@ -53,6 +106,21 @@ async def profile_schema_data(
     """
     Profiles the data in the selected schema based on the schema structure.
     Calculates nullability, cardinality, orphan records, and type anomalies.
+    With args["profile_mode"] = "statistics", nullability and key cardinality
+    are read from the database's optimizer statistics instead of table scans.
+    Tables are profiled concurrently on up to args["pool_size"] connections.
+    args["statement_timeout"] and args["time_budget"] (seconds) cap each query
+    and the whole run; when the budget runs out a partial profile is stored.
+    With args["cardinality_error"] (e.g. 0.01), key cardinality is estimated
+    within that relative error instead of counted exactly.
+    Every profile is stored per schema and user; with args["incremental"],
+    tables that have not been written since the stored profile reuse its
+    results.
+    With args["discover_relationships"], columns whose values are contained in
+    another table's key column are added to the inferred relationships.
+    With args["adaptive_concurrency"] (on by default), fewer checks run at
+    once while the server is busy or its replicas lag, and none while it is
+    stressed; the decisions are stored under "throttling".
     Sets a flag on successful completion.
     """
 
@@ -61,6 +129,13 @@ async def profile_schema_data(
     schema_name = tool_context.state.get("selected_schema")
     schema_structure = tool_context.state.get("schema_structure")
     sample_size = args.get("sample_size", 10000)
+    profile_mode = args.get("profile_mode", "sampled")
+    cardinality_error = args.get("cardinality_error")
+    statement_timeout = args.get("statement_timeout", DEFAULT_STATEMENT_TIMEOUT)
+    time_budget = args.get("time_budget")
+    incremental = bool(args.get("incremental"))
+    discover_relationships = bool(args.get("discover_relationships"))
+    adaptive_concurrency = bool(args.get("adaptive_concurrency", ADAPTIVE_CONCURRENCY))
 
     if not db_conn_state or db_conn_state.get("status") != "connected":
         return {"error": "DB not connected."}
@@ -70,50 +145,124 @@ async def profile_schema_data(
         return {"error": "Selected schema not found."}
     if not schema_structure:
         return {"error": "Schema structure not found. Please run introspection first."}
+    if profile_mode not in PROFILE_MODES:
+        return {
+            "error": f"Unknown profile_mode '{profile_mode}'. Use one of {', '.join(PROFILE_MODES)}."
+        }
+    if cardinality_error is not None:
+        try:
+            cardinality_error = float(cardinality_error)
+        except (TypeError, ValueError):
+            return {"error": "cardinality_error must be a number between 0 and 1."}
+        if not 0 < cardinality_error < 1:
+            return {"error": "cardinality_error must be a number between 0 and 1."}
+    try:
+        statement_timeout = float(statement_timeout) if statement_timeout else None
+        time_budget = float(time_budget) if time_budget else None
+    except (TypeError, ValueError):
+        return {
+            "error": "statement_timeout and time_budget must be numbers of seconds."
+        }
 
     metadata = db_conn_state["metadata"]
     password = db_creds["password"]
     db_type = metadata["db_type"]
 
-    conn = None
+    key = session_key(tool_context.state)
+    profile_store = get_profile_store()
+    store_key = profile_store_key(
+        metadata,
+        schema_name,
+        {
+            "sample_size": sample_size,
+            "profile_mode": profile_mode,
+            "cardinality_error": cardinality_error,
+        },
+    )
+    previous_profile = None
+    if incremental:
+        if profile_store:
+            previous_profile = await run_blocking(key, profile_store.get, store_key)
+        if not previous_profile:
+            logger.info(
+                f"No stored profile for '{schema_name}' with these options; "
+                "profiling every table."
+            )
+
+    profile_data = PROFILERS.get(db_type)
+    if profile_data is None:
+        return {"error": f"Profiling for {db_type} not implemented."}
+
     try:
-        conn = _get_db_connection(metadata, password)
-        logger.info(
-            f"Reconnected to {db_type} for data profiling of schema '{schema_name}'."
+        # Profiling blocks for as long as its queries run; keep it off the
+        # event loop so other sessions are served meanwhile.
+        profile_results = await run_blocking(
+            key,
+            profile_with_session_connections,
+            key,
+            metadata,
+            password,
+            profile_data,
+            schema_name=schema_name,
+            schema_structure=schema_structure,
+            sample_size=sample_size,
+            profile_mode=profile_mode,
+            pool_size=_get_pool_size(db_type, args),
+            cardinality_error=cardinality_error,
+            statement_timeout=statement_timeout,
+            time_budget=time_budget,
+            previous_profile=previous_profile,
+            discover_relationships=discover_relationships,
+            adaptive_concurrency=adaptive_concurrency,
         )
 
-        if db_type == "postgresql":
-            profile_results = postgres_profiling_utils.profile_postgres_data(
-                conn, schema_name, schema_structure, sample_size
+        change_indicators = profile_results.pop("change_indicators", {})
+        profile_results["profile_mode"] = profile_mode
+        if profile_store:
+            await run_blocking(
+                key,
+                profile_store.put,
+                store_key,
+                profile_snapshot(
+                    schema_name, schema_structure, profile_results, change_indicators
+                ),
             )
-        elif db_type == "mysql":
-            profile_results = mysql_profiling_utils.profile_mysql_data(
-                conn, schema_name, schema_structure, sample_size
-            )
-        elif db_type == "mssql":
-            profile_results = mssql_profiling_utils.profile_mssql_data(
-                conn, schema_name, schema_structure, sample_size
-            )
-        else:
-            return {"error": f"Profiling for {db_type} not implemented."}
-
         tool_context.state["data_profile"] = profile_results
+        if profile_results.get("value_overlap"):
+            tool_context.state["schema_structure"] = {
+                **schema_structure,
+                "inferred_relationships": merge_discovered(
+                    schema_structure.get("inferred_relationships", []),
+                    profile_results["value_overlap"],
+                ),
+            }
         tool_context.state["profiling_just_completed"] = True  # Set the flag
         logger.info(
             f"Data profiling results for '{schema_name}' saved to session state."
         )
 
+        profiling_status = profile_results.get("profiling_status", {})
+        throttling = profile_results.get("throttling", {})
+        if not profiling_status.get("complete", True):
+            return {
+                "status": "partial",
+                "message": (
+                    f"Data profiling for schema '{schema_name}' stopped early"
+                    f"{' because the server stayed under load' if throttling.get('stopped_for_load') else ''}: "
+                    f"{len(profiling_status['skipped'])} checks skipped and "
+                    f"{len(profiling_status['timed_out'])} timed out. "
+                    "Partial results are stored."
+                ),
+                "schema_name": schema_name,
+            }
         return {
             "status": "success",
             "message": f"Data profiling completed for schema '{schema_name}'. Results are stored.",
             "schema_name": schema_name,
+            "tables_reused": len(profiling_status.get("tables_reused", [])),
+            "relationships_discovered": len(profile_results.get("value_overlap", [])),
+            "throttling_pauses": throttling.get("pauses", 0),
         }
     except Exception as e:
         logger.error(f"Error during data profiling: {e}", exc_info=True)
         return {"error": f"Failed to profile data for {db_type} ({schema_name}): {e!s}"}
-    finally:
-        if conn:
-            try:
-                conn.close()
-            except Exception as e:
-                logger.error(f"Error closing {db_type} connection: {e}")
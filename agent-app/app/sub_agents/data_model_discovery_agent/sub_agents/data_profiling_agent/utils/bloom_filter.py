@@ -0,0 +1,158 @@
+import hashlib
+import math
+import os
+from collections import Counter
+from collections.abc import Iterable
+from typing import Any
+
+import numpy as np
+
+from app.sub_agents.data_model_discovery_agent.utils.blocking import (
+    batched,
+    map_in_processes,
+)
+
+# Upper bound on the memory of one filter, whatever the size of the parent table.
+MAX_BYTES = int(os.environ.get("ORPHAN_BLOOM_MAX_BYTES", str(64 * 1024 * 1024)))
+# False-positive rate the filter is sized for when memory allows.
+ERROR_RATE = 0.001
+# Capacity assumed when the parent table's row count is unknown.
+DEFAULT_CAPACITY = 10_000_000
+
+
+def _hash_pair(value: Any) -> tuple[int, int]:
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        data = bytes(value)
+    else:
+        data = str(value).encode("utf-8")
+    digest = hashlib.blake2b(data, digest_size=16).digest()
+    return int.from_bytes(digest[:8], "big"), int.from_bytes(digest[8:], "big") | 1
+
+
+def _hash_batch(
+    values: list[Any], bits: int
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    _hash_pair of each distinct non-null value, reduced modulo bits, with the
+    value's count. The filter positions (first + i * step) % bits are the
+    same from the reduced pair, which keeps them within int64.
+    """
+    counts = Counter(values)
+    counts.pop(None, None)
+    pairs = [_hash_pair(value) for value in counts]
+    return (
+        np.array([first % bits for first, _ in pairs], dtype=np.int64),
+        np.array([step % bits for _, step in pairs], dtype=np.int64),
+        np.fromiter(counts.values(), dtype=np.int64, count=len(counts)),
+    )
+
+
+class BloomFilter:
+    """
+    Set membership with no false negatives and a bounded false-positive rate,
+    in a fixed bit array. A value reported absent was never added; a value
+    reported present was added with probability 1 - false_positive_rate().
+    """
+
+    def __init__(self, bits: int, hashes: int) -> None:
+        if bits < 8 or hashes < 1:
+            raise ValueError("A Bloom filter needs at least 8 bits and one hash")
+        self.bits = bits
+        self.hashes = hashes
+        self.array = bytearray((bits + 7) // 8)
+        self.count = 0
+
+    @classmethod
+    def for_capacity(
+        cls,
+        capacity: int | None,
+        error_rate: float = ERROR_RATE,
+        max_bytes: int = MAX_BYTES,
+    ) -> "BloomFilter":
+        """
+        Filter sized for `capacity` values at `error_rate`, but never larger than
+        max_bytes; past that size the error rate grows instead of the memory.
+        """
+        capacity = max(1, capacity or DEFAULT_CAPACITY)
+        bits = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        bits = max(8, min(bits, max_bytes * 8))
+        hashes = max(1, round(bits / capacity * math.log(2)))
+        return cls(bits, min(hashes, 16))
+
+    def add(self, value: Any) -> None:
+        if value is None:
+            return
+        first, step = _hash_pair(value)
+        for i in range(self.hashes):
+            position = (first + i * step) % self.bits
+            self.array[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def _positions(self, first: np.ndarray, step: np.ndarray) -> np.ndarray:
+        return (first[:, None] + np.arange(self.hashes) * step[:, None]) % self.bits
+
+    def update(self, values: Iterable[Any]) -> None:
+        """Adds values batch by batch, each hashed in a CPU worker process."""
+        array = np.frombuffer(self.array, dtype=np.uint8)
+        for first, step, counts in map_in_processes(
+            _hash_batch, batched(values), self.bits
+        ):
+            positions = self._positions(first, step).ravel()
+            np.bitwise_or.at(
+                array, positions >> 3, (1 << (positions & 7)).astype(np.uint8)
+            )
+            self.count += int(counts.sum())
+
+    def _contains_hashed(self, first: np.ndarray, step: np.ndarray) -> np.ndarray:
+        """Membership of each value of a _hash_batch, like `in`."""
+        positions = self._positions(first, step)
+        array = np.frombuffer(self.array, dtype=np.uint8)
+        return ((array[positions >> 3] >> (positions & 7)) & 1).all(axis=1)
+
+    def __contains__(self, value: Any) -> bool:
+        first, step = _hash_pair(value)
+        for i in range(self.hashes):
+            position = (first + i * step) % self.bits
+            if not self.array[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    def false_positive_rate(self) -> float:
+        """Probability that an absent value is reported present, from the values added."""
+        return (1 - math.exp(-self.hashes * self.count / self.bits)) ** self.hashes
+
+    @property
+    def size_bytes(self) -> int:
+        return len(self.array)
+
+
+def orphan_estimate(
+    parent_keys: Iterable[Any],
+    child_values: Iterable[Any],
+    parent_rows: int | None = None,
+) -> dict[str, Any]:
+    """
+    Percentage of child values missing from the parent keys, checked against
+    a Bloom filter of the streamed parent keys. False positives can only hide
+    orphans, so the figure is a lower bound within the reported error rate.
+    """
+    bloom = BloomFilter.for_capacity(parent_rows)
+    bloom.update(parent_keys)
+    total = missing = 0
+    # FK samples repeat values heavily; each batch probes its distinct values once.
+    for first, step, counts in map_in_processes(
+        _hash_batch, batched(child_values), bloom.bits
+    ):
+        total += int(counts.sum())
+        missing += int(counts[~bloom._contains_hashed(first, step)].sum())
+    orphan_pct = (missing / total) * 100 if total > 0 else 0
+    return {
+        "value": round(orphan_pct, 2),
+        "estimate": {
+            "method": "bloom_filter",
+            "parent_keys": bloom.count,
+            "values_checked": total,
+            "false_positive_rate": round(bloom.false_positive_rate(), 6),
+            "filter_bytes": bloom.size_bytes,
+        },
+    }
@@ -0,0 +1,62 @@
+import logging
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+PROFILE_MODES = ("sampled", "statistics")
+
+
+def statistics_provenance(source: str, col_stats: dict[str, Any]) -> dict[str, Any]:
+    """Describes where a profiled figure came from and how stale the source is."""
+    return {
+        "source": source,
+        "last_updated": col_stats.get("last_updated"),
+        "age_hours": col_stats.get("age_hours"),
+        "rows_modified_since": col_stats.get("rows_modified_since"),
+    }
+
+
+def nullability_from_statistics(
+    columns: dict[str, Any], table_stats: dict[str, dict[str, Any]]
+) -> tuple[dict[str, Any], dict[str, dict[str, Any]], dict[str, Any]]:
+    """
+    Resolves null percentages without scanning the table. NOT NULL columns are
+    0% by definition; other columns use the optimizer's null fraction.
+
+    Returns the nullability figures, their provenance per column, and the
+    columns that have no statistics and still need a sampled scan.
+    """
+    nullability: dict[str, Any] = {}
+    provenance: dict[str, dict[str, Any]] = {}
+    unresolved: dict[str, Any] = {}
+    for col_name, col_info in columns.items():
+        col_stats = table_stats.get(col_name, {})
+        if not col_info.get("nullable", True):
+            nullability[col_name] = 0.0
+            provenance[col_name] = {"source": "not_null_constraint"}
+        elif col_stats.get("null_frac") is not None:
+            nullability[col_name] = round(float(col_stats["null_frac"]) * 100, 2)
+            provenance[col_name] = statistics_provenance(col_stats["source"], col_stats)
+        else:
+            unresolved[col_name] = col_info
+    return nullability, provenance, unresolved
+
+
+def cardinality_from_statistics(col_stats: dict[str, Any]) -> int | None:
+    """Returns the optimizer's distinct-value estimate for a column, if any."""
+    n_distinct = col_stats.get("n_distinct")
+    if n_distinct is None:
+        return None
+    return round(float(n_distinct))
+
+
+def merge_column_provenance(
+    profile_provenance: dict[str, dict[str, dict[str, Any]]],
+    table_name: str,
+    figure: str,
+    provenance: dict[str, dict[str, Any]],
+) -> None:
+    """Stores per-column provenance as profile[table][column][figure]."""
+    table_provenance = profile_provenance.setdefault(table_name, {})
+    for col_name, entry in provenance.items():
+        table_provenance.setdefault(col_name, {})[figure] = entry
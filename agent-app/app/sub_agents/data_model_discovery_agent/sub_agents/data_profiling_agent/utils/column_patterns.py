@@ -0,0 +1,292 @@
+import math
+import os
+import re
+from collections.abc import Iterable, Iterator, Sequence
+from operator import itemgetter
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from app.sub_agents.data_model_discovery_agent.utils.blocking import map_in_processes
+
+# Share of a column's values one pattern must match before the rest are anomalies.
+DOMINANT_SHARE = 0.8
+# Most frequent values reported per column.
+TOP_VALUES = 5
+# Sample values quoted in profiles and anomaly messages are cut to this length.
+MAX_VALUE_LENGTH = 50
+# Rows read for pattern profiles at most; shares and anomalies are stable well
+# below typical sample sizes, while the regex work grows with every row.
+MAX_SAMPLE_ROWS = int(os.environ.get("COLUMN_PATTERNS_MAX_ROWS", "100000"))
+# Rows counted at once, in a CPU worker process; bounds the memory of a large
+# sample and the time spent sending a chunk to a worker, while keeping the
+# per-chunk pandas overhead small.
+CHUNK_ROWS = int(os.environ.get("COLUMN_PATTERNS_CHUNK_ROWS", "20000"))
+# Most frequent values of each chunk merged into the top values; a value
+# frequent enough to rank among the TOP_VALUES stays among them.
+TOP_VALUE_CANDIDATES = 10000
+# Values quoted per pattern in anomaly messages.
+EXAMPLES = 3
+
+# Checked in order; a value takes the first pattern it matches in full, or "text".
+_PATTERNS = {
+    "integer": r"[+-]?\d+",
+    "decimal": r"[+-]?(?:\d+\.\d*|\.\d+)(?:[eE][+-]?\d+)?",
+    "date": (
+        r"\d{4}-\d{2}-\d{2}(?:[ T]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?"
+        r"(?:Z|[+-]\d{2}:?\d{2})?)?|\d{1,2}[/.]\d{1,2}[/.]\d{2,4}"
+    ),
+    "email": r"[^@\s]+@[^@\s]+\.[A-Za-z]{2,}",
+    "uuid": r"[0-9a-fA-F]{8}-(?:[0-9a-fA-F]{4}-){3}[0-9a-fA-F]{12}",
+    "ipv4": r"(?:\d{1,3}\.){3}\d{1,3}",
+}
+_CLASSIFIER = re.compile(
+    "|".join(f"(?P<{kind}>{regex})" for kind, regex in _PATTERNS.items())
+)
+# Text that only ever holds these patterns is probably stored with the wrong type.
+_TYPED_PATTERNS = {"integer", "decimal", "date"}
+
+
+def is_code_like(col_name: str) -> bool:
+    """Names suggesting phone numbers or postal codes, which should hold digits only."""
+    name = col_name.lower()
+    return "phone" in name or "zip" in name or "postal" in name
+
+
+def _as_text(value: Any) -> str:
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes(value).decode("utf-8", errors="replace")
+    return str(value)
+
+
+def _clip(value: str) -> str:
+    if len(value) <= MAX_VALUE_LENGTH:
+        return value
+    return value[: MAX_VALUE_LENGTH - 3] + "..."
+
+
+def _classify(values: pd.Index) -> np.ndarray:
+    return np.array(
+        [
+            match.lastgroup if (match := _CLASSIFIER.fullmatch(value)) else "text"
+            for value in values
+        ],
+        dtype=object,
+    )
+
+
+def _length_percentile(histogram: np.ndarray, q: float) -> int:
+    """np.percentile of the lengths a histogram counts, without expanding it."""
+    cumulative = np.cumsum(histogram)
+    position = q / 100 * (cumulative[-1] - 1)
+    lower = int(np.searchsorted(cumulative, math.floor(position), side="right"))
+    upper = int(np.searchsorted(cumulative, math.ceil(position), side="right"))
+    return int(lower + (upper - lower) * (position - math.floor(position)))
+
+
+class _PatternTally:
+    """
+    Counts behind one column's pattern profile, counted chunk by chunk and
+    merged so a large sample is never held in memory at once.
+    """
+
+    def __init__(self, col_name: str) -> None:
+        self.col_name = col_name
+        self.total = 0
+        self.kinds: dict[str, int] = {}
+        self.examples: dict[str, list[str]] = {}
+        self.lengths = np.zeros(1, dtype=np.int64)
+        self.top: dict[str, int] = {}
+        self.hashes: list[np.ndarray] = []
+        self.non_numeric = 0
+
+    def add(self, series: pd.Series) -> None:
+        series = series.dropna()
+        if series.empty:
+            return
+        if pd.api.types.infer_dtype(series, skipna=True) != "string":
+            series = series.map(_as_text)
+
+        # Each distinct value of the batch is classified once, in one regex
+        # pass over all patterns, and weighted by its count.
+        counts = series.value_counts()
+        values = counts.index.astype(str)
+        weights = counts.to_numpy()
+        kinds = _classify(values)
+        self.total += int(weights.sum())
+        for kind in set(kinds):
+            matches = kinds == kind
+            self.kinds[kind] = self.kinds.get(kind, 0) + int(weights[matches].sum())
+            examples = self.examples.setdefault(kind, [])
+            for value in values[matches][:EXAMPLES]:
+                if len(examples) < EXAMPLES and value not in examples:
+                    examples.append(value)
+
+        lengths = np.bincount(
+            np.fromiter(map(len, values), dtype=np.int64, count=len(values)),
+            weights=weights,
+        ).astype(np.int64)
+        if len(lengths) > len(self.lengths):
+            self.lengths = np.pad(self.lengths, (0, len(lengths) - len(self.lengths)))
+        self.lengths[: len(lengths)] += lengths
+        self._add_top(
+            zip(
+                values[:TOP_VALUE_CANDIDATES],
+                weights[:TOP_VALUE_CANDIDATES].tolist(),
+                strict=True,
+            )
+        )
+        # Distinct values are counted by hash, 8 bytes each, across chunks; the
+        # hash does not depend on the process, unlike hash().
+        self.hashes.append(pd.util.hash_array(values.to_numpy(dtype=object)))
+        if is_code_like(self.col_name):
+            self.non_numeric += int(weights[values.str.contains(r"[^0-9.-]")].sum())
+
+    def _add_top(self, counts: Iterable[tuple[str, int]]) -> None:
+        for value, count in counts:
+            self.top[value] = self.top.get(value, 0) + count
+        if len(self.top) > 2 * TOP_VALUE_CANDIDATES:
+            self.top = dict(
+                sorted(self.top.items(), key=itemgetter(1), reverse=True)[
+                    :TOP_VALUE_CANDIDATES
+                ]
+            )
+
+    def merge(self, other: "_PatternTally") -> None:
+        """Adds the counts of another chunk of the same column."""
+        self.total += other.total
+        for kind, count in other.kinds.items():
+            self.kinds[kind] = self.kinds.get(kind, 0) + count
+        for kind, values in other.examples.items():
+            examples = self.examples.setdefault(kind, [])
+            for value in values:
+                if len(examples) < EXAMPLES and value not in examples:
+                    examples.append(value)
+        if len(other.lengths) > len(self.lengths):
+            self.lengths = np.pad(
+                self.lengths, (0, len(other.lengths) - len(self.lengths))
+            )
+        self.lengths[: len(other.lengths)] += other.lengths
+        self._add_top(other.top.items())
+        self.hashes.extend(other.hashes)
+        self.non_numeric += other.non_numeric
+
+    def profile(self) -> tuple[dict[str, Any], list[str]]:
+        total = self.total
+        if total == 0:
+            return {"values_sampled": 0}, []
+        shares = sorted(self.kinds.items(), key=lambda item: item[1], reverse=True)
+        dominant = shares[0][0]
+        dominant_share = shares[0][1] / total
+        lengths = self.lengths
+        present = np.flatnonzero(lengths)
+
+        profile = {
+            "values_sampled": total,
+            "distinct": int(
+                np.count_nonzero(np.diff(np.sort(np.concatenate(self.hashes)))) + 1
+            ),
+            "patterns": {kind: round(count / total, 4) for kind, count in shares},
+            "dominant_pattern": dominant,
+            "mixed_type_ratio": round(1 - dominant_share, 4),
+            "length": {
+                "min": int(present[0]),
+                "p50": _length_percentile(lengths, 50),
+                "p95": _length_percentile(lengths, 95),
+                "max": int(present[-1]),
+                "mean": round(
+                    float(np.dot(np.arange(len(lengths)), lengths) / total), 2
+                ),
+            },
+            "top_values": [
+                {"value": _clip(value), "count": int(count)}
+                for value, count in sorted(
+                    self.top.items(), key=lambda item: item[1], reverse=True
+                )[:TOP_VALUES]
+            ],
+        }
+
+        anomalies = []
+        if self.non_numeric > 0:
+            anomalies.append(
+                f"Found {self.non_numeric} rows with non-numeric characters in sample."
+            )
+        if dominant != "text" and DOMINANT_SHARE <= dominant_share < 1:
+            outliers = [
+                value for kind, _ in shares[1:] for value in self.examples[kind]
+            ]
+            examples = ", ".join(f"'{_clip(v)}'" for v in outliers[:EXAMPLES])
+            anomalies.append(
+                f"{dominant_share:.1%} of sampled values look like {dominant}; "
+                f"{total - shares[0][1]} rows do not (e.g. {examples})."
+            )
+        elif (
+            dominant in _TYPED_PATTERNS
+            and dominant_share == 1
+            and not is_code_like(self.col_name)
+        ):
+            anomalies.append(
+                f"All {total} sampled values look like {dominant}; "
+                "the column may be stored as text by mistake."
+            )
+        return profile, anomalies
+
+
+def _count_chunk(
+    batches: list[Sequence[Sequence[Any]]], columns: list[str]
+) -> list[_PatternTally]:
+    frame = pd.DataFrame.from_records(
+        [row for batch in batches for row in batch], columns=columns
+    )
+    tallies = [_PatternTally(col_name) for col_name in columns]
+    for tally in tallies:
+        tally.add(frame[tally.col_name])
+    return tallies
+
+
+def profile_text_columns(
+    batches: Iterable[Sequence[Sequence[Any]]], columns: list[str]
+) -> dict[str, dict[str, Any]]:
+    """
+    Pattern profile of every column of sampled row batches: the share of
+    values that look like integers, decimals, dates, emails, UUIDs or IPv4
+    addresses, the mixed-type ratio, length distribution and top values.
+    Columns with values outside their dominant pattern, or text columns
+    holding only typed values, get anomaly messages. Rows are counted in
+    chunks of CHUNK_ROWS in the CPU worker processes and dropped, so the
+    sample is never held at once. A batch is only iterated there, so it can
+    defer decoding its rows until then.
+    """
+
+    def chunks() -> Iterator[list[Sequence[Sequence[Any]]]]:
+        chunk: list[Sequence[Sequence[Any]]] = []
+        rows = 0
+        for batch in batches:
+            chunk.append(batch)
+            rows += len(batch)
+            if rows >= CHUNK_ROWS:
+                yield chunk
+                chunk = []
+                rows = 0
+        if chunk:
+            yield chunk
+
+    tallies: list[_PatternTally] = []
+    for chunk_tallies in map_in_processes(_count_chunk, chunks(), columns):
+        if not tallies:
+            tallies = chunk_tallies
+            continue
+        for tally, chunk_tally in zip(tallies, chunk_tallies, strict=True):
+            tally.merge(chunk_tally)
+    if not tallies:
+        tallies = [_PatternTally(col_name) for col_name in columns]
+
+    patterns: dict[str, Any] = {}
+    anomalies: dict[str, list[str]] = {}
+    for tally in tallies:
+        profile, messages = tally.profile()
+        patterns[tally.col_name] = profile
+        if messages:
+            anomalies[tally.col_name] = messages
+    return {"patterns": patterns, "anomalies": anomalies}
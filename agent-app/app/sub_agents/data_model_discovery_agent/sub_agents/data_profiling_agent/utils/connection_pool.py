@@ -0,0 +1,129 @@
+import logging
+import queue
+import threading
+import time
+from collections.abc import Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, TypeVar
+
+from .load_shedding import AdaptiveConcurrency
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Returned by run_on_pool for tasks that had not started by the deadline.
+SKIPPED = object()
+
+
+class ConnectionPool:
+    """
+    A bounded set of connections to one database, each lent to a single worker
+    at a time. The caller's connection seeds the pool and stays owned by the
+    caller; further connections are opened lazily with `connect` up to `size`
+    and closed by `close()`. If `connect` fails, the pool shrinks to the
+    connections it already has.
+    """
+
+    def __init__(
+        self,
+        conn: Any,
+        connect: Callable[[], Any] | None = None,
+        size: int = 1,
+    ) -> None:
+        self._connect = connect
+        self.size = max(1, size) if connect else 1
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._idle.put(conn)
+        self._opened: list[Any] = []
+        self._lock = threading.Lock()
+
+    def _acquire(self) -> Any:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            can_open = 1 + len(self._opened) < self.size
+            if can_open:
+                # Reserve the slot before connecting so concurrent callers
+                # never exceed the bound.
+                self._opened.append(None)
+        if not can_open:
+            return self._idle.get()
+        try:
+            new_conn = self._connect()
+        except Exception as e:
+            # Carry on with the connections already open rather than failing
+            # the run, e.g. when the process-wide connection cap is reached.
+            with self._lock:
+                self._opened.remove(None)
+                self.size = 1 + len(self._opened)
+            logger.warning(
+                f"Could not open another pooled connection, continuing with "
+                f"{self.size}: {e}"
+            )
+            return self._idle.get()
+        with self._lock:
+            self._opened[self._opened.index(None)] = new_conn
+        return new_conn
+
+    @contextmanager
+    def connection(self) -> Iterator[Any]:
+        conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            self._idle.put(conn)
+
+    def close(self) -> None:
+        with self._lock:
+            opened, self._opened = self._opened, []
+        for conn in opened:
+            if conn is None:
+                continue
+            try:
+                conn.close()
+            except Exception as e:
+                logger.error(f"Error closing pooled connection: {e}")
+
+
+def run_on_pool(
+    pool: ConnectionPool,
+    tasks: list[Callable[[Any], T]],
+    deadline: float | None = None,
+    controller: AdaptiveConcurrency | None = None,
+) -> list[T | object]:
+    """
+    Runs each task with a connection from the pool, at most `pool.size` at a
+    time, and returns the results in the order of `tasks`. Tasks that have not
+    started by `deadline` (a time.monotonic() value) return SKIPPED. With a
+    `controller`, a task also waits for one of its slots and returns SKIPPED
+    if the controller stops the run.
+    """
+
+    def run(task: Callable[[Any], T]) -> T | object:
+        if deadline is not None and time.monotonic() >= deadline:
+            return SKIPPED
+        if controller is None:
+            with pool.connection() as conn:
+                if deadline is not None and time.monotonic() >= deadline:
+                    return SKIPPED
+                return task(conn)
+        if not controller.admit(deadline):
+            return SKIPPED
+        started = time.monotonic()
+        try:
+            with pool.connection() as conn:
+                return task(conn)
+        finally:
+            controller.release(time.monotonic() - started)
+
+    if pool.size == 1:
+        return [run(task) for task in tasks]
+    with ThreadPoolExecutor(
+        max_workers=pool.size, thread_name_prefix="data-profiling"
+    ) as executor:
+        futures = [executor.submit(run, task) for task in tasks]
+        return [future.result() for future in futures]
@@ -0,0 +1,208 @@
+import base64
+import hashlib
+import math
+import os
+from collections.abc import Callable, Iterable
+from typing import Any
+
+import numpy as np
+
+from app.sub_agents.data_model_discovery_agent.utils.blocking import (
+    batched,
+    map_in_processes,
+)
+
+MIN_PRECISION = 4
+MAX_PRECISION = 18
+
+# Rows a sketched column should send to the client at most; larger columns
+# are hash-sampled on the server, keeping the values of 1 in 2**k hashes.
+HASH_SAMPLE_ROWS = int(os.environ.get("CARDINALITY_HASH_SAMPLE_ROWS", "200000"))
+# Largest k of a hash sample; keeps the mask within a signed 32-bit hash.
+MAX_SAMPLE_BITS = 30
+
+
+def precision_for_error(relative_error: float) -> int:
+    """Smallest precision whose standard error, 1.04 / sqrt(2**p), is within relative_error."""
+    if not 0 < relative_error < 1:
+        raise ValueError(
+            f"relative_error must be between 0 and 1, got {relative_error}"
+        )
+    precision = math.ceil(math.log2((1.04 / relative_error) ** 2))
+    return min(MAX_PRECISION, max(MIN_PRECISION, precision))
+
+
+def _hash64(value: Any) -> int:
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        data = bytes(value)
+    else:
+        data = str(value).encode("utf-8")
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "big")
+
+
+class HyperLogLog:
+    """
+    Distinct-value sketch with a fixed memory footprint of 2**precision bytes.
+
+    Sketches of the same precision can be merged, so partitions or shards of a
+    column can be sketched independently and combined into one estimate.
+    NULLs are ignored, matching COUNT(DISTINCT col).
+    """
+
+    def __init__(self, precision: int = 14) -> None:
+        if not MIN_PRECISION <= precision <= MAX_PRECISION:
+            raise ValueError(
+                f"precision must be between {MIN_PRECISION} and {MAX_PRECISION}"
+            )
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    @classmethod
+    def for_error(cls, relative_error: float) -> "HyperLogLog":
+        return cls(precision_for_error(relative_error))
+
+    @property
+    def relative_error(self) -> float:
+        """Relative standard error of count()."""
+        return 1.04 / math.sqrt(len(self.registers))
+
+    def add(self, value: Any) -> None:
+        if value is None:
+            return
+        hashed = _hash64(value)
+        remaining_bits = 64 - self.precision
+        index = hashed >> remaining_bits
+        rest = hashed & ((1 << remaining_bits) - 1)
+        rank = remaining_bits - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def update(self, values: Iterable[Any]) -> None:
+        """Adds values batch by batch, each sketched in a CPU worker process and merged."""
+        for sketch in map_in_processes(_sketch_batch, batched(values), self.precision):
+            self.merge(sketch)
+
+    def merge(self, other: "HyperLogLog") -> None:
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge sketches with different precision")
+        self.registers = bytearray(
+            np.maximum(
+                np.frombuffer(self.registers, dtype=np.uint8),
+                np.frombuffer(other.registers, dtype=np.uint8),
+            ).tobytes()
+        )
+
+    def count(self) -> int:
+        m = len(self.registers)
+        if m == 16:
+            alpha = 0.673
+        elif m == 32:
+            alpha = 0.697
+        elif m == 64:
+            alpha = 0.709
+        else:
+            alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0**-r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # Linear counting is more accurate while many registers are empty
+            estimate = m * math.log(m / zeros)
+        return round(estimate)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "precision": self.precision,
+            "registers": base64.b64encode(bytes(self.registers)).decode("ascii"),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "HyperLogLog":
+        sketch = cls(data["precision"])
+        registers = base64.b64decode(data["registers"])
+        if len(registers) != len(sketch.registers):
+            raise ValueError("Register count does not match precision")
+        sketch.registers = bytearray(registers)
+        return sketch
+
+
+def _sketch_batch(values: list[Any], precision: int) -> HyperLogLog:
+    sketch = HyperLogLog(precision)
+    for value in values:
+        sketch.add(value)
+    return sketch
+
+
+def estimate_bounds(estimate: int, relative_error: float) -> dict[str, int]:
+    """Approximate 95% interval (two standard errors) around an estimate."""
+    return {
+        "low": max(0, math.floor(estimate * (1 - 2 * relative_error))),
+        "high": math.ceil(estimate * (1 + 2 * relative_error)),
+    }
+
+
+def hash_sample_bits(row_estimate: int | None) -> int:
+    """Smallest k for which 1 in 2**k rows stays within HASH_SAMPLE_ROWS."""
+    if not row_estimate or row_estimate <= HASH_SAMPLE_ROWS:
+        return 0
+    bits = math.ceil(math.log2(row_estimate / HASH_SAMPLE_ROWS))
+    return min(MAX_SAMPLE_BITS, bits)
+
+
+def _sampling_error(sampled_count: int, bits: int) -> float:
+    """Relative standard error of scaling the distinct count of a 1 in 2**bits hash sample."""
+    return math.sqrt((1 - 2.0**-bits) / max(1, sampled_count))
+
+
+def hash_sampled_count(
+    stream: Callable[[int], Iterable[Any]],
+    row_estimate: int | None,
+    relative_error: float,
+    exact: Callable[[], int],
+) -> tuple[int, dict[str, Any]]:
+    """
+    Distinct count of a column from a HyperLogLog sketch of the values whose
+    server-side hash has its low k bits clear, scaled by 2**k. `stream(k)`
+    yields those values; k follows from the row estimate, and is lowered when
+    the sample holds too few distinct values for relative_error. A column too
+    small to sample within it is counted by `exact()` instead.
+
+    The error is split evenly between the sketch and the sampling, so the
+    reported error, their combination, stays within relative_error.
+    """
+    bits = hash_sample_bits(row_estimate)
+    if not bits:
+        sketch = HyperLogLog.for_error(relative_error)
+        sketch.update(stream(0))
+        estimate = sketch.count()
+        return estimate, {
+            "method": "hyperloglog",
+            "relative_error": round(sketch.relative_error, 4),
+            **estimate_bounds(estimate, sketch.relative_error),
+        }
+
+    share = relative_error / math.sqrt(2)
+    while bits:
+        sketch = HyperLogLog.for_error(share)
+        sketch.update(stream(bits))
+        sampled = sketch.count()
+        sampling_error = _sampling_error(sampled, bits)
+        if sampling_error <= share:
+            estimate = sampled << bits
+            error = math.hypot(sketch.relative_error, sampling_error)
+            return estimate, {
+                "method": "hyperloglog",
+                "relative_error": round(error, 4),
+                "hash_sample": f"1/{1 << bits}",
+                **estimate_bounds(estimate, error),
+            }
+        # (2**k - 1) / distinct <= share**2 bounds the sampling error.
+        fitting = math.floor(math.log2(1 + (sampled << bits) * share**2))
+        bits = min(bits - 1, fitting)
+
+    value = exact()
+    return value, {
+        "method": "exact",
+        "relative_error": 0.0,
+        "low": value,
+        "high": value,
+    }
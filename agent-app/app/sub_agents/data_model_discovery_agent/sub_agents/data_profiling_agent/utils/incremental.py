@@ -0,0 +1,211 @@
+import hashlib
+import json
+import logging
+import os
+from typing import Any
+
+from app.sub_agents.data_model_discovery_agent.sub_agents.schema_introspection_agent.utils.schema_cache import (
+    DiskSchemaCache,
+    GcsSchemaCache,
+    SchemaCache,
+)
+
+logger = logging.getLogger(__name__)
+
+# Where stored profiles are kept, and how many, unless PROFILE_STORE_DIR and
+# PROFILE_STORE_MAX_ENTRIES say otherwise.
+DEFAULT_PROFILE_STORE_DIR = os.path.join(
+    os.path.expanduser("~"), ".cache", "data_model_discovery", "profile_store"
+)
+DEFAULT_PROFILE_STORE_ENTRIES = 256
+
+# Per-table figures copied from a stored profile for tables that did not change.
+TABLE_FIGURES = (
+    "nullability",
+    "cardinality",
+    "column_stats",
+    "column_patterns",
+    "statistics_provenance",
+    "cardinality_estimates",
+    "sampling",
+)
+
+# Catalog size estimates in the introspected tables and their partitions; they
+# move without DDL, so they are not part of a table's structure.
+SIZE_ESTIMATES = ("row_estimate", "total_bytes")
+
+
+def profile_store_key(
+    metadata: dict[str, Any], schema_name: str, options: dict[str, Any]
+) -> str:
+    """
+    Store key for the latest profile of one schema taken by one user, who may
+    not read the tables another user profiled. Profiles taken with other
+    sampling options are kept apart, since their figures are not comparable.
+    """
+    key_fields = [
+        "data_profile",
+        metadata.get("db_type"),
+        metadata.get("host"),
+        str(metadata.get("port")),
+        metadata.get("dbname"),
+        metadata.get("user"),
+        schema_name,
+        sorted(options.items()),
+    ]
+    return hashlib.sha256(json.dumps(key_fields).encode("utf-8")).hexdigest()
+
+
+def get_profile_store(min_entries: int = 0) -> SchemaCache | None:
+    """
+    Builds the store of the latest profile per schema and user from the
+    environment. Profiles hold sampled data values (top values, min/max,
+    anomaly samples), so they stay on local disk unless copying them to a
+    bucket is asked for: PROFILE_STORE_BACKEND is "disk" (default), "gcs"
+    (disk in front of PROFILE_STORE_GCS_BUCKET) or "none";
+    PROFILE_STORE_DIR and PROFILE_STORE_MAX_ENTRIES tune the disk backend,
+    which keeps at least `min_entries` profiles.
+    """
+    backend = os.getenv("PROFILE_STORE_BACKEND", "disk").lower()
+    if backend == "none":
+        return None
+    backends: list[Any] = [
+        DiskSchemaCache(
+            os.getenv("PROFILE_STORE_DIR", DEFAULT_PROFILE_STORE_DIR),
+            max(
+                min_entries,
+                int(
+                    os.getenv(
+                        "PROFILE_STORE_MAX_ENTRIES", str(DEFAULT_PROFILE_STORE_ENTRIES)
+                    )
+                ),
+            ),
+        )
+    ]
+    if backend == "gcs":
+        bucket_name = os.getenv("PROFILE_STORE_GCS_BUCKET")
+        if bucket_name:
+            backends.append(GcsSchemaCache(bucket_name, prefix="profile_store/"))
+        else:
+            logger.warning("PROFILE_STORE_BACKEND=gcs but no bucket is configured.")
+    return SchemaCache(backends)
+
+
+def _without_estimates(info: dict[str, Any]) -> dict[str, Any]:
+    return {k: v for k, v in info.items() if k not in SIZE_ESTIMATES}
+
+
+def table_signature(table_info: dict[str, Any]) -> str:
+    """Hash of a table's introspected structure; any DDL change alters it."""
+    structure = _without_estimates(table_info)
+    if "partitioning" in structure:
+        # Attaching or detaching a partition changes the list, not its sizes.
+        structure["partitioning"] = {
+            **structure["partitioning"],
+            "partitions": [
+                _without_estimates(partition)
+                for partition in structure["partitioning"]["partitions"]
+            ],
+        }
+    return hashlib.sha256(
+        json.dumps(structure, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()
+
+
+def orphan_check_name(fk: dict[str, Any]) -> str:
+    return (
+        f"{fk['from_table']}.{fk['from_column']} -> {fk['to_table']}.{fk['to_column']}"
+    )
+
+
+def profile_snapshot(
+    schema_name: str,
+    schema_structure: dict[str, Any],
+    profile_results: dict[str, Any],
+    change_indicators: dict[str, str],
+) -> dict[str, Any]:
+    """
+    What an incremental run needs from this one: the profile, plus the change
+    indicator and structure of every table that was profiled completely.
+    """
+    tables = schema_structure.get("tables", {})
+    return {
+        "schema_name": schema_name,
+        "profile": profile_results,
+        "change_indicators": change_indicators,
+        "table_signatures": {
+            table_name: table_signature(tables[table_name])
+            for table_name in change_indicators
+            if table_name in tables
+        },
+    }
+
+
+def reusable_tables(
+    previous: dict[str, Any] | None,
+    schema_structure: dict[str, Any],
+    change_indicators: dict[str, str],
+) -> set[str]:
+    """
+    Tables whose stored results are still valid: same change indicator and
+    same structure as when they were last profiled completely. Tables without
+    a change indicator are always re-profiled.
+    """
+    if not previous:
+        return set()
+    previous_indicators = previous.get("change_indicators", {})
+    previous_signatures = previous.get("table_signatures", {})
+    previous_nullability = previous.get("profile", {}).get("nullability", {})
+    reusable = set()
+    for table_name, table_info in schema_structure.get("tables", {}).items():
+        indicator = change_indicators.get(table_name)
+        if indicator is None or previous_indicators.get(table_name) != indicator:
+            continue
+        if previous_signatures.get(table_name) != table_signature(table_info):
+            continue
+        if table_name in previous_nullability:
+            reusable.add(table_name)
+    return reusable
+
+
+def reusable_orphan_checks(
+    previous: dict[str, Any] | None,
+    foreign_keys: list[dict[str, Any]],
+    reused: set[str],
+) -> dict[str, Any]:
+    """Stored orphan percentages for FKs between two unchanged tables of the schema."""
+    if not previous:
+        return {}
+    previous_orphans = previous.get("profile", {}).get("orphan_records", {})
+    schema_name = previous.get("schema_name")
+    orphans = {}
+    for fk in foreign_keys:
+        if fk["from_table"] not in reused or fk["to_table"] not in reused:
+            continue
+        if fk.get("to_schema", schema_name) != schema_name:
+            continue
+        value = previous_orphans.get(orphan_check_name(fk))
+        if isinstance(value, (int, float)):
+            orphans[orphan_check_name(fk)] = value
+    return orphans
+
+
+def copy_table_results(
+    previous_profile: dict[str, Any],
+    profile_results: dict[str, Any],
+    table_name: str,
+    table_info: dict[str, Any],
+) -> None:
+    """Copies one table's stored figures and type anomalies into profile_results."""
+    for figure in TABLE_FIGURES:
+        if figure not in profile_results:
+            continue
+        if table_name in previous_profile.get(figure, {}):
+            profile_results[figure][table_name] = previous_profile[figure][table_name]
+    previous_anomalies = previous_profile.get("type_anomalies", {})
+    for col_name in table_info.get("columns", {}):
+        anomaly_key = f"{table_name}.{col_name}"
+        if anomaly_key in previous_anomalies:
+            profile_results["type_anomalies"][anomaly_key] = previous_anomalies[
+                anomaly_key
+            ]
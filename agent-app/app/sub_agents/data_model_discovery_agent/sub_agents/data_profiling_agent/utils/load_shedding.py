@@ -0,0 +1,240 @@
+import logging
+import os
+import threading
+import time
+from collections.abc import Callable
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+# Checks run at once when an adaptive run starts; the limit then grows by one
+# per healthy probe interval up to the pool size.
+INITIAL_CONCURRENCY = int(os.environ.get("PROFILING_INITIAL_CONCURRENCY", "2"))
+# Seconds between two reads of the server's load.
+PROBE_INTERVAL_SECONDS = float(os.environ.get("PROFILING_PROBE_INTERVAL", "2"))
+# Factor the limit is multiplied by when the server looks congested.
+DECREASE_FACTOR = 0.5
+# The probe query is slow when it takes this many times its fastest round
+# trip and at least PROBE_LATENCY_MIN_SLOWDOWN seconds longer; the second
+# bound keeps sub-millisecond jitter from counting.
+PROBE_LATENCY_FACTOR = 3.0
+PROBE_LATENCY_MIN_SLOWDOWN = 0.05
+# Active sessions besides the profiling ones above which concurrency shrinks,
+# and above which no new check starts until they drop again.
+ACTIVE_SESSIONS_HIGH = int(os.environ.get("PROFILING_ACTIVE_SESSIONS_HIGH", "16"))
+ACTIVE_SESSIONS_PAUSE = int(os.environ.get("PROFILING_ACTIVE_SESSIONS_PAUSE", "48"))
+# Replication lag (seconds) above which concurrency shrinks, and above which
+# profiling pauses.
+REPLICATION_LAG_HIGH = float(os.environ.get("PROFILING_REPLICATION_LAG_HIGH", "5"))
+REPLICATION_LAG_PAUSE = float(os.environ.get("PROFILING_REPLICATION_LAG_PAUSE", "30"))
+# Longest a run stays paused; checks not started by then are skipped.
+MAX_PAUSE_SECONDS = float(os.environ.get("PROFILING_MAX_PAUSE_SECONDS", "300"))
+# Throttling decisions kept in the profile; later ones are only counted.
+MAX_RECORDED_DECISIONS = 100
+
+
+def _percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class AdaptiveConcurrency:
+    """
+    AIMD limit on the profiling checks running at once, never above
+    `ceiling`. Every PROBE_INTERVAL_SECONDS one admitted check first reads the
+    server's load through `probe`, which returns the active sessions, the
+    replication lag and the probe's own round-trip time. A stressed server
+    pauses the run; a congested one, or a check that timed out, halves the
+    limit; a healthy one whose limit was in full use gets one more slot.
+    """
+
+    def __init__(self, probe: Callable[[], dict[str, Any]], ceiling: int) -> None:
+        self.ceiling = max(1, ceiling)
+        self.limit = max(1, min(INITIAL_CONCURRENCY, self.ceiling))
+        self._initial_limit = self.limit
+        self._max_limit = self.limit
+        self._probe = probe
+        self._cond = threading.Condition()
+        self._started = time.monotonic()
+        self._next_probe = self._started
+        self._probing = False
+        self._probes = 0
+        self._in_flight = 0
+        self._saturated = False
+        self._baseline: float | None = None
+        self._last_decrease = float("-inf")
+        self._paused_since: float | None = None
+        self._pauses = 0
+        self._paused_seconds = 0.0
+        self._gave_up = False
+        self._latencies: list[float] = []
+        self._decisions: list[dict[str, Any]] = []
+        self._decisions_dropped = 0
+
+    def _record(self, action: str, reason: str, signals: dict[str, Any]) -> None:
+        logger.info(f"Profiling concurrency {action} to {self.limit}: {reason}")
+        if len(self._decisions) >= MAX_RECORDED_DECISIONS:
+            self._decisions_dropped += 1
+            return
+        self._decisions.append(
+            {
+                "at_seconds": round(time.monotonic() - self._started, 2),
+                "action": action,
+                "limit": self.limit,
+                "reason": reason,
+                **signals,
+            }
+        )
+
+    def _decrease(self, reason: str, signals: dict[str, Any]) -> None:
+        self._last_decrease = time.monotonic()
+        new_limit = max(1, int(self.limit * DECREASE_FACTOR))
+        if new_limit != self.limit:
+            self.limit = new_limit
+            self._record("decrease", reason, signals)
+
+    def _decide(self, signals: dict[str, Any]) -> None:
+        """Applies one probe's signals; called with the lock held."""
+        now = time.monotonic()
+        latency = signals["probe_latency_ms"] / 1000
+        active = signals.get("active_sessions")
+        other_active = None if active is None else max(0, active - self._in_flight)
+        lag = signals.get("replication_lag_seconds")
+
+        stressed = []
+        if other_active is not None and other_active >= ACTIVE_SESSIONS_PAUSE:
+            stressed.append(f"{other_active} other active sessions")
+        if lag is not None and lag >= REPLICATION_LAG_PAUSE:
+            stressed.append(f"replication lag {lag:.1f}s")
+        if stressed:
+            if self._paused_since is None:
+                self._paused_since = now
+                self._pauses += 1
+                self._record("pause", ", ".join(stressed), signals)
+            return
+        if self._paused_since is not None:
+            self._paused_seconds += now - self._paused_since
+            self._paused_since = None
+            self.limit = 1
+            self._record(
+                "resume", "server load back below the pause thresholds", signals
+            )
+            return
+
+        congested = []
+        if self._baseline is not None and latency > max(
+            self._baseline * PROBE_LATENCY_FACTOR,
+            self._baseline + PROBE_LATENCY_MIN_SLOWDOWN,
+        ):
+            congested.append(
+                f"probe took {latency * 1000:.0f} ms against "
+                f"{self._baseline * 1000:.0f} ms at best"
+            )
+        if other_active is not None and other_active >= ACTIVE_SESSIONS_HIGH:
+            congested.append(f"{other_active} other active sessions")
+        if lag is not None and lag >= REPLICATION_LAG_HIGH:
+            congested.append(f"replication lag {lag:.1f}s")
+        self._baseline = (
+            latency if self._baseline is None else min(self._baseline, latency)
+        )
+
+        if congested:
+            self._decrease(", ".join(congested), signals)
+        elif self._saturated and self.limit < self.ceiling:
+            self.limit += 1
+            self._max_limit = max(self._max_limit, self.limit)
+            self._record("increase", "server healthy and every slot in use", signals)
+        self._saturated = self._in_flight >= self.limit
+
+    def _maybe_probe(self) -> None:
+        with self._cond:
+            if self._gave_up or self._probing or time.monotonic() < self._next_probe:
+                return
+            self._probing = True
+        signals = None
+        try:
+            signals = self._probe()
+        except Exception as e:
+            logger.warning(f"Could not read the server's load: {e}")
+        with self._cond:
+            self._probing = False
+            self._probes += 1
+            self._next_probe = time.monotonic() + PROBE_INTERVAL_SECONDS
+            if signals is not None and not self._gave_up:
+                self._decide(signals)
+            self._cond.notify_all()
+
+    def admit(self, deadline: float | None = None) -> bool:
+        """
+        Waits for a free slot and takes it. Returns False, without a slot,
+        once `deadline` has passed or the run was paused for MAX_PAUSE_SECONDS.
+        """
+        while True:
+            self._maybe_probe()
+            with self._cond:
+                now = time.monotonic()
+                if self._gave_up or (deadline is not None and now >= deadline):
+                    return False
+                if self._paused_since is not None:
+                    if now - self._paused_since >= MAX_PAUSE_SECONDS:
+                        self._gave_up = True
+                        self._paused_seconds += now - self._paused_since
+                        self._paused_since = None
+                        self._record(
+                            "stop",
+                            f"server stressed for {MAX_PAUSE_SECONDS:.0f}s",
+                            {},
+                        )
+                        self._cond.notify_all()
+                        return False
+                elif self._in_flight < self.limit:
+                    self._in_flight += 1
+                    if self._in_flight >= self.limit:
+                        self._saturated = True
+                    return True
+                wait = max(0.01, self._next_probe - now)
+                if deadline is not None:
+                    wait = min(wait, max(0.01, deadline - now))
+                self._cond.wait(wait)
+
+    def release(self, seconds: float) -> None:
+        """Frees a slot taken by admit; `seconds` is how long the check ran."""
+        with self._cond:
+            self._in_flight -= 1
+            self._latencies.append(seconds)
+            self._cond.notify_all()
+
+    def check_timed_out(self) -> None:
+        """A statement hit its timeout; halves the limit once per probe interval."""
+        with self._cond:
+            if time.monotonic() - self._last_decrease >= PROBE_INTERVAL_SECONDS:
+                self._decrease("a check timed out", {})
+
+    def summary(self) -> dict[str, Any]:
+        """Throttling figures and decisions of the run, for the profile metadata."""
+        with self._cond:
+            paused = self._paused_seconds
+            if self._paused_since is not None:
+                paused += time.monotonic() - self._paused_since
+            latencies = self._latencies
+            return {
+                "adaptive": True,
+                "ceiling": self.ceiling,
+                "initial_limit": self._initial_limit,
+                "max_limit": self._max_limit,
+                "final_limit": self.limit,
+                "probes": self._probes,
+                "pauses": self._pauses,
+                "paused_seconds": round(paused, 2),
+                "stopped_for_load": self._gave_up,
+                "check_seconds": {
+                    "count": len(latencies),
+                    "p50": round(_percentile(latencies, 0.5), 3) if latencies else None,
+                    "p95": round(_percentile(latencies, 0.95), 3)
+                    if latencies
+                    else None,
+                    "max": round(max(latencies), 3) if latencies else None,
+                },
+                "decisions": list(self._decisions),
+                "decisions_dropped": self._decisions_dropped,
+            }
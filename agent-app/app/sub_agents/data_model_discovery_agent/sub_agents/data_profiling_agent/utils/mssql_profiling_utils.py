@@ -1,8 +1,64 @@
 import logging
+import math
+from collections.abc import Callable, Iterator
+from decimal import Decimal
+from functools import partial
 from typing import Any
 
+from .bloom_filter import orphan_estimate
+from .catalog_statistics import (
+    cardinality_from_statistics,
+    nullability_from_statistics,
+    statistics_provenance,
+)
+from .column_patterns import MAX_SAMPLE_ROWS, profile_text_columns
+from .connection_pool import ConnectionPool
+from .hyperloglog import hash_sampled_count
+from .incremental import orphan_check_name
+from .profile_runner import TIMED_OUT, DialectProfiler, run_profile_checks
+from .sampling import SAMPLE_SEED, cap_sampling, plan_sampling, sample_percent
+from .value_overlap import BottomKSketch, hash_limit, sketch_text_kind
+
 logger = logging.getLogger(__name__)
 
+# Columns per fused aggregate statement; keeps the select list well below the
+# SQL Server 4096-column limit for very wide tables.
+FUSED_COLUMNS_PER_QUERY = 200
+
+# Rows fetched per round trip when streaming a column to the client.
+STREAM_BATCH_SIZE = 10000
+
+# APPROX_COUNT_DISTINCT guarantees a 2% error with 97% probability, about a 1%
+# relative standard error; tighter requests use a client-side sketch instead.
+APPROX_COUNT_DISTINCT_ERROR = 0.01
+
+# SQL Server's TABLESAMPLE only keeps whole pages; row samples keep the rows
+# whose content hash falls below the fraction, in this many buckets, so every
+# check of a table reads the same rows.
+ROW_SAMPLE_BUCKETS = 1000000
+
+_NUMERIC_TYPES = {
+    "tinyint",
+    "smallint",
+    "int",
+    "bigint",
+    "decimal",
+    "numeric",
+    "float",
+    "real",
+    "money",
+    "smallmoney",
+}
+_TEMPORAL_TYPES = {
+    "date",
+    "datetime",
+    "datetime2",
+    "smalldatetime",
+    "datetimeoffset",
+    "time",
+}
+_TEXT_TYPES = {"char", "varchar", "nchar", "nvarchar"}
+
 
 def _execute_query(conn: Any, query: str) -> list[dict[str, Any]]:
     """Executes a SQL query and returns results as a list of dicts for SQL Server."""
@@ -18,125 +74,828 @@ def _execute_query(conn: Any, query: str) -> list[dict[str, Any]]:
         cursor.close()
 
 
+def _to_profile_value(value: Any) -> Any:
+    """Keeps ints/floats as-is and stringifies other scalars so the profile stays JSON-safe."""
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, Decimal):
+        return float(value)
+    return str(value)
+
+
+def _column_aggregates(alias: str, col_name: str, col_type: str) -> list[str]:
+    """Returns the cheap aggregate expressions computed for a column in the fused query."""
+    col_type = (col_type or "").lower()
+    expressions = [f"COUNT_BIG([{col_name}]) AS {alias}_non_null"]
+    if col_type in _NUMERIC_TYPES or col_type in _TEMPORAL_TYPES:
+        expressions.append(f"MIN([{col_name}]) AS {alias}_min")
+        expressions.append(f"MAX([{col_name}]) AS {alias}_max")
+    elif col_type in _TEXT_TYPES:
+        expressions.append(f"MIN(LEN([{col_name}])) AS {alias}_min_length")
+        expressions.append(f"MAX(LEN([{col_name}])) AS {alias}_max_length")
+        expressions.append(
+            f"AVG(CAST(LEN([{col_name}]) AS FLOAT)) AS {alias}_avg_length"
+        )
+    return expressions
+
+
+def _sample_query(
+    full_table_name: str,
+    select_list: str,
+    sample_size: int,
+    sampling: dict[str, Any] | None = None,
+    where: str | None = None,
+) -> str:
+    """
+    SELECT of at most sample_size rows of a table, drawn as its sampling plan
+    says. Partitioned tables are read from the plan's partitions only, picked
+    by their partition function so that the others are eliminated, each up to
+    its share of the limit.
+    """
+    plan = sampling or {}
+    source = full_table_name
+    conditions = [f"({where})"] if where else []
+    if plan.get("strategy") == "page_sample":
+        source += (
+            f" TABLESAMPLE SYSTEM ({sample_percent(plan)} PERCENT) "
+            f"REPEATABLE ({SAMPLE_SEED})"
+        )
+    elif plan.get("strategy") == "row_sample":
+        buckets = max(1, int(plan["fraction"] * ROW_SAMPLE_BUCKETS))
+        conditions.insert(
+            0,
+            f"ABS(CAST(BINARY_CHECKSUM(*) AS bigint)) % {ROW_SAMPLE_BUCKETS} < {buckets}",
+        )
+    if plan.get("partitions"):
+        partitioning = plan["partitioning"]
+        partition_of = (
+            f"$PARTITION.[{partitioning['function']}]([{partitioning['key']}])"
+        )
+        branches = " UNION ALL ".join(
+            f"SELECT TOP ({p['limit']}) {select_list} FROM {source} WHERE "
+            + " AND ".join([f"{partition_of} = {p['name']}", *conditions])
+            for p in plan["partitions"]
+        )
+        return f"SELECT TOP ({sample_size}) * FROM ({branches}) AS partitions"
+    condition = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+    return f"SELECT TOP ({sample_size}) {select_list} FROM {source}{condition}"
+
+
+def _profile_column_nulls(
+    conn: Any,
+    full_table_name: str,
+    col_name: str,
+    sample_size: int,
+    sampling: dict[str, Any] | None = None,
+) -> float:
+    """Per-column null percentage; used when the fused query fails for a chunk."""
+    null_q = f"""
+    SELECT
+        COUNT_BIG(*) as total_count,
+        COUNT_BIG(*) - COUNT([{col_name}]) as null_count
+    FROM ({_sample_query(full_table_name, f"[{col_name}]", sample_size, sampling)}) as sampled;
+    """
+    res = _execute_query(conn, null_q)[0]
+    total_count = int(res["total_count"])
+    null_count = int(res["null_count"])
+    null_pct = (null_count / total_count) * 100 if total_count > 0 else 0
+    return round(null_pct, 2)
+
+
+def _profile_columns_fused(
+    conn: Any,
+    full_table_name: str,
+    columns: dict[str, Any],
+    sample_size: int,
+    sampling: dict[str, Any] | None = None,
+) -> tuple[dict[str, Any], dict[str, dict[str, Any]]]:
+    """
+    Computes null percentages and cheap aggregates (min/max, text lengths) for
+    all columns of a table with one scan of one sampled subquery per chunk of
+    columns, instead of one sampled scan per column.
+    """
+    nullability: dict[str, Any] = {}
+    column_stats: dict[str, dict[str, Any]] = {}
+    col_names = list(columns)
+    for start in range(0, len(col_names), FUSED_COLUMNS_PER_QUERY):
+        chunk = col_names[start : start + FUSED_COLUMNS_PER_QUERY]
+        select_list = ["COUNT_BIG(*) AS total_count"]
+        for i, col_name in enumerate(chunk):
+            select_list.extend(
+                _column_aggregates(f"c{i}", col_name, columns[col_name].get("type"))
+            )
+        sampled_cols = ", ".join(f"[{col_name}]" for col_name in chunk)
+        fused_q = f"""
+        SELECT {", ".join(select_list)}
+        FROM ({_sample_query(full_table_name, sampled_cols, sample_size, sampling)}) as sampled;
+        """
+        try:
+            res = _execute_query(conn, fused_q)[0]
+        except Exception as e:
+            if _is_timeout(e):
+                logger.warning(f"Fused profiling timed out for {full_table_name}: {e}")
+                nullability.update(dict.fromkeys(chunk, TIMED_OUT))
+                continue
+            logger.warning(
+                f"Fused profiling failed for {full_table_name}, falling back to per-column queries: {e}"
+            )
+            for col_name in chunk:
+                try:
+                    nullability[col_name] = _profile_column_nulls(
+                        conn, full_table_name, col_name, sample_size, sampling
+                    )
+                except Exception as col_e:
+                    logger.error(
+                        f"Error profiling nulls for {full_table_name}.[{col_name}]: {col_e}"
+                    )
+                    nullability[col_name] = "Error"
+            continue
+
+        total_count = int(res["total_count"])
+        for i, col_name in enumerate(chunk):
+            alias = f"c{i}"
+            null_count = total_count - int(res[f"{alias}_non_null"])
+            null_pct = (null_count / total_count) * 100 if total_count > 0 else 0
+            nullability[col_name] = round(null_pct, 2)
+            stats = {
+                key[len(alias) + 1 :]: _to_profile_value(value)
+                for key, value in res.items()
+                if key.startswith(f"{alias}_") and key != f"{alias}_non_null"
+            }
+            if stats:
+                if isinstance(stats.get("avg_length"), float):
+                    stats["avg_length"] = round(stats["avg_length"], 2)
+                column_stats[col_name] = stats
+    return nullability, column_stats
+
+
+def _collect_catalog_statistics(
+    conn: Any, schema_name: str
+) -> dict[str, dict[str, dict[str, Any]]]:
+    """
+    Reads null fractions and distinct estimates for the schema from the
+    statistics objects whose leading column is each column, using the most
+    recently updated statistic per column (requires sys.dm_db_stats_histogram).
+    """
+    stats_q = f"""
+    SELECT t.name AS table_name, c.name AS column_name,
+        sp.last_updated, sp.rows, sp.modification_counter,
+        DATEDIFF(MINUTE, sp.last_updated, SYSDATETIME()) / 60.0 AS age_hours,
+        h.null_rows, h.distinct_values
+    FROM sys.stats s
+    JOIN sys.tables t ON t.object_id = s.object_id
+    JOIN sys.schemas sch ON sch.schema_id = t.schema_id
+    JOIN sys.stats_columns sc
+        ON sc.object_id = s.object_id AND sc.stats_id = s.stats_id
+        AND sc.stats_column_id = 1
+    JOIN sys.columns c ON c.object_id = sc.object_id AND c.column_id = sc.column_id
+    CROSS APPLY sys.dm_db_stats_properties(s.object_id, s.stats_id) sp
+    OUTER APPLY (
+        SELECT
+            SUM(CASE WHEN hg.range_high_key IS NULL THEN hg.equal_rows ELSE 0 END)
+                AS null_rows,
+            SUM(hg.distinct_range_rows
+                + CASE WHEN hg.range_high_key IS NULL THEN 0 ELSE 1 END)
+                AS distinct_values
+        FROM sys.dm_db_stats_histogram(s.object_id, s.stats_id) hg
+    ) h
+    WHERE sch.name = '{schema_name}'
+    ORDER BY t.name, c.name, sp.last_updated DESC;
+    """
+    catalog_stats: dict[str, dict[str, dict[str, Any]]] = {}
+    for (
+        table_name,
+        column_name,
+        last_updated,
+        row_count,
+        modification_counter,
+        age_hours,
+        null_rows,
+        distinct_values,
+    ) in _stream_rows(conn, stats_q):
+        table_stats = catalog_stats.setdefault(table_name, {})
+        if column_name in table_stats:
+            continue
+        rows = float(row_count or 0)
+        null_frac = None
+        if null_rows is not None and rows > 0:
+            null_frac = float(null_rows) / rows
+        table_stats[column_name] = {
+            "source": "sys.stats",
+            "null_frac": null_frac,
+            "n_distinct": distinct_values,
+            "last_updated": _to_profile_value(last_updated),
+            "age_hours": round(float(age_hours), 1) if age_hours is not None else None,
+            "rows_modified_since": modification_counter,
+        }
+    return catalog_stats
+
+
+def _collect_change_indicators(conn: Any, schema_name: str) -> dict[str, str]:
+    """
+    A token per table from the last write recorded in
+    sys.dm_db_index_usage_stats, the row count and the table's modify_date.
+    Usage stats are cleared on restart, so tables not written since then are
+    keyed on the server start time. Needs VIEW SERVER STATE.
+    """
+    indicators_q = f"""
+    SELECT t.name AS table_name,
+           CONVERT(VARCHAR(33), t.modify_date, 126) AS modify_date,
+           (SELECT CONVERT(VARCHAR(33), MAX(us.last_user_update), 126)
+            FROM sys.dm_db_index_usage_stats us
+            WHERE us.database_id = DB_ID() AND us.object_id = t.object_id)
+               AS last_user_update,
+           (SELECT SUM(p.rows) FROM sys.partitions p
+            WHERE p.object_id = t.object_id AND p.index_id IN (0, 1)) AS row_count,
+           (SELECT CONVERT(VARCHAR(33), sqlserver_start_time, 126)
+            FROM sys.dm_os_sys_info) AS server_started
+    FROM sys.tables t
+    WHERE t.schema_id = SCHEMA_ID('{schema_name}');
+    """
+    indicators = {}
+    for (
+        table_name,
+        modify_date,
+        last_user_update,
+        row_count,
+        server_started,
+    ) in _stream_rows(conn, indicators_q):
+        last_write = last_user_update or f"unmodified-since:{server_started}"
+        indicators[table_name] = f"{modify_date}:{row_count}:{last_write}"
+    return indicators
+
+
+def _profile_cardinality(
+    conn: Any,
+    full_table_name: str,
+    col_name: str,
+    sample_size: int | None = None,
+    sampling: dict[str, Any] | None = None,
+) -> int:
+    """Exact distinct count over the table, or over the sample when sample_size is given."""
+    if sample_size is None:
+        card_q = f"SELECT COUNT(DISTINCT [{col_name}]) as unique_count FROM {full_table_name};"
+    else:
+        card_q = f"""
+        SELECT COUNT(DISTINCT [{col_name}]) as unique_count
+        FROM ({_sample_query(full_table_name, f"[{col_name}]", sample_size, sampling)}) as sampled;
+        """
+    res = _execute_query(conn, card_q)[0]
+    return int(res["unique_count"])
+
+
+def _stream_batches(conn: Any, query: str) -> Iterator[list[tuple]]:
+    """Yields the rows of a query, fetched in batches."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(query)
+        while rows := cursor.fetchmany(STREAM_BATCH_SIZE):
+            yield rows
+    finally:
+        cursor.close()
+
+
+def _stream_rows(conn: Any, query: str) -> Iterator[tuple]:
+    """Yields the rows of a query as tuples, fetched in batches."""
+    for rows in _stream_batches(conn, query):
+        yield from rows
+
+
+def _stream_column(conn: Any, query: str) -> Iterator[Any]:
+    """Yields the first column of each row, fetched in batches."""
+    for row in _stream_rows(conn, query):
+        yield row[0]
+
+
+def _hash_sample(col_name: str, bits: int) -> str:
+    """Predicate keeping the values whose MD5 has its low `bits` bits clear."""
+    if not bits:
+        return "1 = 1"
+    return (
+        f"CONVERT(int, HASHBYTES('MD5', CONVERT(nvarchar(4000), [{col_name}]))) "
+        f"& {(1 << bits) - 1} = 0"
+    )
+
+
+def _approximate_cardinality(
+    conn: Any,
+    full_table_name: str,
+    col_name: str,
+    relative_error: float,
+    row_estimate: int | None = None,
+) -> tuple[int, dict[str, Any]]:
+    """
+    Distinct count from APPROX_COUNT_DISTINCT (SQL Server 2019+) when its error
+    is acceptable, otherwise from a HyperLogLog sketch of the streamed column,
+    of only a hash sample of its values on large tables.
+    """
+    if relative_error >= APPROX_COUNT_DISTINCT_ERROR:
+        approx_q = f"SELECT APPROX_COUNT_DISTINCT([{col_name}]) as approx_count FROM {full_table_name};"
+        try:
+            estimate = int(_execute_query(conn, approx_q)[0]["approx_count"])
+            return estimate, {
+                "method": "approx_count_distinct",
+                "relative_error": APPROX_COUNT_DISTINCT_ERROR,
+                "low": math.floor(estimate * 0.98),
+                "high": math.ceil(estimate * 1.02),
+            }
+        except Exception as e:
+            logger.warning(
+                f"APPROX_COUNT_DISTINCT unavailable for {full_table_name}, using a client-side sketch: {e}"
+            )
+
+    def stream(bits: int) -> Iterator[Any]:
+        return _stream_column(
+            conn,
+            f"SELECT [{col_name}] FROM {full_table_name} "
+            f"WHERE [{col_name}] IS NOT NULL AND {_hash_sample(col_name, bits)};",
+        )
+
+    def exact() -> int:
+        return _profile_cardinality(conn, full_table_name, col_name)
+
+    return hash_sampled_count(stream, row_estimate, relative_error, exact)
+
+
+def _sketch_hash_filter(col_name: str, kind: str, limit: int) -> str:
+    """Predicate keeping the values whose sketch_hash is at most `limit`."""
+    col = f"[{col_name}]"
+    if kind == "numeric":
+        text = (
+            f"CASE WHEN {col} = ROUND({col}, 0, 1) "
+            f"THEN CONVERT(varchar(40), CONVERT(decimal(38, 0), {col})) "
+            f"ELSE CONVERT(varchar(40), {col}) END"
+        )
+    else:
+        text = f"CONVERT(varchar(40), {col})"
+    return f"SUBSTRING(HASHBYTES('MD5', {text}), 1, 8) <= 0x{limit:016x}"
+
+
+def _sketch_column(
+    conn: Any,
+    table_name: str,
+    col_name: str,
+    schema_name: str,
+    sample_size: int,
+    full: bool = False,
+    sampling: dict[str, Any] | None = None,
+    col_type: str | None = None,
+) -> BottomKSketch:
+    """
+    Bottom-k sketch of a whole key column, or of the sampled rows of any other
+    column. A large numeric key column sends only the values whose hash can
+    be among the sketch's smallest.
+    """
+    full_table_name = f"[{schema_name}].[{table_name}]"
+    not_null = f"[{col_name}] IS NOT NULL"
+    limit = None
+    if full:
+        kind = sketch_text_kind(col_type)
+        # Text and uniqueidentifier keys are sent whole: HASHBYTES sees
+        # nvarchar as UTF-16 and drivers differ in how they render GUIDs.
+        if kind in ("integer", "numeric"):
+            limit = hash_limit(
+                (sampling or {}).get("row_estimate")
+                or _estimate_rows(conn, schema_name, table_name)
+            )
+        if limit is not None:
+            not_null += f" AND {_sketch_hash_filter(col_name, kind, limit)}"
+        query = f"SELECT [{col_name}] FROM {full_table_name} WHERE {not_null};"
+    else:
+        query = _sample_query(
+            full_table_name, f"[{col_name}]", sample_size, sampling, not_null
+        )
+    sketch = BottomKSketch(limit=limit)
+    sketch.update(_stream_column(conn, query))
+    return sketch
+
+
+def _profile_table_columns(
+    conn: Any,
+    table_name: str,
+    table_info: dict[str, Any],
+    table_stats: dict[str, dict[str, Any]],
+    schema_name: str,
+    sample_size: int,
+    profile_mode: str,
+    sampling: dict[str, Any] | None = None,
+) -> dict[str, Any]:
+    """Nullability and cheap per-column aggregates for one table."""
+    logger.info(f"Profiling table: {schema_name}.{table_name}")
+    full_table_name = f"[{schema_name}].[{table_name}]"
+    columns = table_info.get("columns", {})
+    if profile_mode != "statistics":
+        nullability, column_stats = _profile_columns_fused(
+            conn, full_table_name, columns, sample_size, sampling
+        )
+        return {
+            "nullability": nullability,
+            "column_stats": column_stats,
+            "statistics_provenance": {},
+        }
+
+    nullability, provenance, unresolved = nullability_from_statistics(
+        columns, table_stats
+    )
+    column_stats = {}
+    if unresolved:
+        sampled, column_stats = _profile_columns_fused(
+            conn, full_table_name, unresolved, sample_size, sampling
+        )
+        nullability.update(sampled)
+        for col_name in unresolved:
+            provenance[col_name] = {"source": "sample", "sample_size": sample_size}
+    return {
+        "nullability": {c: nullability[c] for c in columns if c in nullability},
+        "column_stats": column_stats,
+        "statistics_provenance": provenance,
+    }
+
+
+def _profile_key_cardinality(
+    conn: Any,
+    table_name: str,
+    col_name: str,
+    col_stats: dict[str, Any],
+    schema_name: str,
+    sample_size: int,
+    profile_mode: str,
+    cardinality_error: float | None = None,
+    sampling: dict[str, Any] | None = None,
+) -> dict[str, Any]:
+    """Distinct count of one key column: from statistics, approximate, or exact."""
+    full_table_name = f"[{schema_name}].[{table_name}]"
+    if profile_mode == "statistics":
+        estimate = cardinality_from_statistics(col_stats)
+        if estimate is not None:
+            return {
+                "value": estimate,
+                "provenance": statistics_provenance(col_stats["source"], col_stats),
+            }
+        return {
+            "value": _profile_cardinality(
+                conn, full_table_name, col_name, sample_size, sampling
+            ),
+            "provenance": {"source": "sample", "sample_size": sample_size},
+        }
+    if cardinality_error is not None:
+        value, estimate = _approximate_cardinality(
+            conn,
+            full_table_name,
+            col_name,
+            cardinality_error,
+            # A partitioned parent has no row estimate of its own; the plan
+            # sums its partitions'.
+            (sampling or {}).get("row_estimate")
+            or _estimate_rows(conn, schema_name, table_name),
+        )
+        return {"value": value, "estimate": estimate}
+    return {"value": _profile_cardinality(conn, full_table_name, col_name)}
+
+
+def _key_columns(
+    table_name: str, table_info: dict[str, Any], foreign_keys: list[dict[str, Any]]
+) -> set[str]:
+    """PK, UNIQUE and FK columns of a table."""
+    key_columns = set()
+    for const in table_info.get("constraints", []):
+        if const.get("CONSTRAINT_TYPE") in ("PRIMARY KEY", "UNIQUE") and const.get(
+            "COLUMN_NAME"
+        ):
+            key_columns.add(const["COLUMN_NAME"])
+    for fk in foreign_keys:
+        if fk.get("from_table") == table_name and fk.get("from_column"):
+            key_columns.add(fk["from_column"])
+    return key_columns
+
+
+def _estimate_rows(conn: Any, schema_name: str, table_name: str) -> int | None:
+    """Row count from the catalog, without scanning the table."""
+    estimate_q = f"""
+    SELECT SUM(p.rows) AS row_estimate
+    FROM sys.partitions p
+    JOIN sys.tables t ON t.object_id = p.object_id
+    JOIN sys.schemas s ON s.schema_id = t.schema_id
+    WHERE s.name = '{schema_name}' AND t.name = '{table_name}' AND p.index_id IN (0, 1);
+    """
+    rows = _execute_query(conn, estimate_q)
+    if not rows or not rows[0]["row_estimate"] or rows[0]["row_estimate"] < 0:
+        return None
+    return int(rows[0]["row_estimate"])
+
+
+def _anti_join_orphans(
+    conn: Any,
+    from_table: str,
+    fks: list[dict[str, Any]],
+    schema_name: str,
+    sample_size: int,
+    sampling: dict[str, Any] | None = None,
+) -> dict[str, float]:
+    """
+    Orphan percentages of several FKs of one table in one statement: a single
+    sampled scan of the table, probed with NOT EXISTS against each parent.
+    """
+    from_full = f"[{schema_name}].[{from_table}]"
+    from_cols = list(dict.fromkeys(fk["from_column"] for fk in fks))
+    sampled_cols = ", ".join(f"[{col}]" for col in from_cols)
+    any_value = " OR ".join(f"[{col}] IS NOT NULL" for col in from_cols)
+    flags = []
+    aggregates = []
+    for i, fk in enumerate(fks):
+        from_col, to_col = fk["from_column"], fk["to_column"]
+        to_full = f"[{schema_name}].[{fk['to_table']}]"
+        flags.append(f"x.[{from_col}] AS v{i}")
+        flags.append(
+            f"CASE WHEN x.[{from_col}] IS NOT NULL AND NOT EXISTS "
+            f"(SELECT 1 FROM {to_full} t WHERE t.[{to_col}] = x.[{from_col}]) "
+            f"THEN 1 ELSE 0 END AS o{i}"
+        )
+        aggregates.append(f"COUNT_BIG(v{i}) AS total_{i}, SUM(o{i}) AS orphans_{i}")
+    orphan_q = f"""
+    SELECT {", ".join(aggregates)}
+    FROM (
+        SELECT {", ".join(flags)}
+        FROM ({_sample_query(from_full, sampled_cols, sample_size, sampling, any_value)}) AS x
+    ) AS s;
+    """
+    res = _execute_query(conn, orphan_q)[0]
+    orphans = {}
+    for i, fk in enumerate(fks):
+        total_fk_values = int(res[f"total_{i}"] or 0)
+        orphan_count = int(res[f"orphans_{i}"] or 0)
+        orphan_pct = (
+            (orphan_count / total_fk_values) * 100 if total_fk_values > 0 else 0
+        )
+        orphans[orphan_check_name(fk)] = round(orphan_pct, 2)
+    return orphans
+
+
+def _bloom_orphans(
+    conn: Any,
+    fk: dict[str, Any],
+    schema_name: str,
+    sample_size: int,
+    sampling: dict[str, Any] | None = None,
+) -> dict[str, Any]:
+    """
+    Orphan percentage of an FK whose parent is outside the profiled schema:
+    the parent keys are streamed into a Bloom filter of bounded size and the
+    sampled FK values are checked against it on the client.
+    """
+    from_col, to_col = fk["from_column"], fk["to_column"]
+    to_schema, to_table = fk["to_schema"], fk["to_table"]
+    from_full = f"[{schema_name}].[{fk['from_table']}]"
+    to_full = f"[{to_schema}].[{to_table}]"
+    try:
+        parent_rows = _estimate_rows(conn, to_schema, to_table)
+    except Exception as e:
+        logger.warning(
+            f"No row estimate for {to_full}, sizing the filter by default: {e}"
+        )
+        parent_rows = None
+    return orphan_estimate(
+        _stream_column(
+            conn, f"SELECT [{to_col}] FROM {to_full} WHERE [{to_col}] IS NOT NULL;"
+        ),
+        _stream_column(
+            conn,
+            _sample_query(
+                from_full,
+                f"[{from_col}]",
+                sample_size,
+                sampling,
+                f"[{from_col}] IS NOT NULL",
+            ),
+        ),
+        parent_rows,
+    )
+
+
+def _check_orphans(
+    conn: Any,
+    from_table: str,
+    fks: list[dict[str, Any]],
+    schema_name: str,
+    sample_size: int,
+    sampling: dict[str, Any] | None = None,
+) -> dict[str, Any]:
+    """
+    Orphan percentages for the FKs of one table. Parents in the schema are
+    checked server-side in one batched anti-join; parents in another schema or
+    database are checked client-side against a Bloom filter.
+    """
+    local = [fk for fk in fks if fk.get("to_schema", schema_name) == schema_name]
+    remote = [fk for fk in fks if fk.get("to_schema", schema_name) != schema_name]
+    logger.info(
+        f"Checking orphans for {len(fks)} foreign keys of {from_table} "
+        f"({len(remote)} outside schema '{schema_name}')"
+    )
+    orphans: dict[str, Any] = {}
+    if local:
+        orphans.update(
+            _anti_join_orphans(
+                conn, from_table, local, schema_name, sample_size, sampling
+            )
+        )
+    for fk in remote:
+        orphans[orphan_check_name(fk)] = _bloom_orphans(
+            conn, fk, schema_name, sample_size, sampling
+        )
+    return orphans
+
+
+def _profile_column_patterns(
+    conn: Any,
+    table_name: str,
+    table_info: dict[str, Any],
+    schema_name: str,
+    sample_size: int,
+    sampling: dict[str, Any] | None = None,
+) -> dict[str, Any]:
+    """
+    Pattern profile and type anomalies of all text columns, from one sampled
+    read of at most MAX_SAMPLE_ROWS rows.
+    """
+    text_columns = [
+        col_name
+        for col_name, col_info in table_info.get("columns", {}).items()
+        if (col_info.get("type") or "").lower() in _TEXT_TYPES
+    ]
+    if not text_columns:
+        return {"patterns": {}, "anomalies": {}}
+    sample_size, sampling = cap_sampling(
+        table_info, sample_size, sampling, MAX_SAMPLE_ROWS
+    )
+    select_list = ", ".join(f"[{col_name}]" for col_name in text_columns)
+    sample_q = _sample_query(
+        f"[{schema_name}].[{table_name}]", select_list, sample_size, sampling
+    )
+    return profile_text_columns(_stream_batches(conn, sample_q), text_columns)
+
+
+def _is_timeout(error: Exception) -> bool:
+    """True for statements that outran the connection's query timeout."""
+    return isinstance(error, TimeoutError) or "timeout" in type(error).__name__.lower()
+
+
+def _server_load(conn: Any) -> dict[str, Any]:
+    """
+    Other user requests executing, and the largest lag of an availability
+    group replica of this database. Without VIEW SERVER STATE only this
+    session's requests are visible and neither figure is reported.
+    """
+    active = _execute_query(
+        conn,
+        """
+        SELECT COUNT(*) AS active_sessions
+        FROM sys.dm_exec_requests r
+        INNER JOIN sys.dm_exec_sessions s ON s.session_id = r.session_id
+        WHERE s.is_user_process = 1 AND r.session_id <> @@SPID;
+        """,
+    )
+    lag = None
+    try:
+        rows = _execute_query(
+            conn,
+            """
+            SELECT MAX(secondary_lag_seconds) AS lag
+            FROM sys.dm_hadr_database_replica_states
+            WHERE database_id = DB_ID();
+            """,
+        )
+        lag = rows[0]["lag"] if rows else None
+    except Exception as e:
+        logger.info(f"Availability group lag is not available: {e}")
+    return {
+        "active_sessions": int(active[0]["active_sessions"]),
+        "replication_lag_seconds": None if lag is None else float(lag),
+    }
+
+
 def profile_mssql_data(
     conn: Any,
     schema_name: str,
     schema_structure: dict[str, Any],
     sample_size: int = 10000,
+    profile_mode: str = "sampled",
+    connect: Callable[[], Any] | None = None,
+    pool_size: int = 1,
+    cardinality_error: float | None = None,
+    statement_timeout: float | None = None,
+    time_budget: float | None = None,
+    previous_profile: dict[str, Any] | None = None,
+    discover_relationships: bool = False,
+    adaptive_concurrency: bool = False,
 ) -> dict[str, Any]:
+    """
+    Profiles nullability, cardinality, orphan records and type anomalies.
+
+    Every text column is sampled once per table and classified client-side
+    (numbers, dates, emails, UUIDs, IPv4 addresses, lengths, top values) into
+    "column_patterns"; values that break a column's dominant pattern are
+    reported under "type_anomalies".
+
+    In "statistics" mode nullability and key-column cardinality are read from
+    the optimizer statistics histograms instead of scanning the tables; only
+    columns without statistics fall back to a sampled scan. Each figure's source
+    and staleness is recorded under "statistics_provenance".
+
+    When `connect` is given, checks run concurrently on up to `pool_size`
+    connections; results are merged in schema order.
+
+    With `cardinality_error` set, key-column cardinality is an approximate
+    distinct count within that relative standard error instead of an exact
+    COUNT(DISTINCT); each estimate's method and bounds are recorded under
+    "cardinality_estimates".
+
+    `time_budget` (seconds) bounds the whole run; an exhausted budget yields a
+    partial profile, see "profiling_status". Per-statement limits come from the
+    connection's query `timeout`, so `statement_timeout` is only reported.
+
+    With a `previous_profile` snapshot, tables whose change indicator shows no
+    writes since it was taken reuse its results instead of being profiled.
+
+    Sampled checks read each table in full, by a row-hash filter, or through
+    TABLESAMPLE SYSTEM for large tables, depending on the row count and size
+    that introspection recorded; each table's plan is listed under "sampling".
+    Partitioned tables are sampled from a bounded subset of their partitions.
+
+    With `discover_relationships`, candidate FK columns whose sampled values
+    are contained in a key column are listed under "value_overlap".
+    With `adaptive_concurrency`, concurrency starts low and follows the
+    server's active sessions, replication lag and probe latency, pausing when
+    the server is stressed; decisions are recorded under "throttling".
+    """
     profile_results: dict[str, Any] = {
         "nullability": {},
         "cardinality": {},
         "orphan_records": {},
         "type_anomalies": {},
+        "column_stats": {},
+        "column_patterns": {},
+        "sampling": {},
     }
-    tables = schema_structure.get("tables", {})
-
-    for table_name, table_info in tables.items():
-        logger.info(f"Profiling table: {schema_name}.{table_name}")
-        profile_results["nullability"][table_name] = {}
-        profile_results["cardinality"][table_name] = {}
-        full_table_name = f"[{schema_name}].[{table_name}]"
-
-        for col_name in table_info.get("columns", {}):
-            null_q = f"""
-            SELECT
-                COUNT_BIG(*) as total_count,
-                COUNT_BIG(*) - COUNT([{col_name}]) as null_count
-            FROM (SELECT TOP {sample_size} [{col_name}] FROM {full_table_name}) as sampled;
-            """
-            try:
-                res = _execute_query(conn, null_q)[0]
-                total_count = int(res["total_count"])
-                null_count = int(res["null_count"])
-                null_pct = (null_count / total_count) * 100 if total_count > 0 else 0
-                profile_results["nullability"][table_name][col_name] = round(
-                    null_pct, 2
-                )
-            except Exception as e:
-                logger.error(
-                    f"Error profiling nulls for {full_table_name}.[{col_name}]: {e}"
-                )
-                profile_results["nullability"][table_name][col_name] = "Error"
-
-        key_columns = set()
-        for const in table_info.get("constraints", []):
-            if const.get("type") in ("PRIMARY KEY", "UNIQUE") and const.get("columns"):
-                key_columns.add(const["columns"])
-        for fk in schema_structure.get("foreign_keys", []):
-            if fk.get("from_table") == table_name and fk.get("from_column"):
-                key_columns.add(fk["from_column"])
-
-        for col_name in key_columns:
-            if col_name in table_info.get("columns", {}):
-                card_q = f"SELECT COUNT(DISTINCT [{col_name}]) as unique_count FROM {full_table_name};"
-                try:
-                    res = _execute_query(conn, card_q)[0]
-                    profile_results["cardinality"][table_name][col_name] = int(
-                        res["unique_count"]
-                    )
-                except Exception as e:
-                    logger.error(
-                        f"Error profiling cardinality for {full_table_name}.[{col_name}]: {e}"
-                    )
-                    profile_results["cardinality"][table_name][col_name] = "Error"
-
-    for fk in schema_structure.get("foreign_keys", []):
-        from_table, from_col = fk.get("from_table"), fk.get("from_column")
-        to_table, to_col = fk.get("to_table"), fk.get("to_column")
-        to_schema = fk.get("to_schema", schema_name)
-        if from_table and from_col and to_table and to_col:
-            fk_name = f"{from_table}.{from_col} -> {to_table}.{to_col}"
-            logger.info(f"Checking orphans for {fk_name}")
-            from_full = f"[{schema_name}].[{from_table}]"
-            to_full = f"[{to_schema}].[{to_table}]"
-            orphan_q = f"""
-            SELECT
-                COUNT_BIG(s.[{from_col}]) as total_fk_values,
-                SUM(CASE WHEN t.[{to_col}] IS NULL THEN 1 ELSE 0 END) as orphan_count
-            FROM (SELECT TOP {sample_size} [{from_col}] FROM {from_full} WHERE [{from_col}] IS NOT NULL) as s
-            LEFT JOIN {to_full} t ON s.[{from_col}] = t.[{to_col}];
-            """
-            try:
-                res = _execute_query(conn, orphan_q)[0]
-                total_fk_values = int(res["total_fk_values"])
-                orphan_count = int(res["orphan_count"])
-                orphan_pct = (
-                    (orphan_count / total_fk_values) * 100 if total_fk_values > 0 else 0
-                )
-                profile_results["orphan_records"][fk_name] = round(orphan_pct, 2)
-            except Exception as e:
-                logger.error(f"Error checking orphans for {fk_name}: {e}")
-                profile_results["orphan_records"][fk_name] = "Error"
-
-    for table_name, table_info in tables.items():
-        full_table_name = f"[{schema_name}].[{table_name}]"
-        for col_name, col_info in table_info.get("columns", {}).items():
-            col_type = col_info.get("type", "").lower()
-            if "char" in col_type or "text" in col_type or "varchar" in col_type:
-                if (
-                    "phone" in col_name.lower()
-                    or "zip" in col_name.lower()
-                    or "postal" in col_name.lower()
-                ):
-                    # Regex for anything not a digit, hyphen, or period
-                    anomaly_q = f"""
-                    SELECT COUNT_BIG(*) as non_numeric_count
-                    FROM (SELECT TOP {sample_size} [{col_name}] FROM {full_table_name} WHERE [{col_name}] IS NOT NULL) as s
-                    WHERE [{col_name}] LIKE '%[^0-9.-]%';
-                    """
-                    try:
-                        res = _execute_query(conn, anomaly_q)[0]
-                        non_numeric_count = int(res["non_numeric_count"])
-                        if non_numeric_count > 0:
-                            key = f"{table_name}.{col_name}"
-                            if key not in profile_results["type_anomalies"]:
-                                profile_results["type_anomalies"][key] = []
-                            profile_results["type_anomalies"][key].append(
-                                f"Found {non_numeric_count} rows with non-numeric characters in sample."
-                            )
-                    except Exception as e:
-                        logger.warning(
-                            f"Error checking type anomaly for {full_table_name}.[{col_name}]: {e}"
-                        )
+    if cardinality_error is not None:
+        profile_results["cardinality_estimates"] = {}
+
+    catalog_stats: dict[str, dict[str, dict[str, Any]]] = {}
+    if profile_mode == "statistics":
+        profile_results["statistics_provenance"] = {}
+        try:
+            catalog_stats = _collect_catalog_statistics(conn, schema_name)
+        except Exception as e:
+            logger.error(f"Error reading statistics for schema {schema_name}: {e}")
+
+    change_indicators: dict[str, str] = {}
+    try:
+        change_indicators = _collect_change_indicators(conn, schema_name)
+    except Exception as e:
+        logger.warning(f"Could not read change indicators for {schema_name}: {e}")
+
+    profiler = DialectProfiler(
+        table_columns=partial(
+            _profile_table_columns,
+            schema_name=schema_name,
+            sample_size=sample_size,
+            profile_mode=profile_mode,
+        ),
+        key_cardinality=partial(
+            _profile_key_cardinality,
+            schema_name=schema_name,
+            sample_size=sample_size,
+            profile_mode=profile_mode,
+            cardinality_error=cardinality_error,
+        ),
+        orphans=partial(
+            _check_orphans, schema_name=schema_name, sample_size=sample_size
+        ),
+        column_patterns=partial(
+            _profile_column_patterns, schema_name=schema_name, sample_size=sample_size
+        ),
+        key_columns=_key_columns,
+        is_timeout=_is_timeout,
+        value_sketch=partial(
+            _sketch_column, schema_name=schema_name, sample_size=sample_size
+        ),
+        server_load=_server_load,
+    )
+    pool = ConnectionPool(conn, connect, pool_size)
+    try:
+        run_profile_checks(
+            pool,
+            profiler,
+            schema_structure,
+            profile_results,
+            catalog_stats,
+            statement_timeout,
+            time_budget,
+            change_indicators,
+            previous_profile,
+            discover=discover_relationships,
+            adaptive=adaptive_concurrency,
+            sampling=plan_sampling(schema_structure, sample_size),
+        )
+    finally:
+        pool.close()
     return profile_results
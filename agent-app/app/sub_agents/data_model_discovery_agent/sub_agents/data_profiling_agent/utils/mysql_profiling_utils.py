@@ -1,8 +1,58 @@
+import json
 import logging
+import random
+from collections.abc import Callable, Iterator
+from decimal import Decimal
+from functools import partial
 from typing import Any
 
+from .bloom_filter import orphan_estimate
+from .catalog_statistics import (
+    cardinality_from_statistics,
+    nullability_from_statistics,
+    statistics_provenance,
+)
+from .column_patterns import MAX_SAMPLE_ROWS, profile_text_columns
+from .connection_pool import ConnectionPool
+from .hyperloglog import hash_sampled_count
+from .incremental import orphan_check_name
+from .profile_runner import TIMED_OUT, DialectProfiler, run_profile_checks
+from .sampling import SAMPLE_SEED, cap_sampling, plan_sampling
+from .value_overlap import BottomKSketch, hash_limit, sketch_text_kind
+
 logger = logging.getLogger(__name__)
 
+# MySQL and MariaDB errors for statements interrupted by an execution time limit.
+QUERY_TIMEOUT_ERRNOS = (3024, 1969)
+
+# Columns per fused aggregate statement; keeps very wide tables to a bounded
+# select list per scan.
+FUSED_COLUMNS_PER_QUERY = 200
+
+# Rows fetched per round trip when streaming a column to the client.
+STREAM_BATCH_SIZE = 10000
+
+# MySQL has no TABLESAMPLE; page samples of large tables read this many
+# randomly placed primary key ranges instead, each an index range scan.
+PAGE_SAMPLE_KEY_RANGES = 16
+
+_NUMERIC_TYPES = {
+    "tinyint",
+    "smallint",
+    "mediumint",
+    "int",
+    "integer",
+    "bigint",
+    "decimal",
+    "numeric",
+    "float",
+    "double",
+    "real",
+}
+_INTEGER_TYPES = {"tinyint", "smallint", "mediumint", "int", "integer", "bigint"}
+_TEMPORAL_TYPES = {"date", "datetime", "timestamp", "time", "year"}
+_TEXT_TYPES = {"char", "varchar", "tinytext", "text", "mediumtext", "longtext"}
+
 
 def _execute_query(conn: Any, query: str) -> list[dict[str, Any]]:
     cursor = conn.cursor(dictionary=True)
@@ -13,12 +63,836 @@ def _execute_query(conn: Any, query: str) -> list[dict[str, Any]]:
         cursor.close()
 
 
+def _to_profile_value(value: Any) -> Any:
+    """Keeps ints/floats as-is and stringifies other scalars so the profile stays JSON-safe."""
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, Decimal):
+        return float(value)
+    return str(value)
+
+
+def _column_aggregates(alias: str, col_name: str, col_type: str) -> list[str]:
+    """Returns the cheap aggregate expressions computed for a column in the fused query."""
+    # DESCRIBE-style types carry length and flags, e.g. "int unsigned", "varchar(255)".
+    base_type = (col_type or "").lower().split("(")[0].split(" ")[0]
+    expressions = [f"COUNT(`{col_name}`) AS {alias}_non_null"]
+    if base_type in _NUMERIC_TYPES or base_type in _TEMPORAL_TYPES:
+        expressions.append(f"MIN(`{col_name}`) AS {alias}_min")
+        expressions.append(f"MAX(`{col_name}`) AS {alias}_max")
+    elif base_type in _TEXT_TYPES:
+        expressions.append(f"MIN(CHAR_LENGTH(`{col_name}`)) AS {alias}_min_length")
+        expressions.append(f"MAX(CHAR_LENGTH(`{col_name}`)) AS {alias}_max_length")
+        expressions.append(f"AVG(CHAR_LENGTH(`{col_name}`)) AS {alias}_avg_length")
+    return expressions
+
+
+def _sample_query(
+    full_table_name: str,
+    select_list: str,
+    sample_size: int,
+    sampling: dict[str, Any] | None = None,
+    where: str | None = None,
+) -> str:
+    """
+    SELECT of at most sample_size rows of a table, drawn as its sampling plan
+    says. Partitioned tables are read through PARTITION () from the plan's
+    partitions only, each up to its share of the limit.
+    """
+    plan = sampling or {}
+    conditions = [f"({where})"] if where else []
+    if plan.get("partitions"):
+        if plan.get("strategy") in ("row_sample", "page_sample"):
+            conditions.insert(0, f"RAND({SAMPLE_SEED}) < {plan['fraction']:.8f}")
+        condition = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        branches = " UNION ALL ".join(
+            f"(SELECT {select_list} FROM {full_table_name} PARTITION (`{p['name']}`)"
+            f"{condition} LIMIT {p['limit']})"
+            for p in plan["partitions"]
+        )
+        return f"SELECT * FROM ({branches}) AS partitions LIMIT {sample_size}"
+    if plan.get("strategy") == "page_sample" and plan.get("key_ranges"):
+        # Each range contributes its share of the limit, so an early range
+        # cannot fill the sample on its own.
+        key = plan["key_column"]
+        per_range = -(-sample_size // len(plan["key_ranges"]))
+        ranges = " UNION ALL ".join(
+            f"(SELECT {select_list} FROM {full_table_name} "
+            f"WHERE {' AND '.join([f'`{key}` BETWEEN {low} AND {high}', *conditions])} "
+            f"LIMIT {per_range})"
+            for low, high in plan["key_ranges"]
+        )
+        return f"SELECT * FROM ({ranges}) AS key_ranges LIMIT {sample_size}"
+    if plan.get("strategy") in ("row_sample", "page_sample"):
+        conditions.insert(0, f"RAND({SAMPLE_SEED}) < {plan['fraction']:.8f}")
+    condition = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+    return f"SELECT {select_list} FROM {full_table_name}{condition} LIMIT {sample_size}"
+
+
+def _profile_column_nulls(
+    conn: Any,
+    full_table_name: str,
+    col_name: str,
+    sample_size: int,
+    sampling: dict[str, Any] | None = None,
+) -> float:
+    """Per-column null percentage; used when the fused query fails for a chunk."""
+    null_q = f"""
+    SELECT
+        COUNT(*) as total_count,
+        SUM(CASE WHEN `{col_name}` IS NULL THEN 1 ELSE 0 END) as null_count
+    FROM ({_sample_query(full_table_name, f"`{col_name}`", sample_size, sampling)}) as sampled;
+    """
+    res = _execute_query(conn, null_q)[0]
+    null_pct = (
+        (res["null_count"] / res["total_count"]) * 100 if res["total_count"] > 0 else 0
+    )
+    return round(null_pct, 2)
+
+
+def _profile_columns_fused(
+    conn: Any,
+    full_table_name: str,
+    columns: dict[str, Any],
+    sample_size: int,
+    sampling: dict[str, Any] | None = None,
+) -> tuple[dict[str, Any], dict[str, dict[str, Any]]]:
+    """
+    Computes null percentages and cheap aggregates (min/max, text lengths) for
+    all columns of a table with one scan of one sampled subquery per chunk of
+    columns, instead of one sampled scan per column.
+    """
+    nullability: dict[str, Any] = {}
+    column_stats: dict[str, dict[str, Any]] = {}
+    col_names = list(columns)
+    for start in range(0, len(col_names), FUSED_COLUMNS_PER_QUERY):
+        chunk = col_names[start : start + FUSED_COLUMNS_PER_QUERY]
+        select_list = ["COUNT(*) AS total_count"]
+        for i, col_name in enumerate(chunk):
+            select_list.extend(
+                _column_aggregates(f"c{i}", col_name, columns[col_name].get("type"))
+            )
+        sampled_cols = ", ".join(f"`{col_name}`" for col_name in chunk)
+        fused_q = f"""
+        SELECT {", ".join(select_list)}
+        FROM ({_sample_query(full_table_name, sampled_cols, sample_size, sampling)}) as sampled;
+        """
+        try:
+            res = _execute_query(conn, fused_q)[0]
+        except Exception as e:
+            if _is_timeout(e):
+                logger.warning(f"Fused profiling timed out for {full_table_name}: {e}")
+                nullability.update(dict.fromkeys(chunk, TIMED_OUT))
+                continue
+            logger.warning(
+                f"Fused profiling failed for {full_table_name}, falling back to per-column queries: {e}"
+            )
+            for col_name in chunk:
+                try:
+                    nullability[col_name] = _profile_column_nulls(
+                        conn, full_table_name, col_name, sample_size, sampling
+                    )
+                except Exception as col_e:
+                    logger.error(
+                        f"Error profiling nulls for {full_table_name}.{col_name}: {col_e}"
+                    )
+                    nullability[col_name] = "Error"
+            continue
+
+        total_count = int(res["total_count"])
+        for i, col_name in enumerate(chunk):
+            alias = f"c{i}"
+            null_count = total_count - int(res[f"{alias}_non_null"])
+            null_pct = (null_count / total_count) * 100 if total_count > 0 else 0
+            nullability[col_name] = round(null_pct, 2)
+            stats = {
+                key[len(alias) + 1 :]: _to_profile_value(value)
+                for key, value in res.items()
+                if key.startswith(f"{alias}_") and key != f"{alias}_non_null"
+            }
+            if stats:
+                if isinstance(stats.get("avg_length"), float):
+                    stats["avg_length"] = round(stats["avg_length"], 2)
+                column_stats[col_name] = stats
+    return nullability, column_stats
+
+
+def _histogram_distinct(histogram: dict[str, Any]) -> float | None:
+    """Distinct-value estimate from a MySQL 8 histogram's buckets."""
+    buckets = histogram.get("buckets") or []
+    if histogram.get("histogram-type") == "singleton":
+        return float(len(buckets))
+    if histogram.get("histogram-type") == "equi-height":
+        # Equi-height buckets are [lower, upper, cumulative_frequency, distinct]
+        return float(sum(bucket[3] for bucket in buckets if len(bucket) > 3))
+    return None
+
+
+def _collect_catalog_statistics(
+    conn: Any, schema_name: str
+) -> dict[str, dict[str, dict[str, Any]]]:
+    """
+    Reads null fractions and distinct estimates for the schema without scanning
+    tables: column histograms (ANALYZE TABLE ... UPDATE HISTOGRAM) first, then
+    the leading-column cardinality of indexes for columns without a histogram.
+    """
+    catalog_stats: dict[str, dict[str, dict[str, Any]]] = {}
+
+    table_freshness: dict[str, dict[str, Any]] = {}
+    freshness_q = f"""
+    SELECT table_name, last_update,
+           TIMESTAMPDIFF(SECOND, last_update, NOW()) / 3600 AS age_hours
+    FROM mysql.innodb_table_stats
+    WHERE database_name = '{schema_name}';
+    """
+    try:
+        for row in _execute_query(conn, freshness_q):
+            table_freshness[row["table_name"]] = {
+                "last_updated": _to_profile_value(row["last_update"]),
+                "age_hours": round(float(row["age_hours"]), 1)
+                if row["age_hours"] is not None
+                else None,
+            }
+    except Exception as e:
+        logger.warning(f"Could not read InnoDB statistics age for {schema_name}: {e}")
+
+    histogram_q = f"""
+    SELECT TABLE_NAME AS table_name, COLUMN_NAME AS column_name,
+           HISTOGRAM AS histogram,
+           TIMESTAMPDIFF(
+               SECOND,
+               CAST(JSON_UNQUOTE(HISTOGRAM->'$."last-updated"') AS DATETIME(6)),
+               UTC_TIMESTAMP()
+           ) / 3600 AS age_hours
+    FROM information_schema.COLUMN_STATISTICS
+    WHERE SCHEMA_NAME = '{schema_name}';
+    """
+    try:
+        for table_name, column_name, histogram, age_hours in _stream_rows(
+            conn, histogram_q
+        ):
+            if isinstance(histogram, (bytes, bytearray, str)):
+                histogram = json.loads(histogram)
+            catalog_stats.setdefault(table_name, {})[column_name] = {
+                "source": "column_histogram",
+                "null_frac": histogram.get("null-values"),
+                "n_distinct": _histogram_distinct(histogram),
+                "last_updated": histogram.get("last-updated"),
+                "age_hours": round(float(age_hours), 1)
+                if age_hours is not None
+                else None,
+                "rows_modified_since": None,
+            }
+    except Exception as e:
+        logger.warning(f"Could not read column histograms for {schema_name}: {e}")
+
+    index_q = f"""
+    SELECT TABLE_NAME AS table_name, COLUMN_NAME AS column_name,
+           MAX(CARDINALITY) AS cardinality
+    FROM INFORMATION_SCHEMA.STATISTICS
+    WHERE TABLE_SCHEMA = '{schema_name}' AND SEQ_IN_INDEX = 1
+    GROUP BY TABLE_NAME, COLUMN_NAME;
+    """
+    for table_name, column_name, cardinality in _stream_rows(conn, index_q):
+        if cardinality is None:
+            continue
+        table_stats = catalog_stats.setdefault(table_name, {})
+        freshness = table_freshness.get(table_name, {})
+        col_stats = table_stats.get(column_name)
+        if col_stats is None:
+            table_stats[column_name] = {
+                "source": "index_statistics",
+                "null_frac": None,
+                "n_distinct": cardinality,
+                "last_updated": freshness.get("last_updated"),
+                "age_hours": freshness.get("age_hours"),
+                "rows_modified_since": None,
+            }
+        elif col_stats["n_distinct"] is None:
+            col_stats["n_distinct"] = cardinality
+    return catalog_stats
+
+
+def _collect_change_indicators(conn: Any, schema_name: str) -> dict[str, str]:
+    """
+    A token per table from information_schema.TABLES UPDATE_TIME. InnoDB keeps
+    UPDATE_TIME in memory only, so it is NULL for tables not written since the
+    server started; those tables are keyed on the server start time instead.
+    """
+    try:
+        # MySQL 8 otherwise serves UPDATE_TIME from a cache up to a day old.
+        _execute_query(conn, "SET SESSION information_schema_stats_expiry = 0;")
+    except Exception as e:
+        logger.warning(f"Could not disable information_schema stats caching: {e}")
+    indicators_q = f"""
+    SELECT TABLE_NAME AS table_name, CREATE_TIME AS create_time,
+           UPDATE_TIME AS update_time,
+           (SELECT UNIX_TIMESTAMP() - VARIABLE_VALUE
+            FROM performance_schema.global_status
+            WHERE VARIABLE_NAME = 'Uptime') AS server_started
+    FROM information_schema.TABLES
+    WHERE TABLE_SCHEMA = '{schema_name}' AND TABLE_TYPE = 'BASE TABLE';
+    """
+    indicators = {}
+    for table_name, create_time, update_time, server_started in _stream_rows(
+        conn, indicators_q
+    ):
+        if update_time is not None:
+            indicators[table_name] = f"{create_time}:{update_time}"
+        elif server_started is not None:
+            # Rounded to the minute: the two clocks are read a second apart.
+            started = round(float(server_started) / 60)
+            indicators[table_name] = f"{create_time}:unmodified-since:{started}"
+    return indicators
+
+
+def _profile_cardinality(
+    conn: Any,
+    table_name: str,
+    col_name: str,
+    sample_size: int | None = None,
+    sampling: dict[str, Any] | None = None,
+) -> int:
+    """Exact distinct count over the table, or over the sample when sample_size is given."""
+    if sample_size is None:
+        card_q = (
+            f"SELECT COUNT(DISTINCT `{col_name}`) as unique_count FROM `{table_name}`;"
+        )
+    else:
+        card_q = f"""
+        SELECT COUNT(DISTINCT `{col_name}`) as unique_count
+        FROM ({_sample_query(f"`{table_name}`", f"`{col_name}`", sample_size, sampling)}) as sampled;
+        """
+    res = _execute_query(conn, card_q)[0]
+    return int(res["unique_count"])
+
+
+def _stream_batches(conn: Any, query: str) -> Iterator[list[tuple]]:
+    """Yields the rows of a query in batches from an unbuffered cursor."""
+    cursor = conn.cursor(buffered=False)
+    try:
+        cursor.execute(query)
+        while rows := cursor.fetchmany(STREAM_BATCH_SIZE):
+            yield rows
+    finally:
+        cursor.close()
+
+
+def _stream_rows(conn: Any, query: str) -> Iterator[tuple]:
+    """Yields the rows of a query as tuples from an unbuffered cursor, in batches."""
+    for rows in _stream_batches(conn, query):
+        yield from rows
+
+
+def _stream_column(conn: Any, query: str) -> Iterator[Any]:
+    """Yields the first column of each row from an unbuffered cursor, in batches."""
+    for row in _stream_rows(conn, query):
+        yield row[0]
+
+
+def _hash_sample(col_name: str, bits: int) -> str:
+    """Predicate keeping the values whose CRC32 has its low `bits` bits clear."""
+    if not bits:
+        return "TRUE"
+    return f"CRC32(`{col_name}`) & {(1 << bits) - 1} = 0"
+
+
+def _approximate_cardinality(
+    conn: Any,
+    table_name: str,
+    col_name: str,
+    relative_error: float,
+    row_estimate: int | None = None,
+) -> tuple[int, dict[str, Any]]:
+    """
+    HyperLogLog distinct count of a column, streamed without a server-side
+    sort; large tables send only a hash sample of their values.
+    """
+
+    def stream(bits: int) -> Iterator[Any]:
+        return _stream_column(
+            conn,
+            f"SELECT `{col_name}` FROM `{table_name}` "
+            f"WHERE `{col_name}` IS NOT NULL AND {_hash_sample(col_name, bits)};",
+        )
+
+    def exact() -> int:
+        return _profile_cardinality(conn, table_name, col_name)
+
+    return hash_sampled_count(stream, row_estimate, relative_error, exact)
+
+
+def _sketch_hash_filter(col_name: str, kind: str, limit: int) -> str:
+    """Predicate keeping the values whose sketch_hash is at most `limit`."""
+    col = f"`{col_name}`"
+    if kind == "text":
+        # MD5 hashes a string in its character set; the sketch hashes UTF-8.
+        text = f"CONVERT(TRIM({col}) USING utf8mb4)"
+    elif kind == "numeric":
+        text = (
+            f"CASE WHEN {col} = TRUNCATE({col}, 0) THEN CAST(TRUNCATE({col}, 0) AS CHAR) "
+            f"ELSE CAST({col} AS CHAR) END"
+        )
+    else:
+        text = f"CAST({col} AS CHAR)"
+    return f"CAST(LEFT(MD5({text}), 16) AS BINARY) <= '{limit:016x}'"
+
+
+def _sketch_column(
+    conn: Any,
+    table_name: str,
+    col_name: str,
+    schema_name: str,
+    sample_size: int,
+    full: bool = False,
+    sampling: dict[str, Any] | None = None,
+    col_type: str | None = None,
+) -> BottomKSketch:
+    """
+    Bottom-k sketch of a whole key column, or of the sampled rows of any other
+    column. A large key column sends only the values whose hash can be among
+    the sketch's smallest.
+    """
+    full_table_name = f"`{table_name}`"
+    not_null = f"`{col_name}` IS NOT NULL"
+    limit = None
+    if full:
+        kind = sketch_text_kind(col_type)
+        if kind:
+            limit = hash_limit(
+                (sampling or {}).get("row_estimate")
+                or _estimate_rows(conn, schema_name, table_name)
+            )
+        if limit is not None:
+            not_null += f" AND {_sketch_hash_filter(col_name, kind, limit)}"
+        query = f"SELECT `{col_name}` FROM {full_table_name} WHERE {not_null};"
+    else:
+        query = _sample_query(
+            full_table_name, f"`{col_name}`", sample_size, sampling, not_null
+        )
+    sketch = BottomKSketch(limit=limit)
+    sketch.update(_stream_column(conn, query))
+    return sketch
+
+
+def _profile_table_columns(
+    conn: Any,
+    table_name: str,
+    table_info: dict[str, Any],
+    table_stats: dict[str, dict[str, Any]],
+    schema_name: str,
+    sample_size: int,
+    profile_mode: str,
+    sampling: dict[str, Any] | None = None,
+) -> dict[str, Any]:
+    """Nullability and cheap per-column aggregates for one table."""
+    logger.info(f"Profiling table: {schema_name}.{table_name}")
+    full_table_name = f"`{table_name}`"
+    columns = table_info.get("columns", {})
+    if profile_mode != "statistics":
+        nullability, column_stats = _profile_columns_fused(
+            conn, full_table_name, columns, sample_size, sampling
+        )
+        return {
+            "nullability": nullability,
+            "column_stats": column_stats,
+            "statistics_provenance": {},
+        }
+
+    nullability, provenance, unresolved = nullability_from_statistics(
+        columns, table_stats
+    )
+    column_stats = {}
+    if unresolved:
+        sampled, column_stats = _profile_columns_fused(
+            conn, full_table_name, unresolved, sample_size, sampling
+        )
+        nullability.update(sampled)
+        for col_name in unresolved:
+            provenance[col_name] = {"source": "sample", "sample_size": sample_size}
+    return {
+        "nullability": {c: nullability[c] for c in columns if c in nullability},
+        "column_stats": column_stats,
+        "statistics_provenance": provenance,
+    }
+
+
+def _profile_key_cardinality(
+    conn: Any,
+    table_name: str,
+    col_name: str,
+    col_stats: dict[str, Any],
+    schema_name: str,
+    sample_size: int,
+    profile_mode: str,
+    cardinality_error: float | None = None,
+    sampling: dict[str, Any] | None = None,
+) -> dict[str, Any]:
+    """Distinct count of one key column: from statistics, approximate, or exact."""
+    if profile_mode == "statistics":
+        estimate = cardinality_from_statistics(col_stats)
+        if estimate is not None:
+            return {
+                "value": estimate,
+                "provenance": statistics_provenance(col_stats["source"], col_stats),
+            }
+        return {
+            "value": _profile_cardinality(
+                conn, table_name, col_name, sample_size, sampling
+            ),
+            "provenance": {"source": "sample", "sample_size": sample_size},
+        }
+    if cardinality_error is not None:
+        value, estimate = _approximate_cardinality(
+            conn,
+            table_name,
+            col_name,
+            cardinality_error,
+            # A partitioned parent has no row estimate of its own; the plan
+            # sums its partitions'.
+            (sampling or {}).get("row_estimate")
+            or _estimate_rows(conn, schema_name, table_name),
+        )
+        return {"value": value, "estimate": estimate}
+    return {"value": _profile_cardinality(conn, table_name, col_name)}
+
+
+def _key_columns(
+    table_name: str, table_info: dict[str, Any], foreign_keys: list[dict[str, Any]]
+) -> set[str]:
+    """PK, UNIQUE and FK columns of a table."""
+    key_columns = set()
+    for const in table_info.get("constraints", []):
+        if const.get("CONSTRAINT_TYPE") in ("PRIMARY KEY", "UNIQUE") and const.get(
+            "COLUMN_NAME"
+        ):
+            key_columns.add(const["COLUMN_NAME"])
+    for fk in foreign_keys:
+        if fk.get("from_table") == table_name and fk.get("from_column"):
+            key_columns.add(fk["from_column"])
+    return key_columns
+
+
+def _estimate_rows(conn: Any, schema_name: str, table_name: str) -> int | None:
+    """Row count from the catalog, without scanning the table."""
+    estimate_q = f"""
+    SELECT TABLE_ROWS AS row_estimate FROM information_schema.TABLES
+    WHERE TABLE_SCHEMA = '{schema_name}' AND TABLE_NAME = '{table_name}';
+    """
+    rows = _execute_query(conn, estimate_q)
+    if not rows or not rows[0]["row_estimate"] or rows[0]["row_estimate"] < 0:
+        return None
+    return int(rows[0]["row_estimate"])
+
+
+def _anti_join_orphans(
+    conn: Any,
+    from_table: str,
+    fks: list[dict[str, Any]],
+    schema_name: str,
+    sample_size: int,
+    sampling: dict[str, Any] | None = None,
+) -> dict[str, float]:
+    """
+    Orphan percentages of several FKs of one table in one statement: a single
+    sampled scan of the table, probed with NOT EXISTS against each parent.
+    """
+    from_full = f"`{from_table}`"
+    from_cols = list(dict.fromkeys(fk["from_column"] for fk in fks))
+    sampled_cols = ", ".join(f"`{col}`" for col in from_cols)
+    any_value = " OR ".join(f"`{col}` IS NOT NULL" for col in from_cols)
+    flags = []
+    aggregates = []
+    for i, fk in enumerate(fks):
+        from_col, to_col = fk["from_column"], fk["to_column"]
+        to_full = f"`{schema_name}`.`{fk['to_table']}`"
+        flags.append(f"x.`{from_col}` AS v{i}")
+        flags.append(
+            f"CASE WHEN x.`{from_col}` IS NOT NULL AND NOT EXISTS "
+            f"(SELECT 1 FROM {to_full} t WHERE t.`{to_col}` = x.`{from_col}`) "
+            f"THEN 1 ELSE 0 END AS o{i}"
+        )
+        aggregates.append(f"COUNT(v{i}) AS total_{i}, SUM(o{i}) AS orphans_{i}")
+    orphan_q = f"""
+    SELECT {", ".join(aggregates)}
+    FROM (
+        SELECT {", ".join(flags)}
+        FROM ({_sample_query(from_full, sampled_cols, sample_size, sampling, any_value)}) AS x
+    ) AS s;
+    """
+    res = _execute_query(conn, orphan_q)[0]
+    orphans = {}
+    for i, fk in enumerate(fks):
+        total_fk_values = int(res[f"total_{i}"] or 0)
+        orphan_count = int(res[f"orphans_{i}"] or 0)
+        orphan_pct = (
+            (orphan_count / total_fk_values) * 100 if total_fk_values > 0 else 0
+        )
+        orphans[orphan_check_name(fk)] = round(orphan_pct, 2)
+    return orphans
+
+
+def _bloom_orphans(
+    conn: Any,
+    fk: dict[str, Any],
+    schema_name: str,
+    sample_size: int,
+    sampling: dict[str, Any] | None = None,
+) -> dict[str, Any]:
+    """
+    Orphan percentage of an FK whose parent is outside the profiled schema:
+    the parent keys are streamed into a Bloom filter of bounded size and the
+    sampled FK values are checked against it on the client.
+    """
+    from_col, to_col = fk["from_column"], fk["to_column"]
+    to_schema, to_table = fk["to_schema"], fk["to_table"]
+    from_full = f"`{fk['from_table']}`"
+    to_full = f"`{to_schema}`.`{to_table}`"
+    try:
+        parent_rows = _estimate_rows(conn, to_schema, to_table)
+    except Exception as e:
+        logger.warning(
+            f"No row estimate for {to_full}, sizing the filter by default: {e}"
+        )
+        parent_rows = None
+    return orphan_estimate(
+        _stream_column(
+            conn, f"SELECT `{to_col}` FROM {to_full} WHERE `{to_col}` IS NOT NULL;"
+        ),
+        _stream_column(
+            conn,
+            _sample_query(
+                from_full,
+                f"`{from_col}`",
+                sample_size,
+                sampling,
+                f"`{from_col}` IS NOT NULL",
+            ),
+        ),
+        parent_rows,
+    )
+
+
+def _check_orphans(
+    conn: Any,
+    from_table: str,
+    fks: list[dict[str, Any]],
+    schema_name: str,
+    sample_size: int,
+    sampling: dict[str, Any] | None = None,
+) -> dict[str, Any]:
+    """
+    Orphan percentages for the FKs of one table. Parents in the schema are
+    checked server-side in one batched anti-join; parents in another schema or
+    database are checked client-side against a Bloom filter.
+    """
+    local = [fk for fk in fks if fk.get("to_schema", schema_name) == schema_name]
+    remote = [fk for fk in fks if fk.get("to_schema", schema_name) != schema_name]
+    logger.info(
+        f"Checking orphans for {len(fks)} foreign keys of {from_table} "
+        f"({len(remote)} outside schema '{schema_name}')"
+    )
+    orphans: dict[str, Any] = {}
+    if local:
+        orphans.update(
+            _anti_join_orphans(
+                conn, from_table, local, schema_name, sample_size, sampling
+            )
+        )
+    for fk in remote:
+        orphans[orphan_check_name(fk)] = _bloom_orphans(
+            conn, fk, schema_name, sample_size, sampling
+        )
+    return orphans
+
+
+def _profile_column_patterns(
+    conn: Any,
+    table_name: str,
+    table_info: dict[str, Any],
+    schema_name: str,
+    sample_size: int,
+    sampling: dict[str, Any] | None = None,
+) -> dict[str, Any]:
+    """
+    Pattern profile and type anomalies of all text columns, from one sampled
+    read of at most MAX_SAMPLE_ROWS rows.
+    """
+    text_columns = [
+        col_name
+        for col_name, col_info in table_info.get("columns", {}).items()
+        if (col_info.get("type") or "").lower().split("(")[0].split(" ")[0]
+        in _TEXT_TYPES
+    ]
+    if not text_columns:
+        return {"patterns": {}, "anomalies": {}}
+    sample_size, sampling = cap_sampling(
+        table_info, sample_size, sampling, MAX_SAMPLE_ROWS
+    )
+    select_list = ", ".join(f"`{col_name}`" for col_name in text_columns)
+    sample_q = _sample_query(f"`{table_name}`", select_list, sample_size, sampling)
+    return profile_text_columns(_stream_batches(conn, sample_q), text_columns)
+
+
+def _is_timeout(error: Exception) -> bool:
+    """True for statements interrupted by MAX_EXECUTION_TIME."""
+    return getattr(error, "errno", None) in QUERY_TIMEOUT_ERRNOS
+
+
+def _set_statement_timeout(conn: Any, seconds: float) -> None:
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            f"SET SESSION MAX_EXECUTION_TIME = {max(1, int(seconds * 1000))};"
+        )
+    finally:
+        cursor.close()
+
+
+def _server_load(conn: Any) -> dict[str, Any]:
+    """
+    Threads running a statement besides this one, and this server's lag
+    behind its source when it is a replica.
+    """
+    running = _execute_query(conn, "SHOW GLOBAL STATUS LIKE 'Threads_running';")
+    lag = None
+    try:
+        # SHOW REPLICA STATUS replaced SHOW SLAVE STATUS in MySQL 8.0.22.
+        try:
+            replica = _execute_query(conn, "SHOW REPLICA STATUS;")
+        except Exception:
+            replica = _execute_query(conn, "SHOW SLAVE STATUS;")
+        if replica:
+            lag = replica[0].get(
+                "Seconds_Behind_Source", replica[0].get("Seconds_Behind_Master")
+            )
+    except Exception as e:
+        logger.info(f"Replication status is not available: {e}")
+    return {
+        "active_sessions": max(0, int(running[0]["Value"]) - 1) if running else None,
+        "replication_lag_seconds": None if lag is None else float(lag),
+    }
+
+
+def _integer_primary_key(table_info: dict[str, Any]) -> str | None:
+    """The table's primary key column if it is a single integer column."""
+    pk_columns = [
+        const["COLUMN_NAME"]
+        for const in table_info.get("constraints", [])
+        if const.get("CONSTRAINT_TYPE") == "PRIMARY KEY" and const.get("COLUMN_NAME")
+    ]
+    if len(pk_columns) != 1:
+        return None
+    col_type = table_info.get("columns", {}).get(pk_columns[0], {}).get("type") or ""
+    if col_type.lower().split("(")[0].split(" ")[0] not in _INTEGER_TYPES:
+        return None
+    return pk_columns[0]
+
+
+def _plan_key_ranges(
+    conn: Any,
+    schema_structure: dict[str, Any],
+    sampling: dict[str, dict[str, Any]],
+) -> dict[str, dict[str, Any]]:
+    """
+    Places the key ranges of every page-sampled table: PAGE_SAMPLE_KEY_RANGES
+    ranges, one at a seeded random offset in each equal slice of the primary
+    key's span, together covering the plan's fraction of it. Tables without a
+    single integer primary key, and partitioned tables, whose subset of
+    partitions already bounds the read, fall back to a row sample.
+    """
+    for table_name, plan in sampling.items():
+        if plan["strategy"] != "page_sample":
+            continue
+        if plan.get("partitions"):
+            plan["strategy"] = "row_sample"
+            plan["reason"] = "sampled partitions are read by row"
+            continue
+        table_info = schema_structure.get("tables", {}).get(table_name, {})
+        key = _integer_primary_key(table_info)
+        bounds = None
+        if key:
+            try:
+                bounds = _execute_query(
+                    conn,
+                    f"SELECT MIN(`{key}`) AS low, MAX(`{key}`) AS high FROM `{table_name}`;",
+                )[0]
+            except Exception as e:
+                logger.warning(f"Could not read the key range of {table_name}: {e}")
+        if not bounds or bounds["low"] is None:
+            plan["strategy"] = "row_sample"
+            plan["reason"] = "no integer primary key to sample ranges of"
+            continue
+        low, high = int(bounds["low"]), int(bounds["high"])
+        slice_width = (high - low + 1) / PAGE_SAMPLE_KEY_RANGES
+        range_width = max(1, int(slice_width * plan["fraction"]))
+        rng = random.Random(f"{SAMPLE_SEED}:{table_name}")
+        ranges = []
+        for i in range(PAGE_SAMPLE_KEY_RANGES):
+            start = low + int(
+                i * slice_width + rng.random() * max(0, slice_width - range_width)
+            )
+            ranges.append([start, start + range_width - 1])
+        plan["key_column"] = key
+        plan["key_ranges"] = ranges
+    return sampling
+
+
 def profile_mysql_data(
     conn: Any,
     schema_name: str,
     schema_structure: dict[str, Any],
     sample_size: int = 10000,
+    profile_mode: str = "sampled",
+    connect: Callable[[], Any] | None = None,
+    pool_size: int = 1,
+    cardinality_error: float | None = None,
+    statement_timeout: float | None = None,
+    time_budget: float | None = None,
+    previous_profile: dict[str, Any] | None = None,
+    discover_relationships: bool = False,
+    adaptive_concurrency: bool = False,
 ) -> dict[str, Any]:
+    """
+    Profiles nullability, cardinality, orphan records and type anomalies.
+
+    Every text column is sampled once per table and classified client-side
+    (numbers, dates, emails, UUIDs, IPv4 addresses, lengths, top values) into
+    "column_patterns"; values that break a column's dominant pattern are
+    reported under "type_anomalies".
+
+    In "statistics" mode nullability and key-column cardinality are read from
+    column histograms and index statistics instead of scanning the tables; only
+    columns without statistics fall back to a sampled scan. Each figure's source
+    and staleness is recorded under "statistics_provenance".
+
+    When `connect` is given, checks run concurrently on up to `pool_size`
+    connections; results are merged in schema order.
+
+    With `cardinality_error` set, key-column cardinality is an approximate
+    distinct count within that relative standard error instead of an exact
+    COUNT(DISTINCT); each estimate's method and bounds are recorded under
+    "cardinality_estimates".
+
+    `statement_timeout` and `time_budget` (seconds) bound each statement and the
+    whole run; an exhausted budget yields a partial profile, see
+    "profiling_status".
+
+    With a `previous_profile` snapshot, tables whose change indicator shows no
+    writes since it was taken reuse its results instead of being profiled.
+
+    Sampled checks read each table in full, by a seeded RAND() filter, or, for
+    large tables, from random ranges of an integer primary key, depending on
+    the row estimate and size that introspection recorded; each table's plan
+    is listed under "sampling". Partitioned tables are sampled from a bounded
+    subset of their partitions.
+
+    With `discover_relationships`, candidate FK columns whose sampled values
+    are contained in a key column are listed under "value_overlap".
+    With `adaptive_concurrency`, concurrency starts low and follows the
+    server's active sessions, replication lag and probe latency, pausing when
+    the server is stressed; decisions are recorded under "throttling".
+    """
     try:
         conn.database = schema_name
     except Exception as e:
@@ -30,110 +904,80 @@ def profile_mysql_data(
         "cardinality": {},
         "orphan_records": {},
         "type_anomalies": {},
+        "column_stats": {},
+        "column_patterns": {},
+        "sampling": {},
     }
-    tables = schema_structure.get("tables", {})
-
-    for table_name, table_info in tables.items():
-        logger.info(f"Profiling table: {schema_name}.{table_name}")
-        profile_results["nullability"][table_name] = {}
-        profile_results["cardinality"][table_name] = {}
-        # Nullability
-        for col_name in table_info.get("columns", {}):
-            null_q = f"""
-            SELECT
-                COUNT(*) as total_count,
-                SUM(CASE WHEN `{col_name}` IS NULL THEN 1 ELSE 0 END) as null_count
-            FROM (SELECT `{col_name}` FROM `{table_name}` LIMIT {sample_size}) as sampled;
-            """
-            try:
-                res = _execute_query(conn, null_q)[0]
-                null_pct = (
-                    (res["null_count"] / res["total_count"]) * 100
-                    if res["total_count"] > 0
-                    else 0
-                )
-                profile_results["nullability"][table_name][col_name] = round(
-                    null_pct, 2
-                )
-            except Exception as e:
-                logger.error(f"Error profiling nulls for {table_name}.{col_name}: {e}")
-                profile_results["nullability"][table_name][col_name] = "Error"
-
-        # Cardinality - PKs, FKs
-        key_columns = set()
-        for const in table_info.get("constraints", []):
-            if const.get("type") in ("PRIMARY KEY", "UNIQUE") and const.get("columns"):
-                key_columns.add(const["columns"])
-        for fk in schema_structure.get("foreign_keys", []):
-            if fk.get("from_table") == table_name and fk.get("from_column"):
-                key_columns.add(fk["from_column"])
-
-        for col_name in key_columns:
-            if col_name in table_info.get("columns", {}):
-                card_q = f"SELECT COUNT(DISTINCT `{col_name}`) as unique_count FROM `{table_name}`;"
-                try:
-                    res = _execute_query(conn, card_q)[0]
-                    profile_results["cardinality"][table_name][col_name] = res[
-                        "unique_count"
-                    ]
-                except Exception as e:
-                    logger.error(
-                        f"Error profiling cardinality for {table_name}.{col_name}: {e}"
-                    )
-                    profile_results["cardinality"][table_name][col_name] = "Error"
-
-    # Orphan Records
-    for fk in schema_structure.get("foreign_keys", []):
-        from_table, from_col = fk.get("from_table"), fk.get("from_column")
-        to_table, to_col = fk.get("to_table"), fk.get("to_column")
-        if from_table and from_col and to_table and to_col:
-            fk_name = f"{from_table}.{from_col} -> {to_table}.{to_col}"
-            logger.info(f"Checking orphans for {fk_name}")
-            orphan_q = f"""
-            SELECT
-                COUNT(s.`{from_col}`) as total_fk_values,
-                SUM(CASE WHEN t.`{to_col}` IS NULL THEN 1 ELSE 0 END) as orphan_count
-            FROM (SELECT `{from_col}` FROM `{from_table}` WHERE `{from_col}` IS NOT NULL LIMIT {sample_size}) as s
-            LEFT JOIN `{to_table}` t ON s.`{from_col}` = t.`{to_col}`;
-            """
-            try:
-                res = _execute_query(conn, orphan_q)[0]
-                orphan_pct = (
-                    (res["orphan_count"] / res["total_fk_values"]) * 100
-                    if res["total_fk_values"] > 0
-                    else 0
-                )
-                profile_results["orphan_records"][fk_name] = round(orphan_pct, 2)
-            except Exception as e:
-                logger.error(f"Error checking orphans for {fk_name}: {e}")
-                profile_results["orphan_records"][fk_name] = "Error"
-
-    # Type Anomalies - Heuristic for phone/zip
-    for table_name, table_info in tables.items():
-        for col_name, col_info in table_info.get("columns", {}).items():
-            col_type = col_info.get("type", "").lower()
-            if "char" in col_type or "text" in col_type:
-                if (
-                    "phone" in col_name.lower()
-                    or "zip" in col_name.lower()
-                    or "postal" in col_name.lower()
-                ):
-                    anomaly_q = f"""
-                    SELECT COUNT(*) as non_numeric_count
-                    FROM (SELECT `{col_name}` FROM `{table_name}` WHERE `{col_name}` IS NOT NULL LIMIT {sample_size}) as s
-                    WHERE `{col_name}` REGEXP '[^0-9.-]';
-                    """
-                    try:
-                        res = _execute_query(conn, anomaly_q)[0]
-                        if res["non_numeric_count"] > 0:
-                            key = f"{table_name}.{col_name}"
-                            if key not in profile_results["type_anomalies"]:
-                                profile_results["type_anomalies"][key] = []
-                            profile_results["type_anomalies"][key].append(
-                                f"Found {res['non_numeric_count']} rows with non-numeric characters in sample."
-                            )
-                    except Exception as e:
-                        logger.warning(
-                            f"Error checking type anomaly for {table_name}.{col_name}: {e}"
-                        )
+    if cardinality_error is not None:
+        profile_results["cardinality_estimates"] = {}
+
+    catalog_stats: dict[str, dict[str, dict[str, Any]]] = {}
+    if profile_mode == "statistics":
+        profile_results["statistics_provenance"] = {}
+        try:
+            catalog_stats = _collect_catalog_statistics(conn, schema_name)
+        except Exception as e:
+            logger.error(f"Error reading statistics for schema {schema_name}: {e}")
+
+    change_indicators: dict[str, str] = {}
+    try:
+        change_indicators = _collect_change_indicators(conn, schema_name)
+    except Exception as e:
+        logger.warning(f"Could not read change indicators for {schema_name}: {e}")
+
+    profiler = DialectProfiler(
+        table_columns=partial(
+            _profile_table_columns,
+            schema_name=schema_name,
+            sample_size=sample_size,
+            profile_mode=profile_mode,
+        ),
+        key_cardinality=partial(
+            _profile_key_cardinality,
+            schema_name=schema_name,
+            sample_size=sample_size,
+            profile_mode=profile_mode,
+            cardinality_error=cardinality_error,
+        ),
+        orphans=partial(
+            _check_orphans, schema_name=schema_name, sample_size=sample_size
+        ),
+        column_patterns=partial(
+            _profile_column_patterns, schema_name=schema_name, sample_size=sample_size
+        ),
+        key_columns=_key_columns,
+        is_timeout=_is_timeout,
+        set_statement_timeout=_set_statement_timeout,
+        value_sketch=partial(
+            _sketch_column, schema_name=schema_name, sample_size=sample_size
+        ),
+        server_load=_server_load,
+    )
+
+    def connect_to_schema() -> Any:
+        schema_conn = connect()
+        schema_conn.database = schema_name
+        return schema_conn
+
+    sampling = _plan_key_ranges(
+        conn, schema_structure, plan_sampling(schema_structure, sample_size)
+    )
+    pool = ConnectionPool(conn, connect_to_schema if connect else None, pool_size)
+    try:
+        run_profile_checks(
+            pool,
+            profiler,
+            schema_structure,
+            profile_results,
+            catalog_stats,
+            statement_timeout,
+            time_budget,
+            change_indicators,
+            previous_profile,
+            discover=discover_relationships,
+            adaptive=adaptive_concurrency,
+            sampling=sampling,
+        )
+    finally:
+        pool.close()
     return profile_results
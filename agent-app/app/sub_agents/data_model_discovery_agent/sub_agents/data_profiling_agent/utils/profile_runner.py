@@ -0,0 +1,418 @@
+import logging
+import time
+from collections.abc import Callable
+from functools import partial
+from typing import Any, NamedTuple
+
+from .catalog_statistics import merge_column_provenance
+from .connection_pool import SKIPPED, ConnectionPool, run_on_pool
+from .incremental import (
+    TABLE_FIGURES,
+    copy_table_results,
+    orphan_check_name,
+    reusable_orphan_checks,
+    reusable_tables,
+)
+from .load_shedding import AdaptiveConcurrency
+from .value_overlap import BottomKSketch, discover_relationships, overlap_columns
+
+logger = logging.getLogger(__name__)
+
+ERROR = "Error"
+TIMED_OUT = "Timeout"
+
+# Checks run in this order: sampled, bounded checks first, full-column scans
+# last, so a run that hits its budget still has the most results per second.
+CHECK_PRIORITY = (
+    "nullability",
+    "column_patterns",
+    "orphan_records",
+    "cardinality",
+    "value_sketches",
+)
+
+
+class DialectProfiler(NamedTuple):
+    """
+    The checks one SQL dialect provides to a profiling run. Each check takes a
+    connection first and may raise; the runner records failures and timeouts.
+    """
+
+    table_columns: Callable[..., dict[str, Any]]
+    key_cardinality: Callable[..., dict[str, Any]]
+    orphans: Callable[..., Any]
+    column_patterns: Callable[..., dict[str, Any]]
+    key_columns: Callable[..., set[str]]
+    is_timeout: Callable[[Exception], bool]
+    set_statement_timeout: Callable[[Any, float], None] | None = None
+    value_sketch: Callable[..., BottomKSketch] | None = None
+    server_load: Callable[[Any], dict[str, Any]] | None = None
+
+
+class _Check(NamedTuple):
+    kind: str
+    key: tuple[str, ...]
+    run: Callable[[Any], Any]
+
+    @property
+    def labels(self) -> list[str]:
+        if self.kind == "orphan_records":
+            return [f"{self.kind}:{fk_name}" for fk_name in self.key]
+        return [f"{self.kind}:{'.'.join(self.key)}"]
+
+    @property
+    def label(self) -> str:
+        return ", ".join(self.labels)
+
+
+def _complete_foreign_keys(schema_structure: dict[str, Any]) -> list[dict[str, Any]]:
+    return [
+        fk
+        for fk in schema_structure.get("foreign_keys", [])
+        if fk.get("from_table")
+        and fk.get("from_column")
+        and fk.get("to_table")
+        and fk.get("to_column")
+    ]
+
+
+def _build_checks(
+    profiler: DialectProfiler,
+    schema_structure: dict[str, Any],
+    catalog_stats: dict[str, dict[str, dict[str, Any]]],
+    reused_tables: set[str],
+    reused_orphans: dict[str, Any],
+    sampling: dict[str, dict[str, Any]],
+    discover: bool = False,
+) -> list[_Check]:
+    tables = schema_structure.get("tables", {})
+    all_foreign_keys = schema_structure.get("foreign_keys", [])
+    checks: dict[str, list[_Check]] = {kind: [] for kind in CHECK_PRIORITY}
+
+    for table_name, table_info in tables.items():
+        if table_name in reused_tables:
+            continue
+        columns = table_info.get("columns", {})
+        table_stats = catalog_stats.get(table_name, {})
+        checks["nullability"].append(
+            _Check(
+                "nullability",
+                (table_name,),
+                partial(
+                    profiler.table_columns,
+                    table_name=table_name,
+                    table_info=table_info,
+                    table_stats=table_stats,
+                    sampling=sampling.get(table_name),
+                ),
+            )
+        )
+        checks["column_patterns"].append(
+            _Check(
+                "column_patterns",
+                (table_name,),
+                partial(
+                    profiler.column_patterns,
+                    table_name=table_name,
+                    table_info=table_info,
+                    sampling=sampling.get(table_name),
+                ),
+            )
+        )
+        key_columns = profiler.key_columns(table_name, table_info, all_foreign_keys)
+        for col_name in sorted(key_columns):
+            if col_name in columns:
+                checks["cardinality"].append(
+                    _Check(
+                        "cardinality",
+                        (table_name, col_name),
+                        partial(
+                            profiler.key_cardinality,
+                            table_name=table_name,
+                            col_name=col_name,
+                            col_stats=table_stats.get(col_name, {}),
+                            sampling=sampling.get(table_name),
+                        ),
+                    )
+                )
+
+    # One orphan check per referencing table, covering all of its FKs.
+    orphan_batches: dict[str, list[dict[str, Any]]] = {}
+    for fk in _complete_foreign_keys(schema_structure):
+        if orphan_check_name(fk) not in reused_orphans:
+            orphan_batches.setdefault(fk["from_table"], []).append(fk)
+    for from_table, fks in orphan_batches.items():
+        checks["orphan_records"].append(
+            _Check(
+                "orphan_records",
+                tuple(orphan_check_name(fk) for fk in fks),
+                partial(
+                    profiler.orphans,
+                    from_table=from_table,
+                    fks=fks,
+                    sampling=sampling.get(from_table),
+                ),
+            )
+        )
+
+    if discover and profiler.value_sketch:
+        # Sketches are cheap to compare but not stored, so every table is
+        # sketched, including tables whose other figures are reused.
+        for role, columns in overlap_columns(schema_structure).items():
+            for table_name, col_name in columns:
+                checks["value_sketches"].append(
+                    _Check(
+                        "value_sketches",
+                        (table_name, col_name, role),
+                        partial(
+                            profiler.value_sketch,
+                            table_name=table_name,
+                            col_name=col_name,
+                            full=role == "targets",
+                            sampling=sampling.get(table_name),
+                            col_type=schema_structure["tables"][table_name]["columns"][
+                                col_name
+                            ].get("type"),
+                        ),
+                    )
+                )
+
+    return [check for kind in CHECK_PRIORITY for check in checks[kind]]
+
+
+def run_profile_checks(
+    pool: ConnectionPool,
+    profiler: DialectProfiler,
+    schema_structure: dict[str, Any],
+    profile_results: dict[str, Any],
+    catalog_stats: dict[str, dict[str, dict[str, Any]]] | None = None,
+    statement_timeout: float | None = None,
+    time_budget: float | None = None,
+    change_indicators: dict[str, str] | None = None,
+    previous: dict[str, Any] | None = None,
+    discover: bool = False,
+    sampling: dict[str, dict[str, Any]] | None = None,
+    adaptive: bool = False,
+) -> None:
+    """
+    Runs every profiling check for a schema on the pool, cheapest first, and
+    merges the results into profile_results in schema order.
+
+    Each statement is limited to statement_timeout seconds, or to whatever is
+    left of time_budget if that is shorter. Checks that have not started when
+    the budget runs out are skipped; skipped and timed-out checks are listed
+    in profile_results["profiling_status"].
+
+    With a `previous` profile snapshot, tables whose change indicator and
+    structure match it are not queried; their stored results are reused.
+    The indicators of every completely profiled table are returned in
+    profile_results["change_indicators"] for the next snapshot.
+
+    With `discover`, key columns and candidate referencing columns are
+    sketched and column pairs with high value containment are returned in
+    profile_results["value_overlap"].
+
+    `sampling` holds the plan of each table (see sampling.plan_sampling); it
+    is passed to every sampled check of the table and recorded in
+    profile_results["sampling"].
+
+    With `adaptive`, the number of checks running at once follows the
+    server's load between one and the pool size (see
+    load_shedding.AdaptiveConcurrency), and may pause; the throttling
+    decisions are recorded in profile_results["throttling"].
+    """
+    started = time.monotonic()
+    deadline = started + time_budget if time_budget else None
+    tables = schema_structure.get("tables", {})
+    change_indicators = change_indicators or {}
+    sampling = sampling or {}
+    reused_tables = reusable_tables(previous, schema_structure, change_indicators)
+    reused_orphans = reusable_orphan_checks(
+        previous, _complete_foreign_keys(schema_structure), reused_tables
+    )
+    checks = _build_checks(
+        profiler,
+        schema_structure,
+        catalog_stats or {},
+        reused_tables,
+        reused_orphans,
+        sampling,
+        discover,
+    )
+
+    controller = None
+    if adaptive and profiler.server_load:
+        server_load = profiler.server_load
+
+        def probe() -> dict[str, Any]:
+            with pool.connection() as conn:
+                probe_started = time.monotonic()
+                signals = server_load(conn)
+                latency = time.monotonic() - probe_started
+            return {**signals, "probe_latency_ms": round(latency * 1000, 2)}
+
+        controller = AdaptiveConcurrency(probe, pool.size)
+
+    def guarded(check: _Check) -> Callable[[Any], Any]:
+        def run(conn: Any) -> Any:
+            limit = statement_timeout
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                limit = remaining if limit is None else min(limit, remaining)
+            try:
+                if limit is not None and profiler.set_statement_timeout:
+                    profiler.set_statement_timeout(conn, max(limit, 0.001))
+                return check.run(conn)
+            except Exception as e:
+                if profiler.is_timeout(e):
+                    logger.warning(f"Profiling check {check.label} timed out: {e}")
+                    if controller:
+                        controller.check_timed_out()
+                    return TIMED_OUT
+                logger.error(f"Error in profiling check {check.label}: {e}")
+                return ERROR
+
+        return run
+
+    results = run_on_pool(
+        pool, [guarded(check) for check in checks], deadline, controller
+    )
+    profile_results["throttling"] = (
+        controller.summary()
+        if controller
+        else {"adaptive": False, "ceiling": pool.size}
+    )
+
+    for table_name in tables:
+        if table_name not in reused_tables:
+            profile_results["cardinality"][table_name] = {}
+            if table_name in sampling:
+                profile_results.setdefault("sampling", {})[table_name] = sampling[
+                    table_name
+                ]
+    skipped: list[str] = []
+    timed_out: list[str] = []
+    incomplete_tables: set[str] = set()
+    sketches: dict[str, dict[tuple[str, str], BottomKSketch]] = {
+        "sources": {},
+        "targets": {},
+    }
+    for check, result in zip(checks, results, strict=True):
+        if check.kind not in ("orphan_records", "value_sketches") and (
+            result is SKIPPED or result in (TIMED_OUT, ERROR)
+        ):
+            incomplete_tables.add(check.key[0])
+        if result is SKIPPED:
+            skipped.extend(check.labels)
+            continue
+        if result == TIMED_OUT:
+            timed_out.extend(check.labels)
+
+        if check.kind == "nullability":
+            (table_name,) = check.key
+            if not isinstance(result, dict):
+                continue
+            profile_results["nullability"][table_name] = result["nullability"]
+            if any(
+                value in (TIMED_OUT, ERROR) for value in result["nullability"].values()
+            ):
+                incomplete_tables.add(table_name)
+            timed_out.extend(
+                f"nullability:{table_name}.{col_name}"
+                for col_name, value in result["nullability"].items()
+                if value == TIMED_OUT
+            )
+            if result["column_stats"]:
+                profile_results["column_stats"][table_name] = result["column_stats"]
+            if "statistics_provenance" in profile_results:
+                merge_column_provenance(
+                    profile_results["statistics_provenance"],
+                    table_name,
+                    "nullability",
+                    result["statistics_provenance"],
+                )
+        elif check.kind == "cardinality":
+            table_name, col_name = check.key
+            if not isinstance(result, dict):
+                profile_results["cardinality"][table_name][col_name] = result
+                continue
+            profile_results["cardinality"][table_name][col_name] = result["value"]
+            if result.get("estimate"):
+                profile_results.setdefault("cardinality_estimates", {}).setdefault(
+                    table_name, {}
+                )[col_name] = result["estimate"]
+            if result.get("provenance") and "statistics_provenance" in profile_results:
+                merge_column_provenance(
+                    profile_results["statistics_provenance"],
+                    table_name,
+                    "cardinality",
+                    {col_name: result["provenance"]},
+                )
+        elif check.kind == "orphan_records":
+            if not isinstance(result, dict):
+                for fk_name in check.key:
+                    profile_results["orphan_records"][fk_name] = result
+                continue
+            for fk_name, value in result.items():
+                if isinstance(value, dict):
+                    profile_results["orphan_records"][fk_name] = value["value"]
+                    profile_results.setdefault("orphan_estimates", {})[fk_name] = value[
+                        "estimate"
+                    ]
+                else:
+                    profile_results["orphan_records"][fk_name] = value
+        elif check.kind == "column_patterns":
+            (table_name,) = check.key
+            if not isinstance(result, dict):
+                continue
+            if result["patterns"]:
+                profile_results["column_patterns"][table_name] = result["patterns"]
+            for col_name, messages in result["anomalies"].items():
+                profile_results["type_anomalies"][f"{table_name}.{col_name}"] = messages
+        elif check.kind == "value_sketches":
+            table_name, col_name, role = check.key
+            if isinstance(result, BottomKSketch):
+                sketches[role][(table_name, col_name)] = result
+
+    if previous:
+        for table_name in reused_tables:
+            copy_table_results(
+                previous["profile"], profile_results, table_name, tables[table_name]
+            )
+        profile_results["orphan_records"].update(reused_orphans)
+        # Keep per-table figures in schema order regardless of where they came from.
+        for figure in TABLE_FIGURES:
+            if figure in profile_results:
+                profile_results[figure] = {
+                    table_name: profile_results[figure][table_name]
+                    for table_name in tables
+                    if table_name in profile_results[figure]
+                }
+
+    # Orphan checks are batched per referencing table; report them in FK order.
+    profile_results["orphan_records"] = {
+        fk_name: profile_results["orphan_records"][fk_name]
+        for fk_name in map(orphan_check_name, _complete_foreign_keys(schema_structure))
+        if fk_name in profile_results["orphan_records"]
+    }
+
+    if discover and profiler.value_sketch:
+        profile_results["value_overlap"] = discover_relationships(
+            schema_structure, sketches["sources"], sketches["targets"]
+        )
+
+    profile_results["change_indicators"] = {
+        table_name: change_indicators[table_name]
+        for table_name in tables
+        if table_name in change_indicators and table_name not in incomplete_tables
+    }
+    profile_results["profiling_status"] = {
+        "complete": not skipped and not timed_out,
+        "elapsed_seconds": round(time.monotonic() - started, 2),
+        "time_budget_seconds": time_budget,
+        "statement_timeout_seconds": statement_timeout,
+        "checks_run": sum(len(check.labels) for check in checks) - len(skipped),
+        "skipped": skipped,
+        "timed_out": timed_out,
+        "tables_reused": [t for t in tables if t in reused_tables],
+    }
@@ -0,0 +1,150 @@
+import os
+from typing import Any
+
+# Tables at least this large on disk (or with at least PAGE_SAMPLE_MIN_ROWS
+# rows) are sampled by page instead of by row, since a row sample still reads
+# every page.
+PAGE_SAMPLE_MIN_BYTES = int(
+    os.environ.get("PROFILING_PAGE_SAMPLE_MIN_BYTES", str(1024**3))
+)
+PAGE_SAMPLE_MIN_ROWS = int(os.environ.get("PROFILING_PAGE_SAMPLE_MIN_ROWS", "10000000"))
+# Sampling fractions are raised by this factor so that the row limit, not the
+# luck of the draw, decides how many rows are read. It stays small because the
+# limit drops the tail of the sample, which would favour the table's first pages.
+OVERSAMPLE = 1.1
+# Page samples keep whole pages, so they vary more and are oversampled more.
+PAGE_OVERSAMPLE = 1.25
+# Seed of repeatable samples: every check of a table reads the same rows.
+SAMPLE_SEED = 42
+# Partitioned tables are sampled from at most this many of their partitions,
+# spread evenly over the partition order, instead of from all of them.
+MAX_SAMPLED_PARTITIONS = int(os.environ.get("PROFILING_MAX_SAMPLED_PARTITIONS", "8"))
+
+# How each check reads a table:
+#   full         the table is no larger than the sample; every row is read
+#   row_sample   each row is kept with probability `fraction` (one full pass)
+#   page_sample  pages or key ranges are kept with probability `fraction`
+#   first_rows   no size estimate; the first sample_size rows, as before
+# A partitioned table's plan also lists the partitions it reads ("partitions",
+# each with its share of the row limit) and applies the strategy to each one.
+STRATEGIES = ("full", "row_sample", "page_sample", "first_rows")
+
+
+def _select_partitions(partitions: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """
+    Up to MAX_SAMPLED_PARTITIONS partitions evenly spaced over the partition
+    order, always including the first and last. Partitions known to be empty
+    are left out.
+    """
+    candidates = [p for p in partitions if p.get("row_estimate") != 0] or partitions
+    if len(candidates) <= MAX_SAMPLED_PARTITIONS:
+        return candidates
+    step = (len(candidates) - 1) / max(1, MAX_SAMPLED_PARTITIONS - 1)
+    return [candidates[round(i * step)] for i in range(MAX_SAMPLED_PARTITIONS)]
+
+
+def _plan_partition_sampling(
+    table_info: dict[str, Any], sample_size: int
+) -> dict[str, Any]:
+    """
+    Plan of a partitioned table: the table's strategy is picked from the size
+    of the selected partitions only, and each partition may contribute rows in
+    proportion to its row estimate (equal shares when an estimate is missing).
+    """
+    partitioning = table_info["partitioning"]
+    selected = _select_partitions(partitioning["partitions"])
+    rows = [p.get("row_estimate") for p in selected]
+    sizes = [p.get("total_bytes") for p in selected]
+    known_rows = None if None in rows else sum(rows)
+    plan = plan_table_sampling(
+        {
+            "row_estimate": known_rows,
+            "total_bytes": None if None in sizes else sum(sizes),
+        },
+        sample_size,
+    )
+    plan["row_estimate"] = table_info.get("row_estimate")
+    plan["total_bytes"] = table_info.get("total_bytes")
+    plan["partitioning"] = {
+        key: value for key, value in partitioning.items() if key != "partitions"
+    }
+    plan["partitions"] = [
+        {
+            **{key: p[key] for key in ("schema", "name") if key in p},
+            "limit": max(
+                1,
+                -(-sample_size * p["row_estimate"] // known_rows)
+                if known_rows
+                else -(-sample_size // len(selected)),
+            ),
+        }
+        for p in selected
+    ]
+    return plan
+
+
+def plan_table_sampling(table_info: dict[str, Any], sample_size: int) -> dict[str, Any]:
+    """
+    Picks how to sample one table from the row estimate and on-disk size
+    recorded by introspection. Every strategy still stops at sample_size rows,
+    so a stale estimate can cost accuracy but never a full read of a big table.
+    Partitioned tables larger than the sample are read from a bounded subset
+    of their partitions, see _plan_partition_sampling.
+    """
+    rows = table_info.get("row_estimate")
+    partitions = table_info.get("partitioning", {}).get("partitions")
+    if partitions and (rows is None or int(rows) > sample_size):
+        return _plan_partition_sampling(table_info, sample_size)
+    total_bytes = table_info.get("total_bytes")
+    plan: dict[str, Any] = {
+        "strategy": "first_rows",
+        "sample_size": sample_size,
+        "row_estimate": rows,
+        "total_bytes": total_bytes,
+    }
+    if rows is None:
+        return plan
+    rows = int(rows)
+    if rows <= sample_size:
+        plan["strategy"] = "full"
+        return plan
+    if (total_bytes or 0) >= PAGE_SAMPLE_MIN_BYTES or rows >= PAGE_SAMPLE_MIN_ROWS:
+        plan["strategy"] = "page_sample"
+        plan["fraction"] = min(1.0, PAGE_OVERSAMPLE * sample_size / rows)
+    else:
+        plan["strategy"] = "row_sample"
+        plan["fraction"] = min(1.0, OVERSAMPLE * sample_size / rows)
+    return plan
+
+
+def cap_sampling(
+    table_info: dict[str, Any],
+    sample_size: int,
+    sampling: dict[str, Any] | None,
+    max_rows: int,
+) -> tuple[int, dict[str, Any] | None]:
+    """
+    Sample size and plan of a check that reads at most max_rows rows. A smaller
+    sample is planned afresh, so it is still spread over the whole table rather
+    than cut from the start of the larger one.
+    """
+    if sample_size <= max_rows:
+        return sample_size, sampling
+    if sampling is None:
+        return max_rows, None
+    return max_rows, plan_table_sampling(table_info, max_rows)
+
+
+def plan_sampling(
+    schema_structure: dict[str, Any], sample_size: int
+) -> dict[str, dict[str, Any]]:
+    """Sampling plan of every table of the schema."""
+    return {
+        table_name: plan_table_sampling(table_info, sample_size)
+        for table_name, table_info in schema_structure.get("tables", {}).items()
+    }
+
+
+def sample_percent(plan: dict[str, Any]) -> str:
+    """The plan's fraction as a TABLESAMPLE percentage literal."""
+    return f"{max(plan['fraction'] * 100, 0.000001):.6f}".rstrip("0").rstrip(".")
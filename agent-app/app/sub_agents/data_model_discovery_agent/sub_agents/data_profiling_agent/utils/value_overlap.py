@@ -0,0 +1,355 @@
+import hashlib
+import heapq
+import math
+import os
+from collections.abc import Iterable
+from decimal import Decimal
+from typing import Any
+
+from app.sub_agents.data_model_discovery_agent.sub_agents.schema_introspection_agent.utils.relationship_inference import (
+    single_column_keys,
+    type_family,
+    types_compatible,
+)
+from app.sub_agents.data_model_discovery_agent.utils.blocking import (
+    batched,
+    map_in_processes,
+)
+
+# Hashes kept per column sketch; larger sketches find overlaps with bigger
+# target tables at 8 bytes per hash.
+SKETCH_SIZE = int(os.environ.get("VALUE_OVERLAP_SKETCH_SIZE", "1024"))
+
+# Values a key column's server-side hash filter aims to send, as a multiple of
+# SKETCH_SIZE; the margin keeps the sketch full when the row estimate is high.
+KEY_SKETCH_MARGIN = 4
+
+_MAX_HASH = 2**64 - 1
+
+# Estimated share of a column's values that must occur in a key column.
+MIN_CONTAINMENT = 0.9
+# Fewest sketch hashes that must be comparable before a pair is judged.
+MIN_TESTED = 8
+# Fewest distinct values a column needs before its overlap means anything.
+MIN_DISTINCT = 10
+# Relationships scoring below this are not reported.
+MIN_EVIDENCE = 0.5
+# A runner-up target scoring within this margin of the best makes a column ambiguous.
+EVIDENCE_MARGIN = 0.1
+
+# Type families whose values can identify a row; floats, dates and binaries cannot.
+_KEY_FAMILIES = {"integer", "numeric", "text", "uuid"}
+
+
+def _normalize(value: Any) -> Any:
+    """Canonical form so that 42, Decimal('42.00') and '42' hash alike."""
+    if isinstance(value, Decimal) and value == value.to_integral_value():
+        return int(value)
+    if isinstance(value, str):
+        return value.strip()
+    return value
+
+
+def sketch_hash(value: Any) -> int:
+    """
+    First 64 bits of the MD5 of a value's text, big-endian. Databases can
+    compute it too, so they can filter a column down to its smallest hashes.
+    """
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        data = bytes(value)
+    else:
+        data = str(value).encode("utf-8")
+    return int.from_bytes(hashlib.md5(data, usedforsecurity=False).digest()[:8], "big")
+
+
+def hash_limit(row_estimate: int | None, size: int = SKETCH_SIZE) -> int | None:
+    """
+    Largest sketch hash a key column of about row_estimate distinct values
+    needs to send for a full sketch, with KEY_SKETCH_MARGIN to spare; None when
+    the column is small enough to send whole.
+    """
+    wanted = KEY_SKETCH_MARGIN * size
+    if not row_estimate or row_estimate <= wanted:
+        return None
+    return (wanted << 64) // row_estimate
+
+
+def sketch_text_kind(col_type: str | None) -> str | None:
+    """
+    How a key column's values are rendered for sketch_hash: "integer",
+    "numeric" (integral values without their scale), "text" (trimmed) or
+    "uuid"; None for other types, such as money, whose text depends on the
+    driver.
+    """
+    family = type_family(col_type)
+    if family not in _KEY_FAMILIES or "money" in (col_type or "").lower():
+        return None
+    return family
+
+
+class BottomKSketch:
+    """
+    The k smallest distinct value hashes of a column (a bottom-k MinHash).
+
+    Every hash at or below the sketch's threshold is retained, so two sketches
+    compared below the lower of their thresholds see exactly the values they
+    share. A sketch of only the values hashing up to `limit` (filtered by the
+    database) is the same sketch when it fills up, and otherwise has `limit`
+    as its threshold. Also tracks how many values were seen and, for integer
+    columns, their range.
+    """
+
+    def __init__(self, size: int = SKETCH_SIZE, limit: int | None = None) -> None:
+        self.size = size
+        self.limit = _MAX_HASH if limit is None else limit
+        self._heap: list[int] = []  # negated hashes: a max-heap of the k smallest
+        self._members: set[int] = set()
+        self.values_seen = 0
+        self.min_value: int | None = None
+        self.max_value: int | None = None
+
+    def add(self, value: Any) -> None:
+        if value is None:
+            return
+        value = _normalize(value)
+        self.values_seen += 1
+        if isinstance(value, int) and not isinstance(value, bool):
+            if self.min_value is None or value < self.min_value:
+                self.min_value = value
+            if self.max_value is None or value > self.max_value:
+                self.max_value = value
+        self._offer(sketch_hash(value))
+
+    def _offer(self, hashed: int) -> None:
+        if hashed > self.limit or hashed in self._members:
+            return
+        if len(self._heap) < self.size:
+            heapq.heappush(self._heap, -hashed)
+            self._members.add(hashed)
+        elif hashed < -self._heap[0]:
+            evicted = -heapq.heapreplace(self._heap, -hashed)
+            self._members.discard(evicted)
+            self._members.add(hashed)
+
+    def update(self, values: Iterable[Any]) -> None:
+        """Adds values batch by batch, each sketched in a CPU worker process and merged."""
+        for sketch in map_in_processes(
+            _sketch_batch, batched(values), self.size, self.limit
+        ):
+            self.merge(sketch)
+
+    def merge(self, other: "BottomKSketch") -> None:
+        """
+        Adds the values another sketch has seen: the k smallest hashes of
+        both columns combined are among the k smallest of each.
+        """
+        if (other.size, other.limit) != (self.size, self.limit):
+            raise ValueError("Cannot merge sketches with different size or limit")
+        self.values_seen += other.values_seen
+        if other.min_value is not None and (
+            self.min_value is None or other.min_value < self.min_value
+        ):
+            self.min_value = other.min_value
+        if other.max_value is not None and (
+            self.max_value is None or other.max_value > self.max_value
+        ):
+            self.max_value = other.max_value
+        for hashed in other.hashes:
+            self._offer(hashed)
+
+    @property
+    def hashes(self) -> set[int]:
+        return self._members
+
+    @property
+    def threshold(self) -> int:
+        """Largest retained hash; all hashes of the column up to it are in the sketch."""
+        if len(self._heap) < self.size:
+            return self.limit
+        return -self._heap[0]
+
+    def distinct_count(self) -> int:
+        """
+        Exact while an unfiltered sketch is not full, otherwise the KMV
+        estimate (k-1)/threshold, or the retained hashes scaled by the share
+        of hashes up to the limit.
+        """
+        if len(self._heap) < self.size:
+            if self.limit == _MAX_HASH:
+                return len(self._heap)
+            return round(len(self._heap) * 2**64 / (self.limit + 1))
+        return round((self.size - 1) * 2**64 / (self.threshold + 1))
+
+
+def _sketch_batch(values: list[Any], size: int, limit: int) -> BottomKSketch:
+    sketch = BottomKSketch(size, limit)
+    for value in values:
+        sketch.add(value)
+    return sketch
+
+
+def containment(source: BottomKSketch, target: BottomKSketch) -> tuple[int, int]:
+    """
+    Of the source hashes both sketches can speak for, how many the target
+    also holds. The share contained/tested estimates the fraction of source
+    values present in the target column.
+    """
+    threshold = min(source.threshold, target.threshold)
+    tested = [h for h in source.hashes if h <= threshold]
+    contained = sum(1 for h in tested if h in target.hashes)
+    return contained, len(tested)
+
+
+def _wilson_lower_bound(successes: int, trials: int, z: float = 1.96) -> float:
+    """Lower end of the 95% Wilson interval for a proportion."""
+    if trials == 0:
+        return 0.0
+    p = successes / trials
+    denominator = 1 + z * z / trials
+    centre = p + z * z / (2 * trials)
+    spread = z * math.sqrt(p * (1 - p) / trials + z * z / (4 * trials * trials))
+    return max(0.0, (centre - spread) / denominator)
+
+
+def _is_dense_integer_range(sketch: BottomKSketch) -> bool:
+    """Surrogate keys 1..N contain any small integer, so overlap with them proves little."""
+    if sketch.min_value is None or sketch.max_value is None:
+        return False
+    span = sketch.max_value - sketch.min_value + 1
+    return sketch.distinct_count() >= 0.5 * span
+
+
+def overlap_columns(
+    schema_structure: dict[str, Any],
+) -> dict[str, list[tuple[str, str]]]:
+    """
+    Columns worth sketching: single-column PRIMARY KEY/UNIQUE columns as
+    targets, and every other key-like column (integer, numeric, text, uuid)
+    that is not already a declared foreign key as a source.
+    """
+    declared = {
+        (fk.get("from_table"), fk.get("from_column"))
+        for fk in schema_structure.get("foreign_keys", [])
+    }
+    targets: list[tuple[str, str]] = []
+    sources: list[tuple[str, str]] = []
+    for table_name, table_info in schema_structure.get("tables", {}).items():
+        keys = single_column_keys(table_info)
+        for col_name, col_info in table_info.get("columns", {}).items():
+            if type_family(col_info.get("type")) not in _KEY_FAMILIES:
+                continue
+            if col_name in keys:
+                targets.append((table_name, col_name))
+            elif (table_name, col_name) not in declared:
+                sources.append((table_name, col_name))
+    return {"targets": targets, "sources": sources}
+
+
+def discover_relationships(
+    schema_structure: dict[str, Any],
+    source_sketches: dict[tuple[str, str], BottomKSketch],
+    target_sketches: dict[tuple[str, str], BottomKSketch],
+    min_containment: float = MIN_CONTAINMENT,
+) -> list[dict[str, Any]]:
+    """
+    Finds source columns whose values are (almost) all present in a key
+    column. Candidate pairs come from an inverted index of target sketch
+    hashes, so the work is proportional to the number of sketches rather than
+    to every pair of columns. Each relationship carries an evidence_score:
+    the 95% lower bound of the estimated containment, scaled down when the
+    target is a dense integer range that small integers overlap by chance.
+    """
+    tables = schema_structure.get("tables", {})
+
+    def col_type(column: tuple[str, str]) -> str | None:
+        return tables[column[0]]["columns"][column[1]].get("type")
+
+    postings: dict[int, list[tuple[str, str]]] = {}
+    for target, sketch in target_sketches.items():
+        for hashed in sketch.hashes:
+            postings.setdefault(hashed, []).append(target)
+
+    relationships = []
+    for source, sketch in source_sketches.items():
+        distinct = sketch.distinct_count()
+        if distinct < MIN_DISTINCT:
+            continue
+        shared: dict[tuple[str, str], int] = {}
+        for hashed in sketch.hashes:
+            for target in postings.get(hashed, ()):
+                shared[target] = shared.get(target, 0) + 1
+        scored = []
+        for target in shared:
+            if target[0] == source[0]:
+                continue
+            if types_compatible(col_type(source), col_type(target)) is False:
+                continue
+            target_sketch = target_sketches[target]
+            contained, tested = containment(sketch, target_sketch)
+            if tested < MIN_TESTED or contained < min_containment * tested:
+                continue
+            evidence = _wilson_lower_bound(contained, tested)
+            coverage = min(1.0, distinct / max(1, target_sketch.distinct_count()))
+            if _is_dense_integer_range(target_sketch):
+                evidence *= min(1.0, 10 * coverage)
+            if evidence >= MIN_EVIDENCE:
+                scored.append((evidence, target, contained / tested, tested, coverage))
+        if not scored:
+            continue
+        scored.sort(key=lambda s: -s[0])
+        evidence, target, share, tested, coverage = scored[0]
+        if len(scored) > 1 and evidence - scored[1][0] < EVIDENCE_MARGIN:
+            continue
+        relationships.append(
+            {
+                "from_table": source[0],
+                "from_column": source[1],
+                "to_table": target[0],
+                "to_column": target[1],
+                "confidence": round(evidence, 2),
+                "evidence_score": round(evidence, 2),
+                "containment": round(share, 3),
+                "values_tested": tested,
+                "target_coverage": round(coverage, 3),
+                "source": "value_overlap",
+                "explanation": (
+                    f"About {share:.0%} of sampled values of '{source[1]}' occur in "
+                    f"'{target[0]}.{target[1]}' ({tested} values compared)."
+                ),
+                "suggestion": "Consider adding a foreign key constraint.",
+            }
+        )
+    return relationships
+
+
+def merge_discovered(
+    inferred: list[dict[str, Any]], discovered: list[dict[str, Any]]
+) -> list[dict[str, Any]]:
+    """
+    Adds value-overlap relationships to the inferred ones. A name-based
+    suggestion the data confirms gains the evidence score; one the data points
+    elsewhere is kept, and the overlap is added beside it.
+    """
+    merged = [dict(relationship) for relationship in inferred]
+    by_pair = {
+        (
+            r.get("from_table"),
+            r.get("from_column"),
+            r.get("to_table"),
+            r.get("to_column"),
+        ): r
+        for r in merged
+    }
+    for relationship in discovered:
+        pair = (
+            relationship["from_table"],
+            relationship["from_column"],
+            relationship["to_table"],
+            relationship["to_column"],
+        )
+        if pair in by_pair:
+            by_pair[pair]["evidence_score"] = relationship["evidence_score"]
+            by_pair[pair]["containment"] = relationship["containment"]
+        else:
+            merged.append(relationship)
+    return merged
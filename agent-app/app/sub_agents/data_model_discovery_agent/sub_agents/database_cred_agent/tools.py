@@ -1,11 +1,14 @@
 import logging
+import uuid
 from typing import Any
 
-import mysql.connector
-import psycopg2
-import pytds as tds
 from google.adk.tools import ToolContext
 
+from app.sub_agents.data_model_discovery_agent.utils.blocking import run_blocking
+from app.sub_agents.data_model_discovery_agent.utils.connection_manager import (
+    get_connection_manager,
+)
+
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
@@ -51,6 +54,26 @@ def _get_schemas(conn: Any, db_type: str) -> list[str]:
     return schemas
 
 
+def connect_and_list_schemas(
+    connection_id: str, metadata: dict[str, Any], password: str
+) -> list[str]:
+    """
+    Blocking part of validate_db_connection and of the batch discovery job;
+    leaves the connection warm for later tools.
+    """
+    db_type = metadata["db_type"]
+    conn = get_connection_manager().acquire(
+        connection_id, metadata, password, statement_timeout=5
+    )
+    try:
+        logger.info(
+            f"{db_type.upper()} connection established successfully for validation."
+        )
+        return _get_schemas(conn, db_type)
+    finally:
+        conn.close()
+
+
 async def validate_db_connection(
     connection_details: dict[str, Any], tool_context: ToolContext
 ) -> dict[str, Any]:
@@ -79,46 +102,31 @@ async def validate_db_connection(
         return {"status": "error", "message": error_msg}
 
     db_type = connection_details["db_type"].lower()
-    conn = None
-    try:
-        if db_type == "postgresql":
-            conn = psycopg2.connect(
-                host=connection_details["host"],
-                port=connection_details["port"],
-                dbname=connection_details["dbname"],
-                user=connection_details["user"],
-                password=connection_details["password"],
-            )
-        elif db_type == "mysql":
-            conn = mysql.connector.connect(
-                host=connection_details["host"],
-                port=connection_details["port"],
-                database=connection_details["dbname"],
-                user=connection_details["user"],
-                password=connection_details["password"],
-            )
-        elif db_type == "mssql":
-            conn = tds.connect(
-                server=connection_details["host"],
-                port=int(connection_details["port"]),
-                database=connection_details["dbname"],
-                user=connection_details["user"],
-                password=connection_details["password"],
-                login_timeout=5,
-                timeout=5,
-                as_dict=False,
-            )
-        else:
-            error_msg = f"Unsupported database type: {db_type}. Supported types are: postgresql, mysql, mssql."
-            logger.error(error_msg)
-            return {"status": "error", "message": error_msg}
+    if db_type not in ("postgresql", "mysql", "mssql"):
+        error_msg = f"Unsupported database type: {db_type}. Supported types are: postgresql, mysql, mssql."
+        logger.error(error_msg)
+        return {"status": "error", "message": error_msg}
 
-        logger.info(
-            f"{db_type.upper()} connection established successfully for validation."
+    metadata = {
+        "host": connection_details["host"],
+        "port": connection_details["port"],
+        "dbname": connection_details["dbname"],
+        "user": connection_details["user"],
+        "db_type": db_type,
+    }
+    # Connections of earlier credentials in this session are not reused.
+    previous = tool_context.state.get("db_connection") or {}
+    if previous.get("connection_id"):
+        get_connection_manager().close_session(previous["connection_id"])
+    connection_id = uuid.uuid4().hex
+    try:
+        schemas = await run_blocking(
+            connection_id,
+            connect_and_list_schemas,
+            connection_id,
+            metadata,
+            connection_details["password"],
         )
-
-        # Fetch schemas
-        schemas = _get_schemas(conn, db_type)
         logger.info(f"Successfully fetched schemas: {schemas}")
 
         # Clear any previous connection state
@@ -130,14 +138,9 @@ async def validate_db_connection(
             tool_context.state["selected_schema"] = None
 
         tool_context.state["db_connection"] = {
-            "metadata": {
-                "host": connection_details["host"],
-                "port": connection_details["port"],
-                "dbname": connection_details["dbname"],
-                "user": connection_details["user"],
-                "db_type": db_type,
-            },
+            "metadata": metadata,
             "status": "connected",
+            "connection_id": connection_id,
         }
         tool_context.state["db_creds_temp"] = {
             "password": connection_details["password"]
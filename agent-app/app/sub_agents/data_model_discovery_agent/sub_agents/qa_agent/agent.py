@@ -1,11 +1,18 @@
 import json
 from decimal import Decimal
+from typing import Any
 
 from google.adk.agents.llm_agent import LlmAgent
 from google.adk.agents.readonly_context import ReadonlyContext
 
 from app.config import MODEL
 
+# Workload context in the prompt: the busiest tables, the leading queries of
+# each ranking and the characters of each query's text kept.
+QA_HOT_TABLES = 10
+QA_TOP_QUERIES = 5
+QA_QUERY_CHARS = 200
+
 
 def json_encoder_default(obj):
     if isinstance(obj, Decimal):
@@ -13,11 +20,64 @@ def json_encoder_default(obj):
     raise TypeError(f"Object of type {obj.__class__.__name__} is not JSON serializable")
 
 
+def pattern_summary(column_patterns: dict[str, Any]) -> dict[str, Any]:
+    """
+    Dominant pattern and mixed-type ratio of each profiled text column. Pattern
+    shares, lengths and top values stay in the profile for the reporting export.
+    """
+    return {
+        table_name: {
+            col_name: {
+                "dominant_pattern": profile["dominant_pattern"],
+                "mixed_type_ratio": profile["mixed_type_ratio"],
+            }
+            for col_name, profile in columns.items()
+            if profile.get("values_sampled")
+        }
+        for table_name, columns in column_patterns.items()
+    }
+
+
+def workload_summary(workload_profile: dict[str, Any]) -> dict[str, Any]:
+    """
+    The busiest tables and a short excerpt of each leading query, listed once
+    however many rankings it leads. Full rankings and statement texts stay in
+    the profile for the reporting export.
+    """
+    queries: dict[str, dict[str, Any]] = {}
+    leaders: dict[str, list[str]] = {}
+    for ranking, ranked in workload_profile.get("top_queries", {}).items():
+        leaders[ranking] = []
+        for query in ranked[:QA_TOP_QUERIES]:
+            leaders[ranking].append(query["query_id"])
+            text = " ".join(query["query"].split())
+            if len(text) > QA_QUERY_CHARS:
+                text = text[: QA_QUERY_CHARS - 3] + "..."
+            queries[query["query_id"]] = {
+                "query": text,
+                "calls": query["calls"],
+                "total_time_ms": query["total_time_ms"],
+                "mean_time_ms": query["mean_time_ms"],
+                "time_share_pct": query["time_share_pct"],
+            }
+    hot_tables = workload_profile.get("hot_tables", {})
+    return {
+        "Source": workload_profile.get("source"),
+        "I/O Unit": workload_profile.get("io_unit"),
+        "Totals": workload_profile.get("totals"),
+        "Hot Tables": dict(list(hot_tables.items())[:QA_HOT_TABLES]),
+        "Hot Tables Not Shown": max(0, len(hot_tables) - QA_HOT_TABLES),
+        "Top Query Ids": leaders,
+        "Queries": queries,
+    }
+
+
 def qa_agent_instruction(ctx: ReadonlyContext) -> str:
     """Builds the QA agent's instruction for schema and data profiling queries."""
 
     schema_structure = ctx.state.get("schema_structure")
     data_profile = ctx.state.get("data_profile")
+    workload_profile = ctx.state.get("workload_profile")
     selected_schema = ctx.state.get("selected_schema", "the selected schema")
 
     # Handle missing schema
@@ -49,6 +109,13 @@ def qa_agent_instruction(ctx: ReadonlyContext) -> str:
                 "Cardinality": data_profile.get("cardinality", "Not available"),
                 "Orphan Records": data_profile.get("orphan_records", "Not available"),
                 "Type Anomalies": data_profile.get("type_anomalies", "Not available"),
+                "Column Patterns": pattern_summary(
+                    data_profile.get("column_patterns", {})
+                ),
+                "Column Statistics": data_profile.get("column_stats", "Not available"),
+                "Profiling Status": data_profile.get(
+                    "profiling_status", "Not available"
+                ),
             }
             profile_message = json.dumps(
                 profile_summary, indent=2, default=json_encoder_default
@@ -64,6 +131,26 @@ def qa_agent_instruction(ctx: ReadonlyContext) -> str:
             "(sampling up to 10,000 rows) and provide a summary of key findings."
         )
 
+    # Handle workload profiling
+    if workload_profile and workload_profile.get("available"):
+        try:
+            workload_message = json.dumps(
+                workload_summary(workload_profile),
+                indent=2,
+                default=json_encoder_default,
+            )
+        except Exception:
+            workload_message = (
+                "Workload profiling results exist but could not be summarized."
+            )
+    elif workload_profile:
+        workload_message = (
+            "Workload statistics are not available: "
+            f"{workload_profile.get('reason', 'unknown reason')}"
+        )
+    else:
+        workload_message = "Workload profiling has not been run yet."
+
     return f"""
     ### Role
     You are a Database Schema & Data Profile Q&A Assistant. Your goal is to answer user questions 
@@ -78,12 +165,16 @@ def qa_agent_instruction(ctx: ReadonlyContext) -> str:
     ### Data Profiling Context for '{selected_schema}'
     {profile_message}
 
+    ### Workload Context
+    {workload_message}
+
     ### Instructions
     1. Answer questions only based on the provided schema structure and data profiling information.
     2. Avoid exposing raw internal session variables or empty lists directly. Answer conversationally.
     3. If data profiling has not been run and the user asks about it, politely suggest running profiling on up to 10,000 rows.
     4. If the user asks to generate a **Mermaid diagram** of the schema or to **export the schema structure as a JSON response**, transfer the request to the `reporting_agent` by calling:
        `transfer_to_agent(reporting_agent, query)`
+       The same goes for details left out of the context above, such as the top values of a column, full query texts or further hot tables; they are in the full export.
     5. Use tables for lists when helpful.
     6. If a question is outside your scope, guide the user to the appropriate agent instead.
 
@@ -94,6 +185,7 @@ def qa_agent_instruction(ctx: ReadonlyContext) -> str:
     * "Which columns have high nulls?": Refer to data profiling nullability.
     * "Are there orphan records?": Summarize orphan records in a human-friendly way.
     * "Any type anomalies?": List columns with type inconsistencies in plain language.
+    * "Which tables are hottest?": Refer to the workload hot tables and their share of total time.
     * "Generate a Mermaid diagram of the schema": Transfer to `reporting_agent`.
     * "Export the schema as JSON": Transfer to `reporting_agent`.
 
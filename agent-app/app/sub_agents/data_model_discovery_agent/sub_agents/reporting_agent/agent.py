@@ -17,6 +17,8 @@ reporting_agent = LlmAgent(
         -   `selected_schema`: The name of the analyzed schema.
         -   `schema_structure`: Detailed schema information from introspection.
         -   `data_profile`: Data quality profiling results.
+        -   `workload_profile`: Hot queries and table load from the database's statement statistics.
+        -   `index_advice`: Ranked findings on unused, duplicate and redundant indexes, unindexed foreign keys and missing indexes.
 
     ### Tasks
     Based on the user's request, call the appropriate tool:
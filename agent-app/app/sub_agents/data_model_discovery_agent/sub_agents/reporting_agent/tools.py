@@ -7,6 +7,9 @@ from google.adk.tools import ToolContext
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
+# Highest-ranked index advisor findings listed in the summary report.
+INDEX_ADVICE_REPORT_FINDINGS = 5
+
 
 async def generate_summary_report(
     tool_context: ToolContext, args: dict[str, Any]
@@ -14,9 +17,9 @@ async def generate_summary_report(
     """
     Generates a high-level summary report of the database analysis.
 
-    This tool reads the 'schema_structure' and 'data_profile' from the session state
-    to produce a markdown formatted text summary of the key findings from the
-    introspection and data profiling phases.
+    This tool reads the 'schema_structure', 'data_profile' and 'index_advice' from
+    the session state to produce a markdown formatted text summary of the key
+    findings from the introspection, data profiling and index advisor phases.
 
     Args:
         tool_context: The ADK tool context, providing access to session state.
@@ -84,12 +87,30 @@ async def generate_summary_report(
     else:
         report += "**Data Quality Profile:** Not yet run.\n"
 
+    index_advice = tool_context.state.get("index_advice")
+    if index_advice:
+        by_severity = index_advice["summary"]["by_severity"]
+        report += "\n**Index Advisor Findings:**\n"
+        report += (
+            f"-   High: {by_severity.get('high', 0)}, "
+            f"Medium: {by_severity.get('medium', 0)}, "
+            f"Low: {by_severity.get('low', 0)}\n"
+        )
+        for finding in index_advice["findings"][:INDEX_ADVICE_REPORT_FINDINGS]:
+            report += (
+                f"-   #{finding['rank']} [{finding['severity']}] {finding['detail']} "
+                f"{finding['recommendation']}\n"
+            )
+    else:
+        report += "\n**Index Advisor:** Not yet run.\n"
+
     return {"status": "success", "report_text": report}
 
 
 async def export_full_report(tool_context: ToolContext, args: dict) -> dict:
     """
-    Exports the full schema structure and data profile as a clean JSON report.
+    Exports the full schema structure, data profile, workload profile and index
+    advice as a clean JSON report.
 
     Only JSON is supported. Backslashes are avoided in the output.
 
@@ -126,6 +147,8 @@ async def export_full_report(tool_context: ToolContext, args: dict) -> dict:
     full_report = {
         "schema_structure": schema_structure,
         "data_profile": data_profile or "Not run",
+        "workload_profile": tool_context.state.get("workload_profile") or "Not run",
+        "index_advice": tool_context.state.get("index_advice") or "Not run",
     }
 
     def safe_encoder(obj):
@@ -2,7 +2,7 @@ from google.adk.agents.llm_agent import LlmAgent
 
 from app.config import MODEL
 
-from .tools import get_schema_details
+from .tools import advise_indexes, get_schema_details
 
 schema_introspection_agent = LlmAgent(
     model=MODEL,
@@ -13,7 +13,7 @@ schema_introspection_agent = LlmAgent(
     You are a **Database Schema Introspection Agent**. Your sole task is to fetch and summarize the schema structure of a database.  
 
     ### Scope
-    - You can only report **schema-level information**: tables, columns, constraints, indexes, foreign keys, inferred relationships, and anomalies.  
+    - You can only report **schema-level information**: tables, columns, constraints, indexes, foreign keys, inferred relationships, anomalies, and index advice.  
     - Do **not** answer questions about data content, queries, or performance. Forward all other questions to the QA agent using:  
     ```python
     transfer_to_agent(qa_agent, query)
@@ -37,6 +37,7 @@ schema_introspection_agent = LlmAgent(
 
     2.  **Call Tool:** Invoke the `get_schema_details` tool. You MUST pass the schema name as a dictionary to the `args` parameter of the tool.
         - **Tool Call:** `get_schema_details(args={"schema_name": query})`
+        - Results are cached per schema and reused while the schema is unchanged. Only if the user explicitly asks to refresh or re-introspect, add `"refresh": True` to the args.
 
     3.  **Process Results:**
         -   If the tool call returns `status`: "success":
@@ -58,10 +59,17 @@ schema_introspection_agent = LlmAgent(
                 -   'Describe the table <table_name>.'
                 -   'Show foreign keys involving the <table_name> table.'
                 -   'Tell me about any anomalies found.'
-                -   'List any inferred relationships.'"
+                -   'List any inferred relationships.'
+                -   'Which indexes are unused or redundant?'"
 
         -   If the tool call returns an error, follow the **Error Handling** instruction above.
 
+    4.  **Index Advice:** If the user asks about unused, duplicate or redundant indexes, missing indexes or unindexed foreign keys of the introspected schema, invoke `advise_indexes(args={})`.
+        -   On `status`: "success", report the `summary` counts by severity and list the `findings` in rank order as a table of rank, severity, table, detail and recommendation.
+        -   If `stats_window_days` is below 7, warn that the usage statistics are recent, so unused-index findings are weak evidence.
+        -   If `usage_available` is false, say that usage counters could not be read, so only duplicate, redundant and foreign-key findings are reported.
+        -   Never drop or create indexes yourself; the findings are recommendations.
+
     ### IMPORTANT
     - If there is anything which is not in your scope or you cannot answer transfer the query to the root agent calling transfer_to_agent(data_model_discovery_agent, query)
     - For anything outside this scope, immediately call:
@@ -70,5 +78,5 @@ schema_introspection_agent = LlmAgent(
         ```
     - Focus **only** on fetching and summarizing schema details.
     """,
-    tools=[get_schema_details],
+    tools=[get_schema_details, advise_indexes],
 )
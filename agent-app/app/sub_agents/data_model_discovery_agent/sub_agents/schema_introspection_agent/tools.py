@@ -1,56 +1,37 @@
 import logging
+import os
 from typing import Any
 
-import mysql.connector
-
-# Import database connectors
-import psycopg2
-import pytds as tds
 from google.adk.tools import ToolContext
 
+from app.sub_agents.data_model_discovery_agent.utils.blocking import run_blocking
+from app.sub_agents.data_model_discovery_agent.utils.connection_manager import (
+    get_connection_manager,
+    session_key,
+)
+
 # Import utils
-from .utils import mssql_utils, mysql_utils, postgresql_utils
+from .utils import (
+    index_advisor,
+    mssql_utils,
+    mysql_utils,
+    postgresql_utils,
+    schema_cache,
+)
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
+# Seconds an MSSQL introspection query may run before it is cancelled. The
+# bulk sys.* reads cover the whole schema, so this allows for large catalogs.
+# PostgreSQL and MySQL introspection connections have no statement timeout;
+# open_connection applies this only to MSSQL.
+MSSQL_INTROSPECTION_TIMEOUT = float(
+    os.environ.get("MSSQL_INTROSPECTION_TIMEOUT", "120")
+)
 
-def _get_db_connection(metadata: dict[str, Any], password: str) -> Any:
-    db_type = metadata.get("db_type")
-    host = metadata.get("host")
-    port = metadata.get("port")
-    dbname = metadata.get("dbname")
-    user = metadata.get("user")
-
-    if not all([db_type, host, port, dbname, user, password is not None]):
-        raise ValueError(
-            "Missing one or more required connection parameters in metadata or password."
-        )
-    port = int(port)  # type: ignore[arg-type]
-    logger.info(
-        f"Attempting to connect to {db_type} at {host}:{port} as {user} to database {dbname}"
-    )
-    if db_type == "postgresql":
-        return psycopg2.connect(
-            host=host, port=port, dbname=dbname, user=user, password=password
-        )
-    elif db_type == "mysql":
-        return mysql.connector.connect(
-            host=host, port=port, database=dbname, user=user, password=password
-        )
-    elif db_type == "mssql":
-        return tds.connect(
-            server=host,
-            port=port,
-            database=dbname,
-            user=user,
-            password=password,
-            login_timeout=5,
-            timeout=5,
-            as_dict=False,
-        )
-    else:
-        raise ValueError(f"Unsupported database type: {db_type}")
+# Findings returned to the agent; the full list stays in state.
+INDEX_ADVICE_TOP_FINDINGS = 10
 
 
 def _generate_summary(schema_details: dict[str, Any]) -> dict[str, int]:
@@ -72,12 +53,81 @@ def _generate_summary(schema_details: dict[str, Any]) -> dict[str, int]:
     return summary
 
 
+def _get_catalog_fingerprint(conn: Any, db_type: str, schema_name: str) -> str | None:
+    if db_type == "postgresql":
+        return postgresql_utils.get_postgres_catalog_fingerprint(conn, schema_name)
+    elif db_type == "mysql":
+        return mysql_utils.get_mysql_catalog_fingerprint(conn, schema_name)
+    elif db_type == "mssql":
+        return mssql_utils.get_mssql_catalog_fingerprint(conn, schema_name)
+    return None
+
+
+def introspect_schema(
+    key: str,
+    metadata: dict[str, Any],
+    password: str,
+    schema_name: str,
+    refresh: bool,
+    cache: schema_cache.SchemaCache | None,
+) -> tuple[dict[str, Any], str]:
+    """
+    Blocking part of get_schema_details and of the batch discovery job:
+    returns the schema details and their status in `cache`.
+    """
+    db_type = metadata["db_type"]
+    conn = get_connection_manager().acquire(
+        key, metadata, password, statement_timeout=MSSQL_INTROSPECTION_TIMEOUT
+    )
+    try:
+        logger.info(
+            f"Using the session's {db_type} connection for introspection of schema '{schema_name}'."
+        )
+
+        cache_key = None
+        if cache:
+            try:
+                fingerprint = _get_catalog_fingerprint(conn, db_type, schema_name)
+                if fingerprint:
+                    cache_key = schema_cache.schema_cache_key(
+                        metadata, schema_name, fingerprint
+                    )
+                    if not refresh:
+                        schema_details = cache.get(cache_key)
+                        if schema_details is not None:
+                            logger.info(
+                                f"Schema structure for '{schema_name}' served from cache."
+                            )
+                            return schema_details, "hit"
+            except Exception as e:
+                logger.warning(f"Schema cache lookup skipped for '{schema_name}': {e}")
+
+        if db_type == "postgresql":
+            schema_details = postgresql_utils.get_postgres_schema_details(
+                conn, schema_name
+            )
+        elif db_type == "mysql":
+            schema_details = mysql_utils.get_mysql_schema_details(conn, schema_name)
+        else:
+            schema_details = mssql_utils.get_mssql_schema_details(conn, schema_name)
+        if cache and cache_key:
+            cache.put(cache_key, schema_details)
+        return schema_details, "miss" if cache_key else "disabled"
+    finally:
+        try:
+            conn.close()
+        except Exception as e:
+            logger.error(f"Error releasing {db_type} connection: {e}")
+
+
 async def get_schema_details(
     tool_context: ToolContext, args: dict[str, Any]
 ) -> dict[str, Any]:
     """
     Retrieves detailed schema information and a summary for the given schema_name.
     Updates the session state with the selected_schema and schema_structure.
+    Results are cached by catalog fingerprint, so an unchanged schema is served
+    from the cache; args["refresh"] forces a fresh introspection.
     """
     schema_name = args.get("schema_name")
     if not schema_name or not str(schema_name).strip():
@@ -100,24 +150,22 @@ async def get_schema_details(
     password = db_creds["password"]
     db_type = metadata["db_type"]
 
-    conn = None
+    if db_type not in ("postgresql", "mysql", "mssql"):
+        return {"error": f"Introspection for {db_type} is not implemented."}
+
+    key = session_key(tool_context.state)
     try:
-        conn = _get_db_connection(metadata, password)
-        logger.info(
-            f"Successfully reconnected to {db_type} for introspection of schema '{schema_name}'."
+        # Introspection and the LLM analysis block; run them off the event loop.
+        schema_details, cache_status = await run_blocking(
+            key,
+            introspect_schema,
+            key,
+            metadata,
+            password,
+            schema_name,
+            bool(args.get("refresh")),
+            schema_cache.get_schema_cache(),
         )
-
-        if db_type == "postgresql":
-            schema_details = postgresql_utils.get_postgres_schema_details(
-                conn, schema_name
-            )
-        elif db_type == "mysql":
-            schema_details = mysql_utils.get_mysql_schema_details(conn, schema_name)
-        elif db_type == "mssql":
-            schema_details = mssql_utils.get_mssql_schema_details(conn, schema_name)
-        else:
-            return {"error": f"Introspection for {db_type} is not implemented."}
-
         tool_context.state["schema_structure"] = schema_details
         logger.info(f"Schema structure for '{schema_name}' saved to session state.")
 
@@ -128,15 +176,88 @@ async def get_schema_details(
             "message": f"Schema details for '{schema_name}' ({db_type}) retrieved and stored.",
             "schema_name": schema_name,
             "summary": summary,  # Include the summary
+            "cache": cache_status,
         }
     except Exception as e:
         logger.error(f"Error during schema introspection: {e}", exc_info=True)
         return {
             "error": f"Failed to get schema details for {db_type} ({schema_name}): {e!s}"
         }
+
+
+def _collect_index_usage(
+    key: str, metadata: dict[str, Any], password: str, schema_name: str
+) -> dict[str, Any]:
+    """Blocking part of advise_indexes: reads the schema's index usage figures."""
+    db_type = metadata["db_type"]
+    conn = get_connection_manager().acquire(
+        key, metadata, password, statement_timeout=MSSQL_INTROSPECTION_TIMEOUT
+    )
+    try:
+        if db_type == "postgresql":
+            return postgresql_utils.get_postgres_index_usage(conn, schema_name)
+        elif db_type == "mysql":
+            return mysql_utils.get_mysql_index_usage(conn, schema_name)
+        return mssql_utils.get_mssql_index_usage(conn, schema_name)
     finally:
-        if conn:
-            try:
-                conn.close()
-            except Exception as e:
-                logger.error(f"Error closing {db_type} connection: {e}")
+        try:
+            conn.close()
+        except Exception as e:
+            logger.error(f"Error releasing {db_type} connection: {e}")
+
+
+async def advise_indexes(
+    tool_context: ToolContext, args: dict[str, Any]
+) -> dict[str, Any]:
+    """
+    Joins the introspected indexes of the selected schema with the database's
+    index usage statistics and ranks unused, duplicate and prefix-redundant
+    indexes, unindexed foreign keys and missing indexes.
+    Updates the session state with index_advice.
+    """
+    schema_structure = tool_context.state.get("schema_structure")
+    schema_name = tool_context.state.get("selected_schema")
+    db_conn_state = tool_context.state.get("db_connection")
+    db_creds = tool_context.state.get("db_creds_temp")
+
+    if not db_conn_state or db_conn_state.get("status") != "connected":
+        return {"error": "Database not connected. Please connect first."}
+    if not db_creds:
+        return {"error": "Database credentials not found."}
+    if not schema_structure or not schema_name:
+        return {
+            "error": "Schema structure not found. Please introspect a schema first."
+        }
+
+    metadata = db_conn_state["metadata"]
+    db_type = metadata["db_type"]
+    if db_type not in ("postgresql", "mysql", "mssql"):
+        return {"error": f"Index advice for {db_type} is not implemented."}
+
+    key = session_key(tool_context.state)
+    try:
+        usage = await run_blocking(
+            key,
+            _collect_index_usage,
+            key,
+            metadata,
+            db_creds["password"],
+            schema_name,
+        )
+        advice = index_advisor.advise_indexes(schema_structure, usage)
+        tool_context.state["index_advice"] = advice
+        logger.info(f"Index advice for '{schema_name}' saved to session state.")
+        return {
+            "status": "success",
+            "message": f"Index advice for '{schema_name}' ({db_type}) generated and stored.",
+            "schema_name": schema_name,
+            "stats_window_days": advice["stats_window_days"],
+            "usage_available": advice["usage_available"],
+            "summary": advice["summary"],
+            "findings": advice["findings"][:INDEX_ADVICE_TOP_FINDINGS],
+        }
+    except Exception as e:
+        logger.error(f"Error during index advice: {e}", exc_info=True)
+        return {
+            "error": f"Failed to advise indexes for {db_type} ({schema_name}): {e!s}"
+        }
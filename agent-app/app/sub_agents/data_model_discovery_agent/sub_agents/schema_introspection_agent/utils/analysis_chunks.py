@@ -0,0 +1,178 @@
+import json
+import logging
+import os
+import re
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from .relationship_inference import llm_context
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on the schema context sent in one LLM request, in estimated tokens.
+CHUNK_TOKENS = int(os.environ.get("SCHEMA_ANALYSIS_CHUNK_TOKENS", "30000"))
+# LLM requests in flight at once for one schema.
+CONCURRENCY = int(os.environ.get("SCHEMA_ANALYSIS_CONCURRENCY", "4"))
+
+
+def _rendered_size(value: Any) -> int:
+    return len(json.dumps(value, indent=4, default=str))
+
+
+def estimate_tokens(value: Any) -> int:
+    """Rough token count of a value as it appears in the prompt (about 4 characters per token)."""
+    return _rendered_size(value) // 4
+
+
+def _name_prefix(table_name: str) -> str | None:
+    parts = [p for p in re.split(r"[^a-z0-9]+", table_name.lower()) if p]
+    return parts[0] if len(parts) > 1 else None
+
+
+def table_clusters(
+    schema_details: dict[str, Any], relationships: list[dict[str, Any]]
+) -> list[list[str]]:
+    """
+    Groups tables connected by a foreign key or inferred relationship, or
+    sharing a name prefix (crm_*, billing_*), in schema order.
+    """
+    tables = list(schema_details.get("tables", {}))
+    parent = {table_name: table_name for table_name in tables}
+
+    def find(table_name: str) -> str:
+        while parent[table_name] != table_name:
+            parent[table_name] = parent[parent[table_name]]
+            table_name = parent[table_name]
+        return table_name
+
+    def union(a: str, b: str) -> None:
+        if a in parent and b in parent:
+            parent[find(a)] = find(b)
+
+    for relationship in [*schema_details.get("foreign_keys", []), *relationships]:
+        union(relationship.get("from_table"), relationship.get("to_table"))
+    first_with_prefix: dict[str, str] = {}
+    for table_name in tables:
+        prefix = _name_prefix(table_name)
+        if prefix:
+            union(table_name, first_with_prefix.setdefault(prefix, table_name))
+
+    clusters: dict[str, list[str]] = {}
+    for table_name in tables:
+        clusters.setdefault(find(table_name), []).append(table_name)
+    return list(clusters.values())
+
+
+def plan_chunks(
+    schema_details: dict[str, Any],
+    ambiguous: list[dict[str, Any]],
+    relationships: list[dict[str, Any]],
+    token_budget: int = CHUNK_TOKENS,
+) -> list[dict[str, Any]]:
+    """
+    Splits the LLM context into chunks of about token_budget tokens. A schema
+    that fits is sent whole. Otherwise clusters of related tables are packed
+    into chunks, each carrying its ambiguous columns and the key columns of
+    its cluster tables and candidate targets; a cluster larger than the budget
+    is split table by table.
+    """
+    full_context = llm_context(schema_details, ambiguous)
+    if estimate_tokens(full_context) <= token_budget:
+        return [full_context]
+
+    tables = schema_details.get("tables", {})
+    by_table: dict[str, list[dict[str, Any]]] = {}
+    for column in ambiguous:
+        by_table.setdefault(column["from_table"], []).append(column)
+
+    # Sizes in characters of what each column and each table's key columns add
+    # to a chunk, rendered where they sit in the context; the same entries
+    # rendered on their own are about twice as large. One more character
+    # covers the comma between entries.
+    budget = token_budget * 4
+    frame = _rendered_size(llm_context({"tables": {}}, []))
+    column_size = {
+        id(column): _rendered_size(llm_context({"tables": {}}, [column])) - frame + 1
+        for column in ambiguous
+    }
+    key_size = {
+        table_name: _rendered_size(llm_context({"tables": {table_name: info}}, []))
+        - frame
+        + 1
+        for table_name, info in tables.items()
+    }
+
+    def piece(table_names: list[str]) -> tuple[list[dict[str, Any]], set[str], int]:
+        columns = [c for t in table_names for c in by_table.get(t, [])]
+        key_tables = set(table_names) | {
+            candidate["to_table"] for c in columns for candidate in c["candidates"]
+        }
+        return columns, key_tables, sum(column_size[id(c)] for c in columns)
+
+    # Each piece goes into the first chunk with room for it, so a cluster too
+    # large for the space left in one chunk does not leave that space unused.
+    chunks: list[tuple[list[dict[str, Any]], set[str]]] = []
+    sizes: list[int] = []
+    for cluster in table_clusters(schema_details, relationships):
+        if not any(t in by_table for t in cluster):
+            continue
+        pieces = [piece(cluster)]
+        if (
+            frame + pieces[0][2] + sum(key_size.get(t, 0) for t in pieces[0][1])
+            > budget
+        ):
+            pieces = [piece([t]) for t in cluster if t in by_table]
+        for piece_columns, piece_keys, piece_size in pieces:
+            for i, (columns, key_tables) in enumerate(chunks):
+                added = piece_size + sum(
+                    key_size.get(t, 0) for t in piece_keys - key_tables
+                )
+                if sizes[i] + added <= budget:
+                    columns.extend(piece_columns)
+                    key_tables |= piece_keys
+                    sizes[i] += added
+                    break
+            else:
+                chunks.append((list(piece_columns), set(piece_keys)))
+                sizes.append(
+                    frame + piece_size + sum(key_size.get(t, 0) for t in piece_keys)
+                )
+    return [
+        llm_context(schema_details, chunk_columns, chunk_keys)
+        for chunk_columns, chunk_keys in chunks
+    ]
+
+
+def analyze_chunks(
+    contexts: list[dict[str, Any]],
+    analyze: Callable[[dict[str, Any]], list[dict[str, Any]]],
+    concurrency: int = CONCURRENCY,
+) -> list[dict[str, Any]]:
+    """
+    Runs `analyze` on every chunk context with at most `concurrency` requests
+    in flight and concatenates the results in chunk order. A chunk that fails
+    is logged and contributes nothing; the other chunks are unaffected.
+    """
+
+    def run(i: int, context: dict[str, Any]) -> list[dict[str, Any]]:
+        try:
+            return analyze(context)
+        except Exception as e:
+            logger.error(
+                f"LLM analysis of chunk {i + 1}/{len(contexts)} "
+                f"({len(context.get('table_keys', {}))} tables) failed: {e}"
+            )
+            return []
+
+    if len(contexts) == 1:
+        return run(0, contexts[0])
+    logger.info(f"Analyzing schema in {len(contexts)} chunks, {concurrency} at a time.")
+    with ThreadPoolExecutor(
+        max_workers=max(1, min(concurrency, len(contexts))),
+        thread_name_prefix="schema-analysis",
+    ) as executor:
+        futures = [
+            executor.submit(run, i, context) for i, context in enumerate(contexts)
+        ]
+        return [relationship for f in futures for relationship in f.result()]
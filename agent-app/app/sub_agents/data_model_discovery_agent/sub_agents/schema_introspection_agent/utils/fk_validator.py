@@ -0,0 +1,187 @@
+import re
+from typing import Any
+
+from .relationship_inference import type_family, types_compatible
+
+
+def _field(row: dict[str, Any], name: str) -> Any:
+    """Constraint rows use lowercase keys on PostgreSQL and uppercase elsewhere."""
+    return row.get(name, row.get(name.upper()))
+
+
+def _declared_type(col_info: dict[str, Any]) -> str:
+    col_type = str(col_info.get("type") or "").lower().strip()
+    if type_family(col_type) == "integer":
+        # MySQL display widths (int(11)) do not change the stored type.
+        col_type = re.sub(r"\(\d+\)", "", col_type)
+    return col_type
+
+
+def _key_column_sets(table_info: dict[str, Any]) -> list[frozenset[str]]:
+    """Column sets enforced unique by a PK/UNIQUE constraint or a unique index."""
+    constraint_columns: dict[str, set[str]] = {}
+    for const in table_info.get("constraints", []):
+        if _field(const, "constraint_type") in ("PRIMARY KEY", "UNIQUE"):
+            col_name = _field(const, "column_name")
+            if col_name:
+                constraint_columns.setdefault(
+                    _field(const, "constraint_name"), set()
+                ).add(col_name)
+    key_sets = [frozenset(columns) for columns in constraint_columns.values()]
+    key_sets += [
+        frozenset(index["columns"])
+        for index in table_info.get("indexes", [])
+        if index.get("unique") and index.get("columns")
+    ]
+    return key_sets
+
+
+def _index_prefixes(table_info: dict[str, Any]) -> list[list[str]]:
+    """Leading-column lists of every index, counting PK/UNIQUE constraints as indexes."""
+    prefixes = [
+        list(index["columns"])
+        for index in table_info.get("indexes", [])
+        if index.get("columns")
+    ]
+    constraint_columns: dict[str, list[str]] = {}
+    for const in table_info.get("constraints", []):
+        if _field(const, "constraint_type") in ("PRIMARY KEY", "UNIQUE"):
+            col_name = _field(const, "column_name")
+            if col_name:
+                constraint_columns.setdefault(
+                    _field(const, "constraint_name"), []
+                ).append(col_name)
+    return prefixes + list(constraint_columns.values())
+
+
+def _group_foreign_keys(
+    foreign_keys: list[dict[str, Any]],
+) -> list[list[dict[str, Any]]]:
+    """One entry per FK constraint; composite keys arrive as one row per column."""
+    grouped: dict[tuple[Any, Any], list[dict[str, Any]]] = {}
+    for fk in foreign_keys:
+        key = (fk.get("from_table"), _field(fk, "constraint_name"))
+        grouped.setdefault(key, []).append(fk)
+    return list(grouped.values())
+
+
+def _anomaly(
+    rows: list[dict[str, Any]], anomaly_type: str, explanation: str, suggestion: str
+) -> dict[str, Any]:
+    return {
+        "constraint_name": _field(rows[0], "constraint_name"),
+        "from_table": rows[0].get("from_table"),
+        "from_column": ", ".join(str(r.get("from_column")) for r in rows),
+        "to_table": rows[0].get("to_table"),
+        "to_column": ", ".join(str(r.get("to_column")) for r in rows),
+        "anomaly_type": anomaly_type,
+        "explanation": explanation,
+        "suggestion": suggestion,
+    }
+
+
+def validate_foreign_keys(
+    schema_name: str, schema_details: dict[str, Any]
+) -> list[dict[str, Any]]:
+    """
+    Checks every declared foreign key against the introspected tables, in time
+    linear in the number of FK columns. Flags targets that do not exist or are
+    not PK/UNIQUE, referencing and referenced columns of different types, and
+    FK columns that no index leads with (slow joins and cascading deletes).
+    """
+    tables = schema_details.get("tables", {})
+    key_sets = {name: _key_column_sets(info) for name, info in tables.items()}
+    index_prefixes = {name: _index_prefixes(info) for name, info in tables.items()}
+    anomalies: list[dict[str, Any]] = []
+
+    for rows in _group_foreign_keys(schema_details.get("foreign_keys", [])):
+        from_table = rows[0].get("from_table")
+        to_table = rows[0].get("to_table")
+        from_columns = [r.get("from_column") for r in rows]
+        to_columns = [r.get("to_column") for r in rows]
+        from_info = tables.get(from_table, {})
+
+        if from_info and not any(
+            set(prefix[: len(from_columns)]) == set(from_columns)
+            for prefix in index_prefixes[from_table]
+        ):
+            anomalies.append(
+                _anomaly(
+                    rows,
+                    "missing_index",
+                    f"No index on {from_table} starts with the FK column(s) "
+                    f"{', '.join(map(str, from_columns))}, so joins to {to_table} "
+                    "and deletes or updates on it scan the whole table.",
+                    "Create an index on the foreign key column(s).",
+                )
+            )
+
+        # Targets in another schema are not introspected and cannot be checked.
+        if rows[0].get("to_schema", schema_name) != schema_name:
+            continue
+        to_info = tables.get(to_table)
+        if to_info is None:
+            anomalies.append(
+                _anomaly(
+                    rows,
+                    "missing_target_table",
+                    f"Referenced table '{to_table}' was not found in schema "
+                    f"'{schema_name}'.",
+                    "Verify target table exists.",
+                )
+            )
+            continue
+        missing = [c for c in to_columns if c not in to_info.get("columns", {})]
+        if missing:
+            anomalies.append(
+                _anomaly(
+                    rows,
+                    "missing_target_column",
+                    f"Referenced column(s) {', '.join(map(str, missing))} not found "
+                    f"in '{to_table}'.",
+                    "Verify target column exists.",
+                )
+            )
+            continue
+        if frozenset(to_columns) not in key_sets[to_table]:
+            anomalies.append(
+                _anomaly(
+                    rows,
+                    "target_not_unique",
+                    f"'{to_table}.{', '.join(map(str, to_columns))}' is not a "
+                    "PRIMARY KEY or UNIQUE key, so a child row may match several "
+                    "parent rows.",
+                    "Target column should be PK/UK.",
+                )
+            )
+
+        for row in rows:
+            from_col_info = from_info.get("columns", {}).get(row.get("from_column"))
+            to_col_info = to_info["columns"][row.get("to_column")]
+            if from_col_info is None:
+                continue
+            from_type = _declared_type(from_col_info)
+            to_type = _declared_type(to_col_info)
+            if not from_type or not to_type or from_type == to_type:
+                continue
+            if types_compatible(from_type, to_type) is False:
+                explanation = (
+                    f"{from_table}.{row.get('from_column')} is {from_type} but "
+                    f"{to_table}.{row.get('to_column')} is {to_type}; the values "
+                    "cannot be compared without a cast."
+                )
+            else:
+                explanation = (
+                    f"{from_table}.{row.get('from_column')} is {from_type} but "
+                    f"{to_table}.{row.get('to_column')} is {to_type}; joins need an "
+                    "implicit conversion that can prevent index use."
+                )
+            anomalies.append(
+                _anomaly(
+                    [row],
+                    "type_mismatch",
+                    explanation,
+                    "Use the same data type on both sides of the relationship.",
+                )
+            )
+    return anomalies
@@ -0,0 +1,341 @@
+import math
+from typing import Any
+
+# Score each kind of finding starts from; its size or load adds up to 40.
+FINDING_BASE_SCORES = {
+    "duplicate_index": 40,
+    "unused_index": 35,
+    "unindexed_foreign_key": 35,
+    "missing_index": 30,
+    "redundant_prefix_index": 25,
+    "full_scan_heavy_table": 25,
+}
+
+# Scores from which a finding is of high or medium severity.
+HIGH_SEVERITY_SCORE = 70
+MEDIUM_SEVERITY_SCORE = 50
+
+# Usage counters younger than this do not show that an index is unused;
+# weekly or month-end jobs may not have run yet.
+MIN_USAGE_WINDOW_DAYS = 7
+
+# Tables with fewer rows are not reported for full scans, which are cheaper
+# than an index lookup on them.
+FULL_SCAN_MIN_ROWS = 10000
+
+# Access methods ordered on their key columns, whose indexes can be compared
+# by column prefix.
+_BTREE_METHODS = {"btree", "clustered", "nonclustered"}
+
+
+def _magnitude(value: float | None, unit: float) -> float:
+    """Up to 40 points, 10 per order of magnitude of value over unit."""
+    if not value:
+        return 0.0
+    return min(40.0, 10 * math.log10(1 + value / unit))
+
+
+def _finding(
+    finding_type: str,
+    table_name: str,
+    magnitude: float,
+    detail: str,
+    recommendation: str,
+    **evidence: Any,
+) -> dict[str, Any]:
+    score = round(FINDING_BASE_SCORES[finding_type] + magnitude, 1)
+    if score >= HIGH_SEVERITY_SCORE:
+        severity = "high"
+    elif score >= MEDIUM_SEVERITY_SCORE:
+        severity = "medium"
+    else:
+        severity = "low"
+    return {
+        "type": finding_type,
+        "severity": severity,
+        "score": score,
+        "table": table_name,
+        "detail": detail,
+        "recommendation": recommendation,
+        "evidence": evidence,
+    }
+
+
+def _merged_indexes(
+    table_info: dict[str, Any], usage: dict[str, dict[str, Any]]
+) -> list[dict[str, Any]]:
+    """Introspected indexes with their usage figures, cut to their key columns."""
+    indexes = []
+    for index in table_info.get("indexes", []):
+        stats = usage.get(index["name"])
+        if stats is None or not index.get("columns"):
+            continue
+        indexes.append(
+            {
+                **stats,
+                "name": index["name"],
+                "columns": list(index["columns"][: stats["key_columns"]]),
+                "comparable": not stats["partial"]
+                and str(stats["method"]).lower() in _BTREE_METHODS,
+            }
+        )
+    return indexes
+
+
+def _droppable(index: dict[str, Any]) -> bool:
+    """Indexes that enforce a key cannot be dropped on their own."""
+    return not (index["primary"] or index["constraint"] or index["unique"])
+
+
+def _foreign_key_columns(
+    foreign_keys: list[dict[str, Any]], table_name: str
+) -> list[list[str]]:
+    """Column lists of the table's FK constraints; composite keys arrive one row per column."""
+    grouped: dict[Any, list[str]] = {}
+    for fk in foreign_keys:
+        if fk.get("from_table") == table_name:
+            name = fk.get("constraint_name", fk.get("CONSTRAINT_NAME"))
+            grouped.setdefault(name, []).append(fk.get("from_column"))
+    return list(grouped.values())
+
+
+def _supports(index: dict[str, Any], columns: list[str]) -> bool:
+    return set(index["columns"][: len(columns)]) == set(columns)
+
+
+def _sole_fk_indexes(
+    indexes: list[dict[str, Any]], fk_columns: list[list[str]]
+) -> set[str]:
+    """Indexes that are the only one leading with the columns of some FK."""
+    sole = set()
+    for columns in fk_columns:
+        supporting = [index["name"] for index in indexes if _supports(index, columns)]
+        if len(supporting) == 1:
+            sole.add(supporting[0])
+    return sole
+
+
+def _index_findings(
+    table_name: str,
+    indexes: list[dict[str, Any]],
+    fk_columns: list[list[str]],
+    window_days: float | None,
+) -> list[dict[str, Any]]:
+    """Duplicate, prefix-redundant and unused indexes of one table."""
+    findings = []
+    flagged = set()
+
+    by_columns: dict[tuple[str, ...], list[dict[str, Any]]] = {}
+    for index in indexes:
+        if index["comparable"]:
+            by_columns.setdefault(tuple(index["columns"]), []).append(index)
+    for group in by_columns.values():
+        # Keep the index that enforces the most, then the most used one.
+        group.sort(
+            key=lambda i: (
+                not i["primary"],
+                not i["constraint"],
+                not i["unique"],
+                -(i["uses"] or 0),
+                i["name"],
+            )
+        )
+        keeper = group[0]
+        for index in group[1:]:
+            if not _droppable(index):
+                continue
+            flagged.add(index["name"])
+            findings.append(
+                _finding(
+                    "duplicate_index",
+                    table_name,
+                    _magnitude(index["size_bytes"], 1e6),
+                    f"Index {index['name']} on {table_name} "
+                    f"({', '.join(index['columns'])}) has the same key columns as "
+                    f"{keeper['name']}.",
+                    f"Drop {index['name']}; {keeper['name']} serves the same lookups.",
+                    index=index["name"],
+                    duplicate_of=keeper["name"],
+                    size_bytes=index["size_bytes"],
+                    uses=index["uses"],
+                )
+            )
+
+    for index in indexes:
+        if index["name"] in flagged or not index["comparable"]:
+            continue
+        if not _droppable(index):
+            continue
+        covering = next(
+            (
+                other
+                for other in indexes
+                if other["comparable"]
+                and len(other["columns"]) > len(index["columns"])
+                and other["columns"][: len(index["columns"])] == index["columns"]
+            ),
+            None,
+        )
+        if covering is None:
+            continue
+        flagged.add(index["name"])
+        findings.append(
+            _finding(
+                "redundant_prefix_index",
+                table_name,
+                _magnitude(index["size_bytes"], 1e6),
+                f"The key columns of {index['name']} on {table_name} "
+                f"({', '.join(index['columns'])}) are a prefix of {covering['name']} "
+                f"({', '.join(covering['columns'])}).",
+                f"Drop {index['name']} unless its smaller size matters for a hot "
+                f"query; {covering['name']} serves the same lookups.",
+                index=index["name"],
+                covered_by=covering["name"],
+                size_bytes=index["size_bytes"],
+                uses=index["uses"],
+            )
+        )
+
+    # An FK must keep one supporting index once the findings above are acted on.
+    sole_fk = _sole_fk_indexes(
+        [index for index in indexes if index["name"] not in flagged], fk_columns
+    )
+    short_window = window_days is not None and window_days < MIN_USAGE_WINDOW_DAYS
+    for index in indexes:
+        if index["uses"] != 0 or index["name"] in flagged:
+            continue
+        if not _droppable(index) or index["name"] in sole_fk:
+            continue
+        window = (
+            f"{window_days:.1f} days" if window_days is not None else "an unknown time"
+        )
+        findings.append(
+            _finding(
+                "unused_index",
+                table_name,
+                0.0 if short_window else _magnitude(index["size_bytes"], 1e6),
+                f"Index {index['name']} on {table_name} "
+                f"({', '.join(index['columns'])}) has not been used in {window} of "
+                "usage statistics, but is maintained on every write."
+                + (
+                    " The statistics are too recent to rule out periodic use."
+                    if short_window
+                    else ""
+                ),
+                f"Confirm no periodic job or replica needs {index['name']}, then drop it.",
+                index=index["name"],
+                size_bytes=index["size_bytes"],
+                stats_window_days=window_days,
+            )
+        )
+    return findings
+
+
+def advise_indexes(
+    schema_structure: dict[str, Any], usage: dict[str, Any]
+) -> dict[str, Any]:
+    """
+    Ranked index findings for an introspected schema, from its indexes joined
+    with the dialect's usage figures: duplicate, prefix-redundant and unused
+    indexes, FK columns no index leads with, the optimizer's missing-index
+    suggestions (SQL Server) and large tables read mostly by full scans.
+    Indexes with a predicate or expression, or not ordered on their key
+    columns, are only checked for use.
+    """
+    tables = schema_structure.get("tables", {})
+    foreign_keys = schema_structure.get("foreign_keys", [])
+    window_days = usage.get("stats_window_days")
+    findings: list[dict[str, Any]] = []
+
+    for table_name, table_info in tables.items():
+        indexes = _merged_indexes(table_info, usage["indexes"].get(table_name, {}))
+        findings.extend(
+            _index_findings(
+                table_name,
+                indexes,
+                _foreign_key_columns(foreign_keys, table_name),
+                window_days,
+            )
+        )
+
+    # Introspection already flags FKs that no index leads with.
+    for anomaly in schema_structure.get("anomalies", []):
+        if anomaly.get("anomaly_type") != "missing_index":
+            continue
+        table_name = anomaly.get("from_table")
+        rows = tables.get(table_name, {}).get("row_estimate")
+        findings.append(
+            _finding(
+                "unindexed_foreign_key",
+                table_name,
+                _magnitude(rows, 1e3),
+                anomaly.get("explanation", ""),
+                f"Create an index on {table_name} ({anomaly.get('from_column')}).",
+                constraint_name=anomaly.get("constraint_name"),
+                columns=anomaly.get("from_column"),
+                row_estimate=rows,
+            )
+        )
+
+    for missing in usage.get("missing_indexes", []):
+        columns = ", ".join(
+            c for c in (missing["equality_columns"], missing["inequality_columns"]) if c
+        )
+        included = missing["included_columns"]
+        findings.append(
+            _finding(
+                "missing_index",
+                missing["table"],
+                _magnitude(missing["improvement"], 1e3),
+                f"The optimizer asked for an index on {missing['table']} ({columns})"
+                f"{f' including {included}' if included else ''} "
+                f"{missing['uses']} times, estimating a "
+                f"{missing['avg_user_impact']:.0f}% lower query cost.",
+                f"Review the suggestion against existing indexes of {missing['table']} "
+                "before creating it; suggestions often overlap.",
+                **missing,
+            )
+        )
+
+    for table_name, scans in usage.get("table_scans", {}).items():
+        rows = tables.get(table_name, {}).get("row_estimate")
+        if table_name not in tables or not rows or rows < FULL_SCAN_MIN_ROWS:
+            continue
+        if not scans["rows_read"]:
+            continue
+        if scans["full_scans"] is not None and scans["full_scans"] <= (
+            scans["index_scans"] or 0
+        ):
+            continue
+        findings.append(
+            _finding(
+                "full_scan_heavy_table",
+                table_name,
+                _magnitude(scans["rows_read"], 1e6),
+                f"{table_name} (about {rows} rows) is read mostly by full scans: "
+                f"{scans['rows_read']} rows read without an index.",
+                f"Find the statements filtering {table_name} in the workload "
+                "profile and index their predicates.",
+                row_estimate=rows,
+                **scans,
+            )
+        )
+
+    findings.sort(key=lambda f: f["score"], reverse=True)
+    summary: dict[str, dict[str, int]] = {"by_type": {}, "by_severity": {}}
+    for rank, finding in enumerate(findings, start=1):
+        finding["rank"] = rank
+        by_type = summary["by_type"]
+        by_type[finding["type"]] = by_type.get(finding["type"], 0) + 1
+        by_severity = summary["by_severity"]
+        by_severity[finding["severity"]] = by_severity.get(finding["severity"], 0) + 1
+    return {
+        "stats_window_days": round(window_days, 1) if window_days is not None else None,
+        "usage_available": any(
+            index["uses"] is not None
+            for table in usage["indexes"].values()
+            for index in table.values()
+        ),
+        "findings": findings,
+        "summary": summary,
+    }
@@ -1,14 +1,19 @@
+import hashlib
 import json
 import logging
 import os
 import re
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
 from typing import Any
 
 import google.auth
 from google import genai
-from google.api_core import exceptions
 from google.genai import types
 
+from . import analysis_chunks, fk_validator, relationship_inference
+
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
 
@@ -30,6 +35,9 @@ GOOGLE_GENAI_USE_VERTEXAI = os.environ.get(
 ).lower() in ("true", "1")
 MODEL = os.environ.get("MODEL", "gemini-1.5-pro")
 
+# Catalog rows fetched per round trip when streaming introspection queries.
+STREAM_BATCH_SIZE = int(os.environ.get("INTROSPECTION_STREAM_BATCH_SIZE", "5000"))
+
 client = None
 if GOOGLE_CLOUD_PROJECT:
     try:
@@ -66,26 +74,36 @@ def _execute_query(conn: Any, query: str) -> list[dict[str, Any]]:
         cursor.close()
 
 
+def _stream_query(conn: Any, query: str) -> Iterator[tuple]:
+    """
+    Yields the rows of a query as tuples, fetched in batches so that only one
+    batch is held in memory at a time. No other query may run on the
+    connection until the rows are consumed.
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute(query)
+        while rows := cursor.fetchmany(STREAM_BATCH_SIZE):
+            yield from rows
+    except Exception as ex:
+        logger.error(f"SQL Error: {ex} for query: {query}")
+        raise
+    finally:
+        cursor.close()
+
+
 def _construct_llm_prompt(
-    schema_name: str, db_type: str, schema_details: dict[str, Any]
+    schema_name: str, db_type: str, chunk_context: dict[str, Any]
 ) -> str:
-    """Constructs a prompt for the LLM to analyze relationships and anomalies with formatted JSON."""
-    tables_context = {}
-    for table_name, table_info in schema_details.get("tables", {}).items():
-        tables_context[table_name] = {
-            "columns": list(table_info.get("columns", {}).keys()),
-            "constraints": table_info.get("constraints", []),
-        }
-    context = {
-        "db_type": db_type,
-        "schema_name": schema_name,
-        "tables": tables_context,
-        "existing_foreign_keys": schema_details.get("foreign_keys", []),
-    }
+    """
+    Constructs a prompt for the LLM to resolve the columns the naming rules left
+    ambiguous in one chunk of the schema, with formatted JSON.
+    """
+    context = {"db_type": db_type, "schema_name": schema_name, **chunk_context}
     context_json = json.dumps(context, indent=4)
     prompt = f"""
     You are a database expert analyzing the schema of a {db_type} database named '{schema_name}'.
-    Your task is to identify potential inferred relationships and relationship anomalies based on the provided schema information.
+    Your task is to identify potential inferred relationships based on the provided schema information.
 
     Here is the schema context:
     ```json
@@ -94,21 +112,13 @@ def _construct_llm_prompt(
 
     **Tasks:**
 
-    1.  **Inferred Relationship Suggestion:**
-        Analyze the table and column names. Suggest potential foreign key relationships that are NOT already defined in `existing_foreign_keys`.
-        Common patterns include columns like `user_id`, `product_code`, `order_uuid`, etc., potentially linking to `id` or similar columns in other tables (e.g., `users.id`).
-        For each suggestion, provide the `from_table`, `from_column`, `to_table`, `to_column`, an `explanation` (why you think it's related), and a `suggestion` (e.g., "Consider adding a foreign key").
-
-    2.  **Relationship Anomaly Detection:**
-        Examine the `existing_foreign_keys`. For each foreign key, check if the `to_table` and `to_column` exist in the `tables` context. Also, verify if the `to_column` in the `to_table` is part of a PRIMARY KEY or UNIQUE constraint in that table's constraints list.
-        Flag any anomalies where:
-            a. The `to_table` is not in the `tables` context.
-            b. The `to_column` is not in the `columns` list of the `to_table`.
-            c. The `to_column` in the `to_table` is NOT listed as a 'PRIMARY KEY' or 'UNIQUE' in its constraints.
-        For each anomaly, provide the `constraint_name`, `from_table`, `from_column`, `to_table`, `to_column`, an `explanation` of the issue, and a `suggestion` (e.g., "Verify target column exists" or "Target column should be PK/UK").
+    1.  **Inferred Relationship Resolution:**
+        Likely foreign keys have already been derived from column naming rules. `ambiguous_columns` maps each `table.column` whose target could not be decided to its type and scored `candidates`; `unmatched_columns` lists, per table, columns named like references for which no target table was found.
+        For each of these columns, pick the referenced table and column from its `candidates` or from `table_keys` (the PRIMARY KEY/UNIQUE columns of the relevant tables), or leave it out if it is not a reference.
+        For each suggestion, provide the `from_table`, `from_column`, `to_table`, `to_column`, a `confidence` between 0 and 1, an `explanation` (why you think it's related), and a `suggestion` (e.g., "Consider adding a foreign key").
 
     **Output Format:**
-    Return your findings as a single JSON object with two keys: "inferred_relationships" and "anomalies". The JSON must be well-formed.
+    Return your findings as a single JSON object with the key "inferred_relationships". The JSON must be well-formed.
 
     ```json
     {{
@@ -118,24 +128,14 @@ def _construct_llm_prompt(
           "from_column": "string",
           "to_table": "string",
           "to_column": "string",
-          "explanation": "string",
-          "suggestion": "string"
-        }}
-      ],
-      "anomalies": [
-        {{
-          "constraint_name": "string",
-          "from_table": "string",
-          "from_column": "string",
-          "to_table": "string",
-          "to_column": "string",
+          "confidence": 0.0,
           "explanation": "string",
           "suggestion": "string"
         }}
       ]
     }}
     ```
-    If no inferred relationships or anomalies are found, return empty lists for the respective keys.
+    If no inferred relationships are found, return an empty list.
     """
     return prompt
 
@@ -149,64 +149,82 @@ def _extract_json_content(text: str) -> str:
     return extracted
 
 
+def _request_relationships(prompt: str) -> list[dict[str, Any]]:
+    """Sends one analysis prompt to the LLM and returns its inferred relationships."""
+    logger.debug(f"****** Custom_LLM_Request: {prompt}")
+    response = client.models.generate_content(  # type: ignore[union-attr]
+        model=MODEL,
+        contents=[types.Part.from_text(text=prompt)],  # type: ignore[arg-type]
+        config=types.GenerateContentConfig(response_mime_type="application/json"),
+    )
+    generated_text = response.candidates[0].content.parts[0].text  # type: ignore[index, union-attr]
+    logger.debug(f"****** Raw LLM Response: {generated_text}")
+    cleaned_json = _extract_json_content(generated_text)  # type: ignore[arg-type]
+    logger.debug(f"****** Cleaned JSON Extracted from LLM Response:\n{cleaned_json}")
+    inferred = json.loads(cleaned_json).get("inferred_relationships", [])
+    if not isinstance(inferred, list):
+        raise ValueError("LLM response is not in the expected list format for keys.")
+    return inferred
+
+
 def _analyze_with_llm(
     schema_name: str, db_type: str, schema_details: dict[str, Any]
 ) -> dict[str, list[dict[str, Any]]]:
-    """Calls an LLM to get inferred relationships and anomalies."""
+    """
+    Infers relationships with local naming rules first, then calls an LLM only
+    for the columns the rules left ambiguous. Large schemas are split into
+    chunks of related tables that are analyzed concurrently; a chunk whose
+    request fails loses only its own suggestions.
+    """
+    inference = relationship_inference.infer_relationships(schema_details)
+    rule_inferred = inference["inferred"]
+    ambiguous = inference["ambiguous"]
+    logger.info(
+        f"Naming rules inferred {len(rule_inferred)} relationships for {db_type}; "
+        f"{len(ambiguous)} ambiguous columns left for the LLM."
+    )
+    if not ambiguous:
+        return {"inferred_relationships": rule_inferred}
+
     if not client:
         logger.error("GenAI Client not initialized. Skipping LLM analysis.")
-        return {
-            "inferred_relationships": [],
-            "anomalies": [{"error": "LLM client not available."}],
-        }
+        return {"inferred_relationships": rule_inferred}
+
+    contexts = analysis_chunks.plan_chunks(schema_details, ambiguous, rule_inferred)
+    logger.info(
+        f"Sending {len(contexts)} prompt(s) to LLM for {db_type} relationship analysis."
+    )
+    llm_inferred = analysis_chunks.analyze_chunks(
+        contexts,
+        lambda context: _request_relationships(
+            _construct_llm_prompt(schema_name, db_type, context)
+        ),
+    )
+    return {
+        "inferred_relationships": relationship_inference.merge_inferred(
+            rule_inferred, llm_inferred
+        ),
+    }
+
 
-    prompt = _construct_llm_prompt(schema_name, db_type, schema_details)
-    logger.info(f"Sending prompt to LLM for {db_type} relationship analysis.")
-    generated_text = ""
+@contextmanager
+def _timed_phase(timings: dict[str, float], phase: str) -> Iterator[None]:
+    """Records the wall-clock duration of an introspection phase in seconds."""
+    started = time.perf_counter()
     try:
-        logger.debug(f"****** Custom_LLM_Request: {prompt}")
-        response = client.models.generate_content(
-            model=MODEL,
-            contents=[types.Part.from_text(text=prompt)],  # type: ignore[arg-type]
-            config=types.GenerateContentConfig(response_mime_type="application/json"),
-        )
-        generated_text = response.candidates[0].content.parts[0].text  # type: ignore[index, union-attr, assignment]
-        logger.debug(f"****** Raw LLM Response: {generated_text}")
-        cleaned_json = _extract_json_content(generated_text)
-        logger.debug(
-            f"****** Cleaned JSON Extracted from LLM Response:\n{cleaned_json}"
-        )
-        llm_output = json.loads(cleaned_json)
-        inferred = llm_output.get("inferred_relationships", [])
-        anomalies = llm_output.get("anomalies", [])
-        if not isinstance(inferred, list) or not isinstance(anomalies, list):
-            raise ValueError(
-                "LLM response is not in the expected list format for keys."
-            )
-        return {"inferred_relationships": inferred, "anomalies": anomalies}
-    except json.JSONDecodeError as e:
-        logger.error(
-            f"Error decoding LLM JSON response: {e}. Cleaned Response: {cleaned_json}"
-        )
-        return {
-            "inferred_relationships": [],
-            "anomalies": [{"error": f"LLM response was not valid JSON: {e}"}],
-        }
-    except (exceptions.GoogleAPICallError, IndexError, AttributeError, ValueError) as e:
-        logger.error(f"Error calling LLM or processing response: {e}")
-        return {
-            "inferred_relationships": [],
-            "anomalies": [{"error": f"LLM analysis failed: {e}"}],
-        }
-    except Exception as e:
-        logger.error(f"Unexpected error during LLM analysis: {e}", exc_info=True)
-        return {
-            "inferred_relationships": [],
-            "anomalies": [{"error": f"Unexpected LLM analysis error: {e}"}],
-        }
+        yield
+    finally:
+        timings[phase] = round(time.perf_counter() - started, 3)
+        logger.info(f"MSSQL introspection phase '{phase}' took {timings[phase]}s")
 
 
 def get_mssql_schema_details(conn: Any, schema_name: str) -> dict[str, Any]:
+    """
+    Introspects a SQL Server schema from the sys catalog views. Every phase is a
+    single schema-wide result set grouped per table in memory, so no query runs
+    per table and the per-query timeout is not hit on very large schemas.
+    Phase durations are reported under "introspection_timings".
+    """
     logger.info(f"Fetching MSSQL schema details for: {schema_name}")
     details: dict[str, Any] = {
         "tables": {},
@@ -214,78 +232,282 @@ def get_mssql_schema_details(conn: Any, schema_name: str) -> dict[str, Any]:
         "foreign_keys": [],
         "inferred_relationships": [],
         "anomalies": [],
+        "introspection_timings": {},
     }
+    timings = details["introspection_timings"]
+    tables = details["tables"]
 
-    tables_query = f"SELECT TABLE_NAME FROM INFORMATION_SCHEMA.TABLES WHERE TABLE_SCHEMA = '{schema_name}' AND TABLE_TYPE = 'BASE TABLE';"
-    tables = _execute_query(conn, tables_query)
-    for table in tables:
-        t_name = table["TABLE_NAME"]
-        details["tables"][t_name] = {"columns": {}, "constraints": [], "indexes": []}
-        cols_query = f"SELECT COLUMN_NAME, DATA_TYPE, CHARACTER_MAXIMUM_LENGTH, NUMERIC_PRECISION, NUMERIC_SCALE, IS_NULLABLE, COLUMN_DEFAULT FROM INFORMATION_SCHEMA.COLUMNS WHERE TABLE_SCHEMA = '{schema_name}' AND TABLE_NAME = '{t_name}';"
-        for col in _execute_query(conn, cols_query):
-            details["tables"][t_name]["columns"][col["COLUMN_NAME"]] = {
-                "type": col["DATA_TYPE"],
-                "length": col["CHARACTER_MAXIMUM_LENGTH"],
-                "precision": col["NUMERIC_PRECISION"],
-                "scale": col["NUMERIC_SCALE"],
-                "nullable": col["IS_NULLABLE"] == "YES",
-                "default": col["COLUMN_DEFAULT"],
+    with _timed_phase(timings, "tables"):
+        tables_query = f"""
+        SELECT t.name AS TABLE_NAME
+        FROM sys.tables t INNER JOIN sys.schemas s ON t.schema_id = s.schema_id
+        WHERE s.name = '{schema_name}' AND t.is_ms_shipped = 0
+        ORDER BY t.name;
+        """
+        for (table_name,) in _stream_query(conn, tables_query):
+            tables[table_name] = {
+                "columns": {},
+                "constraints": [],
+                "indexes": [],
+                "row_estimate": None,
+                "total_bytes": None,
             }
 
+    with _timed_phase(timings, "columns"):
+        # Type, length, precision and scale follow the INFORMATION_SCHEMA.COLUMNS
+        # definitions so the reported values do not change.
+        cols_query = f"""
+        SELECT t.name AS TABLE_NAME, c.name AS COLUMN_NAME,
+               CASE WHEN ty.is_user_defined = 1 THEN TYPE_NAME(c.system_type_id) ELSE ty.name END AS DATA_TYPE,
+               COLUMNPROPERTY(c.object_id, c.name, 'charmaxlen') AS CHARACTER_MAXIMUM_LENGTH,
+               CASE WHEN c.system_type_id IN (48, 52, 56, 59, 60, 62, 106, 108, 122, 127) THEN c.precision END AS NUMERIC_PRECISION,
+               CASE WHEN c.system_type_id IN (48, 52, 56, 60, 106, 108, 122, 127) THEN c.scale END AS NUMERIC_SCALE,
+               c.is_nullable AS IS_NULLABLE, OBJECT_DEFINITION(c.default_object_id) AS COLUMN_DEFAULT
+        FROM sys.columns c
+        INNER JOIN sys.tables t ON c.object_id = t.object_id
+        INNER JOIN sys.schemas s ON t.schema_id = s.schema_id
+        INNER JOIN sys.types ty ON c.user_type_id = ty.user_type_id
+        WHERE s.name = '{schema_name}'
+        ORDER BY t.name, c.column_id;
+        """
+        for (
+            table_name,
+            column_name,
+            data_type,
+            length,
+            precision,
+            scale,
+            is_nullable,
+            default,
+        ) in _stream_query(conn, cols_query):
+            table_info = tables.get(table_name)
+            if table_info is None:
+                continue
+            table_info["columns"][column_name] = {
+                "type": data_type,
+                "length": length,
+                "precision": precision,
+                "scale": scale,
+                "nullable": bool(is_nullable),
+                "default": default,
+            }
+
+    with _timed_phase(timings, "constraints"):
         constraints_query = f"""
-            SELECT KCU.TABLE_NAME, TC.CONSTRAINT_NAME, TC.CONSTRAINT_TYPE, KCU.COLUMN_NAME, CC.CHECK_CLAUSE
-            FROM INFORMATION_SCHEMA.TABLE_CONSTRAINTS AS TC
-            LEFT JOIN INFORMATION_SCHEMA.KEY_COLUMN_USAGE AS KCU ON TC.CONSTRAINT_NAME = KCU.CONSTRAINT_NAME AND TC.TABLE_SCHEMA = KCU.TABLE_SCHEMA AND TC.TABLE_NAME = KCU.TABLE_NAME
-            LEFT JOIN INFORMATION_SCHEMA.CHECK_CONSTRAINTS AS CC ON TC.CONSTRAINT_NAME = CC.CONSTRAINT_NAME AND TC.CONSTRAINT_SCHEMA = CC.CONSTRAINT_SCHEMA
-            WHERE TC.TABLE_SCHEMA = '{schema_name}' AND KCU.TABLE_NAME = '{t_name}';
+        SELECT TABLE_NAME, CONSTRAINT_NAME, CONSTRAINT_TYPE, COLUMN_NAME, CHECK_CLAUSE
+        FROM (
+            SELECT t.name AS TABLE_NAME, kc.name AS CONSTRAINT_NAME,
+                   CASE kc.type WHEN 'PK' THEN 'PRIMARY KEY' ELSE 'UNIQUE' END AS CONSTRAINT_TYPE,
+                   COL_NAME(ic.object_id, ic.column_id) AS COLUMN_NAME, CAST(NULL AS NVARCHAR(MAX)) AS CHECK_CLAUSE,
+                   ic.key_ordinal AS KEY_ORDINAL
+            FROM sys.key_constraints kc
+            INNER JOIN sys.index_columns ic ON ic.object_id = kc.parent_object_id AND ic.index_id = kc.unique_index_id
+            INNER JOIN sys.tables t ON kc.parent_object_id = t.object_id
+            INNER JOIN sys.schemas s ON t.schema_id = s.schema_id
+            WHERE s.name = '{schema_name}'
+            UNION ALL
+            SELECT t.name, fk.name, 'FOREIGN KEY', COL_NAME(fkc.parent_object_id, fkc.parent_column_id), NULL,
+                   fkc.constraint_column_id
+            FROM sys.foreign_keys fk
+            INNER JOIN sys.foreign_key_columns fkc ON fkc.constraint_object_id = fk.object_id
+            INNER JOIN sys.tables t ON fk.parent_object_id = t.object_id
+            INNER JOIN sys.schemas s ON t.schema_id = s.schema_id
+            WHERE s.name = '{schema_name}'
+            UNION ALL
+            SELECT t.name, cc.name, 'CHECK', COL_NAME(cc.parent_object_id, NULLIF(cc.parent_column_id, 0)), cc.definition, 0
+            FROM sys.check_constraints cc
+            INNER JOIN sys.tables t ON cc.parent_object_id = t.object_id
+            INNER JOIN sys.schemas s ON t.schema_id = s.schema_id
+            WHERE s.name = '{schema_name}'
+        ) AS c
+        ORDER BY TABLE_NAME, CONSTRAINT_NAME, KEY_ORDINAL;
         """
-        details["tables"][t_name]["constraints"] = _execute_query(
-            conn, constraints_query
-        )
+        for (
+            table_name,
+            constraint_name,
+            constraint_type,
+            column_name,
+            check_clause,
+        ) in _stream_query(conn, constraints_query):
+            table_info = tables.get(table_name)
+            if table_info is not None:
+                table_info["constraints"].append(
+                    {
+                        "TABLE_NAME": table_name,
+                        "CONSTRAINT_NAME": constraint_name,
+                        "CONSTRAINT_TYPE": constraint_type,
+                        "COLUMN_NAME": column_name,
+                        "CHECK_CLAUSE": check_clause,
+                    }
+                )
 
+    with _timed_phase(timings, "indexes"):
         indexes_query = f"""
         SELECT t.name AS table_name, ind.name AS index_name, COL_NAME(ic.object_id, ic.column_id) AS column_name, ind.is_unique
         FROM sys.indexes ind INNER JOIN sys.index_columns ic ON  ind.object_id = ic.object_id AND ind.index_id = ic.index_id
         INNER JOIN sys.tables t ON ind.object_id = t.object_id INNER JOIN sys.schemas s ON t.schema_id = s.schema_id
-        WHERE s.name = '{schema_name}' AND t.name = '{t_name}' AND ind.is_hypothetical = 0 AND ind.type > 0;
+        WHERE s.name = '{schema_name}' AND ind.is_hypothetical = 0 AND ind.type > 0
+        ORDER BY t.name, ind.index_id, ic.index_column_id;
         """
         try:
-            indexes = _execute_query(conn, indexes_query)
-            grouped_indexes = {}
-            for index in indexes:
-                idx_name = index["index_name"]
-                if not idx_name:
+            grouped_indexes: dict[str, dict[str, dict[str, Any]]] = {}
+            for t_name, idx_name, column_name, is_unique in _stream_query(
+                conn, indexes_query
+            ):
+                if t_name not in tables or not idx_name:
                     continue
-                if idx_name not in grouped_indexes:
-                    grouped_indexes[idx_name] = {
+                table_indexes = grouped_indexes.setdefault(t_name, {})
+                if idx_name not in table_indexes:
+                    table_indexes[idx_name] = {
                         "name": idx_name,
                         "columns": [],
-                        "unique": index["is_unique"],
+                        "unique": is_unique,
                     }
-                if index["column_name"] not in grouped_indexes[idx_name]["columns"]:
-                    grouped_indexes[idx_name]["columns"].append(index["column_name"])
-            details["tables"][t_name]["indexes"] = list(grouped_indexes.values())
+                if column_name not in table_indexes[idx_name]["columns"]:
+                    table_indexes[idx_name]["columns"].append(column_name)
+            for t_name, table_indexes in grouped_indexes.items():
+                tables[t_name]["indexes"] = list(table_indexes.values())
         except Exception as e:
-            logger.error(f"Error fetching MSSQL indexes for {t_name}: {e}")
-
-    fks_query = f"""
-    SELECT KCU1.CONSTRAINT_NAME AS constraint_name, KCU1.TABLE_NAME AS from_table, KCU1.COLUMN_NAME AS from_column,
-           KCU2.TABLE_SCHEMA AS to_schema, KCU2.TABLE_NAME AS to_table, KCU2.COLUMN_NAME AS to_column
-    FROM INFORMATION_SCHEMA.REFERENTIAL_CONSTRAINTS RC
-    JOIN INFORMATION_SCHEMA.KEY_COLUMN_USAGE KCU1 ON KCU1.CONSTRAINT_SCHEMA = RC.CONSTRAINT_SCHEMA AND KCU1.CONSTRAINT_NAME = RC.CONSTRAINT_NAME
-    JOIN INFORMATION_SCHEMA.KEY_COLUMN_USAGE KCU2 ON KCU2.CONSTRAINT_SCHEMA = RC.UNIQUE_CONSTRAINT_SCHEMA AND KCU2.CONSTRAINT_NAME = RC.UNIQUE_CONSTRAINT_NAME AND KCU2.ORDINAL_POSITION = KCU1.ORDINAL_POSITION
-    WHERE KCU1.TABLE_SCHEMA = '{schema_name}';
-    """
-    details["foreign_keys"] = _execute_query(conn, fks_query)
-    views_query = f"SELECT TABLE_NAME AS view_name, VIEW_DEFINITION FROM INFORMATION_SCHEMA.VIEWS WHERE TABLE_SCHEMA = '{schema_name}';"
-    details["views"] = {
-        view["view_name"]: {"definition": view["VIEW_DEFINITION"]}
-        for view in _execute_query(conn, views_query)
-    }
+            logger.error(f"Error fetching MSSQL indexes for schema {schema_name}: {e}")
+
+    with _timed_phase(timings, "sizes"):
+        # Rows of the heap or clustered index and pages reserved by every index.
+        # sys.dm_db_partition_stats needs VIEW DATABASE STATE; without it only
+        # the row counts of sys.partitions are read.
+        sizes_query = f"""
+        SELECT t.name AS table_name,
+               SUM(CASE WHEN ps.index_id IN (0, 1) THEN ps.row_count ELSE 0 END) AS row_estimate,
+               SUM(ps.reserved_page_count) * 8192 AS total_bytes
+        FROM sys.dm_db_partition_stats ps
+        INNER JOIN sys.tables t ON ps.object_id = t.object_id
+        INNER JOIN sys.schemas s ON t.schema_id = s.schema_id
+        WHERE s.name = '{schema_name}'
+        GROUP BY t.name;
+        """
+        rows_query = f"""
+        SELECT t.name AS table_name, SUM(p.rows) AS row_estimate, NULL AS total_bytes
+        FROM sys.partitions p
+        INNER JOIN sys.tables t ON p.object_id = t.object_id
+        INNER JOIN sys.schemas s ON t.schema_id = s.schema_id
+        WHERE s.name = '{schema_name}' AND p.index_id IN (0, 1)
+        GROUP BY t.name;
+        """
+        try:
+            sizes = list(_stream_query(conn, sizes_query))
+        except Exception as e:
+            logger.warning(
+                f"Falling back to sys.partitions row counts for schema {schema_name}: {e}"
+            )
+            sizes = list(_stream_query(conn, rows_query))
+        for t_name, row_estimate, total_bytes in sizes:
+            if t_name in tables:
+                tables[t_name]["row_estimate"] = row_estimate
+                tables[t_name]["total_bytes"] = total_bytes
+
+    with _timed_phase(timings, "partitions"):
+        # Tables whose heap or clustered index lives on a partition scheme,
+        # with the partition function, its first partitioning column and the
+        # boundary value closing each partition.
+        partitions_query = f"""
+        SELECT t.name AS table_name, pf.name AS function_name, pf.type_desc AS strategy,
+               pf.boundary_value_on_right, COL_NAME(ic.object_id, ic.column_id) AS key_column,
+               p.partition_number, p.rows AS row_estimate,
+               CONVERT(nvarchar(4000), prv.value, 126) AS boundary
+        FROM sys.tables t
+        INNER JOIN sys.schemas s ON t.schema_id = s.schema_id
+        INNER JOIN sys.indexes i ON i.object_id = t.object_id AND i.index_id IN (0, 1)
+        INNER JOIN sys.partition_schemes ps ON ps.data_space_id = i.data_space_id
+        INNER JOIN sys.partition_functions pf ON pf.function_id = ps.function_id
+        INNER JOIN sys.index_columns ic ON ic.object_id = i.object_id
+            AND ic.index_id = i.index_id AND ic.partition_ordinal = 1
+        INNER JOIN sys.partitions p ON p.object_id = t.object_id AND p.index_id = i.index_id
+        LEFT JOIN sys.partition_range_values prv ON prv.function_id = pf.function_id
+            AND prv.boundary_id = p.partition_number - pf.boundary_value_on_right
+        WHERE s.name = '{schema_name}'
+        ORDER BY t.name, p.partition_number;
+        """
+        try:
+            for (
+                t_name,
+                function_name,
+                strategy,
+                on_right,
+                key_column,
+                partition_number,
+                row_estimate,
+                boundary,
+            ) in _stream_query(conn, partitions_query):
+                if t_name not in tables:
+                    continue
+                partitioning = tables[t_name].setdefault(
+                    "partitioning",
+                    {
+                        "strategy": strategy.lower(),
+                        "key": key_column,
+                        "function": function_name,
+                        "partitions": [],
+                    },
+                )
+                # RANGE RIGHT boundaries open a partition, RANGE LEFT ones close it.
+                if boundary is None:
+                    bounds = None
+                elif on_right:
+                    bounds = f">= {boundary}"
+                else:
+                    bounds = f"<= {boundary}"
+                partitioning["partitions"].append(
+                    {
+                        "name": str(partition_number),
+                        "bounds": bounds,
+                        "row_estimate": row_estimate,
+                        "total_bytes": None,
+                    }
+                )
+            for table_info in tables.values():
+                if "partitioning" in table_info:
+                    table_info["partitioning"]["partition_count"] = len(
+                        table_info["partitioning"]["partitions"]
+                    )
+        except Exception as e:
+            logger.error(
+                f"Error fetching MSSQL partitions for schema {schema_name}: {e}"
+            )
+
+    with _timed_phase(timings, "foreign_keys"):
+        fks_query = f"""
+        SELECT fk.name AS constraint_name, pt.name AS from_table,
+               COL_NAME(fkc.parent_object_id, fkc.parent_column_id) AS from_column,
+               rs.name AS to_schema, rt.name AS to_table,
+               COL_NAME(fkc.referenced_object_id, fkc.referenced_column_id) AS to_column
+        FROM sys.foreign_keys fk
+        INNER JOIN sys.foreign_key_columns fkc ON fkc.constraint_object_id = fk.object_id
+        INNER JOIN sys.tables pt ON fk.parent_object_id = pt.object_id
+        INNER JOIN sys.schemas ps ON pt.schema_id = ps.schema_id
+        INNER JOIN sys.tables rt ON fk.referenced_object_id = rt.object_id
+        INNER JOIN sys.schemas rs ON rt.schema_id = rs.schema_id
+        WHERE ps.name = '{schema_name}'
+        ORDER BY pt.name, fk.name, fkc.constraint_column_id;
+        """
+        details["foreign_keys"] = _execute_query(conn, fks_query)
+
+    with _timed_phase(timings, "views"):
+        # OBJECT_DEFINITION is not truncated at 4000 characters like
+        # INFORMATION_SCHEMA.VIEWS.VIEW_DEFINITION.
+        views_query = f"""
+        SELECT v.name AS view_name, OBJECT_DEFINITION(v.object_id) AS VIEW_DEFINITION
+        FROM sys.views v INNER JOIN sys.schemas s ON v.schema_id = s.schema_id
+        WHERE s.name = '{schema_name}';
+        """
+        details["views"] = {
+            view["view_name"]: {"definition": view["VIEW_DEFINITION"]}
+            for view in _execute_query(conn, views_query)
+        }
 
-    llm_analysis = _analyze_with_llm(schema_name, "Microsoft SQL Server", details)
+    with _timed_phase(timings, "llm_analysis"):
+        llm_analysis = _analyze_with_llm(schema_name, "Microsoft SQL Server", details)
     details["inferred_relationships"] = llm_analysis.get("inferred_relationships", [])
-    details["anomalies"] = llm_analysis.get("anomalies", [])
+    with _timed_phase(timings, "fk_validation"):
+        details["anomalies"] = fk_validator.validate_foreign_keys(schema_name, details)
     logger.info(
         f"Found {len(details['inferred_relationships'])} potential inferred relationships for MSSQL."
     )
@@ -293,3 +515,130 @@ def get_mssql_schema_details(conn: Any, schema_name: str) -> dict[str, Any]:
         f"Found {len(details['anomalies'])} potential relationship anomalies for MSSQL."
     )
     return details
+
+
+def get_mssql_catalog_fingerprint(conn: Any, schema_name: str) -> str | None:
+    """
+    Digest of the schema's objects from sys.objects modify_date, which moves
+    on any ALTER of a table, view or constraint, plus the schema's indexes.
+    """
+    fingerprint_q = f"""
+    SELECT
+        (SELECT COUNT_BIG(*) FROM sys.objects o
+         WHERE o.schema_id = SCHEMA_ID('{schema_name}') AND o.is_ms_shipped = 0) AS object_count,
+        (SELECT CHECKSUM_AGG(CHECKSUM(o.object_id, o.name, o.type, o.modify_date))
+         FROM sys.objects o
+         WHERE o.schema_id = SCHEMA_ID('{schema_name}') AND o.is_ms_shipped = 0) AS object_checksum,
+        (SELECT CHECKSUM_AGG(CHECKSUM(i.object_id, i.index_id, i.name, i.is_unique))
+         FROM sys.indexes i JOIN sys.objects o ON o.object_id = i.object_id
+         WHERE o.schema_id = SCHEMA_ID('{schema_name}') AND o.is_ms_shipped = 0) AS index_checksum,
+        SCHEMA_ID('{schema_name}') AS schema_id;
+    """
+    rows = _execute_query(conn, fingerprint_q)
+    if not rows or rows[0]["schema_id"] is None:
+        return None
+    row = rows[0]
+    return hashlib.sha256(
+        f"{row['object_count']}:{row['object_checksum']}:{row['index_checksum']}".encode()
+    ).hexdigest()
+
+
+def _index_usage_query(schema_name: str, with_usage: bool) -> str:
+    """
+    Kind, size and usage of the schema's indexes; without `with_usage` only
+    the catalog is read, which needs no server-level permission. Clustered
+    indexes are the table itself and are never drop candidates, so they
+    count as primary. Included columns are not key columns.
+    """
+    if with_usage:
+        usage = """
+           (SELECT SUM(ps.used_page_count) * 8192 FROM sys.dm_db_partition_stats ps
+            WHERE ps.object_id = i.object_id AND ps.index_id = i.index_id) AS size_bytes,
+           ISNULL(us.user_seeks + us.user_scans + us.user_lookups, 0) AS uses"""
+        usage_join = """
+    LEFT JOIN sys.dm_db_index_usage_stats us
+        ON us.database_id = DB_ID() AND us.object_id = i.object_id AND us.index_id = i.index_id"""
+    else:
+        usage = "\n           NULL AS size_bytes, NULL AS uses"
+        usage_join = ""
+    return f"""
+    SELECT t.name AS table_name, i.name AS index_name, i.type_desc AS method,
+           CAST(CASE WHEN i.is_primary_key = 1 OR i.type = 1 THEN 1 ELSE 0 END AS bit) AS is_primary,
+           i.is_unique, CAST(i.is_primary_key | i.is_unique_constraint AS bit) AS backs_constraint,
+           i.has_filter AS is_partial,
+           (SELECT COUNT(*) FROM sys.index_columns ic
+            WHERE ic.object_id = i.object_id AND ic.index_id = i.index_id
+              AND ic.is_included_column = 0) AS key_columns,{usage}
+    FROM sys.indexes i
+    INNER JOIN sys.tables t ON t.object_id = i.object_id
+    INNER JOIN sys.schemas s ON s.schema_id = t.schema_id{usage_join}
+    WHERE s.name = '{schema_name}' AND i.type > 0 AND i.is_hypothetical = 0;
+    """
+
+
+def get_mssql_index_usage(conn: Any, schema_name: str) -> dict[str, Any]:
+    """
+    Usage, size and kind of every index of the schema from
+    sys.dm_db_index_usage_stats, and the missing-index DMVs' suggestions for
+    its tables, for the index advisor. Without VIEW SERVER STATE the DMVs are
+    not readable and only the catalog part is returned. Counters cover the
+    time since the instance started, taken from tempdb's creation date.
+    """
+    missing_q = f"""
+    SELECT t.name AS table_name, d.equality_columns, d.inequality_columns,
+           d.included_columns, gs.user_seeks + gs.user_scans AS uses,
+           gs.avg_user_impact,
+           gs.avg_total_user_cost * gs.avg_user_impact * (gs.user_seeks + gs.user_scans)
+               AS improvement
+    FROM sys.dm_db_missing_index_details d
+    INNER JOIN sys.dm_db_missing_index_groups g ON g.index_handle = d.index_handle
+    INNER JOIN sys.dm_db_missing_index_group_stats gs ON gs.group_handle = g.index_group_handle
+    INNER JOIN sys.tables t ON t.object_id = d.object_id
+    INNER JOIN sys.schemas s ON s.schema_id = t.schema_id
+    WHERE d.database_id = DB_ID() AND s.name = '{schema_name}';
+    """
+    window_q = """
+    SELECT DATEDIFF(MINUTE, create_date, SYSDATETIME()) / 1440.0 AS stats_window_days
+    FROM sys.databases WHERE name = 'tempdb';
+    """
+    try:
+        rows = _execute_query(conn, _index_usage_query(schema_name, True))
+    except Exception as e:
+        logger.warning(f"Index usage DMVs are not available: {e}")
+        rows = _execute_query(conn, _index_usage_query(schema_name, False))
+    try:
+        missing_indexes = _execute_query(conn, missing_q)
+    except Exception as e:
+        logger.warning(f"Missing-index DMVs are not available: {e}")
+        missing_indexes = []
+
+    indexes: dict[str, dict[str, dict[str, Any]]] = {}
+    for row in rows:
+        indexes.setdefault(row["table_name"], {})[row["index_name"]] = {
+            "method": row["method"],
+            "primary": bool(row["is_primary"]),
+            "unique": bool(row["is_unique"]),
+            "constraint": bool(row["backs_constraint"]),
+            "partial": bool(row["is_partial"]),
+            "key_columns": int(row["key_columns"]),
+            "uses": row["uses"],
+            "size_bytes": row["size_bytes"],
+        }
+    window = _execute_query(conn, window_q)
+    return {
+        "stats_window_days": float(window[0]["stats_window_days"]) if window else None,
+        "indexes": indexes,
+        "table_scans": {},
+        "missing_indexes": [
+            {
+                "table": row["table_name"],
+                "equality_columns": row["equality_columns"],
+                "inequality_columns": row["inequality_columns"],
+                "included_columns": row["included_columns"],
+                "uses": int(row["uses"] or 0),
+                "avg_user_impact": float(row["avg_user_impact"] or 0),
+                "improvement": float(row["improvement"] or 0),
+            }
+            for row in missing_indexes
+        ],
+    }
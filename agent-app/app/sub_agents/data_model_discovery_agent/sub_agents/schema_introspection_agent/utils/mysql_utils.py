@@ -1,15 +1,18 @@
+import hashlib
 import json
 import logging
 import os
 import re
+from collections.abc import Iterator
 from typing import Any
 
 import google.auth
 import mysql.connector
 from google import genai
-from google.api_core import exceptions
 from google.genai import types
 
+from . import analysis_chunks, fk_validator, relationship_inference
+
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
 
@@ -30,6 +33,9 @@ GOOGLE_GENAI_USE_VERTEXAI = os.environ.get(
 ).lower() in ("true", "1")
 MODEL = "gemini-2.5-pro"
 
+# Catalog rows fetched per round trip when streaming introspection queries.
+STREAM_BATCH_SIZE = int(os.environ.get("INTROSPECTION_STREAM_BATCH_SIZE", "5000"))
+
 client = None
 if GOOGLE_CLOUD_PROJECT:
     try:
@@ -57,31 +63,34 @@ def _execute_query(conn: Any, query: str) -> list[dict[str, Any]]:
         cursor.close()
 
 
-def _construct_llm_prompt(
-    schema_name: str, db_type: str, schema_details: dict[str, Any]
-) -> str:
-    """Constructs a prompt for the LLM to analyze relationships and anomalies with formatted JSON."""
-
-    tables_context = {}
-    for table_name, table_info in schema_details.get("tables", {}).items():
-        tables_context[table_name] = {
-            "columns": list(table_info.get("columns", {}).keys()),
-            "constraints": table_info.get("constraints", []),
-        }
+def _stream_query(conn: Any, query: str) -> Iterator[tuple]:
+    """
+    Yields the rows of a query as tuples from an unbuffered cursor, holding one
+    batch in memory at a time. No other query may run on the connection until
+    the rows are consumed.
+    """
+    cursor = conn.cursor(buffered=False)
+    try:
+        cursor.execute(query)
+        while rows := cursor.fetchmany(STREAM_BATCH_SIZE):
+            yield from rows
+    finally:
+        cursor.close()
 
-    context = {
-        "db_type": db_type,
-        "schema_name": schema_name,
-        "tables": tables_context,
-        "existing_foreign_keys": schema_details.get("foreign_keys", []),
-    }
 
-    # Format JSON for readability
+def _construct_llm_prompt(
+    schema_name: str, db_type: str, chunk_context: dict[str, Any]
+) -> str:
+    """
+    Constructs a prompt for the LLM to resolve the columns the naming rules left
+    ambiguous in one chunk of the schema, with formatted JSON.
+    """
+    context = {"db_type": db_type, "schema_name": schema_name, **chunk_context}
     context_json = json.dumps(context, indent=4)
 
     prompt = f"""
     You are a database expert analyzing the schema of a {db_type} database named '{schema_name}'.
-    Your task is to identify potential inferred relationships and relationship anomalies based on the provided schema information.
+    Your task is to identify potential inferred relationships based on the provided schema information.
 
     Here is the schema context:
     ```json
@@ -90,21 +99,13 @@ def _construct_llm_prompt(
 
     **Tasks:**
 
-    1.  **Inferred Relationship Suggestion:**
-        Analyze the table and column names. Suggest potential foreign key relationships that are NOT already defined in `existing_foreign_keys`.
-        Common patterns include columns like `user_id`, `product_code`, `order_uuid`, etc., potentially linking to `id` or similar columns in other tables (e.g., `users.id`).
-        For each suggestion, provide the `from_table`, `from_column`, `to_table`, `to_column`, an `explanation` (why you think it's related), and a `suggestion` (e.g., "Consider adding a foreign key").
-
-    2.  **Relationship Anomaly Detection:**
-        Examine the `existing_foreign_keys`. For each foreign key, check if the `to_table` and `to_column` exist in the `tables` context. Also, verify if the `to_column` in the `to_table` is part of a PRIMARY KEY or UNIQUE constraint in that table's constraints list.
-        Flag any anomalies where:
-            a. The `to_table` is not in the `tables` context.
-            b. The `to_column` is not in the `columns` list of the `to_table`.
-            c. The `to_column` in the `to_table` is NOT listed as a 'PRIMARY KEY' or 'UNIQUE' in its constraints.
-        For each anomaly, provide the `constraint_name`, `from_table`, `from_column`, `to_table`, `to_column`, an `explanation` of the issue, and a `suggestion` (e.g., "Verify target column exists" or "Target column should be PK/UK").
+    1.  **Inferred Relationship Resolution:**
+        Likely foreign keys have already been derived from column naming rules. `ambiguous_columns` maps each `table.column` whose target could not be decided to its type and scored `candidates`; `unmatched_columns` lists, per table, columns named like references for which no target table was found.
+        For each of these columns, pick the referenced table and column from its `candidates` or from `table_keys` (the PRIMARY KEY/UNIQUE columns of the relevant tables), or leave it out if it is not a reference.
+        For each suggestion, provide the `from_table`, `from_column`, `to_table`, `to_column`, a `confidence` between 0 and 1, an `explanation` (why you think it's related), and a `suggestion` (e.g., "Consider adding a foreign key").
 
     **Output Format:**
-    Return your findings as a single JSON object with two keys: "inferred_relationships" and "anomalies". The JSON must be well-formed.
+    Return your findings as a single JSON object with the key "inferred_relationships". The JSON must be well-formed.
 
     ```json
     {{
@@ -114,24 +115,14 @@ def _construct_llm_prompt(
           "from_column": "string",
           "to_table": "string",
           "to_column": "string",
-          "explanation": "string",
-          "suggestion": "string"
-        }}
-      ],
-      "anomalies": [
-        {{
-          "constraint_name": "string",
-          "from_table": "string",
-          "from_column": "string",
-          "to_table": "string",
-          "to_column": "string",
+          "confidence": 0.0,
           "explanation": "string",
           "suggestion": "string"
         }}
       ]
     }}
     ```
-    If no inferred relationships or anomalies are found, return empty lists for the respective keys.
+    If no inferred relationships are found, return an empty list.
     """
     return prompt
 
@@ -157,67 +148,61 @@ def _extract_json_content(text: str) -> str:
         return extracted
 
 
+def _request_relationships(prompt: str) -> list[dict[str, Any]]:
+    """Sends one analysis prompt to the LLM and returns its inferred relationships."""
+    logger.debug(f"****** Custom_LLM_Request: {prompt}")
+    response = client.models.generate_content(  # type: ignore[union-attr]
+        model=MODEL,
+        contents=[types.Part.from_text(text=prompt)],  # type: ignore[arg-type]
+    )
+    generated_text = response.candidates[0].content.parts[0].text  # type: ignore[index, union-attr]
+    logger.debug(f"****** Raw LLM Response: {generated_text}")
+    cleaned_json = _extract_json_content(generated_text)  # type: ignore[arg-type]
+    logger.debug(f"****** Cleaned JSON Extracted from LLM Response:\n{cleaned_json}")
+    inferred = json.loads(cleaned_json).get("inferred_relationships", [])
+    if not isinstance(inferred, list):
+        raise ValueError("LLM response is not in the expected list format for keys.")
+    return inferred
+
+
 def _analyze_with_llm(
     schema_name: str, db_type: str, schema_details: dict[str, Any]
 ) -> dict[str, list[dict[str, Any]]]:
-    """Calls an LLM to get inferred relationships and anomalies."""
+    """
+    Infers relationships with local naming rules first, then calls an LLM only
+    for the columns the rules left ambiguous. Large schemas are split into
+    chunks of related tables that are analyzed concurrently; a chunk whose
+    request fails loses only its own suggestions.
+    """
+    inference = relationship_inference.infer_relationships(schema_details)
+    rule_inferred = inference["inferred"]
+    ambiguous = inference["ambiguous"]
+    logger.info(
+        f"Naming rules inferred {len(rule_inferred)} relationships for {db_type}; "
+        f"{len(ambiguous)} ambiguous columns left for the LLM."
+    )
+    if not ambiguous:
+        return {"inferred_relationships": rule_inferred}
+
     if not client:
         logger.error("GenAI Client not initialized. Skipping LLM analysis.")
-        return {
-            "inferred_relationships": [],
-            "anomalies": [{"error": "LLM client not available."}],
-        }
+        return {"inferred_relationships": rule_inferred}
 
-    prompt = _construct_llm_prompt(schema_name, db_type, schema_details)
-    logger.info(f"Sending prompt to LLM for {db_type} relationship analysis.")
-    generated_text = ""
-    try:
-        logger.debug(f"****** Custom_LLM_Request: {prompt}")
-        response = client.models.generate_content(
-            model=MODEL,
-            contents=[types.Part.from_text(text=prompt)],  # type: ignore[arg-type]
-        )
-        generated_text = response.candidates[0].content.parts[0].text  # type: ignore[index, union-attr, assignment]
-        logger.debug(f"****** Raw LLM Response: {generated_text}")
-
-        # handles ```json blocks
-        cleaned_json = _extract_json_content(generated_text)
-        logger.debug(
-            f"****** Cleaned JSON Extracted from LLM Response:\n{cleaned_json}"
-        )
-
-        # Parse the cleaned JSON
-        llm_output = json.loads(cleaned_json)
-        inferred = llm_output.get("inferred_relationships", [])
-        anomalies = llm_output.get("anomalies", [])
-
-        if not isinstance(inferred, list) or not isinstance(anomalies, list):
-            raise ValueError(
-                "LLM response is not in the expected list format for keys."
-            )
-
-        return {"inferred_relationships": inferred, "anomalies": anomalies}
-
-    except json.JSONDecodeError as e:
-        logger.error(
-            f"Error decoding LLM JSON response: {e}. Cleaned Response: {cleaned_json}"
-        )
-        return {
-            "inferred_relationships": [],
-            "anomalies": [{"error": f"LLM response was not valid JSON: {e}"}],
-        }
-    except (exceptions.GoogleAPICallError, IndexError, AttributeError, ValueError) as e:
-        logger.error(f"Error calling LLM or processing response: {e}")
-        return {
-            "inferred_relationships": [],
-            "anomalies": [{"error": f"LLM analysis failed: {e}"}],
-        }
-    except Exception as e:
-        logger.error(f"Unexpected error during LLM analysis: {e}")
-        return {
-            "inferred_relationships": [],
-            "anomalies": [{"error": f"Unexpected LLM analysis error: {e}"}],
-        }
+    contexts = analysis_chunks.plan_chunks(schema_details, ambiguous, rule_inferred)
+    logger.info(
+        f"Sending {len(contexts)} prompt(s) to LLM for {db_type} relationship analysis."
+    )
+    llm_inferred = analysis_chunks.analyze_chunks(
+        contexts,
+        lambda context: _request_relationships(
+            _construct_llm_prompt(schema_name, db_type, context)
+        ),
+    )
+    return {
+        "inferred_relationships": relationship_inference.merge_inferred(
+            rule_inferred, llm_inferred
+        ),
+    }
 
 
 def get_mysql_schema_details(conn: Any, schema_name: str) -> dict[str, Any]:
@@ -238,52 +223,154 @@ def get_mysql_schema_details(conn: Any, schema_name: str) -> dict[str, Any]:
     }
 
     # 1. Fetch Basic Schema Info
-    tables_query = "SHOW FULL TABLES WHERE Table_type = 'BASE TABLE';"
-    tables = _execute_query(conn, tables_query)
-    table_names = [next(iter(t.values())) for t in tables]
-
-    for t_name in table_names:
-        details["tables"][t_name] = {"columns": {}, "constraints": [], "indexes": []}
-        cols_query = f"DESCRIBE `{t_name}`;"
-        columns = _execute_query(conn, cols_query)
-        for col in columns:
-            details["tables"][t_name]["columns"][col["Field"]] = {
-                "type": col["Type"],
-                "nullable": col["Null"] == "YES",
-                "default": col["Default"],
-                "key": col["Key"],
-                "extra": col["Extra"],
-            }
-
-        constraints_query = f"""
-            SELECT KCU.CONSTRAINT_NAME, TC.CONSTRAINT_TYPE, KCU.COLUMN_NAME
-            FROM INFORMATION_SCHEMA.TABLE_CONSTRAINTS AS TC
-            LEFT JOIN INFORMATION_SCHEMA.KEY_COLUMN_USAGE AS KCU
-                ON TC.CONSTRAINT_NAME = KCU.CONSTRAINT_NAME AND TC.TABLE_SCHEMA = KCU.TABLE_SCHEMA AND TC.TABLE_NAME = KCU.TABLE_NAME
-            WHERE TC.TABLE_SCHEMA = '{schema_name}' AND TC.TABLE_NAME = '{t_name}'
-            AND TC.CONSTRAINT_TYPE IN ('PRIMARY KEY', 'UNIQUE', 'FOREIGN KEY', 'CHECK');
-        """
-        details["tables"][t_name]["constraints"] = _execute_query(
-            conn, constraints_query
-        )
+    # Columns, constraints and indexes are read from INFORMATION_SCHEMA once for
+    # the whole database and grouped per table client-side, instead of running
+    # DESCRIBE / SHOW INDEX for every table. The per-table layout is unchanged.
+    # TABLE_ROWS is InnoDB's sampled estimate; lengths include all indexes.
+    tables_query = f"""
+        SELECT TABLE_NAME AS table_name, TABLE_ROWS AS row_estimate,
+               DATA_LENGTH + INDEX_LENGTH AS total_bytes
+        FROM INFORMATION_SCHEMA.TABLES
+        WHERE TABLE_SCHEMA = '{schema_name}' AND TABLE_TYPE = 'BASE TABLE'
+        ORDER BY TABLE_NAME;
+    """
+    for table_name, row_estimate, total_bytes in _stream_query(conn, tables_query):
+        details["tables"][table_name] = {
+            "columns": {},
+            "constraints": [],
+            "indexes": [],
+            "row_estimate": row_estimate,
+            "total_bytes": total_bytes,
+        }
+    tables = details["tables"]
+
+    # Partitions are part of their table in MySQL; they are listed under
+    # "partitioning" with their bounds and size. Subpartitions add up into
+    # their partition.
+    partitions_query = f"""
+        SELECT TABLE_NAME AS table_name, PARTITION_NAME AS partition_name,
+               PARTITION_METHOD AS method, PARTITION_EXPRESSION AS expression,
+               PARTITION_DESCRIPTION AS description, TABLE_ROWS AS row_estimate,
+               DATA_LENGTH + INDEX_LENGTH AS total_bytes
+        FROM INFORMATION_SCHEMA.PARTITIONS
+        WHERE TABLE_SCHEMA = '{schema_name}' AND PARTITION_NAME IS NOT NULL
+        ORDER BY TABLE_NAME, PARTITION_ORDINAL_POSITION, SUBPARTITION_ORDINAL_POSITION;
+    """
+    try:
+        for (
+            table_name,
+            partition_name,
+            method,
+            expression,
+            description,
+            row_estimate,
+            total_bytes,
+        ) in _stream_query(conn, partitions_query):
+            table_info = tables.get(table_name)
+            if table_info is None:
+                continue
+            partitioning = table_info.setdefault(
+                "partitioning",
+                {"strategy": method.lower(), "key": expression, "partitions": []},
+            )
+            partitions = partitioning["partitions"]
+            if partitions and partitions[-1]["name"] == partition_name:
+                partitions[-1]["row_estimate"] += row_estimate or 0
+                partitions[-1]["total_bytes"] += total_bytes or 0
+                continue
+            bounds = None
+            if description is not None:
+                bounds = (
+                    f"VALUES IN ({description})"
+                    if method.startswith("LIST")
+                    else f"VALUES LESS THAN ({description})"
+                )
+            partitions.append(
+                {
+                    "name": partition_name,
+                    "bounds": bounds,
+                    "row_estimate": row_estimate or 0,
+                    "total_bytes": total_bytes or 0,
+                }
+            )
+        for table_info in tables.values():
+            if "partitioning" in table_info:
+                table_info["partitioning"]["partition_count"] = len(
+                    table_info["partitioning"]["partitions"]
+                )
+    except Exception as e:
+        logger.error(f"Error fetching MySQL partitions for schema {schema_name}: {e}")
+
+    # Same fields as DESCRIBE: Field, Type, Null, Default, Key, Extra.
+    cols_query = f"""
+        SELECT TABLE_NAME AS table_name, COLUMN_NAME AS Field, COLUMN_TYPE AS Type,
+               IS_NULLABLE AS `Null`, COLUMN_DEFAULT AS `Default`, COLUMN_KEY AS `Key`, EXTRA AS Extra
+        FROM INFORMATION_SCHEMA.COLUMNS
+        WHERE TABLE_SCHEMA = '{schema_name}'
+        ORDER BY TABLE_NAME, ORDINAL_POSITION;
+    """
+    for table_name, field, col_type, null, default, key, extra in _stream_query(
+        conn, cols_query
+    ):
+        table_info = tables.get(table_name)
+        if table_info is None:
+            continue
+        table_info["columns"][field] = {
+            "type": col_type,
+            "nullable": null == "YES",
+            "default": default,
+            "key": key,
+            "extra": extra,
+        }
 
-        indexes_query = f"SHOW INDEX FROM `{t_name}`;"
-        indexes = _execute_query(conn, indexes_query)
-        grouped_indexes = {}
-        for index in indexes:
-            idx_name = index["Key_name"]
-            if idx_name not in grouped_indexes:
-                grouped_indexes[idx_name] = {
-                    "name": idx_name,
-                    "columns": [],
-                    "unique": index["Non_unique"] == 0,
+    constraints_query = f"""
+        SELECT TC.TABLE_NAME AS table_name, KCU.CONSTRAINT_NAME, TC.CONSTRAINT_TYPE, KCU.COLUMN_NAME
+        FROM INFORMATION_SCHEMA.TABLE_CONSTRAINTS AS TC
+        LEFT JOIN INFORMATION_SCHEMA.KEY_COLUMN_USAGE AS KCU
+            ON TC.CONSTRAINT_NAME = KCU.CONSTRAINT_NAME AND TC.TABLE_SCHEMA = KCU.TABLE_SCHEMA AND TC.TABLE_NAME = KCU.TABLE_NAME
+        WHERE TC.TABLE_SCHEMA = '{schema_name}'
+        AND TC.CONSTRAINT_TYPE IN ('PRIMARY KEY', 'UNIQUE', 'FOREIGN KEY', 'CHECK')
+        ORDER BY TC.TABLE_NAME, TC.CONSTRAINT_NAME, KCU.ORDINAL_POSITION;
+    """
+    for table_name, constraint_name, constraint_type, column_name in _stream_query(
+        conn, constraints_query
+    ):
+        table_info = tables.get(table_name)
+        if table_info is not None:
+            table_info["constraints"].append(
+                {
+                    "CONSTRAINT_NAME": constraint_name,
+                    "CONSTRAINT_TYPE": constraint_type,
+                    "COLUMN_NAME": column_name,
                 }
-            grouped_indexes[idx_name]["columns"].append(index["Column_name"])
-        details["tables"][t_name]["indexes"] = list(grouped_indexes.values())
+            )
+
+    # Same fields as SHOW INDEX: Key_name, Non_unique, Column_name, in index order.
+    indexes_query = f"""
+        SELECT TABLE_NAME AS table_name, INDEX_NAME AS Key_name, NON_UNIQUE AS Non_unique, COLUMN_NAME AS Column_name
+        FROM INFORMATION_SCHEMA.STATISTICS
+        WHERE TABLE_SCHEMA = '{schema_name}'
+        ORDER BY TABLE_NAME, INDEX_NAME <> 'PRIMARY', NON_UNIQUE, INDEX_NAME, SEQ_IN_INDEX;
+    """
+    grouped_indexes: dict[str, dict[str, dict[str, Any]]] = {}
+    for t_name, idx_name, non_unique, column_name in _stream_query(conn, indexes_query):
+        if t_name not in tables:
+            continue
+        table_indexes = grouped_indexes.setdefault(t_name, {})
+        if idx_name not in table_indexes:
+            table_indexes[idx_name] = {
+                "name": idx_name,
+                "columns": [],
+                "unique": non_unique == 0,
+            }
+        table_indexes[idx_name]["columns"].append(column_name)
+    for t_name, table_indexes in grouped_indexes.items():
+        tables[t_name]["indexes"] = list(table_indexes.values())
 
     fks_query = f"""
         SELECT KCU.TABLE_NAME AS from_table, KCU.COLUMN_NAME AS from_column,
-               KCU.REFERENCED_TABLE_NAME AS to_table, KCU.REFERENCED_COLUMN_NAME AS to_column, KCU.CONSTRAINT_NAME
+               KCU.REFERENCED_TABLE_SCHEMA AS to_schema, KCU.REFERENCED_TABLE_NAME AS to_table,
+               KCU.REFERENCED_COLUMN_NAME AS to_column, KCU.CONSTRAINT_NAME
         FROM INFORMATION_SCHEMA.KEY_COLUMN_USAGE AS KCU
         WHERE KCU.TABLE_SCHEMA = '{schema_name}' AND KCU.REFERENCED_TABLE_NAME IS NOT NULL;
     """
@@ -303,7 +390,7 @@ def get_mysql_schema_details(conn: Any, schema_name: str) -> dict[str, Any]:
     # 2. LLM-based Analysis for Inferred Relationships and Anomalies
     llm_analysis = _analyze_with_llm(schema_name, "MySQL", details)
     details["inferred_relationships"] = llm_analysis.get("inferred_relationships", [])
-    details["anomalies"] = llm_analysis.get("anomalies", [])
+    details["anomalies"] = fk_validator.validate_foreign_keys(schema_name, details)
 
     logger.info(
         f"Found {len(details['inferred_relationships'])} potential inferred relationships."
@@ -315,3 +402,122 @@ def get_mysql_schema_details(conn: Any, schema_name: str) -> dict[str, Any]:
     logger.debug("************************")
 
     return details
+
+
+def get_mysql_catalog_fingerprint(conn: Any, schema_name: str) -> str | None:
+    """
+    Digest of the database's catalog from order-independent checksums computed
+    server-side. Table CREATE_TIME is used rather than UPDATE_TIME, which moves
+    on every write and would invalidate the cache without any DDL.
+    """
+    fingerprint_q = f"""
+    SELECT 'tables' AS part, COUNT(*) AS row_count,
+           COALESCE(SUM(CRC32(CONCAT_WS('|', TABLE_NAME, TABLE_TYPE, CREATE_TIME))), 0) AS checksum
+    FROM INFORMATION_SCHEMA.TABLES WHERE TABLE_SCHEMA = '{schema_name}'
+    UNION ALL
+    SELECT 'columns', COUNT(*),
+           COALESCE(SUM(CRC32(CONCAT_WS('|', TABLE_NAME, COLUMN_NAME, ORDINAL_POSITION,
+               COLUMN_TYPE, IS_NULLABLE, COLUMN_DEFAULT, COLUMN_KEY, EXTRA))), 0)
+    FROM INFORMATION_SCHEMA.COLUMNS WHERE TABLE_SCHEMA = '{schema_name}'
+    UNION ALL
+    SELECT 'constraints', COUNT(*),
+           COALESCE(SUM(CRC32(CONCAT_WS('|', TABLE_NAME, CONSTRAINT_NAME, COLUMN_NAME,
+               ORDINAL_POSITION, REFERENCED_TABLE_SCHEMA, REFERENCED_TABLE_NAME,
+               REFERENCED_COLUMN_NAME))), 0)
+    FROM INFORMATION_SCHEMA.KEY_COLUMN_USAGE WHERE TABLE_SCHEMA = '{schema_name}'
+    UNION ALL
+    SELECT 'indexes', COUNT(*),
+           COALESCE(SUM(CRC32(CONCAT_WS('|', TABLE_NAME, INDEX_NAME, SEQ_IN_INDEX,
+               COLUMN_NAME, NON_UNIQUE))), 0)
+    FROM INFORMATION_SCHEMA.STATISTICS WHERE TABLE_SCHEMA = '{schema_name}'
+    UNION ALL
+    SELECT 'views', COUNT(*),
+           COALESCE(SUM(CRC32(CONCAT_WS('|', TABLE_NAME, VIEW_DEFINITION))), 0)
+    FROM INFORMATION_SCHEMA.VIEWS WHERE TABLE_SCHEMA = '{schema_name}';
+    """
+    rows = _execute_query(conn, fingerprint_q)
+    if not rows or not rows[0]["row_count"]:
+        return None
+    digest = hashlib.sha256()
+    for row in rows:
+        digest.update(f"{row['part']}:{row['row_count']}:{row['checksum']};".encode())
+    return digest.hexdigest()
+
+
+def get_mysql_index_usage(conn: Any, schema_name: str) -> dict[str, Any]:
+    """
+    Usage, size and kind of every index of the schema, for the index advisor.
+    Reads come from performance_schema.table_io_waits_summary_by_index_usage,
+    the source of sys.schema_unused_indexes, and rows read without any index
+    from its NULL-index rows; sizes from mysql.innodb_index_stats. Either may
+    be unavailable, which leaves those figures empty. Counters cover the time
+    since the server started.
+    """
+    # Column prefixes (SUB_PART) and functional key parts make an index
+    # incomparable by its column list.
+    indexes_q = f"""
+    SELECT TABLE_NAME AS table_name, INDEX_NAME AS index_name,
+           MAX(INDEX_TYPE) AS method, MIN(NON_UNIQUE) = 0 AS is_unique,
+           MAX(SUB_PART IS NOT NULL OR COLUMN_NAME IS NULL) AS is_partial,
+           COUNT(*) AS key_columns
+    FROM INFORMATION_SCHEMA.STATISTICS
+    WHERE TABLE_SCHEMA = '{schema_name}'
+    GROUP BY TABLE_NAME, INDEX_NAME;
+    """
+    usage_q = f"""
+    SELECT OBJECT_NAME AS table_name, INDEX_NAME AS index_name, COUNT_READ AS reads
+    FROM performance_schema.table_io_waits_summary_by_index_usage
+    WHERE OBJECT_SCHEMA = '{schema_name}';
+    """
+    sizes_q = f"""
+    SELECT table_name, index_name, stat_value * @@innodb_page_size AS size_bytes
+    FROM mysql.innodb_index_stats
+    WHERE database_name = '{schema_name}' AND stat_name = 'size';
+    """
+    indexes: dict[str, dict[str, dict[str, Any]]] = {}
+    for row in _execute_query(conn, indexes_q):
+        # PRIMARY and UNIQUE constraints are their own indexes in MySQL.
+        indexes.setdefault(row["table_name"], {})[row["index_name"]] = {
+            "method": row["method"],
+            "primary": row["index_name"] == "PRIMARY",
+            "unique": bool(row["is_unique"]),
+            "constraint": bool(row["is_unique"]),
+            "partial": bool(row["is_partial"]),
+            "key_columns": int(row["key_columns"]),
+            "uses": None,
+            "size_bytes": None,
+        }
+
+    table_scans: dict[str, dict[str, Any]] = {}
+    try:
+        for row in _execute_query(conn, usage_q):
+            if row["index_name"] is None:
+                table_scans[row["table_name"]] = {
+                    "full_scans": None,
+                    "rows_read": int(row["reads"]),
+                    "index_scans": None,
+                }
+            elif row["index_name"] in indexes.get(row["table_name"], {}):
+                indexes[row["table_name"]][row["index_name"]]["uses"] = int(
+                    row["reads"]
+                )
+    except Exception as e:
+        logger.warning(f"Index usage from performance_schema is not available: {e}")
+
+    try:
+        for row in _execute_query(conn, sizes_q):
+            index = indexes.get(row["table_name"], {}).get(row["index_name"])
+            if index is not None:
+                index["size_bytes"] = int(row["size_bytes"])
+    except Exception as e:
+        logger.warning(
+            f"Index sizes from mysql.innodb_index_stats are not available: {e}"
+        )
+
+    uptime = _execute_query(conn, "SHOW GLOBAL STATUS LIKE 'Uptime';")
+    return {
+        "stats_window_days": int(uptime[0]["Value"]) / 86400 if uptime else None,
+        "indexes": indexes,
+        "table_scans": table_scans,
+        "missing_indexes": [],
+    }
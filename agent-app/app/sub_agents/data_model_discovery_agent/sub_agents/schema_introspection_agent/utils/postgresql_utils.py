@@ -2,13 +2,16 @@ import json
 import logging
 import os
 import re
+import uuid
+from collections.abc import Iterator
 from typing import Any
 
 import google.auth
 from google import genai
-from google.api_core import exceptions
 from google.genai import types
 
+from . import analysis_chunks, fk_validator, relationship_inference
+
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
 
@@ -29,6 +32,9 @@ GOOGLE_GENAI_USE_VERTEXAI = os.environ.get(
 ).lower() in ("true", "1")
 MODEL = os.environ.get("MODEL", "gemini-2.5-pro")
 
+# Catalog rows fetched per round trip when streaming introspection queries.
+STREAM_BATCH_SIZE = int(os.environ.get("INTROSPECTION_STREAM_BATCH_SIZE", "5000"))
+
 client = None
 if GOOGLE_CLOUD_PROJECT:
     try:
@@ -62,26 +68,40 @@ def _execute_query(conn: Any, query: str) -> list[dict[str, Any]]:
         cursor.close()
 
 
+def _stream_query(conn: Any, query: str) -> Iterator[tuple]:
+    """
+    Yields the rows of a query as tuples through a server-side cursor, holding
+    one batch in memory at a time. No other query may run on the connection
+    until the rows are consumed.
+    """
+    autocommit = conn.autocommit
+    if autocommit:
+        # Named cursors only live inside a transaction.
+        conn.autocommit = False
+    cursor = conn.cursor(name=f"introspect_{uuid.uuid4().hex}")
+    try:
+        cursor.execute(query)
+        while rows := cursor.fetchmany(STREAM_BATCH_SIZE):
+            yield from rows
+    finally:
+        cursor.close()
+        if autocommit:
+            conn.rollback()
+            conn.autocommit = True
+
+
 def _construct_llm_prompt(
-    schema_name: str, db_type: str, schema_details: dict[str, Any]
+    schema_name: str, db_type: str, chunk_context: dict[str, Any]
 ) -> str:
-    """Constructs a prompt for the LLM to analyze relationships and anomalies with formatted JSON."""
-    tables_context = {}
-    for table_name, table_info in schema_details.get("tables", {}).items():
-        tables_context[table_name] = {
-            "columns": list(table_info.get("columns", {}).keys()),
-            "constraints": table_info.get("constraints", []),
-        }
-    context = {
-        "db_type": db_type,
-        "schema_name": schema_name,
-        "tables": tables_context,
-        "existing_foreign_keys": schema_details.get("foreign_keys", []),
-    }
+    """
+    Constructs a prompt for the LLM to resolve the columns the naming rules left
+    ambiguous in one chunk of the schema, with formatted JSON.
+    """
+    context = {"db_type": db_type, "schema_name": schema_name, **chunk_context}
     context_json = json.dumps(context, indent=4)
     prompt = f"""
     You are a database expert analyzing the schema of a {db_type} database named '{schema_name}'.
-    Your task is to identify potential inferred relationships and relationship anomalies based on the provided schema information.
+    Your task is to identify potential inferred relationships based on the provided schema information.
 
     Here is the schema context:
     ```json
@@ -90,21 +110,13 @@ def _construct_llm_prompt(
 
     **Tasks:**
 
-    1.  **Inferred Relationship Suggestion:**
-        Analyze the table and column names. Suggest potential foreign key relationships that are NOT already defined in `existing_foreign_keys`.
-        Common patterns include columns like `user_id`, `product_code`, `order_uuid`, etc., potentially linking to `id` or similar columns in other tables (e.g., `users.id`).
-        For each suggestion, provide the `from_table`, `from_column`, `to_table`, `to_column`, an `explanation` (why you think it's related), and a `suggestion` (e.g., "Consider adding a foreign key").
-
-    2.  **Relationship Anomaly Detection:**
-        Examine the `existing_foreign_keys`. For each foreign key, check if the `to_table` and `to_column` exist in the `tables` context. Also, verify if the `to_column` in the `to_table` is part of a PRIMARY KEY or UNIQUE constraint in that table's constraints list.
-        Flag any anomalies where:
-            a. The `to_table` is not in the `tables` context.
-            b. The `to_column` is not in the `columns` list of the `to_table`.
-            c. The `to_column` in the `to_table` is NOT listed as a 'PRIMARY KEY' or 'UNIQUE' in its constraints.
-        For each anomaly, provide the `constraint_name`, `from_table`, `from_column`, `to_table`, `to_column`, an `explanation` of the issue, and a `suggestion` (e.g., "Verify target column exists" or "Target column should be PK/UK").
+    1.  **Inferred Relationship Resolution:**
+        Likely foreign keys have already been derived from column naming rules. `ambiguous_columns` maps each `table.column` whose target could not be decided to its type and scored `candidates`; `unmatched_columns` lists, per table, columns named like references for which no target table was found.
+        For each of these columns, pick the referenced table and column from its `candidates` or from `table_keys` (the PRIMARY KEY/UNIQUE columns of the relevant tables), or leave it out if it is not a reference.
+        For each suggestion, provide the `from_table`, `from_column`, `to_table`, `to_column`, a `confidence` between 0 and 1, an `explanation` (why you think it's related), and a `suggestion` (e.g., "Consider adding a foreign key").
 
     **Output Format:**
-    Return your findings as a single JSON object with two keys: "inferred_relationships" and "anomalies". The JSON must be well-formed.
+    Return your findings as a single JSON object with the key "inferred_relationships". The JSON must be well-formed.
 
     ```json
     {{
@@ -114,24 +126,14 @@ def _construct_llm_prompt(
           "from_column": "string",
           "to_table": "string",
           "to_column": "string",
-          "explanation": "string",
-          "suggestion": "string"
-        }}
-      ],
-      "anomalies": [
-        {{
-          "constraint_name": "string",
-          "from_table": "string",
-          "from_column": "string",
-          "to_table": "string",
-          "to_column": "string",
+          "confidence": 0.0,
           "explanation": "string",
           "suggestion": "string"
         }}
       ]
     }}
     ```
-    If no inferred relationships or anomalies are found, return empty lists for the respective keys.
+    If no inferred relationships are found, return an empty list.
     """
     return prompt
 
@@ -149,64 +151,146 @@ def _extract_json_content(text: str) -> str:
         return extracted
 
 
+def _request_relationships(prompt: str) -> list[dict[str, Any]]:
+    """Sends one analysis prompt to the LLM and returns its inferred relationships."""
+    logger.debug(f"****** Custom_LLM_Request: {prompt}")
+    response = client.models.generate_content(  # type: ignore[union-attr]
+        model=MODEL,
+        contents=[types.Part.from_text(text=prompt)],  # type: ignore[arg-type]
+        config=types.GenerateContentConfig(response_mime_type="application/json"),
+    )
+    generated_text = response.candidates[0].content.parts[0].text  # type: ignore[index, union-attr]
+    logger.debug(f"****** Raw LLM Response: {generated_text}")
+    cleaned_json = _extract_json_content(generated_text)  # type: ignore[arg-type]
+    logger.debug(f"****** Cleaned JSON Extracted from LLM Response:\n{cleaned_json}")
+    inferred = json.loads(cleaned_json).get("inferred_relationships", [])
+    if not isinstance(inferred, list):
+        raise ValueError("LLM response is not in the expected list format for keys.")
+    return inferred
+
+
 def _analyze_with_llm(
     schema_name: str, db_type: str, schema_details: dict[str, Any]
 ) -> dict[str, list[dict[str, Any]]]:
-    """Calls an LLM to get inferred relationships and anomalies."""
+    """
+    Infers relationships with local naming rules first, then calls an LLM only
+    for the columns the rules left ambiguous. Large schemas are split into
+    chunks of related tables that are analyzed concurrently; a chunk whose
+    request fails loses only its own suggestions.
+    """
+    inference = relationship_inference.infer_relationships(schema_details)
+    rule_inferred = inference["inferred"]
+    ambiguous = inference["ambiguous"]
+    logger.info(
+        f"Naming rules inferred {len(rule_inferred)} relationships for {db_type}; "
+        f"{len(ambiguous)} ambiguous columns left for the LLM."
+    )
+    if not ambiguous:
+        return {"inferred_relationships": rule_inferred}
+
     if not client:
         logger.error("GenAI Client not initialized. Skipping LLM analysis.")
-        return {
-            "inferred_relationships": [],
-            "anomalies": [{"error": "LLM client not available."}],
-        }
+        return {"inferred_relationships": rule_inferred}
 
-    prompt = _construct_llm_prompt(schema_name, db_type, schema_details)
-    logger.info(f"Sending prompt to LLM for {db_type} relationship analysis.")
-    generated_text = ""
-    try:
-        logger.debug(f"****** Custom_LLM_Request: {prompt}")
-        response = client.models.generate_content(
-            model=MODEL,
-            contents=[types.Part.from_text(text=prompt)],  # type: ignore[arg-type]
-            config=types.GenerateContentConfig(response_mime_type="application/json"),
-        )
-        generated_text = response.candidates[0].content.parts[0].text  # type: ignore[index, union-attr, assignment]
-        logger.debug(f"****** Raw LLM Response: {generated_text}")
-        cleaned_json = _extract_json_content(generated_text)
-        logger.debug(
-            f"****** Cleaned JSON Extracted from LLM Response:\n{cleaned_json}"
+    contexts = analysis_chunks.plan_chunks(schema_details, ambiguous, rule_inferred)
+    logger.info(
+        f"Sending {len(contexts)} prompt(s) to LLM for {db_type} relationship analysis."
+    )
+    llm_inferred = analysis_chunks.analyze_chunks(
+        contexts,
+        lambda context: _request_relationships(
+            _construct_llm_prompt(schema_name, db_type, context)
+        ),
+    )
+    return {
+        "inferred_relationships": relationship_inference.merge_inferred(
+            rule_inferred, llm_inferred
+        ),
+    }
+
+
+def _collapse_partitions(
+    conn: Any, schema_name: str, tables: dict[str, dict[str, Any]]
+) -> None:
+    """
+    Folds the partitions of every partitioned table of the schema into its
+    entry under "partitioning": strategy, key and the leaf partitions with
+    their bounds and size, at any depth and in any schema. Partitions of this
+    schema are dropped from `tables`, and a parent's row estimate and size
+    become those of its leaves, as a partitioned table holds no rows itself.
+    """
+    partitions_query = f"""
+    WITH RECURSIVE tree(root, relid) AS (
+        SELECT c.oid, c.oid
+        FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE n.nspname = '{schema_name}' AND c.relkind = 'p' AND NOT c.relispartition
+        UNION ALL
+        SELECT tree.root, i.inhrelid
+        FROM tree JOIN pg_inherits i ON i.inhparent = tree.relid
+    )
+    SELECT r.relname AS table_name, pg_get_partkeydef(r.oid) AS partition_key,
+           pn.nspname AS partition_schema, c.relname AS partition_name,
+           c.relkind = 'p' AS is_partitioned,
+           pg_get_expr(c.relpartbound, c.oid) AS bounds,
+           CASE WHEN c.reltuples >= 0 THEN c.reltuples::bigint END AS row_estimate,
+           pg_total_relation_size(c.oid) AS total_bytes
+    FROM tree
+    JOIN pg_class r ON r.oid = tree.root
+    JOIN pg_class c ON c.oid = tree.relid
+    JOIN pg_namespace pn ON pn.oid = c.relnamespace
+    WHERE tree.relid <> tree.root
+    ORDER BY r.relname, c.relname;
+    """
+    for row in _execute_query(conn, partitions_query):
+        table_info = tables.get(row["table_name"])
+        if table_info is None:
+            continue
+        if row["partition_schema"] == schema_name:
+            tables.pop(row["partition_name"], None)
+        if row["is_partitioned"]:
+            continue
+        if "partitioning" not in table_info:
+            # pg_get_partkeydef gives e.g. "RANGE (created_at)".
+            strategy, _, key = row["partition_key"].partition(" ")
+            table_info["partitioning"] = {
+                "strategy": strategy.lower(),
+                "key": key.strip()[1:-1],
+                "partitions": [],
+            }
+            table_info["row_estimate"] = 0
+        table_info["partitioning"]["partitions"].append(
+            {
+                "schema": row["partition_schema"],
+                "name": row["partition_name"],
+                "bounds": row["bounds"],
+                "row_estimate": row["row_estimate"],
+                "total_bytes": row["total_bytes"],
+            }
         )
-        llm_output = json.loads(cleaned_json)
-        inferred = llm_output.get("inferred_relationships", [])
-        anomalies = llm_output.get("anomalies", [])
-        if not isinstance(inferred, list) or not isinstance(anomalies, list):
-            raise ValueError(
-                "LLM response is not in the expected list format for keys."
+        if table_info["row_estimate"] is not None:
+            table_info["row_estimate"] = (
+                None
+                if row["row_estimate"] is None
+                else table_info["row_estimate"] + row["row_estimate"]
+            )
+        table_info["total_bytes"] = (table_info["total_bytes"] or 0) + row[
+            "total_bytes"
+        ]
+    for table_info in tables.values():
+        if "partitioning" in table_info:
+            table_info["partitioning"]["partition_count"] = len(
+                table_info["partitioning"]["partitions"]
             )
-        return {"inferred_relationships": inferred, "anomalies": anomalies}
-    except json.JSONDecodeError as e:
-        logger.error(
-            f"Error decoding LLM JSON response: {e}. Cleaned Response: {cleaned_json}"
-        )
-        return {
-            "inferred_relationships": [],
-            "anomalies": [{"error": f"LLM response was not valid JSON: {e}"}],
-        }
-    except (exceptions.GoogleAPICallError, IndexError, AttributeError, ValueError) as e:
-        logger.error(f"Error calling LLM or processing response: {e}")
-        return {
-            "inferred_relationships": [],
-            "anomalies": [{"error": f"LLM analysis failed: {e}"}],
-        }
-    except Exception as e:
-        logger.error(f"Unexpected error during LLM analysis: {e}")
-        return {
-            "inferred_relationships": [],
-            "anomalies": [{"error": f"Unexpected LLM analysis error: {e}"}],
-        }
 
 
 def get_postgres_schema_details(conn: Any, schema_name: str) -> dict[str, Any]:
+    """
+    Introspects a PostgreSQL schema using a fixed number of set-based catalog
+    queries. Each query covers the whole schema and the rows are grouped per
+    table in memory, so the round-trip count does not grow with the table count.
+    Partitioned tables are listed once, with their partitions under
+    "partitioning".
+    """
     details: dict[str, Any] = {
         "tables": {},
         "views": {},
@@ -216,68 +300,165 @@ def get_postgres_schema_details(conn: Any, schema_name: str) -> dict[str, Any]:
     }
     logger.info(f"Fetching PostgreSQL schema details for: {schema_name}")
 
-    tables_query = f"SELECT table_name FROM information_schema.tables WHERE table_schema = '{schema_name}' AND table_type = 'BASE TABLE';"
-    tables = _execute_query(conn, tables_query)
-    for table in tables:
-        t_name = table["table_name"]
-        details["tables"][t_name] = {"columns": {}, "constraints": [], "indexes": []}
-        cols_query = f"""
-        SELECT column_name, data_type, character_maximum_length, numeric_precision, numeric_scale, is_nullable, column_default
-        FROM information_schema.columns WHERE table_schema = '{schema_name}' AND table_name = '{t_name}';
-        """
-        for col in _execute_query(conn, cols_query):
-            details["tables"][t_name]["columns"][col["column_name"]] = {
-                "type": col["data_type"],
-                "length": col["character_maximum_length"],
-                "precision": col["numeric_precision"],
-                "scale": col["numeric_scale"],
-                "nullable": col["is_nullable"] == "YES",
-                "default": col["column_default"],
-            }
-        constraints_query = f"""
-        SELECT tc.table_name, tc.constraint_name, tc.constraint_type, kcu.column_name, cc.check_clause
-        FROM information_schema.table_constraints tc
-        LEFT JOIN information_schema.key_column_usage kcu ON tc.constraint_name = kcu.constraint_name AND tc.table_schema = kcu.table_schema AND tc.table_name = kcu.table_name
-        LEFT JOIN information_schema.check_constraints cc ON tc.constraint_name = cc.constraint_name AND tc.table_schema = cc.constraint_schema
-        WHERE tc.table_schema = '{schema_name}' AND tc.table_name = '{t_name}';
-        """
-        details["tables"][t_name]["constraints"] = _execute_query(
-            conn, constraints_query
+    # Mirrors information_schema.tables (table_type = 'BASE TABLE') without the
+    # per-row privilege view overhead. reltuples is the planner's row estimate
+    # (-1 until the table is first vacuumed or analyzed).
+    tables_query = f"""
+    SELECT c.relname AS table_name,
+           CASE WHEN c.reltuples >= 0 THEN c.reltuples::bigint END AS row_estimate,
+           pg_total_relation_size(c.oid) AS total_bytes
+    FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE n.nspname = '{schema_name}' AND c.relkind IN ('r', 'p')
+      AND (has_table_privilege(c.oid, 'SELECT, INSERT, UPDATE, DELETE, TRUNCATE, REFERENCES, TRIGGER')
+           OR has_any_column_privilege(c.oid, 'SELECT, INSERT, UPDATE, REFERENCES'))
+    ORDER BY c.relname;
+    """
+    for table_name, row_estimate, total_bytes in _stream_query(conn, tables_query):
+        details["tables"][table_name] = {
+            "columns": {},
+            "constraints": [],
+            "indexes": [],
+            "row_estimate": row_estimate,
+            "total_bytes": total_bytes,
+        }
+    tables = details["tables"]
+
+    try:
+        _collapse_partitions(conn, schema_name, tables)
+    except Exception as e:
+        logger.error(
+            f"Error fetching PostgreSQL partitions for schema {schema_name}: {e}"
         )
-        indexes_query = f"""
-        SELECT t.relname AS table_name, i.relname AS index_name, a.attname AS column_name, ix.indisunique AS is_unique
-        FROM pg_class t JOIN pg_index ix ON t.oid = ix.indrelid JOIN pg_class i ON i.oid = ix.indexrelid
-        LEFT JOIN pg_attribute a ON a.attrelid = t.oid AND a.attnum = ANY(ix.indkey)
-        JOIN pg_namespace n ON t.relnamespace = n.oid WHERE n.nspname = '{schema_name}' AND t.relname = '{t_name}' AND t.relkind = 'r';
-        """
-        try:
-            indexes = _execute_query(conn, indexes_query)
-            grouped_indexes = {}
-            for index in indexes:
-                if index["column_name"]:
-                    idx_name = index["index_name"]
-                    if idx_name not in grouped_indexes:
-                        grouped_indexes[idx_name] = {
-                            "name": idx_name,
-                            "columns": [],
-                            "unique": index["is_unique"],
-                        }
-                    if index["column_name"] not in grouped_indexes[idx_name]["columns"]:
-                        grouped_indexes[idx_name]["columns"].append(
-                            index["column_name"]
-                        )
-            details["tables"][t_name]["indexes"] = list(grouped_indexes.values())
-        except Exception as e:
-            logger.error(f"Error fetching PostgreSQL indexes for {t_name}: {e}")
 
+    # information_schema.columns is kept for the column layout so that the
+    # reported data types stay identical to the SQL-standard names.
+    cols_query = f"""
+    SELECT table_name, column_name, data_type, character_maximum_length, numeric_precision, numeric_scale, is_nullable, column_default
+    FROM information_schema.columns WHERE table_schema = '{schema_name}'
+    ORDER BY table_name, ordinal_position;
+    """
+    for (
+        table_name,
+        column_name,
+        data_type,
+        length,
+        precision,
+        scale,
+        is_nullable,
+        default,
+    ) in _stream_query(conn, cols_query):
+        table_info = tables.get(table_name)
+        if table_info is None:
+            continue
+        table_info["columns"][column_name] = {
+            "type": data_type,
+            "length": length,
+            "precision": precision,
+            "scale": scale,
+            "nullable": is_nullable == "YES",
+            "default": default,
+        }
+
+    # Same rows as information_schema.table_constraints joined to
+    # key_column_usage/check_constraints, including the synthesized NOT NULL
+    # checks, read straight from pg_constraint/pg_attribute.
+    constraints_query = f"""
+    SELECT table_name, constraint_name, constraint_type, column_name, check_clause
+    FROM (
+        SELECT rel.relname AS table_name, con.conname AS constraint_name,
+               CASE con.contype WHEN 'p' THEN 'PRIMARY KEY' WHEN 'u' THEN 'UNIQUE'
+                                WHEN 'f' THEN 'FOREIGN KEY' ELSE 'CHECK' END AS constraint_type,
+               att.attname AS column_name,
+               CASE WHEN con.contype = 'c' THEN substring(pg_get_constraintdef(con.oid) FROM 7) END AS check_clause,
+               k.ord AS key_position
+        FROM pg_constraint con
+        JOIN pg_class rel ON rel.oid = con.conrelid
+        JOIN pg_namespace nsp ON nsp.oid = rel.relnamespace
+        LEFT JOIN LATERAL unnest(CASE WHEN con.contype IN ('p', 'u', 'f') THEN con.conkey END)
+            WITH ORDINALITY AS k(attnum, ord) ON TRUE
+        LEFT JOIN pg_attribute att ON att.attrelid = con.conrelid AND att.attnum = k.attnum
+        WHERE nsp.nspname = '{schema_name}' AND con.contype IN ('p', 'u', 'f', 'c') AND rel.relkind IN ('r', 'p')
+        UNION ALL
+        SELECT rel.relname, nsp.oid || '_' || rel.oid || '_' || att.attnum || '_not_null',
+               'CHECK', NULL, att.attname || ' IS NOT NULL', NULL
+        FROM pg_attribute att
+        JOIN pg_class rel ON rel.oid = att.attrelid
+        JOIN pg_namespace nsp ON nsp.oid = rel.relnamespace
+        WHERE nsp.nspname = '{schema_name}' AND rel.relkind IN ('r', 'p')
+          AND att.attnum > 0 AND NOT att.attisdropped AND att.attnotnull
+    ) AS c
+    ORDER BY table_name, constraint_name, key_position;
+    """
+    for (
+        table_name,
+        constraint_name,
+        constraint_type,
+        column_name,
+        check_clause,
+    ) in _stream_query(conn, constraints_query):
+        table_info = tables.get(table_name)
+        if table_info is not None:
+            table_info["constraints"].append(
+                {
+                    "table_name": table_name,
+                    "constraint_name": constraint_name,
+                    "constraint_type": constraint_type,
+                    "column_name": column_name,
+                    "check_clause": check_clause,
+                }
+            )
+
+    indexes_query = f"""
+    SELECT t.relname AS table_name, i.relname AS index_name, a.attname AS column_name, ix.indisunique AS is_unique
+    FROM pg_index ix
+    JOIN pg_class t ON t.oid = ix.indrelid
+    JOIN pg_class i ON i.oid = ix.indexrelid
+    JOIN pg_namespace n ON n.oid = t.relnamespace
+    CROSS JOIN LATERAL unnest(ix.indkey::smallint[]) WITH ORDINALITY AS k(attnum, ord)
+    LEFT JOIN pg_attribute a ON a.attrelid = t.oid AND a.attnum = k.attnum
+    WHERE n.nspname = '{schema_name}' AND t.relkind IN ('r', 'p')
+    ORDER BY t.relname, ix.indexrelid, k.ord;
+    """
+    try:
+        grouped_indexes: dict[str, dict[str, dict[str, Any]]] = {}
+        for t_name, idx_name, column_name, is_unique in _stream_query(
+            conn, indexes_query
+        ):
+            if t_name not in tables or not column_name:
+                continue
+            table_indexes = grouped_indexes.setdefault(t_name, {})
+            if idx_name not in table_indexes:
+                table_indexes[idx_name] = {
+                    "name": idx_name,
+                    "columns": [],
+                    "unique": is_unique,
+                }
+            if column_name not in table_indexes[idx_name]["columns"]:
+                table_indexes[idx_name]["columns"].append(column_name)
+        for t_name, table_indexes in grouped_indexes.items():
+            tables[t_name]["indexes"] = list(table_indexes.values())
+    except Exception as e:
+        logger.error(f"Error fetching PostgreSQL indexes for schema {schema_name}: {e}")
+
+    # Unnesting conkey/confkey pairwise keeps composite keys aligned column by
+    # column instead of cross-joining through constraint_column_usage. FKs of
+    # and to partitioned tables are cloned onto every partition (conparentid
+    # set); only the parent's constraint is kept. conparentid is PostgreSQL 11+;
+    # older servers allow no FKs on partitioned tables, so have no clones.
+    clones_filter = "AND con.conparentid = 0" if conn.server_version >= 110000 else ""
     fks_query = f"""
-    SELECT tc.constraint_name, tc.table_name AS from_table, kcu.column_name AS from_column,
-           ccu.table_schema AS to_schema, ccu.table_name AS to_table, ccu.column_name AS to_column
-    FROM information_schema.table_constraints AS tc JOIN information_schema.key_column_usage AS kcu
-        ON tc.constraint_name = kcu.constraint_name AND tc.table_schema = kcu.table_schema
-    JOIN information_schema.constraint_column_usage AS ccu
-        ON ccu.constraint_name = tc.constraint_name AND ccu.table_schema = tc.table_schema
-    WHERE tc.constraint_type = 'FOREIGN KEY' AND tc.table_schema = '{schema_name}';
+    SELECT con.conname AS constraint_name, rel.relname AS from_table, att.attname AS from_column,
+           fnsp.nspname AS to_schema, frel.relname AS to_table, fatt.attname AS to_column
+    FROM pg_constraint con
+    JOIN pg_class rel ON rel.oid = con.conrelid
+    JOIN pg_namespace nsp ON nsp.oid = rel.relnamespace
+    JOIN pg_class frel ON frel.oid = con.confrelid
+    JOIN pg_namespace fnsp ON fnsp.oid = frel.relnamespace
+    CROSS JOIN LATERAL unnest(con.conkey, con.confkey) WITH ORDINALITY AS k(attnum, fattnum, ord)
+    JOIN pg_attribute att ON att.attrelid = con.conrelid AND att.attnum = k.attnum
+    JOIN pg_attribute fatt ON fatt.attrelid = con.confrelid AND fatt.attnum = k.fattnum
+    WHERE con.contype = 'f' {clones_filter} AND nsp.nspname = '{schema_name}'
+    ORDER BY rel.relname, con.conname, k.ord;
     """
     details["foreign_keys"] = _execute_query(conn, fks_query)
     views_query = f"SELECT table_name AS view_name, view_definition FROM information_schema.views WHERE table_schema = '{schema_name}';"
@@ -286,7 +467,7 @@ def get_postgres_schema_details(conn: Any, schema_name: str) -> dict[str, Any]:
 
     llm_analysis = _analyze_with_llm(schema_name, "PostgreSQL", details)
     details["inferred_relationships"] = llm_analysis.get("inferred_relationships", [])
-    details["anomalies"] = llm_analysis.get("anomalies", [])
+    details["anomalies"] = fk_validator.validate_foreign_keys(schema_name, details)
     logger.info(
         f"Found {len(details['inferred_relationships'])} potential inferred relationships for PostgreSQL."
     )
@@ -294,3 +475,112 @@ def get_postgres_schema_details(conn: Any, schema_name: str) -> dict[str, Any]:
         f"Found {len(details['anomalies'])} potential relationship anomalies for PostgreSQL."
     )
     return details
+
+
+def get_postgres_catalog_fingerprint(conn: Any, schema_name: str) -> str | None:
+    """
+    Digest of the schema's catalog rows, read in one query. DDL on a relation,
+    column, constraint or view rewrites the catalog row (new xmin) or the
+    relfilenode; ANALYZE and VACUUM update pg_class in place and leave it alone.
+    """
+    fingerprint_q = f"""
+    SELECT md5(concat_ws('|',
+        (SELECT string_agg(c.oid || ':' || c.relfilenode || ':' || c.xmin, ',' ORDER BY c.oid)
+         FROM pg_class c WHERE c.relnamespace = n.oid),
+        (SELECT string_agg(a.attrelid || ':' || a.attnum || ':' || a.xmin, ',' ORDER BY a.attrelid, a.attnum)
+         FROM pg_attribute a JOIN pg_class c ON c.oid = a.attrelid
+         WHERE c.relnamespace = n.oid AND a.attnum > 0),
+        (SELECT string_agg(con.oid || ':' || con.xmin, ',' ORDER BY con.oid)
+         FROM pg_constraint con WHERE con.connamespace = n.oid),
+        (SELECT string_agg(r.oid || ':' || r.xmin, ',' ORDER BY r.oid)
+         FROM pg_rewrite r JOIN pg_class c ON c.oid = r.ev_class
+         WHERE c.relnamespace = n.oid)
+    )) AS fingerprint
+    FROM pg_namespace n
+    WHERE n.nspname = '{schema_name}';
+    """
+    rows = _execute_query(conn, fingerprint_q)
+    return rows[0]["fingerprint"] if rows else None
+
+
+def _partition_tree(relid: str) -> str:
+    """Subquery listing a relation and, if it is partitioned, all its partitions."""
+    return f"""
+    WITH RECURSIVE tree(relid) AS (
+        SELECT {relid}
+        UNION ALL
+        SELECT i.inhrelid FROM tree JOIN pg_inherits i ON i.inhparent = tree.relid
+    )
+    SELECT relid FROM tree
+    """
+
+
+def get_postgres_index_usage(conn: Any, schema_name: str) -> dict[str, Any]:
+    """
+    Usage, size and kind of every index of the schema from pg_stat_user_indexes,
+    and sequential against index scans per table from pg_stat_user_tables, for
+    the index advisor. Counters cover this server only, since the database's
+    statistics were last reset or the server started; scans on replicas are
+    not included. Partitioned tables and indexes count the figures of all
+    their partitions.
+    """
+    # indnkeyatts leaves out INCLUDE columns, which came with PostgreSQL 11;
+    # before that every column of an index is a key column.
+    key_atts = "indnkeyatts" if conn.server_version >= 110000 else "indnatts"
+    indexes_q = f"""
+    SELECT t.relname AS table_name, i.relname AS index_name, am.amname AS method,
+           ix.indisprimary AS is_primary, ix.indisunique AS is_unique,
+           EXISTS (SELECT 1 FROM pg_constraint con WHERE con.conindid = ix.indexrelid
+                   AND con.contype IN ('p', 'u', 'x')) AS backs_constraint,
+           ix.indpred IS NOT NULL OR ix.indexprs IS NOT NULL AS is_partial,
+           ix.{key_atts} AS key_columns, u.uses, u.size_bytes
+    FROM pg_index ix
+    JOIN pg_class t ON t.oid = ix.indrelid
+    JOIN pg_class i ON i.oid = ix.indexrelid
+    JOIN pg_am am ON am.oid = i.relam
+    JOIN pg_namespace n ON n.oid = t.relnamespace
+    CROSS JOIN LATERAL (
+        SELECT SUM(s.idx_scan)::bigint AS uses,
+               SUM(pg_relation_size(p.relid))::bigint AS size_bytes
+        FROM ({_partition_tree("ix.indexrelid")}) AS p
+        LEFT JOIN pg_stat_user_indexes s ON s.indexrelid = p.relid
+    ) AS u
+    WHERE n.nspname = '{schema_name}' AND t.relkind IN ('r', 'p');
+    """
+    scans_q = f"""
+    SELECT c.relname AS table_name, SUM(s.seq_scan)::bigint AS full_scans,
+           SUM(s.seq_tup_read)::bigint AS rows_read,
+           SUM(s.idx_scan)::bigint AS index_scans
+    FROM pg_class c
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    CROSS JOIN LATERAL ({_partition_tree("c.oid")}) AS p
+    JOIN pg_stat_user_tables s ON s.relid = p.relid
+    WHERE n.nspname = '{schema_name}' AND c.relkind IN ('r', 'p')
+    GROUP BY c.relname;
+    """
+    window_q = """
+    SELECT EXTRACT(EPOCH FROM now() - COALESCE(stats_reset, pg_postmaster_start_time())) / 86400
+           AS stats_window_days
+    FROM pg_stat_database WHERE datname = current_database();
+    """
+    indexes: dict[str, dict[str, dict[str, Any]]] = {}
+    for row in _execute_query(conn, indexes_q):
+        indexes.setdefault(row.pop("table_name"), {})[row.pop("index_name")] = {
+            "method": row["method"],
+            "primary": row["is_primary"],
+            "unique": row["is_unique"],
+            "constraint": row["backs_constraint"],
+            "partial": row["is_partial"],
+            "key_columns": row["key_columns"],
+            "uses": row["uses"],
+            "size_bytes": row["size_bytes"],
+        }
+    window = _execute_query(conn, window_q)
+    return {
+        "stats_window_days": float(window[0]["stats_window_days"]) if window else None,
+        "indexes": indexes,
+        "table_scans": {
+            row.pop("table_name"): row for row in _execute_query(conn, scans_q)
+        },
+        "missing_indexes": [],
+    }
@@ -0,0 +1,315 @@
+import re
+from typing import Any
+
+# Trailing column-name tokens that mark a reference to another table's key,
+# e.g. customer_id, product_code, orderUuid.
+KEY_SUFFIXES = ("id", "uuid", "guid", "code", "key", "no", "num", "number")
+
+# Rule-based suggestions at or above this confidence are kept without the LLM.
+CONFIDENT = 0.75
+# A runner-up candidate within this margin of the best one makes a column ambiguous.
+AMBIGUITY_MARGIN = 0.1
+
+_TABLE_MATCH_SCORES = {"exact": 0.45, "prefixed": 0.3, "role": 0.3}
+_COMPATIBLE_FAMILIES = {frozenset({"integer", "numeric"})}
+
+
+def _field(row: dict[str, Any], name: str) -> Any:
+    """Constraint rows use lowercase keys on PostgreSQL and uppercase elsewhere."""
+    return row.get(name, row.get(name.upper()))
+
+
+def _tokens(name: str) -> list[str]:
+    spaced = re.sub(r"([a-z0-9])([A-Z])", r"\1_\2", name)
+    spaced = re.sub(r"([A-Z]+)([A-Z][a-z])", r"\1_\2", spaced)
+    return [token for token in re.split(r"[^A-Za-z0-9]+", spaced.lower()) if token]
+
+
+def _name_forms(tokens: list[str]) -> set[str]:
+    """The name as written plus its possible singular forms (orders, statuses, categories)."""
+    last = tokens[-1]
+    endings = {last}
+    if last.endswith("ies") and len(last) > 4:
+        endings.add(last[:-3] + "y")
+    if last.endswith("es") and len(last) > 3:
+        endings.add(last[:-2])
+    if last.endswith("s") and not last.endswith("ss") and len(last) > 2:
+        endings.add(last[:-1])
+    return {"_".join([*tokens[:-1], ending]) for ending in endings}
+
+
+def type_family(col_type: str | None) -> str | None:
+    """Coarse type class used to decide whether two columns can be joined."""
+    if not col_type:
+        return None
+    t = col_type.lower()
+    if "uuid" in t or "uniqueidentifier" in t:
+        return "uuid"
+    if "interval" in t or "date" in t or "time" in t or "year" in t:
+        return "temporal"
+    if "int" in t or "serial" in t:
+        return "integer"
+    if "numeric" in t or "decimal" in t or "number" in t or "money" in t:
+        return "numeric"
+    if "float" in t or "double" in t or "real" in t:
+        return "float"
+    if "char" in t or "text" in t or "string" in t or "clob" in t:
+        return "text"
+    if "binary" in t or "bytea" in t or "blob" in t:
+        return "binary"
+    return t
+
+
+def types_compatible(from_type: str | None, to_type: str | None) -> bool | None:
+    """True/False for known types, None when either type is unknown."""
+    from_family, to_family = type_family(from_type), type_family(to_type)
+    if from_family is None or to_family is None:
+        return None
+    return (
+        from_family == to_family
+        or frozenset({from_family, to_family}) in _COMPATIBLE_FAMILIES
+    )
+
+
+def single_column_keys(table_info: dict[str, Any]) -> dict[str, str]:
+    """Columns that are by themselves a PRIMARY KEY or UNIQUE constraint."""
+    key_columns: dict[str, list[str]] = {}
+    key_types: dict[str, str] = {}
+    for const in table_info.get("constraints", []):
+        const_type = _field(const, "constraint_type")
+        if const_type not in ("PRIMARY KEY", "UNIQUE"):
+            continue
+        const_name = _field(const, "constraint_name")
+        col_name = _field(const, "column_name")
+        if col_name:
+            key_columns.setdefault(const_name, []).append(col_name)
+            key_types[const_name] = const_type
+    keys: dict[str, str] = {}
+    for const_name, columns in key_columns.items():
+        if len(columns) == 1 and keys.get(columns[0]) != "PRIMARY KEY":
+            keys[columns[0]] = key_types[const_name]
+    return keys
+
+
+class _SchemaIndex:
+    """Hash indexes over table names and key columns, built in one pass."""
+
+    def __init__(self, tables: dict[str, dict[str, Any]]) -> None:
+        self.tables = tables
+        self.keys = {name: single_column_keys(info) for name, info in tables.items()}
+        self.primary_keys = {
+            name: next((c for c, k in keys.items() if k == "PRIMARY KEY"), None)
+            for name, keys in self.keys.items()
+        }
+        self.by_name: dict[str, list[str]] = {}
+        self.by_suffix: dict[str, list[str]] = {}
+        for table_name in tables:
+            tokens = _tokens(table_name)
+            if not tokens:
+                continue
+            for name in _name_forms(tokens):
+                self.by_name.setdefault(name, []).append(table_name)
+            # crm_customers is also reachable as "customer", at lower confidence
+            for start in range(1, len(tokens)):
+                for name in _name_forms(tokens[start:]):
+                    self.by_suffix.setdefault(name, []).append(table_name)
+
+    def tables_for(self, stem: list[str]) -> tuple[list[str], str]:
+        name = "_".join(stem)
+        if name in self.by_name:
+            return self.by_name[name], "exact"
+        if name in self.by_suffix:
+            return self.by_suffix[name], "prefixed"
+        # billing_customer_id -> customer
+        for start in range(1, len(stem)):
+            name = "_".join(stem[start:])
+            if name in self.by_name:
+                return self.by_name[name], "role"
+        return [], ""
+
+
+def _target_column(
+    index: _SchemaIndex, to_table: str, from_column: str, stem: list[str], suffix: str
+) -> tuple[str | None, float]:
+    """Picks the referenced column of to_table and scores how key-like it is."""
+    columns = index.tables[to_table].get("columns", {})
+    keys = index.keys[to_table]
+    named = [from_column, suffix, "_".join([*stem, suffix]), "".join([*stem, suffix])]
+    lowered = {c.lower(): c for c in columns}
+    matches = [lowered[n.lower()] for n in named if n.lower() in lowered]
+    for col_name in matches:
+        if col_name in keys:
+            return col_name, 0.35
+    primary_key = index.primary_keys[to_table]
+    if primary_key and suffix in ("id", "uuid", "guid", "key"):
+        return primary_key, 0.25
+    if matches:
+        return matches[0], 0.1
+    return None, 0.0
+
+
+def _candidates(
+    index: _SchemaIndex, table_name: str, col_name: str, col_type: str | None
+) -> list[dict[str, Any]] | None:
+    """Scored target candidates, or None if the column does not look like a reference."""
+    tokens = _tokens(col_name)
+    if len(tokens) > 1 and tokens[-1] in KEY_SUFFIXES:
+        stem, suffix = tokens[:-1], tokens[-1]
+    elif len(tokens) == 1 and tokens[0].endswith("id") and len(tokens[0]) > 4:
+        stem, suffix = [tokens[0][:-2]], "id"
+    else:
+        return None
+
+    to_tables, match = index.tables_for(stem)
+    candidates = []
+    for to_table in to_tables:
+        to_column, column_score = _target_column(
+            index, to_table, col_name, stem, suffix
+        )
+        if to_column is None or (to_table, to_column) == (table_name, col_name):
+            continue
+        to_type = index.tables[to_table]["columns"][to_column].get("type")
+        compatible = types_compatible(col_type, to_type)
+        if compatible is False:
+            continue
+        if compatible is None:
+            type_score = 0.05
+        elif str(col_type).lower() == str(to_type).lower():
+            type_score = 0.15
+        else:
+            type_score = 0.1
+        candidates.append(
+            {
+                "to_table": to_table,
+                "to_column": to_column,
+                "confidence": round(
+                    _TABLE_MATCH_SCORES[match] + column_score + type_score, 2
+                ),
+                "match": match,
+            }
+        )
+    candidates.sort(key=lambda c: -c["confidence"])
+    return candidates
+
+
+def infer_relationships(schema_details: dict[str, Any]) -> dict[str, list[dict]]:
+    """
+    Proposes foreign keys from column names, key constraints and types in one
+    pass over the columns. Confident, unambiguous matches are returned under
+    "inferred"; reference-like columns with no clear target are returned under
+    "ambiguous" with their scored candidates, for the LLM to resolve.
+    """
+    tables = schema_details.get("tables", {})
+    index = _SchemaIndex(tables)
+    existing = {
+        (fk.get("from_table"), fk.get("from_column"))
+        for fk in schema_details.get("foreign_keys", [])
+    }
+    inferred: list[dict[str, Any]] = []
+    ambiguous: list[dict[str, Any]] = []
+    for table_name, table_info in tables.items():
+        own_primary_key = index.primary_keys[table_name]
+        for col_name, col_info in table_info.get("columns", {}).items():
+            if (table_name, col_name) in existing or col_name == own_primary_key:
+                continue
+            col_type = col_info.get("type")
+            candidates = _candidates(index, table_name, col_name, col_type)
+            if candidates is None:
+                continue
+            best = candidates[0] if candidates else None
+            runner_up = candidates[1] if len(candidates) > 1 else None
+            if (
+                best
+                and best["confidence"] >= CONFIDENT
+                and (
+                    runner_up is None
+                    or best["confidence"] - runner_up["confidence"] >= AMBIGUITY_MARGIN
+                )
+            ):
+                inferred.append(
+                    {
+                        "from_table": table_name,
+                        "from_column": col_name,
+                        "to_table": best["to_table"],
+                        "to_column": best["to_column"],
+                        "confidence": best["confidence"],
+                        "source": "rules",
+                        "explanation": (
+                            f"Column name '{col_name}' matches table "
+                            f"'{best['to_table']}' ({best['match']} name match) and "
+                            f"its key column '{best['to_column']}' with a "
+                            "compatible type."
+                        ),
+                        "suggestion": "Consider adding a foreign key constraint.",
+                    }
+                )
+            else:
+                ambiguous.append(
+                    {
+                        "from_table": table_name,
+                        "from_column": col_name,
+                        "type": col_type,
+                        "candidates": [
+                            {k: c[k] for k in ("to_table", "to_column", "confidence")}
+                            for c in candidates
+                        ],
+                    }
+                )
+    return {"inferred": inferred, "ambiguous": ambiguous}
+
+
+def llm_context(
+    schema_details: dict[str, Any],
+    ambiguous: list[dict[str, Any]],
+    key_tables: set[str] | None = None,
+) -> dict[str, Any]:
+    """
+    The part of the schema the LLM still needs, in compact form: the ambiguous
+    columns with their scored candidates, reference-like columns without any
+    candidate, and the key columns of every table (or of key_tables only) to
+    resolve them against.
+    """
+    tables = schema_details.get("tables", {})
+    ambiguous_columns: dict[str, Any] = {}
+    unmatched_columns: dict[str, list[str]] = {}
+    for column in ambiguous:
+        if column["candidates"]:
+            ambiguous_columns[f"{column['from_table']}.{column['from_column']}"] = {
+                "type": column["type"],
+                "candidates": {
+                    f"{c['to_table']}.{c['to_column']}": c["confidence"]
+                    for c in column["candidates"]
+                },
+            }
+        else:
+            unmatched_columns.setdefault(column["from_table"], []).append(
+                column["from_column"]
+            )
+    return {
+        "ambiguous_columns": ambiguous_columns,
+        "unmatched_columns": unmatched_columns,
+        "table_keys": {
+            table_name: sorted(single_column_keys(table_info))
+            for table_name, table_info in tables.items()
+            if key_tables is None or table_name in key_tables
+        },
+    }
+
+
+def merge_inferred(
+    rule_inferred: list[dict[str, Any]], llm_inferred: list[dict[str, Any]]
+) -> list[dict[str, Any]]:
+    """Adds the LLM's suggestions for columns the rules did not already resolve."""
+    merged = list(rule_inferred)
+    resolved = {(r["from_table"], r["from_column"]) for r in rule_inferred}
+    for relationship in llm_inferred:
+        if not isinstance(relationship, dict):
+            continue
+        key = (relationship.get("from_table"), relationship.get("from_column"))
+        if key in resolved:
+            continue
+        resolved.add(key)
+        relationship.setdefault("confidence", None)
+        relationship["source"] = "llm"
+        merged.append(relationship)
+    return merged
@@ -0,0 +1,179 @@
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any
+
+import google.cloud.storage as storage
+from google.api_core import exceptions
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever the shape of schema_structure changes so older entries miss.
+CACHE_FORMAT_VERSION = 4
+
+DEFAULT_CACHE_DIR = os.path.join(
+    os.path.expanduser("~"), ".cache", "data_model_discovery", "schema_cache"
+)
+DEFAULT_MAX_ENTRIES = 256
+
+
+def schema_cache_key(
+    metadata: dict[str, Any], schema_name: str, fingerprint: str
+) -> str:
+    """
+    Cache key for one schema of one database at one catalog fingerprint, as
+    seen by one user: introspection lists only what the connected user may
+    access, while the fingerprint covers every object of the schema.
+    """
+    key_fields = [
+        CACHE_FORMAT_VERSION,
+        metadata.get("db_type"),
+        metadata.get("host"),
+        str(metadata.get("port")),
+        metadata.get("dbname"),
+        metadata.get("user"),
+        schema_name,
+        fingerprint,
+    ]
+    return hashlib.sha256(json.dumps(key_fields).encode("utf-8")).hexdigest()
+
+
+class DiskSchemaCache:
+    """
+    JSON files in a local directory. Reads refresh a file's mtime, and writes
+    evict the least recently used files beyond max_entries.
+    """
+
+    def __init__(self, directory: str, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.directory = Path(directory)
+        self.max_entries = max_entries
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        path = self.directory / f"{key}.json"
+        try:
+            with path.open(encoding="utf-8") as f:
+                value = json.load(f)
+            os.utime(path)
+            return value
+        except FileNotFoundError:
+            return None
+
+    def put(self, key: str, value: dict[str, Any]) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f"{key}.json"
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with tmp_path.open("w", encoding="utf-8") as f:
+            json.dump(value, f, default=str)
+        os.replace(tmp_path, path)
+        self._evict()
+
+    def _evict(self) -> None:
+        entries = []
+        for path in self.directory.glob("*.json"):
+            try:
+                entries.append((path.stat().st_mtime, path))
+            except FileNotFoundError:
+                continue
+        entries.sort(reverse=True)
+        for _, path in entries[self.max_entries :]:
+            path.unlink(missing_ok=True)
+
+
+class GcsSchemaCache:
+    """JSON objects in a GCS bucket, shared by every instance of the agent."""
+
+    def __init__(self, bucket_name: str, prefix: str = "schema_cache/"):
+        if bucket_name.startswith("gs://"):
+            bucket_name = bucket_name[5:]
+        self.bucket_name = bucket_name
+        self.prefix = prefix
+        self._bucket: Any = None
+
+    def _blob(self, key: str) -> Any:
+        if self._bucket is None:
+            self._bucket = storage.Client().bucket(self.bucket_name)
+        return self._bucket.blob(f"{self.prefix}{key}.json")
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        try:
+            return json.loads(self._blob(key).download_as_text())
+        except exceptions.NotFound:
+            return None
+
+    def put(self, key: str, value: dict[str, Any]) -> None:
+        self._blob(key).upload_from_string(
+            json.dumps(value, default=str), content_type="application/json"
+        )
+
+
+class SchemaCache:
+    """
+    Looks keys up in each backend in order, copying hits into the earlier
+    (faster) backends. Backend failures are logged and treated as misses.
+    """
+
+    def __init__(self, backends: list[Any]):
+        self.backends = backends
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        for i, backend in enumerate(self.backends):
+            try:
+                value = backend.get(key)
+            except Exception as e:
+                logger.warning(
+                    f"Schema cache read failed on {type(backend).__name__}: {e}"
+                )
+                continue
+            if value is not None:
+                for faster in self.backends[:i]:
+                    try:
+                        faster.put(key, value)
+                    except Exception as e:
+                        logger.warning(
+                            f"Schema cache write failed on {type(faster).__name__}: {e}"
+                        )
+                return value
+        return None
+
+    def put(self, key: str, value: dict[str, Any]) -> None:
+        for backend in self.backends:
+            try:
+                backend.put(key, value)
+            except Exception as e:
+                logger.warning(
+                    f"Schema cache write failed on {type(backend).__name__}: {e}"
+                )
+
+
+def get_schema_cache(min_entries: int = 0) -> SchemaCache | None:
+    """
+    Builds the cache from the environment:
+    SCHEMA_CACHE_BACKEND is "disk" (default), "gcs" (disk in front of GCS) or
+    "none"; SCHEMA_CACHE_DIR and SCHEMA_CACHE_MAX_ENTRIES tune the disk backend;
+    SCHEMA_CACHE_GCS_BUCKET (falling back to GCS_BUCKET_NAME) names the bucket.
+    The disk backend keeps at least `min_entries` entries, so a caller writing
+    that many does not evict its own.
+    """
+    backend = os.getenv("SCHEMA_CACHE_BACKEND", "disk").lower()
+    if backend == "none":
+        return None
+    backends: list[Any] = [
+        DiskSchemaCache(
+            os.getenv("SCHEMA_CACHE_DIR", DEFAULT_CACHE_DIR),
+            max(
+                min_entries,
+                int(os.getenv("SCHEMA_CACHE_MAX_ENTRIES", str(DEFAULT_MAX_ENTRIES))),
+            ),
+        )
+    ]
+    if backend == "gcs":
+        bucket_name = os.getenv("SCHEMA_CACHE_GCS_BUCKET") or os.getenv(
+            "GCS_BUCKET_NAME"
+        )
+        if bucket_name:
+            backends.append(GcsSchemaCache(bucket_name))
+        else:
+            logger.warning("SCHEMA_CACHE_BACKEND=gcs but no bucket is configured.")
+    return SchemaCache(backends)
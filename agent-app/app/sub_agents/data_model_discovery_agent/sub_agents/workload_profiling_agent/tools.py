@@ -0,0 +1,119 @@
+import logging
+from typing import Any
+
+from google.adk.tools import ToolContext
+
+from app.sub_agents.data_model_discovery_agent.utils.blocking import run_blocking
+from app.sub_agents.data_model_discovery_agent.utils.connection_manager import (
+    get_connection_manager,
+    session_key,
+)
+
+from .utils import mssql_workload_utils, mysql_workload_utils, postgres_workload_utils
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+# Queries listed per ranking unless args["top_n"] says otherwise.
+DEFAULT_TOP_N = 20
+
+# Seconds an MSSQL workload query may run before it is cancelled.
+MSSQL_QUERY_TIMEOUT = 30
+
+
+def _collect_workload(
+    key: str,
+    metadata: dict[str, Any],
+    password: str,
+    schema_name: str,
+    table_names: list[str],
+    top_n: int,
+) -> dict[str, Any]:
+    """Blocking part of profile_workload, run on the session's connection."""
+    db_type = metadata["db_type"]
+    conn = get_connection_manager().acquire(
+        key, metadata, password, statement_timeout=MSSQL_QUERY_TIMEOUT
+    )
+    try:
+        logger.info(f"Using the session's {db_type} connection for workload profiling.")
+        if db_type == "postgresql":
+            return postgres_workload_utils.get_postgres_workload(
+                conn, table_names, top_n
+            )
+        elif db_type == "mysql":
+            return mysql_workload_utils.get_mysql_workload(
+                conn, schema_name, table_names, top_n
+            )
+        return mssql_workload_utils.get_mssql_workload(conn, table_names, top_n)
+    finally:
+        try:
+            conn.close()
+        except Exception as e:
+            logger.error(f"Error releasing {db_type} connection: {e}")
+
+
+async def profile_workload(
+    tool_context: ToolContext, args: dict[str, Any]
+) -> dict[str, Any]:
+    """
+    Collects the hot queries of the connected database from its statement
+    statistics: pg_stat_statements, performance_schema statement digests or
+    sys.dm_exec_query_stats. Lists the top args["top_n"] queries by total
+    time, calls, rows and I/O, and the load they put on each table of the
+    introspected schema. Stores the result as workload_profile.
+    """
+    db_conn_state = tool_context.state.get("db_connection")
+    db_creds = tool_context.state.get("db_creds_temp")
+    schema_structure = tool_context.state.get("schema_structure") or {}
+
+    if not db_conn_state or db_conn_state.get("status") != "connected":
+        return {"error": "DB not connected."}
+    if not db_creds:
+        return {"error": "DB credentials not found."}
+    try:
+        top_n = int(args.get("top_n", DEFAULT_TOP_N))
+    except (TypeError, ValueError):
+        return {"error": "top_n must be a positive integer."}
+    if top_n < 1:
+        return {"error": "top_n must be a positive integer."}
+
+    metadata = db_conn_state["metadata"]
+    password = db_creds["password"]
+    db_type = metadata["db_type"]
+    if db_type not in ("postgresql", "mysql", "mssql"):
+        return {"error": f"Workload profiling for {db_type} not implemented."}
+
+    # MySQL keeps digests per schema (database); the others per database.
+    schema_name = tool_context.state.get("selected_schema") or metadata["dbname"]
+    table_names = list(schema_structure.get("tables", {}))
+
+    key = session_key(tool_context.state)
+    try:
+        workload = await run_blocking(
+            key,
+            _collect_workload,
+            key,
+            metadata,
+            password,
+            schema_name,
+            table_names,
+            top_n,
+        )
+    except Exception as e:
+        logger.error(f"Error during workload profiling: {e}", exc_info=True)
+        return {"error": f"Failed to profile the workload of {db_type}: {e!s}"}
+
+    tool_context.state["workload_profile"] = workload
+    if not workload["available"]:
+        return {
+            "status": "unavailable",
+            "message": f"No statement statistics to read: {workload['reason']}",
+        }
+    logger.info("Workload profile saved to session state.")
+    return {
+        "status": "success",
+        "message": f"Workload profile of the {db_type} database collected. Results are stored.",
+        "source": workload["source"],
+        "statements": workload["totals"]["statements"],
+        "hot_tables": list(workload["hot_tables"])[:10],
+    }
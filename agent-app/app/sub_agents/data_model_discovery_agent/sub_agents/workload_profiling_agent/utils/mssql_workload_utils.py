@@ -0,0 +1,92 @@
+import logging
+from typing import Any
+
+from .workload_summary import build_workload_profile, ranked_filter, ranked_select
+
+logger = logging.getLogger(__name__)
+
+# Characters of statement text read per query; longer text is cut client-side
+# anyway and nvarchar(max) cannot be aggregated cheaply.
+_STATEMENT_TEXT_CHARS = 4000
+
+
+def _execute_query(conn: Any, query: str) -> list[dict[str, Any]]:
+    """Executes a SQL query and returns results as a list of dicts for SQL Server."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(query)
+        if cursor.description:
+            columns = [column[0] for column in cursor.description]
+            rows = cursor.fetchall()
+            return [dict(zip(columns, row, strict=False)) for row in rows]
+        return []
+    finally:
+        cursor.close()
+
+
+def get_mssql_workload(
+    conn: Any, table_names: list[str], top_n: int = 20
+) -> dict[str, Any]:
+    """
+    Top statements of the current database from sys.dm_exec_query_stats, by
+    total elapsed time, executions, rows and logical reads, and the load of
+    each of `table_names`. Plans of the same statement are merged by
+    query_hash. The DMV only covers plans still in the plan cache.
+    """
+    workload_q = f"""
+    WITH statements AS (
+        SELECT
+            CONVERT(varchar(18), qs.query_hash, 1) AS query_id,
+            MIN(CAST(SUBSTRING(
+                st.text,
+                qs.statement_start_offset / 2 + 1,
+                (CASE qs.statement_end_offset
+                    WHEN -1 THEN DATALENGTH(st.text)
+                    ELSE qs.statement_end_offset
+                END - qs.statement_start_offset) / 2 + 1
+            ) AS nvarchar({_STATEMENT_TEXT_CHARS}))) AS query,
+            SUM(qs.execution_count) AS calls,
+            SUM(qs.total_elapsed_time) / 1000.0 AS total_time_ms,
+            SUM(qs.total_rows) AS row_count,
+            SUM(qs.total_logical_reads) AS io,
+            MIN(qs.creation_time) AS since
+        FROM sys.dm_exec_query_stats qs
+        CROSS APPLY sys.dm_exec_sql_text(qs.sql_handle) st
+        CROSS APPLY sys.dm_exec_plan_attributes(qs.plan_handle) pa
+        WHERE pa.attribute = 'dbid' AND CAST(pa.value AS int) = DB_ID()
+        GROUP BY qs.query_hash
+    ), ranked AS (
+        SELECT
+            *,
+            {ranked_select()},
+            COUNT(*) OVER () AS all_statements,
+            SUM(calls) OVER () AS all_calls,
+            SUM(total_time_ms) OVER () AS all_time_ms,
+            MIN(since) OVER () AS all_since
+        FROM statements
+    )
+    SELECT * FROM ranked WHERE {ranked_filter(top_n)};
+    """
+    try:
+        rows = _execute_query(conn, workload_q)
+    except Exception as e:
+        # The query stats DMVs need VIEW SERVER STATE.
+        logger.warning(f"Could not read sys.dm_exec_query_stats: {e}")
+        return {"available": False, "reason": str(e).strip()}
+    totals = {
+        "statements": rows[0]["all_statements"] if rows else 0,
+        "calls": rows[0]["all_calls"] if rows else 0,
+        "total_time_ms": rows[0]["all_time_ms"] if rows else 0,
+        "since": rows[0]["all_since"] if rows else None,
+    }
+    return {
+        "available": True,
+        **build_workload_profile(
+            rows,
+            totals,
+            top_n,
+            table_names,
+            "sys.dm_exec_query_stats",
+            "8kb_pages_read",
+        ),
+    }
@@ -0,0 +1,83 @@
+import logging
+from typing import Any
+
+from .workload_summary import WORKLOAD_RANKINGS, build_workload_profile
+
+logger = logging.getLogger(__name__)
+
+# performance_schema timers count picoseconds.
+_PICOSECONDS_PER_MS = 1000000000
+
+
+def _execute_query(conn: Any, query: str) -> list[dict[str, Any]]:
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(query)
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+
+
+def get_mysql_workload(
+    conn: Any, schema_name: str, table_names: list[str], top_n: int = 20
+) -> dict[str, Any]:
+    """
+    Top statement digests of a schema from performance_schema, by total
+    latency, calls, rows sent or affected, and rows examined (the closest
+    figure MySQL keeps to I/O), and the load of each of `table_names`.
+    """
+    try:
+        enabled = _execute_query(conn, "SELECT @@performance_schema AS enabled;")
+    except Exception as e:
+        logger.warning(f"Could not check performance_schema: {e}")
+        return {"available": False, "reason": str(e).strip()}
+    if not enabled or not int(enabled[0]["enabled"]):
+        return {
+            "available": False,
+            "reason": "performance_schema is disabled on this server.",
+        }
+
+    digests = f"""
+        SELECT
+            DIGEST AS query_id,
+            DIGEST_TEXT AS query,
+            COUNT_STAR AS calls,
+            SUM_TIMER_WAIT / {_PICOSECONDS_PER_MS} AS total_time_ms,
+            SUM_ROWS_SENT + SUM_ROWS_AFFECTED AS row_count,
+            SUM_ROWS_EXAMINED AS io
+        FROM performance_schema.events_statements_summary_by_digest
+        WHERE SCHEMA_NAME = '{schema_name}'
+    """
+    # One ORDER BY ... LIMIT per ranking rather than window functions, which
+    # MySQL 5.7 lacks; UNION drops the digests ranked more than once.
+    workload_q = " UNION ".join(
+        f"({digests} ORDER BY {column} DESC LIMIT {top_n})"
+        for column in WORKLOAD_RANKINGS.values()
+    )
+    totals_q = f"""
+    SELECT
+        COUNT(*) AS statements,
+        SUM(COUNT_STAR) AS calls,
+        SUM(SUM_TIMER_WAIT) / {_PICOSECONDS_PER_MS} AS total_time_ms,
+        MIN(FIRST_SEEN) AS since
+    FROM performance_schema.events_statements_summary_by_digest
+    WHERE SCHEMA_NAME = '{schema_name}';
+    """
+    try:
+        rows = _execute_query(conn, workload_q)
+        totals = _execute_query(conn, totals_q)[0]
+    except Exception as e:
+        # Reading performance_schema needs SELECT on it.
+        logger.warning(f"Could not read statement digests: {e}")
+        return {"available": False, "reason": str(e).strip()}
+    return {
+        "available": True,
+        **build_workload_profile(
+            rows,
+            totals,
+            top_n,
+            table_names,
+            "performance_schema.events_statements_summary_by_digest",
+            "rows_examined",
+        ),
+    }
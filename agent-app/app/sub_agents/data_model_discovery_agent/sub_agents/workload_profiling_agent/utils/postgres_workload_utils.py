@@ -0,0 +1,125 @@
+import logging
+from typing import Any
+
+from .workload_summary import build_workload_profile, ranked_filter, ranked_select
+
+logger = logging.getLogger(__name__)
+
+# Blocks of 8 KB touched by a statement: shared and local buffer hits and
+# reads plus temporary file reads.
+_IO_BLOCKS = (
+    "shared_blks_hit + shared_blks_read + local_blks_hit + local_blks_read"
+    " + temp_blks_read"
+)
+
+
+def _execute_query(conn: Any, query: str) -> list[dict[str, Any]]:
+    """Executes a SQL query and returns results as a list of dicts for PostgreSQL."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(query)
+        if cursor.description:
+            columns = [desc[0] for desc in cursor.description]
+            rows = cursor.fetchall()
+            return [dict(zip(columns, row, strict=False)) for row in rows]
+        return []
+    finally:
+        cursor.close()
+
+
+def _stat_statements_schema(conn: Any) -> str | None:
+    """Schema the pg_stat_statements extension is installed in, if it is."""
+    rows = _execute_query(
+        conn,
+        """
+        SELECT n.nspname AS schema_name
+        FROM pg_extension e JOIN pg_namespace n ON n.oid = e.extnamespace
+        WHERE e.extname = 'pg_stat_statements';
+        """,
+    )
+    return rows[0]["schema_name"] if rows else None
+
+
+def _stats_reset(conn: Any, extension_schema: str) -> Any:
+    """When the statement statistics were last reset (PostgreSQL 14+)."""
+    try:
+        rows = _execute_query(
+            conn,
+            f'SELECT stats_reset FROM "{extension_schema}".pg_stat_statements_info;',
+        )
+    except Exception as e:
+        logger.info(f"pg_stat_statements_info is not available: {e}")
+        return None
+    return rows[0]["stats_reset"] if rows else None
+
+
+def get_postgres_workload(
+    conn: Any, table_names: list[str], top_n: int = 20
+) -> dict[str, Any]:
+    """
+    Top statements of the current database from pg_stat_statements, by total
+    execution time, calls, rows and blocks touched, and the load of each of
+    `table_names`. Statements recorded for several users or nesting levels
+    are merged by queryid. Without pg_read_all_stats, other users' statements
+    are counted but their text is hidden.
+    """
+    extension_schema = _stat_statements_schema(conn)
+    if extension_schema is None:
+        return {
+            "available": False,
+            "reason": "The pg_stat_statements extension is not installed in this database.",
+        }
+    view = f'"{extension_schema}".pg_stat_statements'
+    columns = {
+        row["column_name"]
+        for row in _execute_query(
+            conn,
+            f"""
+            SELECT column_name FROM information_schema.columns
+            WHERE table_schema = '{extension_schema}' AND table_name = 'pg_stat_statements';
+            """,
+        )
+    }
+    # PostgreSQL 13 split total_time into planning and execution time.
+    total_time = "total_exec_time" if "total_exec_time" in columns else "total_time"
+    workload_q = f"""
+    WITH statements AS (
+        SELECT
+            queryid::text AS query_id,
+            MIN(query) AS query,
+            SUM(calls) AS calls,
+            SUM({total_time}) AS total_time_ms,
+            SUM(rows) AS row_count,
+            SUM({_IO_BLOCKS}) AS io
+        FROM {view}
+        WHERE dbid = (SELECT oid FROM pg_database WHERE datname = current_database())
+        GROUP BY queryid
+    ), ranked AS (
+        SELECT
+            *,
+            {ranked_select()},
+            COUNT(*) OVER () AS all_statements,
+            SUM(calls) OVER () AS all_calls,
+            SUM(total_time_ms) OVER () AS all_time_ms
+        FROM statements
+    )
+    SELECT * FROM ranked WHERE {ranked_filter(top_n)};
+    """
+    try:
+        rows = _execute_query(conn, workload_q)
+    except Exception as e:
+        # Installed but missing from shared_preload_libraries.
+        logger.warning(f"Could not read pg_stat_statements: {e}")
+        return {"available": False, "reason": str(e).strip()}
+    totals = {
+        "statements": rows[0]["all_statements"] if rows else 0,
+        "calls": rows[0]["all_calls"] if rows else 0,
+        "total_time_ms": rows[0]["all_time_ms"] if rows else 0,
+        "since": _stats_reset(conn, extension_schema),
+    }
+    return {
+        "available": True,
+        **build_workload_profile(
+            rows, totals, top_n, table_names, "pg_stat_statements", "8kb_blocks"
+        ),
+    }
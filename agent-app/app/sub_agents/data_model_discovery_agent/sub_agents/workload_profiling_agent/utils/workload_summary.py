@@ -0,0 +1,127 @@
+import re
+from typing import Any
+
+# Rankings of the workload profile and the figure each one orders by, named
+# alike in the rows the dialect queries return and in the collected statements
+# ("row_count" since ROWS is reserved in MySQL).
+WORKLOAD_RANKINGS = {
+    "total_time": "total_time_ms",
+    "calls": "calls",
+    "rows": "row_count",
+    "io": "io",
+}
+
+# Longest statement text kept per query; digests of long IN lists and bulk
+# inserts are otherwise kilobytes each.
+QUERY_TEXT_MAX_CHARS = 2000
+
+
+def ranked_select() -> str:
+    """Window columns ranking every statement by each figure."""
+    return ", ".join(
+        f"ROW_NUMBER() OVER (ORDER BY {column} DESC) AS rank_{ranking}"
+        for ranking, column in WORKLOAD_RANKINGS.items()
+    )
+
+
+def ranked_filter(top_n: int) -> str:
+    """Keeps the statements among the top_n of any ranking."""
+    return " OR ".join(f"rank_{ranking} <= {top_n}" for ranking in WORKLOAD_RANKINGS)
+
+
+def _share(value: float, total: float) -> float:
+    return round(value / total * 100, 2) if total else 0.0
+
+
+def _table_pattern(table_name: str) -> re.Pattern:
+    """
+    Matches a table name where a statement reads or writes the table: right
+    after FROM, JOIN, UPDATE or INTO, bare, quoted or schema-qualified.
+    """
+    return re.compile(
+        r"\b(?:FROM|JOIN|UPDATE|INTO)\s+(?:ONLY\s+)?(?:[\w$\"`\[\]]+\.)*"
+        rf"[\"`\[]?{re.escape(table_name)}[\"`\]]?(?![\w$])",
+        re.IGNORECASE,
+    )
+
+
+def hot_tables(
+    queries: list[dict[str, Any]], table_names: list[str], total_time_ms: float
+) -> dict[str, dict[str, Any]]:
+    """
+    Load of each table of the schema over the collected statements that
+    reference it, busiest first. A statement touching several tables counts
+    towards each of them. The figures are approximate: statement text is
+    matched, not parsed, so tables listed after the first in a comma join
+    are missed.
+    """
+    tables: dict[str, dict[str, Any]] = {}
+    for table_name in table_names:
+        pattern = _table_pattern(table_name)
+        matched = [q for q in queries if pattern.search(q["query"])]
+        if not matched:
+            continue
+        table_time = sum(q["total_time_ms"] for q in matched)
+        tables[table_name] = {
+            "statements": len(matched),
+            "calls": sum(q["calls"] for q in matched),
+            "total_time_ms": round(table_time, 2),
+            "time_share_pct": _share(table_time, total_time_ms),
+            "max_mean_time_ms": max(q["mean_time_ms"] for q in matched),
+            "row_count": sum(q["row_count"] for q in matched),
+            "io": sum(q["io"] for q in matched),
+        }
+    return dict(
+        sorted(tables.items(), key=lambda item: item[1]["total_time_ms"], reverse=True)
+    )
+
+
+def _statement(row: dict[str, Any], total_time_ms: float) -> dict[str, Any]:
+    """One collected statement, with its figures as plain numbers."""
+    calls = int(row["calls"] or 0)
+    time_ms = float(row["total_time_ms"] or 0)
+    return {
+        "query_id": str(row["query_id"]),
+        "query": row["query"] or "",
+        "calls": calls,
+        "total_time_ms": round(time_ms, 2),
+        "mean_time_ms": round(time_ms / calls, 3) if calls else 0.0,
+        "time_share_pct": _share(time_ms, total_time_ms),
+        "row_count": int(row["row_count"] or 0),
+        "io": int(row["io"] or 0),
+    }
+
+
+def build_workload_profile(
+    rows: list[dict[str, Any]],
+    totals: dict[str, Any],
+    top_n: int,
+    table_names: list[str],
+    source: str,
+    io_unit: str,
+) -> dict[str, Any]:
+    """
+    Workload profile from the statements collected by a dialect: the top_n
+    queries of each ranking and the tables they load.
+    """
+    totals = {
+        "statements": int(totals.get("statements") or 0),
+        "calls": int(totals.get("calls") or 0),
+        "total_time_ms": round(float(totals.get("total_time_ms") or 0), 2),
+        "since": str(totals["since"]) if totals.get("since") else None,
+    }
+    queries = [_statement(row, totals["total_time_ms"]) for row in rows]
+    tables = hot_tables(queries, table_names, totals["total_time_ms"])
+    for query in queries:
+        query["query"] = query["query"][:QUERY_TEXT_MAX_CHARS]
+    return {
+        "source": source,
+        "io_unit": io_unit,
+        "top_n": top_n,
+        "totals": totals,
+        "top_queries": {
+            ranking: sorted(queries, key=lambda q: q[field], reverse=True)[:top_n]
+            for ranking, field in WORKLOAD_RANKINGS.items()
+        },
+        "hot_tables": tables,
+    }
@@ -0,0 +1,166 @@
+import asyncio
+import contextvars
+import logging
+import multiprocessing
+import os
+import threading
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from itertools import chain, islice
+from typing import Any, TypeVar
+
+from .connection_manager import get_connection_manager
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Threads running blocking database and LLM calls for all sessions of the process.
+BLOCKING_WORKERS = int(os.environ.get("DISCOVERY_BLOCKING_WORKERS", "16"))
+# Processes running the CPU-bound part of profiling (pattern classification,
+# sketch and filter hashing), which would otherwise hold the GIL the event
+# loop needs; 0 runs it on the calling thread.
+CPU_WORKERS = int(
+    os.environ.get("DISCOVERY_CPU_WORKERS", str(min(4, os.cpu_count() or 1)))
+)
+# Added to the CPU workers' nice value, so that on a host with few cores the
+# threads serving the sessions get the CPU first.
+CPU_WORKER_NICENESS = int(os.environ.get("DISCOVERY_CPU_WORKER_NICENESS", "10"))
+# Values sent to a CPU worker at once.
+CPU_BATCH_SIZE = int(os.environ.get("DISCOVERY_CPU_BATCH_SIZE", "10000"))
+# Batches of one call queued per CPU worker while the caller fetches more.
+BATCHES_IN_FLIGHT = 2
+
+_executor: ThreadPoolExecutor | None = None
+_process_pool: ProcessPoolExecutor | None = None
+_running: dict[str, Future] = {}
+_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=max(1, BLOCKING_WORKERS),
+                thread_name_prefix="discovery-blocking",
+            )
+        return _executor
+
+
+def _get_process_pool() -> ProcessPoolExecutor | None:
+    global _process_pool
+    with _lock:
+        if _process_pool is None and CPU_WORKERS > 0:
+            # Forking this process would copy locks held by its other threads;
+            # workers fork from a server that has imported the app instead.
+            context = multiprocessing.get_context("forkserver")
+            context.set_forkserver_preload([__name__])
+            _process_pool = ProcessPoolExecutor(
+                max_workers=CPU_WORKERS,
+                mp_context=context,
+                initializer=os.nice,
+                initargs=(CPU_WORKER_NICENESS,),
+            )
+        return _process_pool
+
+
+def _discard_process_pool(pool: ProcessPoolExecutor) -> None:
+    """Drops a pool whose worker died, for instance killed for memory; the next call starts a new one."""
+    global _process_pool
+    with _lock:
+        if _process_pool is pool:
+            _process_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def batched(values: Iterable[T], size: int = CPU_BATCH_SIZE) -> Iterator[list[T]]:
+    """Lists of `size` consecutive values, the last one possibly shorter."""
+    iterator = iter(values)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def map_in_processes(
+    func: Callable[..., T], batches: Iterable[Any], *args: Any
+) -> Iterator[T]:
+    """
+    Yields func(batch, *args) for each batch, in order, computed in the CPU
+    worker processes while the caller goes on fetching batches. `func` must
+    be a module-level function and its arguments and result picklable. A
+    single batch, too small to be worth the round trip, is computed on the
+    calling thread, as is everything when CPU_WORKERS is 0.
+    """
+    iterator = iter(batches)
+    head = list(islice(iterator, 2))
+    pool = _get_process_pool() if len(head) > 1 else None
+    if pool is None:
+        for batch in chain(head, iterator):
+            yield func(batch, *args)
+        return
+
+    pending: deque[Future] = deque()
+    try:
+        for batch in chain(head, iterator):
+            pending.append(pool.submit(func, batch, *args))
+            while pending and (
+                len(pending) > BATCHES_IN_FLIGHT * CPU_WORKERS or pending[0].done()
+            ):
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    except BrokenProcessPool:
+        _discard_process_pool(pool)
+        raise
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def _finished(session_key: str, future: Future) -> None:
+    with _lock:
+        if _running.get(session_key) is future:
+            del _running[session_key]
+            get_connection_manager().resume_session(session_key)
+
+
+async def run_blocking(
+    session_key: str, func: Callable[..., T], *args: Any, **kwargs: Any
+) -> T:
+    """
+    Runs a blocking call on the discovery executor so the event loop keeps
+    serving other sessions while it waits. Its CPU-bound profiling work runs
+    in the CPU worker processes (map_in_processes), so it does not hold up the
+    event loop either.
+
+    If the awaiting task is cancelled, the statements running on the
+    session's connections are cancelled and its connections refuse new ones
+    until the call returns; its result is discarded. A later call for the
+    same session waits for a cancelled one to finish first.
+    """
+    with _lock:
+        previous = _running.get(session_key)
+    if previous is not None:
+        try:
+            await asyncio.shield(asyncio.wrap_future(previous))
+        except Exception:
+            pass
+
+    context = contextvars.copy_context()
+    future = _get_executor().submit(context.run, partial(func, *args, **kwargs))
+    with _lock:
+        _running[session_key] = future
+    future.add_done_callback(partial(_finished, session_key))
+    try:
+        return await asyncio.wrap_future(future)
+    except asyncio.CancelledError:
+        with _lock:
+            if _running.get(session_key) is future:
+                logger.warning(
+                    f"Cancelling the running database work of session {session_key}."
+                )
+                get_connection_manager().cancel_session(session_key)
+        raise
@@ -0,0 +1,470 @@
+import logging
+import os
+import threading
+import time
+import uuid
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from functools import partial
+from typing import Any
+
+import mysql.connector
+import psycopg2
+import pytds as tds
+
+logger = logging.getLogger(__name__)
+
+# Most connections open at once across every session of the process.
+MAX_CONNECTIONS = int(os.environ.get("DB_CONNECTION_MAX", "32"))
+# Idle connections are closed after this many seconds without use.
+IDLE_TTL = float(os.environ.get("DB_CONNECTION_IDLE_TTL", "300"))
+# Connections idle longer than this are pinged before they are handed out.
+HEALTH_CHECK_AFTER = float(os.environ.get("DB_CONNECTION_HEALTH_CHECK_AFTER", "30"))
+# Longest acquire() waits for a connection when the process is at its cap.
+ACQUIRE_TIMEOUT = float(os.environ.get("DB_CONNECTION_ACQUIRE_TIMEOUT", "30"))
+# Seconds allowed for the TCP connect and login of a new MSSQL connection.
+LOGIN_TIMEOUT = 5
+
+
+class ConnectionLimitError(RuntimeError):
+    """No connection could be opened without exceeding MAX_CONNECTIONS."""
+
+
+class OperationCancelledError(RuntimeError):
+    """The session's operation was cancelled; its connections refuse new statements."""
+
+
+def open_connection(
+    metadata: dict[str, Any], password: str, statement_timeout: float | None = None
+) -> Any:
+    """
+    Opens a new connection from the db_connection metadata. For MSSQL the
+    statement timeout is a connection option; the other dialects set it per
+    session, so it is ignored for them here.
+    """
+    db_type = metadata.get("db_type")
+    host = metadata.get("host")
+    port = metadata.get("port")
+    dbname = metadata.get("dbname")
+    user = metadata.get("user")
+
+    if not all([db_type, host, port, dbname, user, password is not None]):
+        raise ValueError(
+            "Missing one or more required connection parameters in metadata or password."
+        )
+    port = int(port)  # type: ignore[arg-type]
+    logger.info(
+        f"Attempting to connect to {db_type} at {host}:{port} as {user} to database {dbname}"
+    )
+    if db_type == "postgresql":
+        conn = psycopg2.connect(
+            host=host, port=port, dbname=dbname, user=user, password=password
+        )
+        conn.autocommit = True
+        return conn
+    elif db_type == "mysql":
+        return mysql.connector.connect(
+            host=host, port=port, database=dbname, user=user, password=password
+        )
+    elif db_type == "mssql":
+        return tds.connect(
+            server=host,
+            port=port,
+            database=dbname,
+            user=user,
+            password=password,
+            login_timeout=LOGIN_TIMEOUT,
+            timeout=statement_timeout,
+            autocommit=True,
+            as_dict=False,
+        )
+    else:
+        raise ValueError(f"Unsupported database type: {db_type}")
+
+
+def _ping(conn: Any) -> None:
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT 1")
+        cursor.fetchall()
+    finally:
+        cursor.close()
+
+
+def _cancel_statement(conn: Any, metadata: dict[str, Any], password: str) -> None:
+    """
+    Asks the server to stop the statement running on conn, from another
+    thread. pytds offers no out-of-band cancel for a busy connection, so MSSQL
+    statements run until their connection timeout.
+    """
+    db_type = metadata.get("db_type")
+    if db_type == "postgresql":
+        conn.cancel()
+    elif db_type == "mysql":
+        killer = open_connection(metadata, password)
+        try:
+            cursor = killer.cursor()
+            cursor.execute(f"KILL QUERY {int(conn.connection_id)}")
+            cursor.close()
+        finally:
+            killer.close()
+
+
+def _reset(conn: Any, db_type: str) -> None:
+    """Ends any open transaction and undoes session settings such as statement timeouts."""
+    if db_type == "postgresql":
+        if not conn.autocommit:
+            conn.rollback()
+            conn.autocommit = True
+        cursor = conn.cursor()
+        try:
+            cursor.execute("RESET ALL")
+        finally:
+            cursor.close()
+    elif db_type == "mysql":
+        conn.reset_session()
+    elif db_type == "mssql":
+        if not getattr(conn, "autocommit", True):
+            conn.rollback()
+
+
+class _CancellableCursor:
+    """A driver cursor that fails before each statement or fetch once cancelled."""
+
+    __slots__ = ("_check", "_cursor")
+
+    def __init__(self, cursor: Any, check: Callable[[], None]):
+        self._cursor = cursor
+        self._check = check
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._cursor, name)
+
+    def execute(self, *args: Any, **kwargs: Any) -> Any:
+        self._check()
+        return self._cursor.execute(*args, **kwargs)
+
+    def fetchmany(self, *args: Any, **kwargs: Any) -> Any:
+        self._check()
+        return self._cursor.fetchmany(*args, **kwargs)
+
+    def fetchall(self) -> Any:
+        self._check()
+        return self._cursor.fetchall()
+
+
+class PooledConnection:
+    """
+    A connection lent by the manager. Everything is delegated to the driver
+    connection except close(), which returns it to the manager instead, and
+    cursor(), whose cursors fail once the session's operation is cancelled.
+    """
+
+    __slots__ = ("_cancel", "_conn", "_manager", "_pool_key", "_released")
+
+    def __init__(
+        self,
+        conn: Any,
+        manager: "ConnectionManager",
+        pool_key: tuple,
+        cancel: Callable[[], None],
+    ):
+        object.__setattr__(self, "_conn", conn)
+        object.__setattr__(self, "_manager", manager)
+        object.__setattr__(self, "_pool_key", pool_key)
+        object.__setattr__(self, "_released", False)
+        object.__setattr__(self, "_cancel", cancel)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._conn, name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(self._conn, name, value)
+
+    def cursor(self, *args: Any, **kwargs: Any) -> Any:
+        check = partial(self._manager._check_cancelled, self._pool_key[0])
+        check()
+        return _CancellableCursor(self._conn.cursor(*args, **kwargs), check)
+
+    def close(self) -> None:
+        if self._released:
+            return
+        object.__setattr__(self, "_released", True)
+        self._manager._release(self)
+
+
+class ConnectionManager:
+    """
+    Warm connections per session, shared by every tool of the discovery
+    agents. Returned connections are reset and kept idle for reuse by the
+    same session; idle ones are pinged before reuse when they have not been
+    used for health_check_after seconds and closed after idle_ttl seconds.
+    At most max_connections are open across all sessions; at the cap the
+    least recently used idle connection of any session is closed to make
+    room, and acquire() waits for a release when none is idle.
+
+    cancel_session() stops the statements running on a session's lent
+    connections and makes them refuse new ones until resume_session().
+    """
+
+    def __init__(
+        self,
+        max_connections: int = MAX_CONNECTIONS,
+        idle_ttl: float = IDLE_TTL,
+        health_check_after: float = HEALTH_CHECK_AFTER,
+        acquire_timeout: float = ACQUIRE_TIMEOUT,
+        connect: Any = open_connection,
+    ) -> None:
+        self.max_connections = max(1, max_connections)
+        self.idle_ttl = idle_ttl
+        self.health_check_after = health_check_after
+        self.acquire_timeout = acquire_timeout
+        self._connect = connect
+        # pool key -> idle (connection, last used) pairs, most recent last
+        self._idle: dict[tuple, list[tuple[Any, float]]] = {}
+        self._open = 0
+        self._lent: dict[str, set[PooledConnection]] = {}
+        self._cancelled: set[str] = set()
+        self._condition = threading.Condition()
+
+    @staticmethod
+    def _pool_key(
+        session_key: str, metadata: dict[str, Any], statement_timeout: float | None
+    ) -> tuple:
+        db_type = metadata.get("db_type")
+        return (
+            session_key,
+            db_type,
+            statement_timeout if db_type == "mssql" else None,
+        )
+
+    def _take_expired(self, now: float) -> list[Any]:
+        expired = []
+        for pool_key in list(self._idle):
+            idle = self._idle[pool_key]
+            keep = [(c, used) for c, used in idle if now - used < self.idle_ttl]
+            expired.extend(c for c, used in idle if now - used >= self.idle_ttl)
+            if keep:
+                self._idle[pool_key] = keep
+            else:
+                del self._idle[pool_key]
+        self._open -= len(expired)
+        return expired
+
+    def _take_least_recently_used(self) -> Any | None:
+        oldest = None
+        for pool_key, idle in self._idle.items():
+            if idle and (oldest is None or idle[0][1] < oldest[1]):
+                oldest = (pool_key, idle[0][1])
+        if oldest is None:
+            return None
+        conn, _ = self._idle[oldest[0]].pop(0)
+        if not self._idle[oldest[0]]:
+            del self._idle[oldest[0]]
+        return conn
+
+    def acquire(
+        self,
+        session_key: str,
+        metadata: dict[str, Any],
+        password: str,
+        statement_timeout: float | None = None,
+        wait: bool = True,
+    ) -> PooledConnection:
+        """
+        A connection for the session, reused when one is idle. With wait=False
+        a ConnectionLimitError is raised at once when the process is at its cap.
+        """
+        self._check_cancelled(session_key)
+        pool_key = self._pool_key(session_key, metadata, statement_timeout)
+        deadline = time.monotonic() + self.acquire_timeout
+        to_close: list[Any] = []
+        reused = None
+        with self._condition:
+            to_close.extend(self._take_expired(time.monotonic()))
+            while True:
+                idle = self._idle.get(pool_key)
+                if idle:
+                    reused = idle.pop()
+                    if not idle:
+                        del self._idle[pool_key]
+                    break
+                if self._open < self.max_connections:
+                    self._open += 1
+                    break
+                victim = self._take_least_recently_used()
+                if victim is not None:
+                    to_close.append(victim)
+                    break
+                remaining = deadline - time.monotonic()
+                if not wait or remaining <= 0:
+                    raise ConnectionLimitError(
+                        f"All {self.max_connections} database connections are in use."
+                    )
+                self._condition.wait(remaining)
+        for conn in to_close:
+            self._close_quietly(conn)
+
+        if reused is not None:
+            conn, last_used = reused
+            if time.monotonic() - last_used < self.health_check_after:
+                return self._lend(conn, pool_key, metadata, password)
+            try:
+                _ping(conn)
+                return self._lend(conn, pool_key, metadata, password)
+            except Exception as e:
+                logger.warning(f"Discarding a broken pooled connection: {e}")
+                self._close_quietly(conn)
+        try:
+            conn = self._connect(metadata, password, statement_timeout)
+        except Exception:
+            with self._condition:
+                self._open -= 1
+                self._condition.notify()
+            raise
+        return self._lend(conn, pool_key, metadata, password)
+
+    def _lend(
+        self, conn: Any, pool_key: tuple, metadata: dict[str, Any], password: str
+    ) -> PooledConnection:
+        pooled = PooledConnection(
+            conn, self, pool_key, partial(_cancel_statement, conn, metadata, password)
+        )
+        with self._condition:
+            self._lent.setdefault(pool_key[0], set()).add(pooled)
+        return pooled
+
+    def _check_cancelled(self, session_key: str) -> None:
+        if session_key in self._cancelled:
+            raise OperationCancelledError(
+                "The operation using this database connection was cancelled."
+            )
+
+    @contextmanager
+    def connection(
+        self,
+        session_key: str,
+        metadata: dict[str, Any],
+        password: str,
+        statement_timeout: float | None = None,
+    ) -> Iterator[PooledConnection]:
+        conn = self.acquire(session_key, metadata, password, statement_timeout)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def _release(self, pooled: PooledConnection) -> None:
+        pool_key, conn = pooled._pool_key, pooled._conn
+        with self._condition:
+            lent = self._lent.get(pool_key[0])
+            if lent is not None:
+                lent.discard(pooled)
+                if not lent:
+                    del self._lent[pool_key[0]]
+        try:
+            _reset(conn, pool_key[1])
+        except Exception as e:
+            logger.warning(f"Closing a pooled connection that could not be reset: {e}")
+            self._close_quietly(conn)
+            with self._condition:
+                self._open -= 1
+                self._condition.notify()
+            return
+        with self._condition:
+            self._idle.setdefault(pool_key, []).append((conn, time.monotonic()))
+            self._condition.notify()
+
+    def close_session(self, session_key: str) -> None:
+        """Closes the idle connections of a session; lent ones close on return."""
+        to_close = []
+        with self._condition:
+            for pool_key in [k for k in self._idle if k[0] == session_key]:
+                to_close.extend(conn for conn, _ in self._idle.pop(pool_key))
+            self._open -= len(to_close)
+            self._condition.notify_all()
+        for conn in to_close:
+            self._close_quietly(conn)
+
+    def cancel_session(self, session_key: str) -> None:
+        """
+        Refuses new statements on the session's connections at once and stops
+        the running ones from a background thread, so callers on an event
+        loop do not block.
+        """
+        with self._condition:
+            self._cancelled.add(session_key)
+            lent = list(self._lent.get(session_key, ()))
+
+        def cancel_statements() -> None:
+            for pooled in lent:
+                try:
+                    pooled._cancel()
+                except Exception as e:
+                    logger.warning(f"Could not cancel a running statement: {e}")
+
+        if lent:
+            threading.Thread(
+                target=cancel_statements, name="db-statement-cancel", daemon=True
+            ).start()
+
+    def resume_session(self, session_key: str) -> None:
+        with self._condition:
+            self._cancelled.discard(session_key)
+
+    def evict_idle(self) -> None:
+        with self._condition:
+            expired = self._take_expired(time.monotonic())
+            if expired:
+                self._condition.notify_all()
+        for conn in expired:
+            self._close_quietly(conn)
+
+    def stats(self) -> dict[str, int]:
+        with self._condition:
+            idle = sum(len(idle) for idle in self._idle.values())
+            return {"open": self._open, "idle": idle, "in_use": self._open - idle}
+
+    @staticmethod
+    def _close_quietly(conn: Any) -> None:
+        try:
+            conn.close()
+        except Exception as e:
+            logger.error(f"Error closing pooled connection: {e}")
+
+
+_manager: ConnectionManager | None = None
+_manager_lock = threading.Lock()
+
+
+def get_connection_manager() -> ConnectionManager:
+    """The process-wide manager, with a daemon thread evicting idle connections."""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = ConnectionManager()
+            manager = _manager
+
+            def evict_forever() -> None:
+                while True:
+                    time.sleep(max(1.0, manager.idle_ttl / 2))
+                    manager.evict_idle()
+
+            threading.Thread(
+                target=evict_forever, name="db-connection-eviction", daemon=True
+            ).start()
+        return _manager
+
+
+def session_key(state: Any) -> str:
+    """
+    Identifies the session's database connection. A new id is issued by every
+    successful validate_db_connection, so new credentials never reuse old
+    connections.
+    """
+    db_connection = state.get("db_connection") or {}
+    key = db_connection.get("connection_id")
+    if not key:
+        key = uuid.uuid4().hex
+        state["db_connection"] = {**db_connection, "connection_id": key}
+    return key
@@ -0,0 +1,95 @@
+"""
+Time and peak memory of the column pattern profile of a large sample.
+
+Generates a table of --rows rows with eight text columns and profiles its
+patterns for sample_size = --rows: once through _profile_column_patterns,
+which reads at most COLUMN_PATTERNS_MAX_ROWS of them, and once over every
+row, counted chunk by chunk.
+
+    uv run python -m benchmarks.column_patterns --rows 1000000
+"""
+
+import argparse
+import logging
+import resource
+import time
+
+from app.sub_agents.data_model_discovery_agent.sub_agents.data_profiling_agent.utils import (
+    postgres_profiling_utils,
+)
+from app.sub_agents.data_model_discovery_agent.sub_agents.data_profiling_agent.utils.column_patterns import (
+    profile_text_columns,
+)
+from app.sub_agents.data_model_discovery_agent.sub_agents.data_profiling_agent.utils.sampling import (
+    plan_table_sampling,
+)
+
+from .common import PATTERNS_SCHEMA_SQL, connect, create_schema
+
+SCHEMA = "bench_patterns"
+TEXT_COLUMNS = [
+    "customer_phone",
+    "zip_code",
+    "amount_txt",
+    "email",
+    "signup_date",
+    "external_ref",
+    "last_ip",
+    "tier",
+]
+
+
+def _peak_rss_mb() -> int:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1024
+
+
+def _report(label: str, started: float, rss_before: int, result: dict) -> None:
+    sampled = result["patterns"]["email"]["values_sampled"]
+    print(
+        f"{label:<28} {time.perf_counter() - started:6.2f} s  "
+        f"peak RSS +{_peak_rss_mb() - rss_before} MB  "
+        f"{sampled} rows, {len(result['anomalies'])} columns with anomalies"
+    )
+
+
+def main(rows: int) -> None:
+    create_schema(PATTERNS_SCHEMA_SQL, schema=SCHEMA, rows=rows)
+    conn = connect()
+    table_info = {
+        "columns": {"id": {"type": "integer"}}
+        | {col_name: {"type": "text"} for col_name in TEXT_COLUMNS},
+        "row_estimate": rows,
+    }
+
+    # Capped first: peak RSS only grows, so the uncapped run is measured on top.
+    rss_before = _peak_rss_mb()
+    started = time.perf_counter()
+    result = postgres_profiling_utils._profile_column_patterns(
+        conn,
+        "contact",
+        table_info,
+        SCHEMA,
+        rows,
+        plan_table_sampling(table_info, rows),
+    )
+    _report("capped pattern profile", started, rss_before, result)
+
+    rss_before = _peak_rss_mb()
+    started = time.perf_counter()
+    select_list = ", ".join(f'"{col_name}"' for col_name in TEXT_COLUMNS)
+    result = profile_text_columns(
+        postgres_profiling_utils._stream_batches(
+            conn, f'SELECT {select_list} FROM "{SCHEMA}"."contact"'
+        ),
+        TEXT_COLUMNS,
+    )
+    _report("every row, chunked", started, rss_before, result)
+    conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    main(args.rows)
@@ -0,0 +1,105 @@
+"""Shared setup of the benchmarks: the PostgreSQL database they run against and the schemas they generate in it."""
+
+import os
+import statistics
+from types import SimpleNamespace
+from typing import Any
+
+import psycopg2
+
+from app.sub_agents.data_model_discovery_agent.sub_agents.schema_introspection_agent.utils import (
+    postgresql_utils,
+)
+
+# PostgreSQL database the benchmarks create their schemas in; they drop and
+# recreate schemas named bench_*, so point this at a scratch database.
+PG_CREDENTIALS = {
+    "host": os.environ.get("BENCHMARK_PG_HOST", "localhost"),
+    "port": int(os.environ.get("BENCHMARK_PG_PORT", "5432")),
+    "dbname": os.environ.get("BENCHMARK_PG_DBNAME", "postgres"),
+    "user": os.environ.get("BENCHMARK_PG_USER", "postgres"),
+    "password": os.environ.get("BENCHMARK_PG_PASSWORD", ""),
+    "db_type": "postgresql",
+}
+
+SHOP_SCHEMA_SQL = """
+DROP SCHEMA IF EXISTS {schema} CASCADE;
+CREATE SCHEMA {schema};
+CREATE TABLE {schema}.customers (
+    id serial PRIMARY KEY, email varchar(200) UNIQUE NOT NULL, phone text,
+    zip char(5), created date
+);
+CREATE TABLE {schema}.products (
+    code text, region int, price numeric(10, 2) CHECK (price > 0),
+    PRIMARY KEY (code, region)
+);
+CREATE TABLE {schema}.orders (
+    id bigserial PRIMARY KEY, customer_id int REFERENCES {schema}.customers (id),
+    pcode text, pregion int, qty int, note text,
+    FOREIGN KEY (pcode, pregion) REFERENCES {schema}.products (code, region)
+);
+CREATE INDEX orders_cust_idx ON {schema}.orders (customer_id, qty);
+CREATE VIEW {schema}.v_orders AS SELECT * FROM {schema}.orders;
+INSERT INTO {schema}.customers (email, phone, zip, created)
+SELECT 'u' || g || '@x.com', CASE WHEN g % 3 = 0 THEN NULL ELSE '555-' || g END,
+       lpad((g % 99999)::text, 5, '0'), date '2020-01-01' + g
+FROM generate_series(1, 2000) g;
+INSERT INTO {schema}.products VALUES ('a', 1, 9.5), ('b', 2, 3);
+INSERT INTO {schema}.orders (customer_id, pcode, pregion, qty, note)
+SELECT (g % 2000) + 1, CASE WHEN g % 2 = 0 THEN 'a' END, CASE WHEN g % 2 = 0 THEN 1 END,
+       g % 10, CASE WHEN g % 5 = 0 THEN NULL ELSE 'n' || g END
+FROM generate_series(1, 5000) g;
+ANALYZE {schema}.customers, {schema}.products, {schema}.orders;
+"""
+
+# Text columns holding typed values, with a few rows off the dominant pattern.
+PATTERNS_SCHEMA_SQL = """
+DROP SCHEMA IF EXISTS {schema} CASCADE;
+CREATE SCHEMA {schema};
+CREATE TABLE {schema}.contact AS
+SELECT g AS id,
+       CASE WHEN g % 997 = 0 THEN 'call me' ELSE '555-' || lpad(g::text, 4, '0') END AS customer_phone,
+       CASE WHEN g % 1009 = 0 THEN 'n/a' ELSE lpad((g % 99999)::text, 5, '0') END AS zip_code,
+       CASE WHEN g % 499 = 0 THEN 'unknown' ELSE g || '.' || (g % 100) END AS amount_txt,
+       'user' || g || '@example.com' AS email,
+       CASE WHEN g % 503 = 0 THEN 'soon' ELSE (date '2020-01-01' + g % 3000)::text END AS signup_date,
+       md5(g::text)::uuid::text AS external_ref,
+       (g % 256) || '.' || (g / 256 % 256) || '.' || (g % 7) || '.1' AS last_ip,
+       (ARRAY['gold', 'silver', 'bronze', 'none'])[g % 4 + 1] AS tier
+FROM generate_series(1, {rows}) g;
+ALTER TABLE {schema}.contact ADD PRIMARY KEY (id);
+ANALYZE {schema}.contact;
+"""
+
+
+def connect() -> Any:
+    """Autocommit connection to the benchmark database."""
+    conn = psycopg2.connect(
+        **{k: v for k, v in PG_CREDENTIALS.items() if k != "db_type"}
+    )
+    conn.autocommit = True
+    return conn
+
+
+def create_schema(sql: str, **params: Any) -> None:
+    conn = connect()
+    try:
+        conn.cursor().execute(sql.format(**params))
+    finally:
+        conn.close()
+
+
+def without_llm() -> None:
+    """Keeps the naming rules of relationship inference but skips the LLM calls."""
+    postgresql_utils.client = None
+
+
+def tool_context() -> SimpleNamespace:
+    """Stand-in for the ADK ToolContext: the tools only use its state."""
+    return SimpleNamespace(state={})
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    return statistics.quantiles(values, n=100, method="inclusive")[
+        round(fraction * 100) - 1
+    ]
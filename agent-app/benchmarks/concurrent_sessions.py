@@ -0,0 +1,171 @@
+"""
+Latency of other sessions while one session profiles a large schema.
+
+Four sessions call get_schema_details on a small schema every 0.5 s,
+staggered; latency is measured open-loop, from when each request was due.
+They run alone first, then while a fifth session profiles a generated
+table of --rows rows; the run fails if their p99 latency during the profile
+exceeds the larger of --p99-factor times and --p99-slack-ms above their p99
+alone. Finally a profile is cancelled mid-run to check that its worker stops
+and the session can be used again.
+
+    uv run python -m benchmarks.concurrent_sessions --rows 1000000
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+
+from app.sub_agents.data_model_discovery_agent.sub_agents.data_profiling_agent.tools import (
+    profile_schema_data,
+)
+from app.sub_agents.data_model_discovery_agent.sub_agents.database_cred_agent.tools import (
+    validate_db_connection,
+)
+from app.sub_agents.data_model_discovery_agent.sub_agents.schema_introspection_agent.tools import (
+    get_schema_details,
+)
+from app.sub_agents.data_model_discovery_agent.utils import blocking
+from app.sub_agents.data_model_discovery_agent.utils.connection_manager import (
+    session_key,
+)
+
+from .common import (
+    PATTERNS_SCHEMA_SQL,
+    PG_CREDENTIALS,
+    SHOP_SCHEMA_SQL,
+    create_schema,
+    percentile,
+    tool_context,
+    without_llm,
+)
+
+SMALL_SCHEMA = "bench_shop"
+LARGE_SCHEMA = "bench_patterns"
+SESSIONS = 4
+INTERVAL = 0.5
+
+
+async def _connected_session():
+    context = tool_context()
+    result = await validate_db_connection(dict(PG_CREDENTIALS), context)
+    if result.get("status") != "success":
+        raise RuntimeError(result)
+    return context
+
+
+async def _other_session(
+    index: int, stop: asyncio.Event, latencies: list[float]
+) -> None:
+    context = await _connected_session()
+    due = time.perf_counter() + index * INTERVAL / SESSIONS
+    while not stop.is_set():
+        due += INTERVAL
+        await asyncio.sleep(max(0.0, due - time.perf_counter()))
+        result = await get_schema_details(context, {"schema_name": SMALL_SCHEMA})
+        latencies.append(time.perf_counter() - due)
+        if "error" in result:
+            raise RuntimeError(result)
+        due = max(due, time.perf_counter())
+
+
+def _report(label: str, latencies: list[float]) -> None:
+    print(
+        f"{label:<24} n={len(latencies):<4} "
+        f"p50={percentile(latencies, 0.5) * 1000:7.1f} ms  "
+        f"p99={percentile(latencies, 0.99) * 1000:7.1f} ms  "
+        f"max={max(latencies) * 1000:7.1f} ms"
+    )
+
+
+async def main(
+    rows: int,
+    sample_size: int,
+    cancel_after: float,
+    p99_factor: float,
+    p99_slack_ms: float,
+) -> None:
+    without_llm()
+    create_schema(SHOP_SCHEMA_SQL, schema=SMALL_SCHEMA)
+    create_schema(PATTERNS_SCHEMA_SQL, schema=LARGE_SCHEMA, rows=rows)
+
+    # Introspect both schemas once so every measured call is a cache hit.
+    profiler = await _connected_session()
+    await get_schema_details(profiler, {"schema_name": SMALL_SCHEMA})
+    await get_schema_details(profiler, {"schema_name": LARGE_SCHEMA})
+
+    alone: list[float] = []
+    stop = asyncio.Event()
+    sessions = [
+        asyncio.create_task(_other_session(i, stop, alone)) for i in range(SESSIONS)
+    ]
+    await asyncio.sleep(4)
+    stop.set()
+    await asyncio.gather(*sessions)
+
+    during: list[float] = []
+    stop = asyncio.Event()
+    sessions = [
+        asyncio.create_task(_other_session(i, stop, during)) for i in range(SESSIONS)
+    ]
+    await asyncio.sleep(0.3)
+    started = time.perf_counter()
+    result = await profile_schema_data(
+        profiler, {"sample_size": sample_size, "pool_size": 2}
+    )
+    profile_seconds = time.perf_counter() - started
+    stop.set()
+    await asyncio.gather(*sessions)
+
+    print(f"profile of {rows} rows: {profile_seconds:.1f} s, {result.get('status')}")
+    _report("other sessions alone", alone)
+    _report("during the profile", during)
+    p99_alone = percentile(alone, 0.99)
+    p99_bound = max(p99_factor * p99_alone, p99_alone + p99_slack_ms / 1000)
+    p99_during = percentile(during, 0.99)
+    print(f"p99 bound during the profile: {p99_bound * 1000:.1f} ms")
+    if p99_during > p99_bound:
+        raise SystemExit(
+            f"p99 latency of other sessions during the profile was "
+            f"{p99_during * 1000:.1f} ms, above the bound of {p99_bound * 1000:.1f} ms"
+        )
+
+    task = asyncio.create_task(
+        profile_schema_data(profiler, {"sample_size": rows, "pool_size": 2})
+    )
+    await asyncio.sleep(cancel_after)
+    cancelled = time.perf_counter()
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+    running = blocking._running.get(session_key(profiler.state))
+    while running is not None and not running.done():
+        await asyncio.sleep(0.01)
+    print(
+        f"cancelled profile stopped {time.perf_counter() - cancelled:.2f} s after cancel"
+    )
+    result = await get_schema_details(profiler, {"schema_name": SMALL_SCHEMA})
+    print(f"session usable after cancel: {'error' not in result}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--sample-size", type=int, default=300_000)
+    parser.add_argument("--cancel-after", type=float, default=1.0)
+    parser.add_argument("--p99-factor", type=float, default=2.0)
+    parser.add_argument("--p99-slack-ms", type=float, default=50.0)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    asyncio.run(
+        main(
+            args.rows,
+            args.sample_size,
+            args.cancel_after,
+            args.p99_factor,
+            args.p99_slack_ms,
+        )
+    )
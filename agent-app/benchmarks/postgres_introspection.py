@@ -0,0 +1,96 @@
+"""
+Round trips and time of get_postgres_schema_details on a wide schema.
+
+Generates --tables tables, each with a primary key, a foreign key to the
+previous table, an index and a CHECK constraint, and introspects them with
+the LLM analysis skipped.
+
+    uv run python -m benchmarks.postgres_introspection --tables 5000
+"""
+
+import argparse
+import logging
+import time
+from typing import Any
+
+from app.sub_agents.data_model_discovery_agent.sub_agents.schema_introspection_agent.utils import (
+    postgresql_utils,
+)
+
+from .common import connect, create_schema, without_llm
+
+SCHEMA = "bench_wide"
+
+# Tables created per transaction; each one takes several locks.
+TABLES_PER_TRANSACTION = 500
+
+WIDE_TABLES_SQL = """
+DO $$
+BEGIN
+    FOR i IN {first}..{last} LOOP
+        EXECUTE format(
+            'CREATE TABLE {schema}.t%s (
+                id serial PRIMARY KEY,
+                parent_id int%s,
+                code varchar(20) CHECK (code <> %L),
+                amount numeric(10, 2),
+                created_at timestamp DEFAULT now()
+            )',
+            i,
+            CASE WHEN i > 1 THEN format(' REFERENCES {schema}.t%s (id)', i - 1) ELSE '' END,
+            ''
+        );
+        EXECUTE format('CREATE INDEX ON {schema}.t%s (code, created_at)', i);
+    END LOOP;
+END $$;
+"""
+
+
+class _CountingConnection:
+    """Counts the cursors opened on a connection, one per catalog query."""
+
+    def __init__(self, conn: Any) -> None:
+        self._conn = conn
+        self.round_trips = 0
+
+    def cursor(self, *args: Any, **kwargs: Any) -> Any:
+        self.round_trips += 1
+        return self._conn.cursor(*args, **kwargs)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._conn, name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name in ("_conn", "round_trips"):
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self._conn, name, value)
+
+
+def main(tables: int) -> None:
+    without_llm()
+    create_schema(
+        "DROP SCHEMA IF EXISTS {schema} CASCADE; CREATE SCHEMA {schema};",
+        schema=SCHEMA,
+    )
+    for first in range(1, tables + 1, TABLES_PER_TRANSACTION):
+        last = min(tables, first + TABLES_PER_TRANSACTION - 1)
+        create_schema(WIDE_TABLES_SQL, schema=SCHEMA, first=first, last=last)
+    conn = _CountingConnection(connect())
+    started = time.perf_counter()
+    details = postgresql_utils.get_postgres_schema_details(conn, SCHEMA)
+    seconds = time.perf_counter() - started
+    print(
+        f"{len(details['tables'])} tables: {conn.round_trips} round trips, "
+        f"{seconds:.2f} s, {len(details['foreign_keys'])} foreign keys, "
+        f"{sum(len(t['indexes']) for t in details['tables'].values())} indexes"
+    )
+    conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--tables", type=int, default=5000)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    main(args.tables)
@@ -0,0 +1,138 @@
+"""
+Accuracy of the naming rules of relationship inference and the LLM context
+left after them, on synthetic schemas.
+
+Each table has a primary key, three references to other entities (30% of
+them declared as foreign keys, the rest left to be inferred) and one
+*_ref_id column that references nothing. The context sent to the LLM is
+compared with the whole-schema context it received before the rules ran:
+every table's columns and constraints plus the declared foreign keys.
+Tokens are estimated as characters / 4.
+
+    uv run python -m benchmarks.relationship_inference --tables 20 200 2000
+"""
+
+import argparse
+import logging
+import random
+import time
+from typing import Any
+
+from app.sub_agents.data_model_discovery_agent.sub_agents.schema_introspection_agent.utils.analysis_chunks import (
+    estimate_tokens,
+    plan_chunks,
+)
+from app.sub_agents.data_model_discovery_agent.sub_agents.schema_introspection_agent.utils.relationship_inference import (
+    infer_relationships,
+)
+
+MODULES = ["crm", "billing", "inventory", "hr", "shipping"]
+MODULES += ["sales", "support", "finance", "catalog", "auth"]
+ENTITIES = ["customer", "order", "invoice", "product", "employee", "shipment"]
+ENTITIES += ["ticket", "account", "payment", "supplier", "warehouse", "category"]
+ENTITIES += ["address", "contract", "region", "store", "vendor", "campaign"]
+ENTITIES += ["lead", "asset"]
+DECLARED_SHARE = 0.3
+
+
+def _plural(entity: str) -> str:
+    return entity + ("es" if entity.endswith("s") else "s")
+
+
+def synthetic_schema(
+    tables: int, seed: int = 7
+) -> tuple[dict[str, Any], set[tuple[str, ...]]]:
+    """Schema details of `tables` tables and the undeclared references among them."""
+    rng = random.Random(seed)
+    details: dict[str, Any] = {"tables": {}, "views": {}, "foreign_keys": []}
+    truth = set()
+    for i in range(tables):
+        entity = ENTITIES[i % len(ENTITIES)]
+        module = MODULES[(i // len(ENTITIES)) % len(MODULES)]
+        copy = i // (len(ENTITIES) * len(MODULES))
+        name = _plural(entity)
+        if i >= len(ENTITIES):
+            name = f"{module}_{name}" + (f"_{copy}" if copy else "")
+        columns = {
+            "id": {"type": "integer", "nullable": False},
+            "name": {"type": "character varying"},
+            "created_at": {"type": "timestamp without time zone"},
+            "external_ref_id": {"type": "character varying"},
+            "notes": {"type": "text"},
+        }
+        for target in rng.sample(ENTITIES, 3):
+            if target == entity:
+                continue
+            col_name = rng.choice([f"{target}_id", f"primary_{target}_id"])
+            columns[col_name] = {"type": "integer", "nullable": True}
+            if rng.random() < DECLARED_SHARE:
+                details["foreign_keys"].append(
+                    {
+                        "constraint_name": f"fk_{name}_{col_name}",
+                        "from_table": name,
+                        "from_column": col_name,
+                        "to_schema": "bench",
+                        "to_table": _plural(target),
+                        "to_column": "id",
+                    }
+                )
+            else:
+                truth.add((name, col_name, _plural(target), "id"))
+        details["tables"][name] = {
+            "columns": columns,
+            "constraints": [
+                {
+                    "table_name": name,
+                    "constraint_name": f"{name}_pkey",
+                    "constraint_type": "PRIMARY KEY",
+                    "column_name": "id",
+                    "check_clause": None,
+                }
+            ],
+            "indexes": [],
+        }
+    return details, truth
+
+
+def whole_schema_context(details: dict[str, Any]) -> dict[str, Any]:
+    """The context every table contributed to the LLM prompt before the rules."""
+    return {
+        "tables": {
+            table_name: {
+                "columns": list(table_info["columns"]),
+                "constraints": table_info["constraints"],
+            }
+            for table_name, table_info in details["tables"].items()
+        },
+        "existing_foreign_keys": details["foreign_keys"],
+    }
+
+
+def main(table_counts: list[int]) -> None:
+    for tables in table_counts:
+        details, truth = synthetic_schema(tables)
+        started = time.perf_counter()
+        inference = infer_relationships(details)
+        seconds = time.perf_counter() - started
+        inferred = {
+            (r["from_table"], r["from_column"], r["to_table"], r["to_column"])
+            for r in inference["inferred"]
+        }
+        contexts = plan_chunks(details, inference["ambiguous"], inference["inferred"])
+        before = estimate_tokens(whole_schema_context(details))
+        after = sum(estimate_tokens(context) for context in contexts)
+        print(
+            f"{tables:>5} tables: rules {seconds * 1000:7.1f} ms, "
+            f"{len(inferred & truth)}/{len(truth)} inferred, "
+            f"{len(inferred - truth)} wrong, {len(inference['ambiguous'])} left "
+            f"for the LLM; context ~{before} -> ~{after} tokens "
+            f"in {len(contexts)} request(s)"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--tables", type=int, nargs="+", default=[20, 200, 2000])
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    main(args.tables)
@@ -0,0 +1,191 @@
+import random
+import threading
+import time
+from typing import Any
+
+import pytest
+
+from app.sub_agents.data_model_discovery_agent.sub_agents.schema_introspection_agent.utils.analysis_chunks import (
+    analyze_chunks,
+    estimate_tokens,
+    plan_chunks,
+    table_clusters,
+)
+
+
+def _table(*columns: str) -> dict[str, Any]:
+    return {
+        "columns": {"id": {"type": "integer"}}
+        | {col_name: {"type": "integer"} for col_name in columns},
+        "constraints": [
+            {
+                "constraint_name": "pk",
+                "constraint_type": "PRIMARY KEY",
+                "column_name": "id",
+            }
+        ],
+    }
+
+
+def _synthetic_schema(
+    table_count: int = 2000, seed: int = 7
+) -> tuple[dict[str, Any], list[dict[str, Any]]]:
+    """Modules of 40 tables, each table with up to three ambiguous references."""
+    rnd = random.Random(seed)
+    names = [f"mod{i // 40}_entity_{i}" for i in range(table_count)]
+    tables = {}
+    ambiguous = []
+    for name in names:
+        col_names = [f"ref{j}_id" for j in range(rnd.randint(0, 3))]
+        tables[name] = _table(*col_names)
+        for col_name in col_names:
+            ambiguous.append(
+                {
+                    "from_table": name,
+                    "from_column": col_name,
+                    "type": "integer",
+                    "candidates": [
+                        {"to_table": t, "to_column": "id", "confidence": 0.8}
+                        for t in rnd.sample(names, rnd.randint(0, 3))
+                    ],
+                }
+            )
+    return {"tables": tables, "foreign_keys": []}, ambiguous
+
+
+def _placed(chunk: dict[str, Any]) -> list[str]:
+    return [*chunk["ambiguous_columns"]] + [
+        f"{table_name}.{col_name}"
+        for table_name, col_names in chunk["unmatched_columns"].items()
+        for col_name in col_names
+    ]
+
+
+@pytest.fixture(scope="module")
+def synthetic():
+    schema, ambiguous = _synthetic_schema()
+    return schema, ambiguous, plan_chunks(schema, ambiguous, [], token_budget=5000)
+
+
+def test_schema_that_fits_is_sent_whole():
+    schema = {"tables": {"customers": _table(), "orders": _table("customer_id")}}
+    ambiguous = [
+        {
+            "from_table": "orders",
+            "from_column": "customer_id",
+            "type": "integer",
+            "candidates": [
+                {"to_table": "customers", "to_column": "id", "confidence": 0.8}
+            ],
+        }
+    ]
+    (chunk,) = plan_chunks(schema, ambiguous, [])
+    assert set(chunk["table_keys"]) == {"customers", "orders"}
+
+
+def test_every_ambiguous_column_lands_in_exactly_one_chunk(synthetic):
+    _, ambiguous, chunks = synthetic
+    assert len(chunks) > 1
+    placed = [column for chunk in chunks for column in _placed(chunk)]
+    assert sorted(placed) == sorted(
+        f"{c['from_table']}.{c['from_column']}" for c in ambiguous
+    )
+
+
+def test_chunks_respect_the_budget_and_are_filled(synthetic):
+    _, _, chunks = synthetic
+    sizes = [estimate_tokens(chunk) for chunk in chunks]
+    assert max(sizes) <= 5000
+    # Most chunks are nearly full; the last ones hold what fit nowhere else.
+    assert sum(sizes) / len(sizes) >= 0.85 * 5000
+    assert sorted(sizes)[len(sizes) // 4] >= 0.85 * 5000
+
+
+def test_chunks_carry_the_keys_of_their_candidate_targets(synthetic):
+    schema, _, chunks = synthetic
+    for chunk in chunks:
+        for candidates in (
+            c["candidates"] for c in chunk["ambiguous_columns"].values()
+        ):
+            for target in candidates:
+                assert target.split(".")[0] in chunk["table_keys"]
+        for table_name in chunk["unmatched_columns"]:
+            assert table_name in chunk["table_keys"]
+    assert len(chunks[0]["table_keys"]) < len(schema["tables"])
+
+
+def test_related_tables_share_a_chunk():
+    schema, ambiguous = _synthetic_schema(table_count=400)
+    relationships = [
+        {"from_table": "mod0_entity_0", "to_table": "mod9_entity_399"},
+    ]
+    clusters = table_clusters(schema, relationships)
+    assert len(clusters) == 9
+    chunks = plan_chunks(schema, ambiguous, relationships, token_budget=9000)
+    assert len(chunks) > 1
+    for cluster in clusters:
+        holding = {
+            i
+            for i, chunk in enumerate(chunks)
+            for column in _placed(chunk)
+            if column.split(".")[0] in cluster
+        }
+        assert len(holding) == 1
+
+
+def test_cluster_larger_than_the_budget_is_split_by_table():
+    schema, ambiguous = _synthetic_schema(table_count=40)
+    chunks = plan_chunks(schema, ambiguous, [], token_budget=500)
+    assert len(table_clusters(schema, [])) == 1
+    assert len(chunks) > 1
+    assert max(estimate_tokens(chunk) for chunk in chunks) <= 500
+    placed = [column for chunk in chunks for column in _placed(chunk)]
+    assert len(placed) == len(set(placed)) == len(ambiguous)
+
+
+def _chunk(name: str) -> dict[str, Any]:
+    return {"ambiguous_columns": {}, "unmatched_columns": {}, "table_keys": {name: []}}
+
+
+def test_failing_chunk_drops_only_its_own_results():
+    def analyze(context):
+        (name,) = context["table_keys"]
+        if name == "b":
+            raise TimeoutError("deadline exceeded")
+        return [{"from_table": name, "n": n} for n in range(2)]
+
+    results = analyze_chunks([_chunk(n) for n in "abc"], analyze, concurrency=3)
+    assert [(r["from_table"], r["n"]) for r in results] == [
+        ("a", 0),
+        ("a", 1),
+        ("c", 0),
+        ("c", 1),
+    ]
+
+
+def test_single_failing_chunk_returns_nothing():
+    def analyze(context):
+        raise ValueError("not JSON")
+
+    assert analyze_chunks([_chunk("a")], analyze) == []
+
+
+def test_concurrency_limit_and_chunk_order():
+    lock = threading.Lock()
+    running = peak = 0
+
+    def analyze(context):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        (name,) = context["table_keys"]
+        # Later chunks finish first.
+        time.sleep(0.01 * (10 - int(name)))
+        with lock:
+            running -= 1
+        return [name]
+
+    results = analyze_chunks([_chunk(str(n)) for n in range(10)], analyze, 3)
+    assert results == [str(n) for n in range(10)]
+    assert peak == 3
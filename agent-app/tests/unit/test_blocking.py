@@ -0,0 +1,51 @@
+import os
+
+import pytest
+
+from app.sub_agents.data_model_discovery_agent.utils import blocking
+from app.sub_agents.data_model_discovery_agent.utils.blocking import (
+    batched,
+    map_in_processes,
+)
+
+
+def _sum_in(batch: list[int], offset: int) -> tuple[int, int]:
+    return sum(batch) + offset, os.getpid()
+
+
+def _fail_on_seven(batch: list[int]) -> int:
+    if 7 in batch:
+        raise ValueError("seven")
+    return len(batch)
+
+
+def test_batched():
+    assert list(batched(range(7), 3)) == [[0, 1, 2], [3, 4, 5], [6]]
+    assert list(batched([], 3)) == []
+
+
+def test_batches_run_in_worker_processes_and_come_back_in_order():
+    batches = list(batched(range(1000), 10))
+    results = list(map_in_processes(_sum_in, iter(batches), 1))
+    assert [total for total, _ in results] == [sum(b) + 1 for b in batches]
+    assert os.getpid() not in {pid for _, pid in results}
+
+
+def test_single_batch_runs_on_the_calling_thread():
+    ((total, pid),) = map_in_processes(_sum_in, [[1, 2, 3]], 0)
+    assert (total, pid) == (6, os.getpid())
+
+
+def test_no_cpu_workers_runs_everything_on_the_calling_thread(monkeypatch):
+    monkeypatch.setattr(blocking, "CPU_WORKERS", 0)
+    monkeypatch.setattr(blocking, "_process_pool", None)
+    results = list(map_in_processes(_sum_in, batched(range(100), 10), 0))
+    assert {pid for _, pid in results} == {os.getpid()}
+    assert blocking._process_pool is None
+
+
+def test_worker_error_is_raised_to_the_caller():
+    results = map_in_processes(_fail_on_seven, batched(range(20), 5))
+    assert next(results) == 5
+    with pytest.raises(ValueError, match="seven"):
+        list(results)
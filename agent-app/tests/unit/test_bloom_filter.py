@@ -0,0 +1,94 @@
+import importlib
+
+import pytest
+
+from app.sub_agents.data_model_discovery_agent.sub_agents.data_profiling_agent.utils import (
+    bloom_filter,
+)
+from app.sub_agents.data_model_discovery_agent.sub_agents.data_profiling_agent.utils.bloom_filter import (
+    ERROR_RATE,
+    BloomFilter,
+    orphan_estimate,
+)
+
+
+def test_no_false_negatives():
+    bloom = BloomFilter.for_capacity(10_000)
+    bloom.update(range(10_000))
+    assert all(value in bloom for value in range(10_000))
+    assert bloom.count == 10_000
+
+
+def test_update_sets_the_same_bits_as_add():
+    added = BloomFilter.for_capacity(50_000)
+    for value in range(50_000):
+        added.add(value)
+    added.add(None)
+    updated = BloomFilter.for_capacity(50_000)
+    updated.update([*range(50_000), None])
+    assert updated.array == added.array
+    assert updated.count == added.count == 50_000
+
+
+def test_false_positive_rate_at_capacity():
+    bloom = BloomFilter.for_capacity(20_000)
+    bloom.update(range(20_000))
+    assert bloom.false_positive_rate() <= 1.1 * ERROR_RATE
+    false_positives = sum(value in bloom for value in range(20_000, 220_000))
+    # 200,000 absent probes at 0.1% expect 200; allow for chance.
+    assert false_positives <= 2.5 * ERROR_RATE * 200_000
+
+
+def test_size_is_capped_and_the_error_rate_grows_instead():
+    capped = BloomFilter.for_capacity(100_000, max_bytes=16 * 1024)
+    assert capped.size_bytes == 16 * 1024
+    capped.update(range(100_000))
+    assert capped.false_positive_rate() > ERROR_RATE
+    assert all(value in capped for value in range(100_000))
+
+
+def test_max_bytes_from_the_environment(monkeypatch):
+    monkeypatch.setenv("ORPHAN_BLOOM_MAX_BYTES", "4096")
+    try:
+        reloaded = importlib.reload(bloom_filter)
+        assert reloaded.MAX_BYTES == 4096
+        assert reloaded.BloomFilter.for_capacity(1_000_000).size_bytes == 4096
+        result = reloaded.orphan_estimate(range(1000), range(10), parent_rows=10**9)
+        assert result["estimate"]["filter_bytes"] == 4096
+    finally:
+        monkeypatch.delenv("ORPHAN_BLOOM_MAX_BYTES")
+        importlib.reload(bloom_filter)
+
+
+def test_unknown_capacity_uses_the_default():
+    assert (
+        BloomFilter.for_capacity(None).bits
+        == BloomFilter.for_capacity(bloom_filter.DEFAULT_CAPACITY).bits
+    )
+
+
+def test_too_small_filter_is_rejected():
+    with pytest.raises(ValueError):
+        BloomFilter(4, 1)
+
+
+def test_orphan_percentage():
+    # 1,000 child values over 100 distinct keys, 25 of which have no parent.
+    children = [n % 100 for n in range(1000)] + [None] * 50
+    result = orphan_estimate(range(25, 1000), children, parent_rows=975)
+    assert result["value"] == 25.0
+    assert result["estimate"]["method"] == "bloom_filter"
+    assert result["estimate"]["parent_keys"] == 975
+    assert result["estimate"]["values_checked"] == 1000
+    assert result["estimate"]["false_positive_rate"] <= ERROR_RATE
+
+
+def test_orphan_percentage_is_a_lower_bound_under_false_positives():
+    # A filter far over capacity reports most absent values as present.
+    result = orphan_estimate(range(100_000), range(100_000, 101_000), parent_rows=10)
+    assert result["value"] < 100.0
+    assert result["estimate"]["false_positive_rate"] > 0.5
+
+
+def test_no_child_values():
+    assert orphan_estimate(range(10), [None, None])["value"] == 0
@@ -0,0 +1,184 @@
+from typing import Any
+
+from app.sub_agents.data_model_discovery_agent.sub_agents.schema_introspection_agent.utils.fk_validator import (
+    validate_foreign_keys,
+)
+
+
+def _key(name: str, kind: str, *columns: str) -> list[dict[str, Any]]:
+    return [
+        {"constraint_name": name, "constraint_type": kind, "column_name": column}
+        for column in columns
+    ]
+
+
+def _fk(
+    name: str, from_table: str, from_column: str, to_table: str, to_column: str
+) -> dict[str, Any]:
+    return {
+        "constraint_name": name,
+        "from_table": from_table,
+        "from_column": from_column,
+        "to_schema": "shop",
+        "to_table": to_table,
+        "to_column": to_column,
+    }
+
+
+def _schema(foreign_keys: list[dict[str, Any]], **overrides: Any) -> dict[str, Any]:
+    tables = {
+        "customers": {
+            "columns": {"id": {"type": "int"}, "email": {"type": "text"}},
+            "constraints": _key("customers_pkey", "PRIMARY KEY", "id"),
+        },
+        "products": {
+            "columns": {"code": {"type": "text"}, "region": {"type": "integer"}},
+            "constraints": _key("products_pkey", "PRIMARY KEY", "code", "region"),
+        },
+        "orders": {
+            "columns": {
+                "id": {"type": "integer"},
+                "customer_id": {"type": "int(11)"},
+                "pcode": {"type": "text"},
+                "pregion": {"type": "integer"},
+            },
+            "constraints": _key("orders_pkey", "PRIMARY KEY", "id"),
+            "indexes": [
+                {"name": "orders_customer_idx", "columns": ["customer_id"]},
+                {"name": "orders_product_idx", "columns": ["pregion", "pcode", "id"]},
+            ],
+        },
+    }
+    tables.update(overrides)
+    return {"tables": tables, "foreign_keys": foreign_keys}
+
+
+def _types(anomalies: list[dict[str, Any]]) -> list[str]:
+    return [a["anomaly_type"] for a in anomalies]
+
+
+def test_valid_single_and_composite_keys_have_no_anomalies():
+    schema = _schema(
+        [
+            _fk("orders_customer_fk", "orders", "customer_id", "customers", "id"),
+            _fk("orders_product_fk", "orders", "pcode", "products", "code"),
+            _fk("orders_product_fk", "orders", "pregion", "products", "region"),
+        ]
+    )
+    assert validate_foreign_keys("shop", schema) == []
+
+
+def test_reference_to_part_of_a_composite_key():
+    schema = _schema([_fk("orders_product_fk", "orders", "pcode", "products", "code")])
+    anomalies = validate_foreign_keys("shop", schema)
+    # No index leads with pcode either: orders_product_idx starts with pregion.
+    assert _types(anomalies) == ["missing_index", "target_not_unique"]
+    assert anomalies[1]["to_column"] == "code"
+
+
+def test_display_width_is_not_a_type_mismatch():
+    # orders.customer_id is int(11), MySQL's int with a display width.
+    schema = _schema(
+        [_fk("orders_customer_fk", "orders", "customer_id", "customers", "id")]
+    )
+    assert validate_foreign_keys("shop", schema) == []
+
+
+def test_type_mismatches():
+    schema = _schema(
+        [
+            _fk("orders_customer_fk", "orders", "customer_id", "customers", "id"),
+            _fk("orders_email_fk", "orders", "pregion", "customers", "email"),
+        ],
+        customers={
+            "columns": {"id": {"type": "bigint"}, "email": {"type": "text"}},
+            "constraints": _key("customers_pkey", "PRIMARY KEY", "id")
+            + _key("customers_email_key", "UNIQUE", "email"),
+        },
+    )
+    schema["tables"]["orders"]["indexes"].append({"columns": ["pregion"]})
+    anomalies = validate_foreign_keys("shop", schema)
+    assert _types(anomalies) == ["type_mismatch", "type_mismatch"]
+    assert "implicit conversion" in anomalies[0]["explanation"]
+    assert "without a cast" in anomalies[1]["explanation"]
+
+
+def test_missing_target_table_and_column():
+    schema = _schema(
+        [
+            _fk("orders_store_fk", "orders", "customer_id", "stores", "id"),
+            _fk("orders_customer_fk", "orders", "customer_id", "customers", "uid"),
+        ]
+    )
+    assert _types(validate_foreign_keys("shop", schema)) == [
+        "missing_target_table",
+        "missing_target_column",
+    ]
+
+
+def test_unique_index_makes_a_valid_target():
+    schema = _schema(
+        [_fk("orders_email_fk", "orders", "customer_id", "customers", "email")]
+    )
+    schema["tables"]["customers"]["columns"]["email"]["type"] = "int"
+    assert _types(validate_foreign_keys("shop", schema)) == ["target_not_unique"]
+    schema["tables"]["customers"]["indexes"] = [{"columns": ["email"], "unique": True}]
+    assert validate_foreign_keys("shop", schema) == []
+
+
+def test_targets_in_other_schemas_are_not_checked():
+    fk = _fk("orders_account_fk", "orders", "customer_id", "accounts", "id")
+    fk["to_schema"] = "billing"
+    assert validate_foreign_keys("shop", _schema([fk])) == []
+
+
+def test_unindexed_foreign_key():
+    schema = _schema(
+        [_fk("orders_customer_fk", "orders", "customer_id", "customers", "id")]
+    )
+    schema["tables"]["orders"]["indexes"] = [
+        {"columns": ["id", "customer_id"]},
+    ]
+    (anomaly,) = validate_foreign_keys("shop", schema)
+    assert anomaly["anomaly_type"] == "missing_index"
+    assert anomaly["from_column"] == "customer_id"
+
+
+def test_composite_foreign_key_index_may_list_its_columns_in_any_order():
+    fks = [
+        _fk("orders_product_fk", "orders", "pcode", "products", "code"),
+        _fk("orders_product_fk", "orders", "pregion", "products", "region"),
+    ]
+    assert validate_foreign_keys("shop", _schema(fks)) == []
+    schema = _schema(fks)
+    # Only a leading column of the FK is indexed.
+    schema["tables"]["orders"]["indexes"] = [{"columns": ["pregion", "id", "pcode"]}]
+    assert _types(validate_foreign_keys("shop", schema)) == ["missing_index"]
+
+
+def test_primary_key_constraint_counts_as_an_index():
+    schema = _schema(
+        [_fk("items_order_fk", "order_items", "order_id", "orders", "id")],
+        order_items={
+            "columns": {"order_id": {"type": "integer"}, "line": {"type": "int"}},
+            "constraints": _key("order_items_pkey", "PRIMARY KEY", "order_id", "line"),
+        },
+    )
+    assert validate_foreign_keys("shop", schema) == []
+
+
+def test_uppercase_constraint_rows():
+    schema = _schema([])
+    schema["tables"]["customers"]["constraints"] = [
+        {"CONSTRAINT_NAME": "PK", "CONSTRAINT_TYPE": "PRIMARY KEY", "COLUMN_NAME": "id"}
+    ]
+    schema["foreign_keys"] = [
+        {
+            "CONSTRAINT_NAME": "FK",
+            "from_table": "orders",
+            "from_column": "customer_id",
+            "to_table": "customers",
+            "to_column": "id",
+        }
+    ]
+    assert validate_foreign_keys("shop", schema) == []
@@ -0,0 +1,157 @@
+import pytest
+
+from app.sub_agents.data_model_discovery_agent.sub_agents.data_profiling_agent.utils import (
+    hyperloglog,
+)
+from app.sub_agents.data_model_discovery_agent.sub_agents.data_profiling_agent.utils.hyperloglog import (
+    HyperLogLog,
+    _hash64,
+    estimate_bounds,
+    hash_sample_bits,
+    hash_sampled_count,
+    precision_for_error,
+)
+
+
+def _sketch(values, precision: int = 14) -> HyperLogLog:
+    sketch = HyperLogLog(precision)
+    sketch.update(values)
+    return sketch
+
+
+def test_precision_for_error():
+    assert precision_for_error(0.01) == 14
+    assert precision_for_error(0.02) == 12
+    assert precision_for_error(0.5) == 4
+    assert precision_for_error(0.0001) == 18
+    for relative_error in (0.005, 0.01, 0.03, 0.1):
+        assert HyperLogLog.for_error(relative_error).relative_error <= relative_error
+    with pytest.raises(ValueError):
+        precision_for_error(1.5)
+
+
+def test_precision_out_of_range():
+    with pytest.raises(ValueError):
+        HyperLogLog(3)
+    with pytest.raises(ValueError):
+        HyperLogLog(19)
+
+
+@pytest.mark.parametrize("cardinality", [0, 1, 100, 5_000, 200_000])
+def test_count_within_three_standard_errors(cardinality):
+    sketch = _sketch(range(cardinality))
+    assert abs(sketch.count() - cardinality) <= 3 * sketch.relative_error * max(
+        1, cardinality
+    )
+
+
+def test_update_equals_adding_value_by_value():
+    sketch = HyperLogLog(12)
+    for value in range(50_000):
+        sketch.add(f"v{value}")
+    assert _sketch((f"v{value}" for value in range(50_000)), 12).registers == (
+        sketch.registers
+    )
+
+
+def test_duplicates_and_nulls_are_not_counted():
+    sketch = _sketch([*range(1000), *range(1000), None, None])
+    assert abs(sketch.count() - 1000) <= 30
+
+
+def test_merge_equals_sketch_of_union():
+    left = _sketch(range(0, 60_000), 12)
+    right = _sketch(range(40_000, 100_000), 12)
+    left.merge(right)
+    assert left.registers == _sketch(range(100_000), 12).registers
+    assert abs(left.count() - 100_000) <= 3 * left.relative_error * 100_000
+
+
+def test_merge_rejects_other_precision():
+    with pytest.raises(ValueError):
+        HyperLogLog(12).merge(HyperLogLog(14))
+
+
+def test_dict_round_trip():
+    sketch = _sketch(range(10_000), 10)
+    restored = HyperLogLog.from_dict(sketch.to_dict())
+    assert restored.precision == 10
+    assert restored.registers == sketch.registers
+    assert restored.count() == sketch.count()
+    data = sketch.to_dict()
+    data["precision"] = 11
+    with pytest.raises(ValueError):
+        HyperLogLog.from_dict(data)
+
+
+def test_estimate_bounds():
+    assert estimate_bounds(1000, 0.01) == {"low": 980, "high": 1020}
+    assert estimate_bounds(10, 0.6) == {"low": 0, "high": 22}
+
+
+def test_hash_sample_bits(monkeypatch):
+    monkeypatch.setattr(hyperloglog, "HASH_SAMPLE_ROWS", 1000)
+    assert hash_sample_bits(None) == 0
+    assert hash_sample_bits(1000) == 0
+    assert hash_sample_bits(1001) == 1
+    assert hash_sample_bits(64_000) == 6
+    assert hash_sample_bits(10**15) == hyperloglog.MAX_SAMPLE_BITS
+
+
+def _column(distinct: int, copies: int = 1):
+    """stream(bits) as a dialect builds it: values whose hash has the low bits clear."""
+    calls = []
+
+    def stream(bits):
+        calls.append(bits)
+        mask = (1 << bits) - 1
+        for value in range(distinct):
+            if _hash64(value) & mask == 0:
+                yield from [value] * copies
+
+    return stream, calls
+
+
+def _exact_not_expected():
+    raise AssertionError("exact count not expected")
+
+
+def test_hash_sampled_count_within_its_reported_error(monkeypatch):
+    monkeypatch.setattr(hyperloglog, "HASH_SAMPLE_ROWS", 20_000)
+    stream, calls = _column(400_000)
+    estimate, details = hash_sampled_count(stream, 400_000, 0.05, _exact_not_expected)
+    assert calls == [5]
+    assert details["hash_sample"] == "1/32"
+    assert details["relative_error"] <= 0.05
+    assert details["low"] <= 400_000 <= details["high"]
+    assert abs(estimate - 400_000) <= 2 * details["relative_error"] * 400_000
+
+
+def test_hash_sampled_count_lowers_bits_for_few_distinct_values(monkeypatch):
+    # Many rows but only 3,000 distinct values: a 1/64 sample holds too few.
+    monkeypatch.setattr(hyperloglog, "HASH_SAMPLE_ROWS", 10_000)
+    stream, calls = _column(3_000, copies=200)
+    estimate, details = hash_sampled_count(stream, 600_000, 0.05, _exact_not_expected)
+    assert calls[0] == 6
+    assert calls == sorted(calls, reverse=True)
+    assert len(calls) > 1
+    assert details["relative_error"] <= 0.05
+    assert abs(estimate - 3_000) <= 2 * details["relative_error"] * 3_000
+
+
+def test_hash_sampled_count_falls_back_to_exact(monkeypatch):
+    monkeypatch.setattr(hyperloglog, "HASH_SAMPLE_ROWS", 10_000)
+    stream, calls = _column(50, copies=10_000)
+    estimate, details = hash_sampled_count(stream, 500_000, 0.01, lambda: 50)
+    assert estimate == 50
+    assert details == {"method": "exact", "relative_error": 0.0, "low": 50, "high": 50}
+    assert 0 not in calls
+
+
+def test_small_column_is_sketched_whole(monkeypatch):
+    monkeypatch.setattr(hyperloglog, "HASH_SAMPLE_ROWS", 10_000)
+    stream, calls = _column(5_000)
+    estimate, details = hash_sampled_count(stream, 5_000, 0.02, _exact_not_expected)
+    assert calls == [0]
+    assert "hash_sample" not in details
+    assert abs(estimate - 5_000) <= 2 * details["relative_error"] * 5_000
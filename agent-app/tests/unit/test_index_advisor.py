@@ -0,0 +1,263 @@
+from typing import Any
+
+from app.sub_agents.data_model_discovery_agent.sub_agents.schema_introspection_agent.utils.index_advisor import (
+    HIGH_SEVERITY_SCORE,
+    MEDIUM_SEVERITY_SCORE,
+    advise_indexes,
+)
+
+
+def _index(
+    name: str,
+    columns: list[str],
+    uses: int | None = 100,
+    size_bytes: int = 8 * 1024 * 1024,
+    key_columns: int | None = None,
+    method: str = "btree",
+    primary: bool = False,
+    unique: bool = False,
+    constraint: bool = False,
+    partial: bool = False,
+) -> tuple[dict[str, Any], dict[str, Any]]:
+    """An introspected index and its usage figures, as the dialects return them."""
+    usage = {
+        "method": method,
+        "primary": primary,
+        "unique": unique or primary,
+        "constraint": constraint or primary,
+        "partial": partial,
+        "key_columns": key_columns or len(columns),
+        "uses": uses,
+        "size_bytes": size_bytes,
+    }
+    return {"name": name, "columns": columns}, usage
+
+
+def _advise(
+    indexes: list[tuple[dict[str, Any], dict[str, Any]]],
+    window_days: float | None = 30.0,
+    foreign_keys: list[dict[str, Any]] | None = None,
+    **usage: Any,
+) -> dict[str, Any]:
+    schema = {
+        "tables": {
+            "orders": {
+                "row_estimate": 1_000_000,
+                "indexes": [introspected for introspected, _ in indexes],
+            }
+        },
+        "foreign_keys": foreign_keys or [],
+        "anomalies": usage.pop("anomalies", []),
+    }
+    return advise_indexes(
+        schema,
+        {
+            "stats_window_days": window_days,
+            "indexes": {"orders": {i["name"]: stats for i, stats in indexes}},
+            "table_scans": usage.pop("table_scans", {}),
+            "missing_indexes": usage.pop("missing_indexes", []),
+        },
+    )
+
+
+def _found(advice: dict[str, Any]) -> list[tuple[str, str]]:
+    return sorted((f["type"], f["evidence"].get("index")) for f in advice["findings"])
+
+
+def _customer_fk() -> list[dict[str, Any]]:
+    return [
+        {
+            "constraint_name": "orders_customer_fk",
+            "from_table": "orders",
+            "from_column": "customer_id",
+        }
+    ]
+
+
+def test_duplicate_keeps_the_index_that_enforces_the_most():
+    advice = _advise(
+        [
+            _index("orders_pkey", ["id"], primary=True),
+            _index("orders_id_idx", ["id"], uses=500),
+            _index("orders_customer_a", ["customer_id"], uses=3),
+            _index("orders_customer_b", ["customer_id"], uses=90),
+        ]
+    )
+    assert _found(advice) == [
+        ("duplicate_index", "orders_customer_a"),
+        ("duplicate_index", "orders_id_idx"),
+    ]
+    by_index = {f["evidence"]["index"]: f for f in advice["findings"]}
+    assert by_index["orders_id_idx"]["evidence"]["duplicate_of"] == "orders_pkey"
+    assert (
+        by_index["orders_customer_a"]["evidence"]["duplicate_of"] == "orders_customer_b"
+    )
+
+
+def test_included_columns_are_not_key_columns():
+    # orders_customer_incl is (customer_id) INCLUDE (total).
+    advice = _advise(
+        [
+            _index("orders_customer_idx", ["customer_id"]),
+            _index(
+                "orders_customer_incl", ["customer_id", "total"], 500, key_columns=1
+            ),
+        ]
+    )
+    assert _found(advice) == [("duplicate_index", "orders_customer_idx")]
+
+
+def test_prefix_of_a_longer_index_is_redundant():
+    advice = _advise(
+        [
+            _index("orders_customer_idx", ["customer_id"]),
+            _index("orders_customer_date_idx", ["customer_id", "created_at"]),
+            _index("orders_date_idx", ["created_at"]),
+            _index("orders_customer_key", ["customer_id", "id"], unique=True),
+        ]
+    )
+    (finding,) = advice["findings"]
+    assert finding["type"] == "redundant_prefix_index"
+    assert finding["evidence"]["index"] == "orders_customer_idx"
+    assert finding["evidence"]["covered_by"] == "orders_customer_date_idx"
+
+
+def test_partial_and_hash_indexes_are_only_checked_for_use():
+    advice = _advise(
+        [
+            _index("orders_customer_idx", ["customer_id", "created_at"]),
+            _index("orders_open_idx", ["customer_id"], partial=True),
+            _index("orders_customer_hash", ["customer_id"], method="hash"),
+            _index("orders_unused_hash", ["customer_id"], method="hash", uses=0),
+        ]
+    )
+    assert _found(advice) == [("unused_index", "orders_unused_hash")]
+
+
+def test_unused_indexes_that_enforce_a_key_are_kept():
+    advice = _advise(
+        [
+            _index("orders_pkey", ["id"], primary=True, uses=0),
+            _index("orders_number_key", ["number"], unique=True, uses=0),
+            _index("orders_status_idx", ["status"], uses=0),
+            _index("orders_region_idx", ["region"], uses=None),
+        ]
+    )
+    assert _found(advice) == [("unused_index", "orders_status_idx")]
+    assert advice["findings"][0]["evidence"]["stats_window_days"] == 30.0
+
+
+def test_sole_index_behind_a_foreign_key_is_not_reported_unused():
+    advice = _advise(
+        [_index("orders_customer_idx", ["customer_id"], uses=0)],
+        foreign_keys=_customer_fk(),
+    )
+    assert advice["findings"] == []
+
+    # With a second index leading with customer_id, the unused one can go.
+    advice = _advise(
+        [
+            _index("orders_customer_idx", ["customer_id"], uses=0),
+            _index("orders_customer_hash", ["customer_id"], method="hash"),
+        ],
+        foreign_keys=_customer_fk(),
+    )
+    assert _found(advice) == [("unused_index", "orders_customer_idx")]
+
+
+def test_foreign_key_keeps_one_of_two_unused_duplicates():
+    advice = _advise(
+        [
+            _index("orders_customer_a", ["customer_id"], uses=0),
+            _index("orders_customer_b", ["customer_id"], uses=0),
+        ],
+        foreign_keys=_customer_fk(),
+    )
+    # orders_customer_b goes as a duplicate, so orders_customer_a must stay.
+    assert _found(advice) == [("duplicate_index", "orders_customer_b")]
+
+
+def test_short_stats_window_downgrades_unused_findings():
+    big = 10 * 1024**3
+    long_window = _advise([_index("orders_status_idx", ["status"], 0, big)])
+    short_window = _advise([_index("orders_status_idx", ["status"], 0, big)], 2.0)
+    (long_finding,) = long_window["findings"]
+    (short_finding,) = short_window["findings"]
+    assert long_finding["score"] >= HIGH_SEVERITY_SCORE
+    assert short_finding["score"] < MEDIUM_SEVERITY_SCORE
+    assert short_finding["severity"] == "low"
+    assert "too recent" in short_finding["detail"]
+    assert "too recent" not in long_finding["detail"]
+    assert short_window["stats_window_days"] == 2.0
+
+
+def test_findings_are_ranked_by_score():
+    advice = _advise(
+        [
+            _index("orders_status_idx", ["status"], uses=0, size_bytes=1024),
+            _index("orders_id_idx", ["id"], size_bytes=10 * 1024**3),
+            _index("orders_id_copy", ["id"], size_bytes=10 * 1024**3, uses=1),
+        ],
+        anomalies=[
+            {
+                "anomaly_type": "missing_index",
+                "constraint_name": "orders_store_fk",
+                "from_table": "orders",
+                "from_column": "store_id",
+                "explanation": "No index leads with store_id.",
+            }
+        ],
+        table_scans={
+            "orders": {"full_scans": 900, "index_scans": 10, "rows_read": 5 * 10**8}
+        },
+    )
+    findings = advice["findings"]
+    assert [f["rank"] for f in findings] == list(range(1, len(findings) + 1))
+    assert [f["score"] for f in findings] == sorted(
+        (f["score"] for f in findings), reverse=True
+    )
+    assert [f["type"] for f in findings] == [
+        "duplicate_index",
+        "unindexed_foreign_key",
+        "full_scan_heavy_table",
+        "unused_index",
+    ]
+    assert advice["summary"]["by_type"] == {
+        "duplicate_index": 1,
+        "unindexed_foreign_key": 1,
+        "full_scan_heavy_table": 1,
+        "unused_index": 1,
+    }
+    assert sum(advice["summary"]["by_severity"].values()) == 4
+
+
+def test_full_scans_need_a_large_table_read_mostly_without_an_index():
+    indexed = {"full_scans": 5, "index_scans": 5000, "rows_read": 10**7}
+    assert _advise([], table_scans={"orders": indexed})["findings"] == []
+    unknown = {"full_scans": None, "index_scans": None, "rows_read": 10**7}
+    (finding,) = _advise([], table_scans={"orders": unknown})["findings"]
+    assert finding["type"] == "full_scan_heavy_table"
+    assert finding["evidence"]["row_estimate"] == 1_000_000
+
+
+def test_missing_index_suggestion():
+    suggestion = {
+        "table": "orders",
+        "equality_columns": "[status]",
+        "inequality_columns": "[created_at]",
+        "included_columns": "[total]",
+        "uses": 1200,
+        "avg_user_impact": 87.5,
+        "improvement": 250_000.0,
+    }
+    (finding,) = _advise([], missing_indexes=[suggestion])["findings"]
+    assert finding["type"] == "missing_index"
+    assert "([status], [created_at]) including [total]" in finding["detail"]
+    assert "88% lower" in finding["detail"]
+
+
+def test_usage_available():
+    assert _advise([_index("orders_status_idx", ["status"])])["usage_available"]
+    advice = _advise([_index("orders_status_idx", ["status"], uses=None)], None)
+    assert advice["usage_available"] is False
+    assert advice["stats_window_days"] is None
@@ -0,0 +1,207 @@
+import time
+from typing import Any
+
+import pytest
+
+from app.sub_agents.data_model_discovery_agent.sub_agents.data_profiling_agent.utils import (
+    load_shedding,
+)
+from app.sub_agents.data_model_discovery_agent.sub_agents.data_profiling_agent.utils.load_shedding import (
+    AdaptiveConcurrency,
+)
+
+HEALTHY = {
+    "active_sessions": 3,
+    "replication_lag_seconds": 0.0,
+    "probe_latency_ms": 1.0,
+}
+
+
+def _sample(**signals: Any) -> dict[str, Any]:
+    return {**HEALTHY, **signals}
+
+
+class ScriptedProbe:
+    """Returns the given load samples in turn, then repeats the last one."""
+
+    def __init__(self, *samples: dict[str, Any] | Exception) -> None:
+        self.samples = list(samples)
+        self.calls = 0
+
+    def __call__(self) -> dict[str, Any]:
+        self.calls += 1
+        sample = self.samples.pop(0) if len(self.samples) > 1 else self.samples[0]
+        if isinstance(sample, Exception):
+            raise sample
+        return dict(sample)
+
+
+@pytest.fixture(autouse=True)
+def probe_on_every_admit(monkeypatch):
+    monkeypatch.setattr(load_shedding, "PROBE_INTERVAL_SECONDS", 0.0)
+
+
+def _actions(controller: AdaptiveConcurrency) -> list[str]:
+    return [d["action"] for d in controller.summary()["decisions"]]
+
+
+def test_limit_grows_by_one_per_probe_while_every_slot_is_in_use():
+    controller = AdaptiveConcurrency(ScriptedProbe(HEALTHY), ceiling=8)
+    assert controller.limit == load_shedding.INITIAL_CONCURRENCY == 2
+    for _ in range(5):
+        assert controller.admit()
+    assert controller.limit == 5
+    assert _actions(controller) == ["increase"] * 3
+
+
+def test_limit_does_not_grow_while_slots_are_free():
+    controller = AdaptiveConcurrency(ScriptedProbe(HEALTHY), ceiling=8)
+    for _ in range(10):
+        assert controller.admit()
+        controller.release(0.1)
+    assert controller.limit == 2
+    assert _actions(controller) == []
+
+
+def test_limit_stops_at_the_ceiling():
+    controller = AdaptiveConcurrency(ScriptedProbe(HEALTHY), ceiling=3)
+    for _ in range(3):
+        assert controller.admit()
+    assert controller.limit == 3
+    assert controller.admit(deadline=time.monotonic() + 0.05) is False
+    assert controller.limit == 3
+
+
+def test_slow_probe_halves_the_limit(monkeypatch):
+    monkeypatch.setattr(load_shedding, "INITIAL_CONCURRENCY", 8)
+    probe = ScriptedProbe(
+        _sample(probe_latency_ms=1.0),
+        # Twice the best round trip, but within the absolute slack: jitter.
+        _sample(probe_latency_ms=2.0),
+        _sample(probe_latency_ms=120.0),
+        HEALTHY,
+    )
+    controller = AdaptiveConcurrency(probe, ceiling=16)
+    controller.admit()
+    controller.release(0.1)
+    controller.admit()
+    controller.release(0.1)
+    assert controller.limit == 8
+    controller.admit()
+    assert controller.limit == 4
+    (decision,) = controller.summary()["decisions"]
+    assert decision["action"] == "decrease"
+    assert "probe took 120 ms" in decision["reason"]
+
+
+def test_profiling_sessions_do_not_count_as_other_load(monkeypatch):
+    monkeypatch.setattr(load_shedding, "INITIAL_CONCURRENCY", 4)
+    controller = AdaptiveConcurrency(ScriptedProbe(HEALTHY), ceiling=8)
+    controller.admit()
+    controller.admit()
+    # Two of these sessions are the controller's own checks.
+    busy = _sample(active_sessions=load_shedding.ACTIVE_SESSIONS_HIGH + 1)
+    controller._probe = ScriptedProbe(busy)
+    controller.admit()
+    assert controller.limit == 4
+    # With two checks done, only one of them is.
+    controller.release(0.1)
+    controller.release(0.1)
+    controller.admit()
+    assert controller.limit == 2
+    assert "16 other active sessions" in controller.summary()["decisions"][0]["reason"]
+
+
+def test_replication_lag_halves_the_limit_down_to_one(monkeypatch):
+    monkeypatch.setattr(load_shedding, "INITIAL_CONCURRENCY", 4)
+    lagging = _sample(replication_lag_seconds=load_shedding.REPLICATION_LAG_HIGH)
+    controller = AdaptiveConcurrency(ScriptedProbe(lagging), ceiling=8)
+    for _ in range(3):
+        controller.admit()
+        controller.release(0.1)
+    assert controller.limit == 1
+    assert _actions(controller) == ["decrease", "decrease"]
+
+
+def test_timed_out_check_halves_the_limit_once_per_interval(monkeypatch):
+    monkeypatch.setattr(load_shedding, "PROBE_INTERVAL_SECONDS", 60.0)
+    monkeypatch.setattr(load_shedding, "INITIAL_CONCURRENCY", 8)
+    controller = AdaptiveConcurrency(ScriptedProbe(HEALTHY), ceiling=8)
+    controller.check_timed_out()
+    controller.check_timed_out()
+    assert controller.limit == 4
+
+
+def test_stressed_server_pauses_and_resumes_at_one(monkeypatch):
+    monkeypatch.setattr(load_shedding, "INITIAL_CONCURRENCY", 4)
+    stressed = _sample(active_sessions=load_shedding.ACTIVE_SESSIONS_PAUSE)
+    probe = ScriptedProbe(stressed, stressed, stressed, HEALTHY)
+    controller = AdaptiveConcurrency(probe, ceiling=8)
+    assert controller.admit()
+    assert probe.calls == 4
+    assert controller.limit == 1
+    summary = controller.summary()
+    assert _actions(controller) == ["pause", "resume"]
+    assert summary["pauses"] == 1
+    assert summary["paused_seconds"] > 0
+    assert summary["stopped_for_load"] is False
+
+
+def test_admit_gives_up_at_its_deadline_while_paused():
+    lagging = _sample(replication_lag_seconds=load_shedding.REPLICATION_LAG_PAUSE)
+    controller = AdaptiveConcurrency(ScriptedProbe(lagging), ceiling=4)
+    assert controller.admit(deadline=time.monotonic() + 0.05) is False
+    assert controller.summary()["stopped_for_load"] is False
+
+
+def test_long_pause_stops_the_run(monkeypatch):
+    monkeypatch.setattr(load_shedding, "MAX_PAUSE_SECONDS", 0.05)
+    stressed = _sample(active_sessions=load_shedding.ACTIVE_SESSIONS_PAUSE)
+    probe = ScriptedProbe(stressed)
+    controller = AdaptiveConcurrency(probe, ceiling=4)
+    assert controller.admit() is False
+    calls = probe.calls
+    assert controller.admit() is False
+    assert probe.calls == calls
+    summary = controller.summary()
+    assert summary["stopped_for_load"] is True
+    assert summary["paused_seconds"] >= 0.05
+    assert _actions(controller) == ["pause", "stop"]
+
+
+def test_failed_probe_leaves_the_limit_alone():
+    probe = ScriptedProbe(RuntimeError("permission denied"), HEALTHY)
+    controller = AdaptiveConcurrency(probe, ceiling=4)
+    assert controller.admit()
+    assert controller.limit == 2
+    assert controller.summary()["probes"] == 1
+
+
+def test_summary(monkeypatch):
+    monkeypatch.setattr(load_shedding, "MAX_RECORDED_DECISIONS", 2)
+    controller = AdaptiveConcurrency(ScriptedProbe(HEALTHY), ceiling=8)
+    for _ in range(6):
+        controller.admit()
+    for seconds in (0.5, 0.1, 0.2, 0.4, 0.3, 2.0):
+        controller.release(seconds)
+    summary = controller.summary()
+    assert summary["adaptive"] is True
+    assert (summary["ceiling"], summary["initial_limit"]) == (8, 2)
+    assert summary["max_limit"] == summary["final_limit"] == 6
+    assert summary["probes"] == 6
+    assert summary["check_seconds"] == {"count": 6, "p50": 0.4, "p95": 2.0, "max": 2.0}
+    assert len(summary["decisions"]) == 2
+    assert summary["decisions_dropped"] == 2
+    assert summary["decisions"][0]["limit"] == 3
+    assert summary["decisions"][0]["probe_latency_ms"] == 1.0
+
+
+def test_summary_without_checks():
+    summary = AdaptiveConcurrency(ScriptedProbe(HEALTHY), ceiling=0).summary()
+    assert summary["ceiling"] == summary["final_limit"] == 1
+    assert summary["check_seconds"] == {
+        "count": 0,
+        "p50": None,
+        "p95": None,
+        "max": None,
+    }
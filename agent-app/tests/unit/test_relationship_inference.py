@@ -0,0 +1,260 @@
+from typing import Any
+
+from app.sub_agents.data_model_discovery_agent.sub_agents.schema_introspection_agent.utils.relationship_inference import (
+    AMBIGUITY_MARGIN,
+    infer_relationships,
+    llm_context,
+    merge_inferred,
+    single_column_keys,
+    types_compatible,
+)
+
+
+def _table(
+    columns: dict[str, str], primary_key: str | None = "id", unique: tuple = ()
+) -> dict[str, Any]:
+    constraints = []
+    if primary_key:
+        constraints.append(
+            {
+                "constraint_name": "pk",
+                "constraint_type": "PRIMARY KEY",
+                "column_name": primary_key,
+            }
+        )
+    for col_name in unique:
+        constraints.append(
+            {
+                "constraint_name": f"uq_{col_name}",
+                "constraint_type": "UNIQUE",
+                "column_name": col_name,
+            }
+        )
+    return {
+        "columns": {name: {"type": col_type} for name, col_type in columns.items()},
+        "constraints": constraints,
+    }
+
+
+def _by_column(result: list[dict[str, Any]]) -> dict[tuple[str, str], dict]:
+    return {(r["from_table"], r["from_column"]): r for r in result}
+
+
+def test_suffix_matches_plural_table_and_its_primary_key():
+    schema = {
+        "tables": {
+            "customers": _table({"id": "integer"}),
+            "orders": _table({"id": "integer", "customer_id": "integer"}),
+        }
+    }
+    inferred = _by_column(infer_relationships(schema)["inferred"])
+    relationship = inferred[("orders", "customer_id")]
+    assert (relationship["to_table"], relationship["to_column"]) == ("customers", "id")
+    assert relationship["confidence"] == 0.95
+    assert relationship["source"] == "rules"
+
+
+def test_plural_forms_and_camel_case_names():
+    schema = {
+        "tables": {
+            "categories": _table({"id": "integer"}),
+            "statuses": _table({"id": "integer"}),
+            "products": _table(
+                {"id": "integer", "categoryId": "integer", "status_id": "integer"}
+            ),
+        }
+    }
+    inferred = _by_column(infer_relationships(schema)["inferred"])
+    assert inferred[("products", "categoryId")]["to_table"] == "categories"
+    assert inferred[("products", "status_id")]["to_table"] == "statuses"
+
+
+def test_key_suffixes_other_than_id_match_a_unique_column():
+    schema = {
+        "tables": {
+            "countries": _table({"id": "integer", "code": "char(2)"}, unique=("code",)),
+            "addresses": _table({"id": "integer", "country_code": "char(2)"}),
+        }
+    }
+    inferred = _by_column(infer_relationships(schema)["inferred"])
+    assert inferred[("addresses", "country_code")]["to_column"] == "code"
+
+
+def test_prefixed_table_names_match_at_lower_confidence():
+    schema = {
+        "tables": {
+            "crm_customers": _table({"id": "integer"}),
+            "orders": _table({"id": "integer", "customer_id": "integer"}),
+        }
+    }
+    relationship = _by_column(infer_relationships(schema)["inferred"])[
+        ("orders", "customer_id")
+    ]
+    assert relationship["to_table"] == "crm_customers"
+    assert "prefixed" in relationship["explanation"]
+    assert relationship["confidence"] == 0.8
+
+
+def test_role_prefix_before_the_table_name():
+    schema = {
+        "tables": {
+            "customers": _table({"id": "integer"}),
+            "invoices": _table(
+                {
+                    "id": "integer",
+                    "billing_customer_id": "integer",
+                    "shipping_customer_id": "integer",
+                }
+            ),
+        }
+    }
+    inferred = _by_column(infer_relationships(schema)["inferred"])
+    for col_name in ("billing_customer_id", "shipping_customer_id"):
+        relationship = inferred[("invoices", col_name)]
+        assert relationship["to_table"] == "customers"
+        assert "role" in relationship["explanation"]
+
+
+def test_single_token_id_column():
+    schema = {
+        "tables": {
+            "users": _table({"id": "integer"}),
+            "sessions": _table({"id": "integer", "userid": "integer"}),
+        }
+    }
+    inferred = _by_column(infer_relationships(schema)["inferred"])
+    assert inferred[("sessions", "userid")]["to_table"] == "users"
+
+
+def test_equally_scored_candidates_are_left_ambiguous():
+    schema = {
+        "tables": {
+            "customer": _table({"id": "integer"}),
+            "customers": _table({"id": "integer"}),
+            "orders": _table({"id": "integer", "customer_id": "integer"}),
+        }
+    }
+    result = infer_relationships(schema)
+    assert result["inferred"] == []
+    (column,) = result["ambiguous"]
+    assert {c["to_table"] for c in column["candidates"]} == {"customer", "customers"}
+
+
+def test_runner_up_beyond_the_margin_is_not_ambiguous():
+    # The exact match scores 0.95; the prefixed one 0.8, more than the margin below.
+    schema = {
+        "tables": {
+            "customers": _table({"id": "integer"}),
+            "crm_customers": _table({"id": "integer"}),
+            "orders": _table({"id": "integer", "customer_id": "integer"}),
+        }
+    }
+    result = infer_relationships(schema)
+    assert 0.95 - 0.8 >= AMBIGUITY_MARGIN
+    assert result["ambiguous"] == []
+    assert result["inferred"][0]["to_table"] == "customers"
+
+
+def test_incompatible_types_drop_the_candidate():
+    schema = {
+        "tables": {
+            "customers": _table({"id": "integer"}),
+            "orders": _table({"id": "integer", "customer_id": "date"}),
+        }
+    }
+    result = infer_relationships(schema)
+    assert result["inferred"] == []
+    assert result["ambiguous"] == [
+        {
+            "from_table": "orders",
+            "from_column": "customer_id",
+            "type": "date",
+            "candidates": [],
+        }
+    ]
+
+
+def test_compatible_but_different_types_score_lower():
+    schema = {
+        "tables": {
+            "customers": _table({"id": "bigint"}),
+            "orders": _table({"id": "integer", "customer_id": "numeric(10)"}),
+        }
+    }
+    relationship = infer_relationships(schema)["inferred"][0]
+    assert relationship["confidence"] == 0.9
+
+
+def test_declared_keys_own_primary_key_and_plain_columns_are_skipped():
+    schema = {
+        "tables": {
+            "customers": _table({"id": "integer", "name": "text"}),
+            "orders": _table(
+                {"order_id": "integer", "customer_id": "integer"},
+                primary_key="order_id",
+            ),
+        },
+        "foreign_keys": [{"from_table": "orders", "from_column": "customer_id"}],
+    }
+    result = infer_relationships(schema)
+    assert result == {"inferred": [], "ambiguous": []}
+
+
+def test_reference_without_target_table_is_unmatched_in_llm_context():
+    schema = {
+        "tables": {
+            "customers": _table({"id": "integer"}),
+            "customer": _table({"id": "integer"}),
+            "orders": _table(
+                {"id": "integer", "warehouse_id": "integer", "customer_id": "integer"}
+            ),
+        }
+    }
+    ambiguous = infer_relationships(schema)["ambiguous"]
+    context = llm_context(schema, ambiguous, key_tables={"customers"})
+    assert context["unmatched_columns"] == {"orders": ["warehouse_id"]}
+    assert context["ambiguous_columns"]["orders.customer_id"]["candidates"] == {
+        "customer.id": 0.95,
+        "customers.id": 0.95,
+    }
+    assert context["table_keys"] == {"customers": ["id"]}
+
+
+def test_merge_keeps_rule_results_over_llm_suggestions():
+    rules = [{"from_table": "orders", "from_column": "customer_id", "to_table": "a"}]
+    llm = [
+        {"from_table": "orders", "from_column": "customer_id", "to_table": "b"},
+        {"from_table": "orders", "from_column": "warehouse_id", "to_table": "c"},
+        {"from_table": "orders", "from_column": "warehouse_id", "to_table": "d"},
+        "not a relationship",
+    ]
+    merged = merge_inferred(rules, llm)
+    assert [r["to_table"] for r in merged] == ["a", "c"]
+    assert merged[1]["source"] == "llm"
+    assert merged[1]["confidence"] is None
+
+
+def test_types_compatible():
+    assert types_compatible("int(11)", "bigint") is True
+    assert types_compatible("integer", "numeric(12, 2)") is True
+    assert types_compatible("varchar(10)", "integer") is False
+    assert types_compatible(None, "integer") is None
+
+
+def test_single_column_keys_ignore_composite_constraints():
+    table = {
+        "constraints": [
+            {
+                "CONSTRAINT_NAME": "pk",
+                "CONSTRAINT_TYPE": "PRIMARY KEY",
+                "COLUMN_NAME": "a",
+            },
+            {
+                "CONSTRAINT_NAME": "pk",
+                "CONSTRAINT_TYPE": "PRIMARY KEY",
+                "COLUMN_NAME": "b",
+            },
+            {"CONSTRAINT_NAME": "uq", "CONSTRAINT_TYPE": "UNIQUE", "COLUMN_NAME": "c"},
+        ]
+    }
+    assert single_column_keys(table) == {"c": "UNIQUE"}
@@ -0,0 +1,150 @@
+from typing import Any
+
+from app.sub_agents.data_model_discovery_agent.sub_agents.batch_discovery_agent.utils.rollup import (
+    build_rollup,
+    schema_figures,
+)
+
+
+def _instance(name: str, status: str = "succeeded", **fields: Any) -> dict[str, Any]:
+    return {
+        "instance": name,
+        "db_type": "postgresql",
+        "status": status,
+        "attempts": 1,
+        "errors": [],
+        **fields,
+    }
+
+
+def _unit(
+    instance: str, schema: str, status: str = "succeeded", **fields: Any
+) -> dict[str, Any]:
+    return {
+        "instance": instance,
+        "schema": schema,
+        "status": status,
+        "attempts": 1,
+        "errors": [],
+        "seconds": 1.5,
+        **fields,
+    }
+
+
+def test_schema_figures():
+    schema_structure = {
+        "tables": {"a": {"columns": {"x": {}, "y": {}}}, "b": {"columns": {"z": {}}}},
+        "views": {"v": {}},
+        "foreign_keys": [{}],
+        "inferred_relationships": [{}, {}],
+        "anomalies": [{}],
+    }
+    data_profile = {
+        "nullability": {"a": {"x": 75.0, "y": 10.0, "z": "error"}},
+        "orphan_records": {"fk1": 12.5, "fk2": 0.0, "fk3": "skipped"},
+        "type_anomalies": {"a.x": {}},
+        "profiling_status": {"complete": False},
+        "throttling": {"pauses": 2},
+    }
+    assert schema_figures(schema_structure, data_profile) == {
+        "tables": 2,
+        "views": 1,
+        "columns": 3,
+        "explicit_fks": 1,
+        "inferred_relationships": 2,
+        "schema_anomalies": 1,
+        "profiled": True,
+        "high_null_columns": 1,
+        "high_orphan_fks": 1,
+        "type_anomalies": 1,
+        "profile_complete": False,
+        "throttling_pauses": 2,
+    }
+    assert "high_null_columns" not in schema_figures(schema_structure, None)
+
+
+def test_totals_per_instance_and_across_the_estate():
+    instances = [
+        _instance("pg1"),
+        _instance("pg2"),
+        _instance("down", "failed", attempts=3, errors=["timeout", "refused"]),
+    ]
+    units = [
+        _unit("pg1", "sales", result={"tables": 10, "columns": 80, "explicit_fks": 4}),
+        _unit(
+            "pg1",
+            "hr",
+            result={"tables": 5, "columns": 20, "profile_complete": False},
+        ),
+        _unit("pg2", "sales", result={"tables": 7, "high_null_columns": 2}),
+        _unit(
+            "pg2",
+            "audit",
+            "failed",
+            attempts=2,
+            errors=["boom", "lock timeout"],
+            stage="profile",
+        ),
+    ]
+    rollup = build_rollup(instances, units)
+
+    pg1 = rollup["instances"]["pg1"]
+    assert (pg1["schemas"], pg1["succeeded"], pg1["partial"], pg1["failed"]) == (
+        2,
+        1,
+        1,
+        0,
+    )
+    assert (pg1["tables"], pg1["columns"], pg1["explicit_fks"]) == (15, 100, 4)
+    assert rollup["instances"]["down"]["reachable"] is False
+    assert rollup["instances"]["down"]["schemas"] == 0
+
+    totals = rollup["totals"]
+    assert totals["instances"] == 3
+    assert totals["instances_unreachable"] == 1
+    assert (totals["schemas"], totals["succeeded"], totals["partial"]) == (4, 2, 1)
+    assert totals["failed"] == 1
+    assert totals["tables"] == 22
+    assert totals["high_null_columns"] == 2
+
+    assert [(row["instance"], row["schema"]) for row in rollup["schemas"]] == [
+        ("pg1", "sales"),
+        ("pg1", "hr"),
+        ("pg2", "sales"),
+        ("pg2", "audit"),
+    ]
+    assert rollup["schemas"][0]["tables"] == 10
+    assert rollup["schemas"][3]["status"] == "failed"
+
+
+def test_failures_carry_their_stage_and_last_error():
+    rollup = build_rollup(
+        [_instance("down", "failed", attempts=3, errors=["timeout", "refused"])],
+        [],
+    )
+    assert rollup["failures"] == [
+        {
+            "instance": "down",
+            "schema": None,
+            "stage": "connect",
+            "attempts": 3,
+            "error": "refused",
+        }
+    ]
+    rollup = build_rollup(
+        [_instance("pg1")],
+        [
+            _unit(
+                "pg1", "audit", "failed", attempts=2, errors=["a", "b"], stage="profile"
+            )
+        ],
+    )
+    assert rollup["failures"] == [
+        {
+            "instance": "pg1",
+            "schema": "audit",
+            "stage": "profile",
+            "attempts": 2,
+            "error": "b",
+        }
+    ]
@@ -0,0 +1,127 @@
+import threading
+import time
+from typing import Any
+
+from app.sub_agents.data_model_discovery_agent.sub_agents.batch_discovery_agent.utils.scheduler import (
+    run_units,
+)
+
+
+def _units(*instances: str) -> list[dict[str, Any]]:
+    return [
+        {"id": f"{instance}/{n}", "instance": instance}
+        for n, instance in enumerate(instances)
+    ]
+
+
+class FakeRun:
+    """run(unit) that sleeps and records how many units were running at once."""
+
+    def __init__(self, seconds: float = 0.02, failures: dict[str, list] | None = None):
+        self.seconds = seconds
+        self.failures = failures or {}
+        self.lock = threading.Lock()
+        self.running: dict[str, int] = {}
+        self.peak_total = 0
+        self.peak_per_instance: dict[str, int] = {}
+        self.starts: dict[str, list[float]] = {}
+
+    def __call__(self, unit: dict[str, Any]) -> Any:
+        instance = unit["instance"]
+        with self.lock:
+            self.starts.setdefault(unit["id"], []).append(time.monotonic())
+            self.running[instance] = self.running.get(instance, 0) + 1
+            self.peak_total = max(self.peak_total, sum(self.running.values()))
+            self.peak_per_instance[instance] = max(
+                self.peak_per_instance.get(instance, 0), self.running[instance]
+            )
+        try:
+            time.sleep(self.seconds)
+            errors = self.failures.get(unit["id"])
+            if errors:
+                raise errors.pop(0)
+            return {"tables": len(unit["id"])}
+        finally:
+            with self.lock:
+                self.running[instance] -= 1
+
+
+def test_every_unit_runs_once_and_succeeds():
+    units = _units("a", "a", "b")
+    run = FakeRun()
+    run_units(units, run, max_concurrent=4, max_per_instance=4)
+    for unit in units:
+        assert unit["status"] == "succeeded"
+        assert unit["attempts"] == 1
+        assert unit["errors"] == []
+        assert unit["result"] == {"tables": len(unit["id"])}
+        assert unit["seconds"] >= 0.01
+
+
+def test_global_and_per_instance_limits():
+    units = _units(*"aaaaaa", *"bbbbbb", *"cc")
+    run = FakeRun()
+    run_units(units, run, max_concurrent=4, max_per_instance=2)
+    assert run.peak_total == 4
+    assert run.peak_per_instance == {"a": 2, "b": 2, "c": 2}
+    assert all(unit["status"] == "succeeded" for unit in units)
+
+
+def test_unit_of_a_busy_instance_does_not_hold_up_the_others():
+    units = _units("a", "a", "a", "b")
+    run = FakeRun(seconds=0.05)
+    run_units(units, run, max_concurrent=2, max_per_instance=1)
+    assert run.peak_per_instance["a"] == 1
+    # b/3 starts alongside a/0, before a/1 gets its turn.
+    assert run.starts["b/3"][0] < run.starts["a/1"][0]
+
+
+def test_retries_back_off_exponentially():
+    units = _units("a", "b")
+    run = FakeRun(
+        seconds=0.0,
+        failures={"a/0": [ConnectionError("reset"), ConnectionError("reset")]},
+    )
+    run_units(
+        units,
+        run,
+        max_concurrent=2,
+        max_per_instance=1,
+        max_attempts=3,
+        retry_backoff=0.1,
+    )
+    unit = units[0]
+    assert unit["status"] == "succeeded"
+    assert unit["attempts"] == 3
+    assert unit["errors"] == ["ConnectionError: reset", "ConnectionError: reset"]
+    first, second, third = run.starts["a/0"]
+    assert second - first >= 0.1
+    assert third - second >= 0.2
+    assert units[1]["attempts"] == 1
+
+
+def test_retries_stop_at_max_attempts():
+    units = _units("a")
+    run = FakeRun(seconds=0.0, failures={"a/0": [TimeoutError()] * 5})
+    run_units(units, run, 1, 1, max_attempts=2, retry_backoff=0.0)
+    assert units[0]["status"] == "failed"
+    assert units[0]["attempts"] == 2
+    assert units[0]["errors"] == ["TimeoutError:", "TimeoutError:"]
+    assert "result" not in units[0]
+
+
+def test_non_retryable_error_fails_at_once():
+    units = _units("a")
+    run = FakeRun(seconds=0.0, failures={"a/0": [PermissionError("denied")]})
+    run_units(
+        units,
+        run,
+        1,
+        1,
+        max_attempts=3,
+        retry_backoff=10.0,
+        is_retryable=lambda e: not isinstance(e, PermissionError),
+    )
+    assert units[0]["status"] == "failed"
+    assert units[0]["attempts"] == 1
+    assert units[0]["errors"] == ["PermissionError: denied"]
@@ -0,0 +1,241 @@
+import uuid
+from decimal import Decimal
+from typing import Any
+
+import pytest
+
+from app.sub_agents.data_model_discovery_agent.sub_agents.data_profiling_agent.utils.value_overlap import (
+    SKETCH_SIZE,
+    BottomKSketch,
+    _normalize,
+    _wilson_lower_bound,
+    containment,
+    discover_relationships,
+    hash_limit,
+    merge_discovered,
+    sketch_hash,
+)
+
+
+def _sketch(values, size: int = 64, limit: int | None = None) -> BottomKSketch:
+    sketch = BottomKSketch(size, limit)
+    sketch.update(values)
+    return sketch
+
+
+# left(md5(<text>), 16) as computed by PostgreSQL's _sketch_hash_filter for the
+# column value on the left; the client must hash the value to the same number.
+SERVER_HASHES = [
+    (42, "a1d0c6e83f027327"),  # integer: 42::text
+    (Decimal("42.00"), "a1d0c6e83f027327"),  # numeric(10,2): trunc(42.00)::text
+    (Decimal("42.50"), "b062d74933a80d73"),  # numeric(10,2): 42.50::text
+    ("  AB-1 ", "dbd21db49cd9704c"),  # text: btrim('  AB-1 ')
+    ("AB-1    ", "dbd21db49cd9704c"),  # char(8): btrim of the padded value
+    ("Zürich", "103a821a3a6a0b92"),  # text hashed as UTF-8
+    (
+        uuid.UUID("0e5a8b2c-6f1d-4a7e-9b3c-2d4f6a8b0c1e"),
+        "acf37723d114f822",
+    ),  # uuid::text
+    ("0e5a8b2c-6f1d-4a7e-9b3c-2d4f6a8b0c1e", "acf37723d114f822"),
+]
+
+
+@pytest.mark.parametrize("value, server_hash", SERVER_HASHES)
+def test_sketch_hash_matches_the_server_rendering(value, server_hash):
+    assert sketch_hash(_normalize(value)) == int(server_hash, 16)
+
+
+def test_normalize():
+    assert _normalize(Decimal("42.00")) == 42
+    assert _normalize(Decimal("42.50")) == Decimal("42.50")
+    assert _normalize(" a ") == "a"
+    assert sketch_hash(_normalize(Decimal("7.0"))) == sketch_hash(_normalize("7"))
+
+
+def test_sketch_keeps_the_smallest_distinct_hashes():
+    sketch = _sketch([*range(1000), *range(500)], size=64)
+    expected = sorted(sketch_hash(v) for v in range(1000))[:64]
+    assert sketch.hashes == set(expected)
+    assert sketch.threshold == expected[-1]
+    assert sketch.values_seen == 1500
+    assert (sketch.min_value, sketch.max_value) == (0, 999)
+
+
+def test_merge_equals_sketch_of_union():
+    left = _sketch(range(0, 600), size=64)
+    left.merge(_sketch(range(400, 1000), size=64))
+    union = _sketch([*range(0, 600), *range(400, 1000)], size=64)
+    assert left.hashes == union.hashes
+    assert left.values_seen == union.values_seen == 1200
+    assert (left.min_value, left.max_value) == (0, 999)
+    with pytest.raises(ValueError):
+        left.merge(BottomKSketch(32))
+
+
+def test_sketch_of_many_batches_equals_sketch_built_value_by_value():
+    values = [f"v{i % 30_000}" for i in range(60_000)]
+    sketch = BottomKSketch(256)
+    for value in values:
+        sketch.add(value)
+    assert _sketch(values, size=256).hashes == sketch.hashes
+
+
+def test_distinct_count_exact_until_full_then_estimated():
+    assert _sketch(range(50)).distinct_count() == 50
+    estimate = _sketch(range(100_000), size=1024).distinct_count()
+    assert abs(estimate - 100_000) <= 0.1 * 100_000
+
+
+def test_limited_sketch_equals_the_full_sketch_once_full():
+    values = range(200_000)
+    limit = hash_limit(len(values), size=256)
+    assert limit is not None
+    full = _sketch(values, size=256)
+    limited = _sketch((v for v in values if sketch_hash(v) <= limit), 256, limit)
+    assert limited.hashes == full.hashes
+    assert limited.threshold == full.threshold
+    assert limited.distinct_count() == full.distinct_count()
+
+
+def test_limited_sketch_that_is_not_full_keeps_the_limit_as_threshold():
+    # A stale estimate ten times the real size lets too few values through.
+    values = range(20_000)
+    limit = hash_limit(200_000, size=256)
+    sketch = _sketch(values, 256, limit)
+    assert len(sketch.hashes) < 256
+    assert sketch.threshold == limit
+    assert all(h <= limit for h in sketch.hashes)
+    assert abs(sketch.distinct_count() - 20_000) <= 0.25 * 20_000
+
+
+def test_hash_limit():
+    assert hash_limit(None) is None
+    assert hash_limit(4 * SKETCH_SIZE) is None
+    assert hash_limit(2**20, size=1024) == 2**64 // 256
+
+
+def test_containment_compares_below_the_lower_threshold():
+    source = _sketch(range(0, 2000, 2), size=128)
+    target = _sketch(range(0, 10_000), size=128)
+    contained, tested = containment(source, target)
+    assert tested > 0
+    assert contained == tested
+    disjoint = _sketch(range(20_000, 30_000), size=128)
+    assert containment(source, disjoint)[0] == 0
+
+
+def test_wilson_lower_bound():
+    assert _wilson_lower_bound(0, 0) == 0.0
+    assert _wilson_lower_bound(10, 10) == pytest.approx(0.7225, abs=1e-4)
+    assert _wilson_lower_bound(90, 100) == pytest.approx(0.8256, abs=1e-4)
+    assert _wilson_lower_bound(900, 1000) > _wilson_lower_bound(90, 100)
+
+
+def _schema(types: dict[tuple[str, str], str]) -> dict[str, Any]:
+    tables: dict[str, Any] = {}
+    for (table_name, col_name), col_type in types.items():
+        tables.setdefault(table_name, {"columns": {}})["columns"][col_name] = {
+            "type": col_type
+        }
+    return {"tables": tables}
+
+
+def test_discovers_a_contained_column():
+    schema = _schema({("orders", "customer_ref"): "text", ("customers", "ref"): "text"})
+    refs = [f"C-{n}" for n in range(5000)]
+    relationships = discover_relationships(
+        schema,
+        {("orders", "customer_ref"): _sketch(refs[::3], size=256)},
+        {("customers", "ref"): _sketch(refs, size=256)},
+    )
+    (relationship,) = relationships
+    assert (relationship["to_table"], relationship["to_column"]) == (
+        "customers",
+        "ref",
+    )
+    assert relationship["containment"] == 1.0
+    assert relationship["evidence_score"] >= 0.9
+
+
+def test_dense_integer_target_needs_coverage():
+    schema = _schema(
+        {
+            ("orders", "qty"): "integer",
+            ("orders", "customer_id"): "integer",
+            ("customers", "id"): "integer",
+        }
+    )
+    target = {("customers", "id"): _sketch(range(1, 100_001), size=256)}
+    # Quantities 1..20 all exist as customer ids, but cover a sliver of them.
+    small = discover_relationships(
+        schema, {("orders", "qty"): _sketch(range(1, 21), size=256)}, target
+    )
+    assert small == []
+    # Customer ids spread over the whole range cover it well.
+    wide = discover_relationships(
+        schema,
+        {("orders", "customer_id"): _sketch(range(1, 100_001, 7), size=256)},
+        target,
+    )
+    assert [r["from_column"] for r in wide] == ["customer_id"]
+
+
+def test_incompatible_types_and_same_table_are_skipped():
+    schema = _schema(
+        {
+            ("orders", "ref"): "integer",
+            ("orders", "id"): "integer",
+            ("codes", "code"): "uuid",
+        }
+    )
+    values = range(10_000, 20_000)
+    assert (
+        discover_relationships(
+            schema,
+            {("orders", "ref"): _sketch(values)},
+            {("orders", "id"): _sketch(values), ("codes", "code"): _sketch(values)},
+        )
+        == []
+    )
+
+
+def test_equally_good_targets_are_ambiguous():
+    schema = _schema({("a", "ref"): "text", ("b", "key"): "text", ("c", "key"): "text"})
+    values = [f"v{n}" for n in range(3000)]
+    assert (
+        discover_relationships(
+            schema,
+            {("a", "ref"): _sketch(values[:1000])},
+            {("b", "key"): _sketch(values), ("c", "key"): _sketch(values)},
+        )
+        == []
+    )
+
+
+def test_merge_discovered():
+    inferred = [
+        {"from_table": "o", "from_column": "c_id", "to_table": "c", "to_column": "id"}
+    ]
+    discovered = [
+        {
+            "from_table": "o",
+            "from_column": "c_id",
+            "to_table": "c",
+            "to_column": "id",
+            "evidence_score": 0.97,
+            "containment": 1.0,
+        },
+        {
+            "from_table": "o",
+            "from_column": "ref",
+            "to_table": "r",
+            "to_column": "code",
+            "evidence_score": 0.9,
+            "containment": 0.99,
+        },
+    ]
+    merged = merge_discovered(inferred, discovered)
+    assert merged[0]["evidence_score"] == 0.97
+    assert merged[0]["containment"] == 1.0
+    assert merged[1] is discovered[1]
+    assert "evidence_score" not in inferred[0]